@@ -1,5 +1,7 @@
-"""Lifespan: webhook при старте и остановке."""
-from app.bot.main import bot, config, dp
+"""Lifespan: webhook, индексы MongoDB, S3-клиент и фоновые воркеры."""
+import logging
+
+from app.bot.main import bot, config, container, dp
 from app.settings.logger import setup_logging
 
 # Кэш username бота (для relay-чата при матчах без @username)
@@ -14,6 +16,82 @@ def start_logger():
     setup_logging()
 
 
+async def ensure_mongo_indexes():
+    """Сверяет индексы MongoDB с реестром. Ошибки не мешают старту приложения."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.infra.mongo_indexes import ensure_indexes
+
+    try:
+        client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
+        await ensure_indexes(client, config)
+    except Exception as e:
+        logging.getLogger(__name__).warning("Mongo index reconcile failed: %s", e)
+
+
+async def open_s3_client():
+    """Открывает общий S3-клиент заранее, чтобы первый запрос не ждал его создания."""
+    from app.infra.s3.base import BaseS3Storage
+
+    try:
+        open_client = getattr(container.resolve(BaseS3Storage), "open", None)
+        if open_client is not None:
+            await open_client()
+    except Exception as e:
+        logging.getLogger(__name__).warning("S3 client open failed: %s", e)
+
+
+async def close_s3_client():
+    from app.infra.s3.base import BaseS3Storage
+    from app.infra.s3.derivatives import ImageDerivativesPipeline
+
+    container.resolve(ImageDerivativesPipeline).close()
+    try:
+        close_client = getattr(container.resolve(BaseS3Storage), "close", None)
+        if close_client is not None:
+            await close_client()
+    except Exception as e:
+        logging.getLogger(__name__).warning("S3 client close failed: %s", e)
+
+
+def _background_workers() -> list:
+    from app.logic.workers.backfill import (
+        MatchesBackfillWorker,
+        NormalizedFieldsBackfillWorker,
+    )
+    from app.logic.workers.broadcasts import BroadcastWorker
+    from app.logic.workers.enrichment import ProfileEnrichmentWorker
+    from app.logic.workers.geocoding import GeocodingWorker
+    from app.logic.workers.media import MediaSweeperWorker
+    from app.logic.workers.notifications import NotificationDispatcherWorker
+    from app.logic.workers.presence import PresenceFlushWorker
+    from app.logic.workers.recommendations import FeedQueueWorker
+
+    return [
+        container.resolve(GeocodingWorker),
+        container.resolve(NormalizedFieldsBackfillWorker),
+        container.resolve(MatchesBackfillWorker),
+        container.resolve(FeedQueueWorker),
+        container.resolve(ProfileEnrichmentWorker),
+        container.resolve(PresenceFlushWorker),
+        container.resolve(MediaSweeperWorker),
+        container.resolve(NotificationDispatcherWorker),
+        container.resolve(BroadcastWorker),
+    ]
+
+
+async def start_background_workers():
+    for worker in _background_workers():
+        await worker.start()
+
+
+async def stop_background_workers():
+    for worker in _background_workers():
+        try:
+            await worker.stop()
+        except Exception as e:
+            logging.getLogger(__name__).warning("Failed to stop %s: %s", type(worker).__name__, e)
+
+
 async def set_bot_webhook():
     global _cached_bot_username
     await bot.set_webhook(
@@ -33,3 +111,12 @@ async def set_bot_webhook():
 
 async def delete_bot_webhook():
     await bot.delete_webhook()
+
+
+async def close_bot_session():
+    """Закрывает пул соединений общего Bot и FSM-хранилище — после остановки воркеров."""
+    try:
+        await bot.session.close()
+        await dp.storage.close()
+    except Exception as e:
+        logging.getLogger(__name__).warning("Bot session close failed: %s", e)
@@ -4,9 +4,15 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.application.api.lifespan import (
+    close_bot_session,
+    close_s3_client,
     delete_bot_webhook,
+    ensure_mongo_indexes,
+    open_s3_client,
     set_bot_webhook,
+    start_background_workers,
     start_logger,
+    stop_background_workers,
 )
 from app.application.api.v1.urls import router as v1_router
 
@@ -14,10 +20,16 @@ from app.application.api.v1.urls import router as v1_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     start_logger()
+    await ensure_mongo_indexes()
+    await open_s3_client()
+    await start_background_workers()
     await set_bot_webhook()
 
     yield
     await delete_bot_webhook()
+    await stop_background_workers()
+    await close_s3_client()
+    await close_bot_session()
 
 
 def create_app():
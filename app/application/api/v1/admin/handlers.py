@@ -70,8 +70,11 @@ async def admin_stats(container: Container = Depends(init_container)):
     new_week       = await users_col.count_documents({"created_at": {"$gte": week_ago}})
     new_month      = await users_col.count_documents({"created_at": {"$gte": month_ago}})
 
-    online_5min    = await users_col.count_documents({"last_seen": {"$gte": now - timedelta(minutes=5)}})
-    online_hour    = await users_col.count_documents({"last_seen": {"$gte": now - timedelta(hours=1)}})
+    # Онлайн — из трекера присутствия, без сканирования last_seen
+    from app.infra.presence import BasePresenceTracker
+    presence: BasePresenceTracker = container.resolve(BasePresenceTracker)
+    online_5min    = await presence.count_online(5 * 60)
+    online_hour    = await presence.count_online(3600)
 
     premium_count  = await users_col.count_documents({"premium_type": "premium", "premium_until": {"$gt": now}})
     vip_count      = await users_col.count_documents({"premium_type": "vip", "premium_until": {"$gt": now}})
@@ -80,8 +83,8 @@ async def admin_stats(container: Container = Depends(init_container)):
     matches_count  = await likes_col.count_documents({"is_match": True})
     likes_today    = await likes_col.count_documents({"created_at": {"$gte": day_ago}})
 
-    male_count   = await users_col.count_documents({"gender": {"$in": ["Man", "man", "Male", "male", "Мужской", "мужской"]}})
-    female_count = await users_col.count_documents({"gender": {"$in": ["Female", "female", "Woman", "woman", "Женский", "женский"]}})
+    male_count   = await users_col.count_documents({"gender_norm": "male"})
+    female_count = await users_col.count_documents({"gender_norm": "female"})
 
     return {
         "users": {
@@ -109,6 +112,28 @@ async def admin_stats(container: Container = Depends(init_container)):
     }
 
 
+@router.get("/notifications", dependencies=[Depends(_check_admin)])
+async def admin_notifications(container: Container = Depends(init_container)):
+    """Очередь уведомлений бота: глубина по видам, возраст старейшей записи и счётчики диспетчера."""
+    from dataclasses import asdict
+    from app.infra.repositories.base import BaseNotificationOutboxRepository
+    from app.logic.workers.notifications import NotificationDispatcherWorker
+
+    outbox: BaseNotificationOutboxRepository = container.resolve(BaseNotificationOutboxRepository)
+    dispatcher: NotificationDispatcherWorker = container.resolve(NotificationDispatcherWorker)
+    queue = await outbox.stats()
+    return {
+        "queue": {
+            "depth": queue.depth,
+            "pending": queue.pending,
+            "sending": queue.sending,
+            "oldest_seconds": round(queue.oldest_seconds, 1),
+        },
+        # Счётчики этого процесса с момента запуска
+        "dispatcher": {"running": dispatcher.is_running, **asdict(dispatcher.stats)},
+    }
+
+
 # ── Пользователи ───────────────────────────────────────────────────────────────
 
 @router.get("/users", dependencies=[Depends(_check_admin)])
@@ -141,9 +166,7 @@ async def admin_list_users(
             query["$or"].append({"telegram_id": int(search)})
 
     if gender in ("Man", "Female"):
-        _ALL_MALE   = ["Man", "man", "Male", "male", "Мужской", "мужской"]
-        _ALL_FEMALE = ["Female", "female", "Женский", "женский", "Woman", "woman"]
-        query["gender"] = {"$in": _ALL_MALE if gender == "Man" else _ALL_FEMALE}
+        query["gender_norm"] = "male" if gender == "Man" else "female"
 
     if premium == "premium":
         query["premium_type"] = "premium"
@@ -214,18 +237,16 @@ async def admin_get_user(user_id: int, container: Container = Depends(init_conta
 @router.put("/users/{user_id}/ban", dependencies=[Depends(_check_admin)])
 async def admin_ban_user(user_id: int, body: BanRequest, container: Container = Depends(init_container)):
     """Забанить / разбанить пользователя."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
-    config: Config = container.resolve(Config)
-    col = client[config.mongodb_dating_database][config.mongodb_users_collection]
+    from app.infra.repositories.base import BaseUsersRepository
+    # Через репозиторий — чтобы очереди рекомендаций узнали о смене статуса
+    users_repository: BaseUsersRepository = container.resolve(BaseUsersRepository)
+    if not await users_repository.check_user_exist_by_telegram_id(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
 
     update = {"is_banned": body.ban, "is_active": not body.ban}
     if body.reason:
         update["ban_reason"] = body.reason
-
-    result = await col.update_one({"telegram_id": user_id}, {"$set": update})
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="User not found")
+    await users_repository.update_user_info_after_register(user_id, update)
 
     return {"ok": True, "banned": body.ban, "user_id": user_id}
 
@@ -277,14 +298,11 @@ async def admin_grant_premium(user_id: int, body: PremiumGrantRequest, container
 @router.put("/users/{user_id}/active", dependencies=[Depends(_check_admin)])
 async def admin_toggle_active(user_id: int, active: bool = True, container: Container = Depends(init_container)):
     """Активировать / деактивировать анкету."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
-    config: Config = container.resolve(Config)
-    col = client[config.mongodb_dating_database][config.mongodb_users_collection]
-
-    result = await col.update_one({"telegram_id": user_id}, {"$set": {"is_active": active}})
-    if result.matched_count == 0:
+    from app.infra.repositories.base import BaseUsersRepository
+    users_repository: BaseUsersRepository = container.resolve(BaseUsersRepository)
+    if not await users_repository.check_user_exist_by_telegram_id(user_id):
         raise HTTPException(status_code=404, detail="User not found")
+    await users_repository.update_user_info_after_register(user_id, {"is_active": active})
     return {"ok": True, "is_active": active}
 
 
@@ -353,8 +371,10 @@ async def admin_resolve_report(
     """Обработать репорт: ban/unban, hide_profile, delete, dismiss."""
     from bson import ObjectId
     from motor.motor_asyncio import AsyncIOMotorClient
+    from app.infra.repositories.base import BaseUsersRepository
     client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
     config: Config = container.resolve(Config)
+    users_repository: BaseUsersRepository = container.resolve(BaseUsersRepository)
     col = client[config.mongodb_dating_database]["reports"]
     users_col = client[config.mongodb_dating_database][config.mongodb_users_collection]
     likes_col = client[config.mongodb_dating_database][config.mongodb_likes_collection]
@@ -367,21 +387,17 @@ async def admin_resolve_report(
     target_id = doc.get("to_user")
     from_user = doc.get("from_user")
 
+    # Статус анкеты — через репозиторий, чтобы очереди рекомендаций его учли
     if body.action == "ban" and target_id:
-        await users_col.update_one(
-            {"telegram_id": target_id},
-            {"$set": {"is_banned": True, "is_active": False, "ban_reason": body.reason}},
+        await users_repository.update_user_info_after_register(
+            target_id,
+            {"is_banned": True, "is_active": False, "ban_reason": body.reason},
         )
     elif body.action == "unban" and target_id:
-        await users_col.update_one(
-            {"telegram_id": target_id},
-            {"$set": {"is_banned": False, "is_active": True}, "$unset": {"ban_reason": ""}},
-        )
+        await users_repository.update_user_info_after_register(target_id, {"is_banned": False, "is_active": True})
+        await users_col.update_one({"telegram_id": target_id}, {"$unset": {"ban_reason": ""}})
     elif body.action == "hide_profile" and target_id:
-        await users_col.update_one(
-            {"telegram_id": target_id},
-            {"$set": {"profile_hidden": True}},
-        )
+        await users_repository.update_user_info_after_register(target_id, {"profile_hidden": True})
     elif body.action == "delete" and target_id:
         await users_col.delete_one({"telegram_id": target_id})
         await likes_col.delete_many({"$or": [{"from_user": target_id}, {"to_user": target_id}]})
@@ -398,59 +414,94 @@ async def admin_resolve_report(
 
 @router.post("/broadcast", dependencies=[Depends(_check_admin)])
 async def admin_broadcast(body: BroadcastRequest, container: Container = Depends(init_container)):
-    """Массовая рассылка сообщений через Telegram бот."""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    from aiogram import Bot
+    """
+    Создаёт задание рассылки и сразу возвращает его id. Рассылает BroadcastWorker пачками
+    с лимитами Telegram; прогресс — GET /admin/broadcasts/{job_id}.
+    """
+    from app.infra.repositories.base import (
+        BaseBroadcastsRepository,
+        BaseUsersRepository,
+    )
+    from app.infra.repositories.broadcasts import (
+        BROADCAST_TARGETS,
+        BroadcastJob,
+    )
 
+    if body.target not in BROADCAST_TARGETS:
+        raise HTTPException(status_code=400, detail=f"Unknown target: {body.target}")
+    broadcasts: BaseBroadcastsRepository = container.resolve(BaseBroadcastsRepository)
+    users_repository: BaseUsersRepository = container.resolve(BaseUsersRepository)
+
+    job = await broadcasts.create(BroadcastJob(
+        text=body.text,
+        target=body.target,
+        photo=body.photo_url,
+        parse_mode=body.parse_mode,
+        total=await users_repository.count_broadcast_audience(body.target),
+    ))
+    logger.info(f"broadcast {job.id} created: target={job.target} total={job.total}")
+    return job.as_dict()
+
+
+@router.get("/broadcasts", dependencies=[Depends(_check_admin)])
+async def admin_list_broadcasts(limit: int = 20, container: Container = Depends(init_container)):
+    from app.infra.repositories.base import BaseBroadcastsRepository
+    broadcasts: BaseBroadcastsRepository = container.resolve(BaseBroadcastsRepository)
+    return {"items": [job.as_dict() for job in await broadcasts.list_recent(min(max(limit, 1), 100))]}
+
+
+@router.get("/broadcasts/{job_id}", dependencies=[Depends(_check_admin)])
+async def admin_broadcast_progress(job_id: str, container: Container = Depends(init_container)):
+    """Прогресс рассылки: отправлено, ошибки, заблокировавшие бота, доля от аудитории."""
+    from app.infra.repositories.base import BaseBroadcastsRepository
+    broadcasts: BaseBroadcastsRepository = container.resolve(BaseBroadcastsRepository)
+    job = await broadcasts.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return job.as_dict()
+
+
+@router.post("/broadcasts/{job_id}/{action}", dependencies=[Depends(_check_admin)])
+async def admin_broadcast_control(job_id: str, action: str, container: Container = Depends(init_container)):
+    """pause | resume | cancel. Пауза и отмена срабатывают со следующей пачки."""
+    from app.infra.repositories.base import BaseBroadcastsRepository
+    from app.infra.repositories.broadcasts import (
+        BROADCAST_CANCELLED,
+        BROADCAST_PAUSED,
+        BROADCAST_RUNNING,
+    )
+
+    transitions = {
+        "pause": (BROADCAST_PAUSED, (BROADCAST_RUNNING,)),
+        "resume": (BROADCAST_RUNNING, (BROADCAST_PAUSED,)),
+        "cancel": (BROADCAST_CANCELLED, (BROADCAST_RUNNING, BROADCAST_PAUSED)),
+    }
+    if action not in transitions:
+        raise HTTPException(status_code=404, detail="Unknown action")
+    broadcasts: BaseBroadcastsRepository = container.resolve(BaseBroadcastsRepository)
+    job = await broadcasts.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    status_to, expected = transitions[action]
+    if not await broadcasts.set_status(job_id, status_to, expected):
+        raise HTTPException(status_code=409, detail=f"Cannot {action} a broadcast in status {job.status}")
+    return (await broadcasts.get(job_id)).as_dict()
+
+
+# ── Индексы MongoDB ────────────────────────────────────────────────────────────
+
+@router.post("/indexes/reconcile", dependencies=[Depends(_check_admin)])
+async def admin_reconcile_indexes(
+    dry_run: bool = True,
+    drop_extra: bool = False,
+    rebuild: bool = False,
+    container: Container = Depends(init_container),
+):
+    """Сверка индексов с реестром. По умолчанию dry_run — только показывает diff."""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from app.infra.mongo_indexes import ensure_indexes
     client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
     config: Config = container.resolve(Config)
-    col = client[config.mongodb_dating_database][config.mongodb_users_collection]
-
-    now = datetime.now(timezone.utc)
-
-    # Формируем фильтр получателей
-    query: dict = {"is_banned": {"$ne": True}}
-    if body.target == "premium":
-        query["premium_type"] = "premium"
-        query["premium_until"] = {"$gt": now}
-    elif body.target == "vip":
-        query["premium_type"] = "vip"
-        query["premium_until"] = {"$gt": now}
-    elif body.target == "active_7d":
-        query["last_seen"] = {"$gte": now - timedelta(days=7)}
-    elif body.target == "no_premium":
-        query["$or"] = [
-            {"premium_type": None},
-            {"premium_type": {"$exists": False}},
-            {"premium_until": {"$lte": now}},
-        ]
 
-    cursor = col.find(query, {"telegram_id": 1})
-    user_ids = [doc["telegram_id"] async for doc in cursor]
-
-    bot = Bot(token=config.token)
-    sent = 0
-    failed = 0
-
-    for uid in user_ids:
-        try:
-            if body.photo_url:
-                await bot.send_photo(
-                    chat_id=uid,
-                    photo=body.photo_url,
-                    caption=body.text,
-                    parse_mode=body.parse_mode,
-                )
-            else:
-                await bot.send_message(
-                    chat_id=uid,
-                    text=body.text,
-                    parse_mode=body.parse_mode,
-                )
-            sent += 1
-        except Exception as e:
-            logger.warning(f"broadcast: failed to send to {uid}: {e}")
-            failed += 1
-
-    await bot.session.close()
-    return {"sent": sent, "failed": failed, "total": len(user_ids)}
+    report = await ensure_indexes(client, config, dry_run=dry_run, drop_extra=drop_extra, rebuild=rebuild)
+    return {"dry_run": dry_run, **report.as_dict()}
@@ -312,7 +312,8 @@ async def generate_icebreaker(
             photo_base64 = None
             photo = getattr(target, "photo", None)
             if photo:
-                photo_url = f"{config.url_webhook}/api/v1/users/{target.telegram_id}/photo"
+                # Карточка вместо оригинала: vision-запрос легче на порядок
+                photo_url = f"{config.url_webhook}/api/v1/users/{target.telegram_id}/photo?variant=card"
                 photo_base64 = await _fetch_photo_base64(photo_url)
 
             variants = await _generate_with_openai(
@@ -709,6 +710,7 @@ class MatchmakingRequest(BaseModel):
     message: str
     conversation: list[dict] = []   # [{"role": "user"|"assistant", "content": str}]
     shown_ids: list[int] = []       # ID анкет, уже показанных пользователю
+    resolve_media: bool = False     # Прямые ссылки на фото вместо /users/{id}/photo/{i}
 
 
 class MatchmakingResponse(BaseModel):
@@ -773,14 +775,16 @@ async def ai_matchmaking(
     msg_lower = data.message.lower().strip()
     is_next_request = any(kw in msg_lower for kw in NEXT_KEYWORDS)
 
-    from app.logic.services.base import BaseLikesService as _BaseLikesService
-    likes_service: _BaseLikesService = container.resolve(_BaseLikesService)
+    from app.infra.repositories.base import BaseSeenProfilesRepository
+    from app.infra.repositories.seen import SortedIdSet
+    seen_repo: BaseSeenProfilesRepository = container.resolve(BaseSeenProfilesRepository)
     try:
-        liked_ids = list(set(await likes_service.get_telegram_id_liked_from(user_id=data.user_id)))
+        liked_ids = (await seen_repo.get_seen(data.user_id)).liked
     except Exception:
-        liked_ids = []
+        liked_ids = SortedIdSet()
 
-    exclude_ids = list(set(liked_ids + shown_ids if is_next_request else liked_ids))
+    # Лайкнутые отсеиваются по компактному множеству, в $nin уходят только показанные в чате
+    exclude_ids = shown_ids if is_next_request else []
 
     current_gender = None
     if current_user.gender:
@@ -805,6 +809,7 @@ async def ai_matchmaking(
         exclude_ids=exclude_ids,
         city_include_neighbors=False,
         limit=300,
+        seen=liked_ids,
     )
 
     if not candidates and parsed.city:
@@ -815,6 +820,7 @@ async def ai_matchmaking(
             exclude_ids=exclude_ids,
             city_include_neighbors=True,
             limit=300,
+            seen=liked_ids,
         )
         if candidates:
             reply = f"По {parsed.city} никого не нашла. Показываю из ближайших городов."
@@ -834,7 +840,7 @@ async def ai_matchmaking(
                 repository=service.user_repository,
                 telegram_id=data.user_id,
                 parsed_query=relaxed,
-                exclude_ids=liked_ids,
+                seen=liked_ids,
                 city_include_neighbors=False,
                 limit=100,
             )
@@ -863,7 +869,7 @@ async def ai_matchmaking(
             repository=service.user_repository,
             telegram_id=data.user_id,
             parsed_query=relaxed,
-            exclude_ids=liked_ids,
+            seen=liked_ids,
             city_include_neighbors=False,
             limit=100,
         )
@@ -887,10 +893,11 @@ async def ai_matchmaking(
     batch = filtered[:3]
     has_more = len(filtered) > 3
 
-    from app.application.api.v1.users.schemas import UserDetailSchema as _UDS
+    from app.application.api.v1.users.media import user_detail_items
+    details = await user_detail_items([user for user, _, _ in batch], container, resolve=data.resolve_media)
     matches_out = []
-    for user, _score, reasons in batch:
-        d = _UDS.from_entity(user).model_dump()
+    for detail, (_user, _score, reasons) in zip(details, batch):
+        d = detail.model_dump()
         d["reasons"] = reasons
         matches_out.append(d)
 
@@ -10,6 +10,7 @@ from fastapi import (
 from punq import Container
 
 from app.application.api.schemas import ErrorSchema
+from app.application.api.v1.users.filters import GetLikesListFilters
 from app.application.api.v1.likes.schemas import (
     CreateLikeRequestSchema,
     CreateLikeResponseSchema,
@@ -61,34 +62,38 @@ async def get_bot_username(
 @router.get(
     "/matches/{user_id}",
     status_code=status.HTTP_200_OK,
-    description="Get mutual matches for user (no premium required).",
+    description="Get one page of mutual matches for user, newest first (no premium required). "
+                "Pass next_cursor from the previous response to get the next page.",
 )
 async def get_matches(
     user_id: int,
+    filters: GetLikesListFilters = Depends(),
     container: Container = Depends(init_container),
 ):
-    """Возвращает список взаимных матчей (mutual likes) — доступно всем пользователям."""
+    """Возвращает страницу взаимных матчей (mutual likes) — доступно всем пользователям."""
     service: BaseLikesService = container.resolve(BaseLikesService)
     users_service: BaseUsersService = container.resolve(BaseUsersService)
     config: Config = container.resolve(Config)
 
     try:
-        liked_by_me = set(await service.get_telegram_id_liked_from(user_id=user_id))
-        liked_me = set(await service.get_users_ids_liked_by(user_id=user_id))
-        mutual_ids = list(liked_by_me & liked_me)
-        users = await users_service.get_users_liked_from(users_list=mutual_ids)
+        mutual_ids, next_cursor = await service.get_matches_page(
+            user_id=user_id,
+            filters=filters.to_infra(),
+        )
+        users = await users_service.get_users_by_ids(mutual_ids)
     except ApplicationException as exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"error": exception.message},
         )
 
-    from app.application.api.v1.users.schemas import UserDetailSchema
+    from app.application.api.v1.users.media import user_detail_items
     from app.application.api.lifespan import get_bot_username
     bot_username = config.bot_username or get_bot_username()
     return {
-        "items": [UserDetailSchema.from_entity(u) for u in users],
+        "items": await user_detail_items(users, container, resolve=filters.resolve_media),
         "bot_username": bot_username,
+        "next_cursor": next_cursor,
     }
 
 
@@ -19,8 +19,9 @@ class MeLikeRequestSchema(BaseModel):
 
 class MeDislikeRequestSchema(BaseModel):
     to_user: int
+from app.application.api.v1.users.filters import GetLikesListFilters, GetUsersFeedFilters
 from app.application.api.v1.users.handlers import get_users_best_result
-from app.application.api.v1.users.schemas import GetUsersFromResponseSchema
+from app.application.api.v1.users.schemas import GetUsersFeedResponseSchema
 from app.domain.exceptions.base import ApplicationException
 from app.logic.init import init_container
 from app.logic.services.base import BaseLikesService, BaseUsersService
@@ -30,38 +31,42 @@ from app.settings.config import Config
 router = APIRouter(prefix="/me", tags=["Me"])
 
 
-@router.get("/best_result", response_model=GetUsersFromResponseSchema)
+@router.get("/best_result", response_model=GetUsersFeedResponseSchema)
 async def me_best_result(
+    filters: GetUsersFeedFilters = Depends(),
     telegram_id: int = Depends(get_current_user),
     container: Container = Depends(init_container),
 ):
-    """Best result для текущего пользователя из сессии."""
-    return await get_users_best_result(user_id=telegram_id, container=container)
+    """Страница ленты для текущего пользователя из сессии (курсор — next_cursor)."""
+    return await get_users_best_result(user_id=telegram_id, filters=filters, container=container)
 
 
 @router.get("/matches")
 async def me_matches(
+    filters: GetLikesListFilters = Depends(),
     telegram_id: int = Depends(get_current_user),
     container: Container = Depends(init_container),
 ):
-    """Матчи текущего пользователя."""
+    """Страница матчей текущего пользователя (курсор — next_cursor)."""
     service: BaseLikesService = container.resolve(BaseLikesService)
     users_service: BaseUsersService = container.resolve(BaseUsersService)
     config: Config = container.resolve(Config)
     try:
-        liked_by_me = set(await service.get_telegram_id_liked_from(user_id=telegram_id))
-        liked_me = set(await service.get_users_ids_liked_by(user_id=telegram_id))
-        mutual_ids = list(liked_by_me & liked_me)
-        users = await users_service.get_users_liked_from(users_list=mutual_ids)
+        mutual_ids, next_cursor = await service.get_matches_page(
+            user_id=telegram_id,
+            filters=filters.to_infra(),
+        )
+        users = await users_service.get_users_by_ids(mutual_ids)
     except ApplicationException as exc:
         from fastapi import HTTPException
         raise HTTPException(status_code=400, detail={"error": exc.message})
-    from app.application.api.v1.users.schemas import UserDetailSchema
+    from app.application.api.v1.users.media import user_detail_items
     from app.application.api.lifespan import get_bot_username
     bot_username = config.bot_username or get_bot_username()
     return {
-        "items": [UserDetailSchema.from_entity(u) for u in users],
+        "items": await user_detail_items(users, container, resolve=filters.resolve_media),
         "bot_username": bot_username,
+        "next_cursor": next_cursor,
     }
 
 
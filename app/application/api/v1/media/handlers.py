@@ -0,0 +1,87 @@
+"""
+Неизменяемые медиа по ключу содержимого: media/{telegram_id}/{sha256}.{ext}.
+
+Объект под таким ключом никогда не меняется, поэтому ответ кэшируется браузером и CDN
+на год (immutable), а повторная проверка по ETag обходится без обращения к S3.
+Исключение — запрошенная производная не нашлась (ещё не загружена, S3 не ответил):
+исходник отдаётся с коротким max-age, чтобы кэши не закрепили его вместо производной.
+"""
+import logging
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Request,
+    status,
+)
+from fastapi.responses import Response
+from punq import Container
+
+from app.application.api.v1.users.media import (
+    pick_variant,
+    presigned_redirect,
+)
+from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.derivatives import expects_variant
+from app.infra.s3.keys import (
+    is_content_key,
+    is_video_key,
+    media_content_type,
+    media_etag,
+)
+from app.logic.init import init_container
+
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Исходник вместо недоступной производной: кэшируется ненадолго, без ETag
+FALLBACK_CACHE_CONTROL = "public, max-age=60"
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+
+@router.get(
+    "/{key:path}",
+    status_code=status.HTTP_200_OK,
+    description="Фото/видео анкеты по неизменяемому ключу (variant=thumb|card|full — уменьшенная копия).",
+    include_in_schema=False,
+)
+async def get_media(
+    key: str,
+    request: Request,
+    variant: Optional[str] = None,
+    container: Container = Depends(init_container),
+):
+    if not is_content_key(key):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+
+    storage: BaseS3Storage = container.resolve(BaseS3Storage)
+    # Видео — на presigned URL: Range-запросы плеера обслуживает само хранилище
+    if is_video_key(key):
+        return await presigned_redirect(storage, key)
+
+    # Какая производная отдаётся, зависит от Accept; наличие производных кэшируется пайплайном
+    s3_key = await pick_variant(container, request, key, variant)
+    if s3_key == key and expects_variant(key, variant):
+        headers = {"Cache-Control": FALLBACK_CACHE_CONTROL}
+    else:
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": media_etag(s3_key)}
+    if variant:
+        headers["Vary"] = "Accept"
+    if "ETag" in headers and _etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    try:
+        body = await storage.download_file(s3_key)
+    except Exception as e:
+        logger.warning("Media download failed for %s: %s", s3_key, e)
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Media not found")
+    return Response(content=body, media_type=media_content_type(s3_key), headers=headers)
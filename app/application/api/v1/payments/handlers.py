@@ -161,9 +161,7 @@ async def _pay_referral_bonus(container: Container, telegram_id: int, amount: fl
             from aiogram import Bot
             from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
-            _container = init_container()
-            _cfg: Config = _container.resolve(Config)
-            _bot = Bot(token=_cfg.token)
+            _bot: Bot = container.resolve(Bot)
 
             withdraw_text = "Здравствуйте, я хотел бы запросить вывод средств по реферальной системе LsJ_Love"
             withdraw_url = f"https://t.me/babymaxx?text={_urlparse.quote(withdraw_text)}"
@@ -182,7 +180,6 @@ async def _pay_referral_bonus(container: Container, telegram_id: int, amount: fl
                 parse_mode="HTML",
                 reply_markup=kb,
             )
-            await _bot.session.close()
         except Exception as e:
             logger.warning(f"Referral notify failed: {e}")
 
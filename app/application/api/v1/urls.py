@@ -6,6 +6,7 @@ from app.application.api.v1.me.handlers import router as me_router
 from app.application.api.v1.ai.handlers import router as ai_router
 from app.application.api.v1.gamification.handlers import router as gamification_router
 from app.application.api.v1.likes.handlers import router as likes_router
+from app.application.api.v1.media.handlers import router as media_router
 from app.application.api.v1.payments.handlers import router as payments_router
 from app.application.api.v1.photo_interactions.handlers import router as photo_interactions_router
 from app.application.api.v1.geocode.handlers import router as geocode_router
@@ -20,6 +21,7 @@ router = APIRouter(
 router.include_router(auth_router)
 router.include_router(me_router)
 router.include_router(users_router)
+router.include_router(media_router)
 router.include_router(geocode_router)
 router.include_router(likes_router)
 router.include_router(telegram_webhook_router)
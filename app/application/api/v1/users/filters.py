@@ -1,6 +1,10 @@
 from pydantic import BaseModel
 
-from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.filters.likes import GetLikesFilters
+from app.infra.repositories.filters.users import (
+    GetAllUsersFilters,
+    GetFeedFilters,
+)
 
 
 class GetUsersFilters(BaseModel):
@@ -12,3 +16,29 @@ class GetUsersFilters(BaseModel):
             limit=self.limit,
             offset=self.offset,
         )
+
+
+class GetUsersFeedFilters(BaseModel):
+    limit: int = 20
+    cursor: str | None = None
+    # Встроить прямые ссылки на фото вместо /users/{id}/photo/{i}
+    resolve_media: bool = False
+
+    def to_infra(self):
+        return GetFeedFilters(
+            limit=self.limit,
+            cursor=self.cursor,
+        )
+
+
+class GetLikesListFilters(BaseModel):
+    limit: int = 50
+    cursor: str | None = None
+    # Встроить прямые ссылки на фото вместо /users/{id}/photo/{i}
+    resolve_media: bool = False
+
+    def to_infra(self):
+        return GetLikesFilters(
+            limit=self.limit,
+            cursor=self.cursor,
+        )
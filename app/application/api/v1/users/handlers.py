@@ -1,13 +1,19 @@
 import aiohttp
 import base64
-from datetime import datetime, timezone
-from typing import Optional
+import hashlib
+import uuid
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Optional,
+)
 
 from fastapi import (
     Depends,
     File,
     Form,
     HTTPException,
+    Request,
     UploadFile,
     status,
 )
@@ -67,14 +73,40 @@ async def _stream_url(url: str) -> bytes:
             if r.status != 200:
                 raise ValueError(f"HTTP {r.status} from {url[:80]}")
             return await r.read()
-from app.application.api.v1.users.filters import GetUsersFilters
+from app.application.api.v1.users.filters import (
+    GetLikesListFilters,
+    GetUsersFeedFilters,
+    GetUsersFilters,
+)
+from app.application.api.v1.users.media import (
+    pick_variant,
+    presigned_redirect,
+    user_detail_items,
+)
 from app.application.api.v1.users.schemas import (
-    GetUsersFromResponseSchema,
+    GetUsersFeedResponseSchema,
+    GetUsersLikesResponseSchema,
     GetUsersResponseSchema,
     UserDetailSchema,
+    media_url,
+    photo_url,
 )
 from app.domain.exceptions.base import ApplicationException
-from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.base import (
+    BaseS3Storage,
+    UploadTooLargeError,
+)
+from app.infra.s3.derivatives import (
+    ImageDerivativesPipeline,
+    is_derivable,
+)
+from app.infra.s3.keys import (
+    UPLOADS_PREFIX,
+    content_hash,
+    content_key,
+    is_content_key,
+    media_content_type,
+)
 from app.logic.init import init_container
 from app.logic.services.base import (
     BaseLikesService,
@@ -96,6 +128,10 @@ _EXT_MAP = {
 }
 
 
+# Сколько байт за раз читать из UploadFile (сам файл starlette держит на диске)
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
 class AddPhotoRequest(BaseModel):
     image_base64: str       # Raw base64 without data: prefix
     media_type: str = "image/jpeg"  # MIME type of the file
@@ -159,21 +195,20 @@ async def get_all_users_handler(
     )
 
 
+def _content_key_redirect(s3_key: str, variant: str | None) -> RedirectResponse:
+    """
+    Неизменяемый ключ — 302 на /media/{key}: там ответ кэшируется бессрочно. Сам редирект
+    кэшируется ненадолго: photos[i] меняется при замене фото.
+    """
+    headers = {"Cache-Control": "public, max-age=60"}
+    return RedirectResponse(url=media_url(s3_key, variant), status_code=302, headers=headers)
+
+
 async def _serve_photo_from_s3(s3_key: str, uploader: BaseS3Storage):
     """Возвращает фото из S3 через presigned URL."""
     try:
-        url = await uploader.upload_file.__func__  # Получаем presigned URL
-    except Exception:
-        pass
-    # Генерируем presigned URL через get_client напрямую
-    try:
-        async with uploader.get_client() as client:
-            url = await client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": uploader.bucket_name, "Key": s3_key},
-                ExpiresIn=3600,
-            )
-            return RedirectResponse(url=url)
+        url = await uploader.get_presigned_url(s3_key, expires=3600)
+        return RedirectResponse(url=url)
     except Exception:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found in S3")
 
@@ -186,9 +221,11 @@ async def _serve_photo_from_s3(s3_key: str, uploader: BaseS3Storage):
 async def get_user_photo_by_index(
     user_id: int,
     index: int,
+    request: Request,
+    variant: Optional[str] = None,
     container: Container = Depends(init_container),
 ):
-    """Возвращает фото пользователя по индексу из массива photos[]."""
+    """Возвращает фото пользователя по индексу из массива photos[] (variant — уменьшенная копия)."""
     service: BaseUsersService = container.resolve(BaseUsersService)
     uploader: BaseS3Storage = container.resolve(BaseS3Storage)
 
@@ -206,12 +243,14 @@ async def get_user_photo_by_index(
     if s3_key.startswith("http"):
         return RedirectResponse(url=s3_key, status_code=302, headers={"Cache-Control": "public, max-age=3600"})
 
+    if is_content_key(s3_key):
+        return _content_key_redirect(s3_key, variant)
+
     # S3 ключ — генерируем presigned URL и редиректим (браузер скачает из S3 напрямую)
     # Это работает: <img> теги не блокирует CORS, браузер скачает файл без проблем
+    s3_key = await pick_variant(container, request, s3_key, variant)
     try:
-        presigned_url = await uploader.get_presigned_url(s3_key, expires=3600)
-        return RedirectResponse(url=presigned_url, status_code=302,
-                                headers={"Cache-Control": "public, max-age=3500"})
+        return await presigned_redirect(uploader, s3_key, vary=bool(variant))
     except Exception as e:
         _photo_logger.error(f"presigned URL failed for key={s3_key}: {e}")
 
@@ -237,61 +276,59 @@ async def get_user_photo_by_index(
 )
 async def get_user_photo(
     user_id: int,
+    request: Request,
+    variant: Optional[str] = None,
     container: Container = Depends(init_container),
 ):
     service: BaseUsersService = container.resolve(BaseUsersService)
-    config: Config = container.resolve(Config)
     uploader: BaseS3Storage = container.resolve(BaseS3Storage)
 
-    try:
-        user = await service.get_user(telegram_id=user_id)
-    except ApplicationException:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    user_name = str(getattr(user, "name", user_id) or user_id)
-
-    # 1) photos[] — S3 ключи или URL-ы → redirect (браузер скачает напрямую из S3)
-    photos = getattr(user, "photos", []) or []
+    # 1) photos[] — S3 ключи или URL-ы → redirect (браузер скачает напрямую из S3).
+    # photos[] и presigned URL кэшируются в процессе: горячий путь обходится без I/O
+    photos = await service.get_photos(telegram_id=user_id)
     if photos:
         s3_key = photos[0]
         if s3_key.startswith("http"):
             # Уже полный URL — редиректим
             return RedirectResponse(url=s3_key, status_code=302)
+        elif is_content_key(s3_key):
+            return _content_key_redirect(s3_key, variant)
         else:
             # S3 ключ → presigned URL redirect
+            s3_key = await pick_variant(container, request, s3_key, variant)
             try:
-                presigned_url = await uploader.get_presigned_url(s3_key, expires=3600)
-                return RedirectResponse(url=presigned_url, status_code=302,
-                                        headers={"Cache-Control": "public, max-age=3500"})
+                return await presigned_redirect(uploader, s3_key, vary=bool(variant))
             except Exception as e:
                 _photo_logger.error(f"presigned URL failed for key={s3_key}: {e}")
                 # Последняя попытка — server-side stream
                 try:
                     body = await _stream_s3(uploader, s3_key)
-                    return StreamingResponse(iter([body]), media_type="image/jpeg", headers=_CORS_HEADERS)
+                    media_type = "image/webp" if s3_key.endswith(".webp") else "image/jpeg"
+                    return StreamingResponse(iter([body]), media_type=media_type, headers=_CORS_HEADERS)
                 except Exception:
                     pass
 
+    try:
+        user = await service.get_user(telegram_id=user_id)
+    except ApplicationException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    user_name = str(getattr(user, "name", user_id) or user_id)
+
     # 2) Фолбэк: legacy photo (HTTP URL или Telegram file_id)
     photo = getattr(user, "photo", None)
     if photo:
         if photo.startswith("http"):
             return RedirectResponse(url=photo, status_code=302)
         else:
-            # Telegram file_id → скачиваем через Bot API на сервере
+            # Telegram file_id → скачиваем через общий Bot (его пул соединений)
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(
-                        f"https://api.telegram.org/bot{config.token}/getFile",
-                        params={"file_id": photo},
-                        timeout=aiohttp.ClientTimeout(total=8),
-                    ) as resp:
-                        data = await resp.json()
-                    if data.get("ok"):
-                        file_path = data["result"]["file_path"]
-                        file_url = f"https://api.telegram.org/file/bot{config.token}/{file_path}"
-                        body = await _stream_url(file_url)
-                        return StreamingResponse(iter([body]), media_type="image/jpeg", headers=_CORS_HEADERS)
+                from aiogram import Bot
+                bot: Bot = container.resolve(Bot)
+                file = await bot.get_file(photo, request_timeout=8)
+                if file.file_path:
+                    body = await bot.download_file(file.file_path, timeout=15)
+                    return StreamingResponse(iter([body.read()]), media_type="image/jpeg", headers=_CORS_HEADERS)
             except Exception:
                 pass
 
@@ -299,80 +336,152 @@ async def get_user_photo(
     return _svg_avatar(user_name, user_id)
 
 
-@router.post(
-    "/{user_id}/photos",
-    status_code=status.HTTP_200_OK,
-)
-async def add_user_photo(
-    user_id: int,
-    body: AddPhotoRequest,
-    container: Container = Depends(init_container),
-) -> PhotosResponse:
-    """Загружает новое фото в S3 и добавляет в массив photos[] пользователя."""
-    service: BaseUsersService = container.resolve(BaseUsersService)
-    uploader: BaseS3Storage = container.resolve(BaseS3Storage)
-
-    # Проверяем существование пользователя
+async def _media_target_index(service: BaseUsersService, user_id: int, replace_index: int | None) -> int:
+    """Индекс в photos[] для загружаемого файла: replace_index или следующий свободный."""
     try:
         user = await service.get_user(telegram_id=user_id)
     except ApplicationException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     current_photos = getattr(user, "photos", []) or []
-    ext = _EXT_MAP.get(body.media_type, "jpg")
-    is_replace = body.replace_index is not None
-
-    if is_replace:
-        idx = body.replace_index
-        if idx < 0 or idx >= len(current_photos):
+    if replace_index is not None:
+        if replace_index < 0 or replace_index >= len(current_photos):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail={"error": "Неверный индекс для замены"},
             )
-    else:
-        if len(current_photos) >= 6:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"error": "Максимум 6 фото/видео"},
-            )
-        idx = len(current_photos)
-
-    # Декодируем base64
-    try:
-        file_bytes = base64.b64decode(body.image_base64)
-    except Exception:
+        return replace_index
+    if len(current_photos) >= 6:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": "Неверный формат base64"},
+            detail={"error": "Максимум 6 фото/видео"},
         )
+    return len(current_photos)
+
+
+def _upload_limit(config: Config, media_type: str) -> int:
+    if media_type.startswith("video/"):
+        return config.max_video_upload_mb * 1024 * 1024
+    return config.max_image_upload_mb * 1024 * 1024
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail={"error": f"Файл больше {max_bytes // (1024 * 1024)} МБ"},
+    )
+
+
+async def _read_limited(chunks: AsyncIterable[bytes], max_bytes: int) -> bytes:
+    """Собирает поток в память, обрывая чтение на превышении max_bytes."""
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise UploadTooLargeError(max_bytes)
+    return bytes(buffer)
+
+
+async def _upload_file_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(_UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
+async def _store_image(container: Container, uploader: BaseS3Storage, s3_key: str, file_bytes: bytes) -> None:
+    """Производные, модерация по уменьшенной копии и загрузка изображения с производными."""
+    # Производные (thumb/card/full, WebP + JPEG) — в пуле процессов
+    pipeline: ImageDerivativesPipeline = container.resolve(ImageDerivativesPipeline)
+    derivatives = await pipeline.render(file_bytes) if is_derivable(s3_key) else {}
+
+    # Модерация: проверяем фото на 18+
+    try:
+        from app.bot.utils.moderation import check_image_safe
+        config: Config = container.resolve(Config)
+        # Vision хватает карточки — оригинал в разы тяжелее
+        check_bytes = derivatives.get(("card", "jpg"), file_bytes)
+        is_safe, reason = await check_image_safe(check_bytes, config.openai_api_key)
+        if not is_safe:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"error": reason},
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        _photo_logger.warning(f"Moderation check failed: {e}")
+
+    await uploader.upload_file(file=file_bytes, file_name=s3_key, content_type=media_content_type(s3_key))
+    await pipeline.store(s3_key, derivatives)
 
-    # Модерация: проверяем фото на 18+ (только для изображений, не для видео)
-    if not body.media_type.startswith("video/"):
+
+async def _store_video(uploader: BaseS3Storage, user_id: int, ext: str, chunks, max_bytes: int) -> str:
+    """
+    Видео уходит в S3 multipart-частями без буферизации целиком. Хэш содержимого известен
+    только в конце потока, поэтому загрузка идёт во временный ключ и копируется в постоянный.
+    """
+    digest = hashlib.sha256()
+
+    async def hashed():
+        async for chunk in chunks:
+            digest.update(chunk)
+            yield chunk
+
+    temp_key = f"{UPLOADS_PREFIX}{uuid.uuid4().hex}.{ext}"
+    await uploader.upload_stream(hashed(), temp_key, content_type=media_content_type(temp_key), max_bytes=max_bytes)
+    s3_key = content_key(user_id, digest.hexdigest(), ext)
+    try:
+        await uploader.copy_file(temp_key, s3_key)
+    finally:
+        # Не удалилось — уберёт MediaSweeperWorker
         try:
-            from app.bot.utils.moderation import check_image_safe
-            config: Config = container.resolve(Config)
-            is_safe, reason = await check_image_safe(file_bytes, config.openai_api_key)
-            if not is_safe:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail={"error": reason},
-                )
-        except HTTPException:
-            raise
+            await uploader.delete_files([temp_key])
         except Exception as e:
-            import logging as _log
-            _log.getLogger(__name__).warning(f"Moderation check failed: {e}")
+            _photo_logger.warning(f"Failed to delete temp upload {temp_key}: {e}")
+    return s3_key
+
 
-    # Загружаем в S3
-    s3_key = f"{user_id}_{idx}.{ext}"
+async def _store_media_stream(
+    container: Container,
+    user_id: int,
+    media_type: str,
+    chunks: AsyncIterable[bytes],
+) -> str:
+    """
+    Загружает файл из потока и возвращает его неизменяемый S3-ключ (по хэшу содержимого).
+    Изображение (до max_image_upload_mb) читается в память — из него строятся производные
+    и копия для модерации.
+    """
+    uploader: BaseS3Storage = container.resolve(BaseS3Storage)
+    max_bytes = _upload_limit(container.resolve(Config), media_type)
+    ext = _EXT_MAP.get(media_type, "jpg")
     try:
-        await uploader.upload_file(file=file_bytes, file_name=s3_key)
+        if media_type.startswith("video/"):
+            s3_key = await _store_video(uploader, user_id, ext, chunks, max_bytes)
+        else:
+            file_bytes = await _read_limited(chunks, max_bytes)
+            s3_key = content_key(user_id, content_hash(file_bytes), ext)
+            await _store_image(container, uploader, s3_key, file_bytes)
+    except UploadTooLargeError as e:
+        raise _too_large(e.max_bytes)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={"error": f"Ошибка загрузки в S3: {str(e)}"},
         )
+    return s3_key
 
+
+async def _save_media(
+    container: Container,
+    user_id: int,
+    idx: int,
+    is_replace: bool,
+    s3_key: str,
+) -> PhotosResponse:
+    """Записывает загруженный файл в photos[] пользователя."""
+    service: BaseUsersService = container.resolve(BaseUsersService)
     if is_replace:
         # Удаляем лайки старого фото перед заменой
         try:
@@ -380,11 +489,9 @@ async def add_user_photo(
             likes_repo: MongoDBPhotoLikesRepository = container.resolve(MongoDBPhotoLikesRepository)
             deleted = await likes_repo.delete_likes_for_photo(owner_id=user_id, photo_index=idx)
             if deleted:
-                import logging as _log
-                _log.getLogger(__name__).info(f"Cleared {deleted} likes for photo {user_id}[{idx}] on replace")
+                _photo_logger.info(f"Cleared {deleted} likes for photo {user_id}[{idx}] on replace")
         except Exception as e:
-            import logging as _log
-            _log.getLogger(__name__).warning(f"Failed to clear photo likes on replace: {e}")
+            _photo_logger.warning(f"Failed to clear photo likes on replace: {e}")
         photos = await service.replace_photo(telegram_id=user_id, index=idx, s3_key=s3_key)
     else:
         photos = await service.add_photo(telegram_id=user_id, s3_key=s3_key)
@@ -395,8 +502,42 @@ async def add_user_photo(
                 data={"photo": s3_key},
             )
 
-    photos_urls = [f"/api/v1/users/{user_id}/photo/{i}" for i in range(len(photos))]
-    return PhotosResponse(photos=photos_urls)
+    return PhotosResponse(photos=[photo_url(user_id, i, key) for i, key in enumerate(photos)])
+
+
+@router.post(
+    "/{user_id}/photos",
+    status_code=status.HTTP_200_OK,
+    description="Загрузка фото/видео в base64 (устаревший путь: используйте /photos/stream).",
+)
+async def add_user_photo(
+    user_id: int,
+    body: AddPhotoRequest,
+    container: Container = Depends(init_container),
+) -> PhotosResponse:
+    """Загружает новое фото в S3 и добавляет в массив photos[] пользователя."""
+    service: BaseUsersService = container.resolve(BaseUsersService)
+    idx = await _media_target_index(service, user_id, body.replace_index)
+
+    # Размер проверяем до декодирования: base64 длиннее файла на треть
+    max_bytes = _upload_limit(container.resolve(Config), body.media_type)
+    if len(body.image_base64) * 3 // 4 > max_bytes:
+        raise _too_large(max_bytes)
+
+    # Декодируем base64
+    try:
+        file_bytes = base64.b64decode(body.image_base64)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"error": "Неверный формат base64"},
+        )
+
+    async def chunks():
+        yield file_bytes
+
+    s3_key = await _store_media_stream(container, user_id, body.media_type, chunks())
+    return await _save_media(container, user_id, idx, body.replace_index is not None, s3_key)
 
 
 @router.post(
@@ -410,95 +551,39 @@ async def upload_user_media_multipart(
     replace_index: Optional[int] = Form(None),
     container: Container = Depends(init_container),
 ) -> PhotosResponse:
-    """Принимает файл через multipart/form-data. Поддерживает видео до 60 МБ."""
+    """Принимает файл через multipart/form-data. Видео уходит в S3 частями, не читаясь целиком."""
     service: BaseUsersService = container.resolve(BaseUsersService)
-    uploader: BaseS3Storage = container.resolve(BaseS3Storage)
-
-    try:
-        user = await service.get_user(telegram_id=user_id)
-    except ApplicationException:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-
-    current_photos = getattr(user, "photos", []) or []
+    idx = await _media_target_index(service, user_id, replace_index)
     media_type = file.content_type or "application/octet-stream"
-    ext = _EXT_MAP.get(media_type, "jpg")
 
-    is_replace = replace_index is not None
-    if is_replace:
-        idx = replace_index
-        if idx < 0 or idx >= len(current_photos):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"error": "Неверный индекс для замены"},
-            )
-    else:
-        if len(current_photos) >= 6:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"error": "Максимум 6 фото/видео"},
-            )
-        idx = len(current_photos)
+    s3_key = await _store_media_stream(container, user_id, media_type, _upload_file_chunks(file))
+    return await _save_media(container, user_id, idx, replace_index is not None, s3_key)
 
-    # Читаем файл
-    try:
-        file_bytes = await file.read()
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"error": f"Ошибка чтения файла: {str(e)}"},
-        )
 
-    # Модерация: проверяем изображение на 18+ (видео не проверяем)
-    if not media_type.startswith("video/"):
-        try:
-            from app.bot.utils.moderation import check_image_safe
-            config: Config = container.resolve(Config)
-            is_safe, reason = await check_image_safe(file_bytes, config.openai_api_key)
-            if not is_safe:
-                raise HTTPException(
-                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                    detail={"error": reason},
-                )
-        except HTTPException:
-            raise
-        except Exception as e:
-            import logging as _log
-            _log.getLogger(__name__).warning(f"Moderation check failed: {e}")
-
-    # Загружаем в S3 (multipart endpoint)
-    s3_key = f"{user_id}_{idx}.{ext}"
-    _mime_map2 = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png",
-                  "webp": "image/webp", "gif": "image/gif",
-                  "mp4": "video/mp4", "mov": "video/quicktime", "webm": "video/webm"}
-    ct_upload2 = _mime_map2.get(ext, "image/jpeg")
-    try:
-        await uploader.upload_file(file=file_bytes, file_name=s3_key, content_type=ct_upload2)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail={"error": f"Ошибка загрузки в S3: {str(e)}"},
-        )
+@router.put(
+    "/{user_id}/photos/stream",
+    status_code=status.HTTP_200_OK,
+    description="Потоковая загрузка фото/видео: тело запроса — сам файл, Content-Type — его MIME-тип. "
+                "Передаётся в S3 частями по мере чтения; лимит размера проверяется на лету.",
+)
+async def upload_user_media_stream(
+    user_id: int,
+    request: Request,
+    replace_index: Optional[int] = None,
+    container: Container = Depends(init_container),
+) -> PhotosResponse:
+    service: BaseUsersService = container.resolve(BaseUsersService)
+    media_type = request.headers.get("content-type", "application/octet-stream").split(";")[0].strip()
 
-    if is_replace:
-        # Удаляем лайки старого фото перед заменой
-        try:
-            from app.infra.repositories.mongo import MongoDBPhotoLikesRepository
-            likes_repo: MongoDBPhotoLikesRepository = container.resolve(MongoDBPhotoLikesRepository)
-            await likes_repo.delete_likes_for_photo(owner_id=user_id, photo_index=idx)
-        except Exception as e:
-            import logging as _log
-            _log.getLogger(__name__).warning(f"Failed to clear photo likes on multipart replace: {e}")
-        photos = await service.replace_photo(telegram_id=user_id, index=idx, s3_key=s3_key)
-    else:
-        photos = await service.add_photo(telegram_id=user_id, s3_key=s3_key)
-        if idx == 0:
-            await service.update_user_info_after_reg(
-                telegram_id=user_id,
-                data={"photo": s3_key},
-            )
+    # Заявленный размер больше лимита — отказ до чтения тела
+    max_bytes = _upload_limit(container.resolve(Config), media_type)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise _too_large(max_bytes)
 
-    photos_urls = [f"/api/v1/users/{user_id}/photo/{i}" for i in range(len(photos))]
-    return PhotosResponse(photos=photos_urls)
+    idx = await _media_target_index(service, user_id, replace_index)
+    s3_key = await _store_media_stream(container, user_id, media_type, request.stream())
+    return await _save_media(container, user_id, idx, replace_index is not None, s3_key)
 
 
 @router.delete(
@@ -528,8 +613,7 @@ async def delete_user_photo(
         _log.getLogger(__name__).warning(f"Failed to clear photo likes on delete: {e}")
 
     photos = await service.remove_photo(telegram_id=user_id, index=index)
-    photos_urls = [f"/api/v1/users/{user_id}/photo/{i}" for i in range(len(photos))]
-    return PhotosResponse(photos=photos_urls)
+    return PhotosResponse(photos=[photo_url(user_id, i, key) for i, key in enumerate(photos)])
 
 
 @router.get(
@@ -607,10 +691,11 @@ async def debug_photo(user_id: int, container: Container = Depends(init_containe
     include_in_schema=False,
 )
 async def migrate_user_coords(container: Container = Depends(init_container)):
-    """Миграция: добавляет lat/lon из CITY_COORDS для всех пользователей.
+    """Миграция: добавляет lat/lon из CITY_COORDS и GeoJSON location для всех пользователей.
     Вызвать один раз после деплоя."""
     from motor.motor_asyncio import AsyncIOMotorClient
     from app.infra.repositories.cities import get_city_coords
+    from app.infra.repositories.converters import convert_coords_to_geojson_point
     client: AsyncIOMotorClient = container.resolve(AsyncIOMotorClient)
     from app.settings.config import Config
     cfg: Config = container.resolve(Config)
@@ -629,7 +714,11 @@ async def migrate_user_coords(container: Container = Depends(init_container)):
         if coords:
             await col.update_one(
                 {"_id": doc["_id"]},
-                {"$set": {"lat": coords[0], "lon": coords[1]}},
+                {"$set": {
+                    "lat": coords[0],
+                    "lon": coords[1],
+                    "location": convert_coords_to_geojson_point(coords[0], coords[1]),
+                }},
             )
             updated += 1
         else:
@@ -637,9 +726,20 @@ async def migrate_user_coords(container: Container = Depends(init_container)):
             if city:
                 skipped_cities[city] = skipped_cities.get(city, 0) + 1
 
+    # Анкеты, у которых lat/lon уже были, но нет location для 2dsphere-индекса
+    location_result = await col.update_many(
+        {
+            "lat": {"$type": "number"},
+            "lon": {"$type": "number"},
+            "location": {"$exists": False},
+        },
+        [{"$set": {"location": {"type": "Point", "coordinates": ["$lon", "$lat"]}}}],
+    )
+
     top_skipped = sorted(skipped_cities.items(), key=lambda x: -x[1])[:20]
     return {
         "updated": updated,
+        "location_backfilled": location_result.modified_count,
         "skipped_unknown_city": skipped,
         "top_skipped_cities": top_skipped,
     }
@@ -684,37 +784,79 @@ async def migrate_looking_for(container: Container = Depends(init_container)):
     }
 
 
+@router.post(
+    "/admin/migrate/normalized-fields",
+    status_code=status.HTTP_200_OK,
+    include_in_schema=False,
+)
+async def migrate_normalized_fields(
+    force: bool = False,
+    container: Container = Depends(init_container),
+):
+    """Миграция: проставляет gender_norm/city_canonical старым анкетам.
+    force=true — пересчитать у всех. Повторный запуск безопасен."""
+    from app.infra.repositories.base import BaseUsersRepository
+    from app.infra.repositories.mongo import MongoDBUserRepository
+    repository = container.resolve(BaseUsersRepository)
+    if not isinstance(repository, MongoDBUserRepository):
+        return {"updated": 0, "message": "Not supported by this repository"}
+
+    updated = await repository.backfill_normalized_fields(force=force)
+    return {"updated": updated, "message": "Migration complete"}
+
+
+@router.post(
+    "/admin/migrate/matches",
+    status_code=status.HTTP_200_OK,
+    include_in_schema=False,
+)
+async def migrate_matches(
+    force: bool = False,
+    container: Container = Depends(init_container),
+):
+    """Миграция: переносит взаимные лайки в коллекцию matches.
+    Без force — только если перенос ещё не завершался. Повторный запуск безопасен."""
+    from app.infra.repositories.base import BaseMatchesRepository
+    from app.infra.repositories.mongo import MongoDBMatchesRepository
+    repository = container.resolve(BaseMatchesRepository)
+    if not isinstance(repository, MongoDBMatchesRepository):
+        return {"stored": 0, "message": "Not supported by this repository"}
+
+    stored = await repository.backfill_from_likes(force=force)
+    return {"stored": stored, "message": "Migration complete"}
+
+
 @router.get(
     "/best_result/{user_id}",
     status_code=status.HTTP_200_OK,
-    description="Get best result for user (excludes already-liked profiles).",
+    description="Get one page of the feed for user (excludes already-liked profiles). "
+                "Pass next_cursor from the previous response to get the next page.",
     responses={
-        status.HTTP_200_OK: {"model": GetUsersFromResponseSchema},
+        status.HTTP_200_OK: {"model": GetUsersFeedResponseSchema},
         status.HTTP_400_BAD_REQUEST: {"model": ErrorSchema},
     },
 )
 async def get_users_best_result(
     user_id: int,
+    filters: GetUsersFeedFilters = Depends(),
     container: Container = Depends(init_container),
-) -> GetUsersFromResponseSchema:
-    from app.infra.repositories.base import BaseDislikesRepository
+) -> GetUsersFeedResponseSchema:
     service_users: BaseUsersService = container.resolve(BaseUsersService)
-    service_likes: BaseLikesService = container.resolve(BaseLikesService)
-    dislikes_repo: BaseDislikesRepository = container.resolve(BaseDislikesRepository)
 
     try:
-        already_liked = await service_likes.get_telegram_id_liked_from(user_id=user_id)
-        already_disliked = await dislikes_repo.get_disliked_ids(user_id=user_id)
-        exclude_ids = list(set(already_liked) | set(already_disliked))
-        users = await service_users.get_best_result_for_user(user_id, exclude_ids=exclude_ids)
+        users, next_cursor = await service_users.get_best_result_for_user(
+            user_id,
+            filters=filters.to_infra(),
+        )
     except ApplicationException as exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"error": exception.message},
         )
 
-    return GetUsersFromResponseSchema(
-        items=[UserDetailSchema.from_entity(user) for user in users],
+    return GetUsersFeedResponseSchema(
+        items=await user_detail_items(users, container, resolve=filters.resolve_media),
+        next_cursor=next_cursor,
     )
 
 
@@ -806,49 +948,55 @@ async def debug_swipe(user_id: int, container: Container = Depends(init_containe
 @router.get(
     "/from/{user_id}",
     status_code=status.HTTP_200_OK,
-    description="Get all users that the user liked.",
+    description="Get one page of users that the user liked, newest likes first. "
+                "Pass next_cursor from the previous response to get the next page.",
     responses={
-        status.HTTP_200_OK: {"model": GetUsersFromResponseSchema},
+        status.HTTP_200_OK: {"model": GetUsersLikesResponseSchema},
         status.HTTP_400_BAD_REQUEST: {"model": ErrorSchema},
     },
 )
 async def get_users_liked_from(
     user_id: int,
+    filters: GetLikesListFilters = Depends(),
     container: Container = Depends(init_container),
-) -> GetUsersFromResponseSchema:
+) -> GetUsersLikesResponseSchema:
     service_likes: BaseLikesService = container.resolve(BaseLikesService)
     service_users: BaseUsersService = container.resolve(BaseUsersService)
 
     try:
-        telegram_ids = await service_likes.get_telegram_id_liked_from(
+        telegram_ids, next_cursor = await service_likes.get_likes_page(
             user_id=user_id,
+            filters=filters.to_infra(),
         )
-        users = await service_users.get_users_liked_from(users_list=telegram_ids)
+        users = await service_users.get_users_by_ids(telegram_ids)
     except ApplicationException as exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"error": exception.message},
         )
 
-    return GetUsersFromResponseSchema(
-        items=[UserDetailSchema.from_entity(user) for user in users],
+    return GetUsersLikesResponseSchema(
+        items=await user_detail_items(users, container, resolve=filters.resolve_media),
+        next_cursor=next_cursor,
     )
 
 
 @router.get(
     "/by/{user_id}",
     status_code=status.HTTP_200_OK,
-    description="Get all users that liked the user (Premium required).",
+    description="Get one page of users that liked the user, newest likes first (Premium required). "
+                "Pass next_cursor from the previous response to get the next page.",
     responses={
-        status.HTTP_200_OK: {"model": GetUsersFromResponseSchema},
+        status.HTTP_200_OK: {"model": GetUsersLikesResponseSchema},
         status.HTTP_400_BAD_REQUEST: {"model": ErrorSchema},
         status.HTTP_403_FORBIDDEN: {"model": ErrorSchema},
     },
 )
 async def get_users_liked_by(
     user_id: int,
+    filters: GetLikesListFilters = Depends(),
     container: Container = Depends(init_container),
-) -> GetUsersFromResponseSchema:
+) -> GetUsersLikesResponseSchema:
     from datetime import datetime, timezone
     service_likes: BaseLikesService = container.resolve(BaseLikesService)
     service_users: BaseUsersService = container.resolve(BaseUsersService)
@@ -872,18 +1020,21 @@ async def get_users_liked_by(
         )
 
     try:
-        telegram_ids = await service_likes.get_users_ids_liked_by(
+        telegram_ids, next_cursor = await service_likes.get_likes_page(
             user_id=user_id,
+            filters=filters.to_infra(),
+            incoming=True,
         )
-        users = await service_users.get_users_liked_by(users_list=telegram_ids)
+        users = await service_users.get_users_by_ids(telegram_ids)
     except ApplicationException as exception:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail={"error": exception.message},
         )
 
-    return GetUsersFromResponseSchema(
-        items=[UserDetailSchema.from_entity(user) for user in users],
+    return GetUsersLikesResponseSchema(
+        items=await user_detail_items(users, container, resolve=filters.resolve_media),
+        next_cursor=next_cursor,
     )
 
 
@@ -972,13 +1123,11 @@ async def ping_user(
     user_id: int,
     container: Container = Depends(init_container),
 ):
-    """Обновляет last_seen пользователя — вызывается с фронта каждые 60 секунд."""
-    service: BaseUsersService = container.resolve(BaseUsersService)
-    now = datetime.now(timezone.utc)
-    await service.update_user_info_after_reg(
-        telegram_id=user_id,
-        data={"last_seen": now},
-    )
+    """Обновляет last_seen пользователя — вызывается с фронта каждые 60 секунд.
+    Пинг пишется в трекер присутствия, в MongoDB — пачкой (PresenceFlushWorker)."""
+    from app.infra.presence import BasePresenceTracker
+    presence: BasePresenceTracker = container.resolve(BasePresenceTracker)
+    await presence.touch(user_id)
     return {"ok": True}
 
 
@@ -0,0 +1,142 @@
+"""
+Прямые ссылки на медиа для списков анкет (resolve_media=true).
+
+По умолчанию карточки содержат /api/v1/users/{id}/photo/{i}: браузер сначала идёт в API
+за 302, потом в хранилище. С resolve_media ссылки на все фото страницы считаются за один
+проход (публичный CDN или presigned URL из кэша S3Storage) и встраиваются в ответ вместе
+со сроком годности media_expires_at — после него клиент перезапрашивает страницу.
+"""
+import asyncio
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import Iterable
+
+from fastapi import Request
+from fastapi.responses import RedirectResponse
+
+from app.application.api.v1.users.schemas import UserDetailSchema
+from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.derivatives import (
+    ImageDerivativesPipeline,
+    is_derivable,
+)
+
+
+# Срок presigned URL в списках — как у редиректа /photo/{index}
+MEDIA_URL_EXPIRES_SECONDS = 3600
+
+
+@dataclass
+class PageMedia:
+    # S3-ключ → прямая ссылка
+    urls: dict[str, str] = field(default_factory=dict)
+    # Когда истекает первая из ссылок; None — ссылки бессрочные (CDN, http)
+    expires_at: datetime | None = None
+
+
+def _media_keys(users: Iterable) -> set[str]:
+    # Legacy-поле photo (Telegram file_id) не резолвится: его отдаёт только /photo
+    return {
+        key
+        for user in users
+        for key in getattr(user, "photos", None) or []
+        if not key.startswith("http")
+    }
+
+
+async def resolve_media(
+    users: Iterable,
+    storage: BaseS3Storage,
+    public_base_url: str = "",
+    expires: int = MEDIA_URL_EXPIRES_SECONDS,
+    pipeline: ImageDerivativesPipeline | None = None,
+) -> PageMedia:
+    """Прямые ссылки на все медиа страницы анкет (и на WebP-карточки, если они есть)."""
+    keys = sorted(_media_keys(users))
+    if not keys:
+        return PageMedia()
+    if pipeline is not None:
+        cards = await asyncio.gather(*(pipeline.pick(key, "card", "webp") for key in keys if is_derivable(key)))
+        keys = sorted(set(keys) | set(cards))
+    if public_base_url:
+        base = public_base_url.rstrip("/")
+        return PageMedia(urls={key: f"{base}/{key}" for key in keys})
+
+    get_cached = getattr(storage, "get_presigned_url_cached", None)
+
+    async def presign(key: str) -> tuple[str, int]:
+        if get_cached is not None:
+            return await get_cached(key, expires=expires)
+        return await storage.get_presigned_url(key, expires=expires), expires
+
+    resolved = await asyncio.gather(*(presign(key) for key in keys), return_exceptions=True)
+    urls: dict[str, str] = {}
+    valid_for: list[int] = []
+    for key, result in zip(keys, resolved):
+        # Не подписалось — у этой карточки останется ссылка через API
+        if isinstance(result, BaseException):
+            continue
+        urls[key], seconds = result
+        valid_for.append(seconds)
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=min(valid_for)) if valid_for else None
+    return PageMedia(urls=urls, expires_at=expires_at)
+
+
+async def presigned_redirect(storage: BaseS3Storage, s3_key: str, vary: bool = False) -> RedirectResponse:
+    """
+    302 на presigned URL. URL берётся из кэша S3Storage, max-age — сколько он ещё
+    гарантированно действителен, чтобы браузер не держал в кэше протухшую ссылку.
+    """
+    get_cached = getattr(storage, "get_presigned_url_cached", None)
+    if get_cached is not None:
+        presigned_url, max_age = await get_cached(s3_key, expires=MEDIA_URL_EXPIRES_SECONDS)
+    else:
+        presigned_url = await storage.get_presigned_url(s3_key, expires=MEDIA_URL_EXPIRES_SECONDS)
+        max_age = MEDIA_URL_EXPIRES_SECONDS - 100
+    headers = {"Cache-Control": f"public, max-age={max_age}"}
+    if vary:
+        headers["Vary"] = "Accept"
+    return RedirectResponse(url=presigned_url, status_code=302, headers=headers)
+
+
+async def pick_variant(container, request: Request, s3_key: str, variant: str | None) -> str:
+    """
+    Ключ производной (?variant=thumb|card|full): WebP, если клиент его принимает,
+    иначе JPEG. Нет производной (старое фото, видео) — исходный ключ.
+    """
+    if not variant:
+        return s3_key
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpg"
+    pipeline: ImageDerivativesPipeline = container.resolve(ImageDerivativesPipeline)
+    return await pipeline.pick(s3_key, variant, fmt)
+
+
+async def user_detail_items(
+    users: list,
+    container,
+    resolve: bool = False,
+) -> list[UserDetailSchema]:
+    """UserDetailSchema для страницы; resolve=True — со встроенными прямыми ссылками на медиа."""
+    if not resolve:
+        return [UserDetailSchema.from_entity(user) for user in users]
+
+    from app.settings.config import Config
+
+    config: Config = container.resolve(Config)
+    media = await resolve_media(
+        users,
+        container.resolve(BaseS3Storage),
+        public_base_url=getattr(config, "media_public_base_url", ""),
+        pipeline=container.resolve(ImageDerivativesPipeline),
+    )
+    return [
+        UserDetailSchema.from_entity(user, media_urls=media.urls, media_expires_at=media.expires_at)
+        for user in users
+    ]
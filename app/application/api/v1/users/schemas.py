@@ -14,14 +14,26 @@ from pydantic import BaseModel
 
 from app.application.api.schemas import BaseQueryResponseSchema
 from app.domain.entities.users import UserEntity
+from app.infra.s3.derivatives import (
+    is_derivable,
+    variant_key,
+)
+from app.infra.s3.keys import (
+    is_content_key,
+    is_video_key,
+)
 
 
-_VIDEO_EXTS = {"mp4", "mov", "webm", "avi", "mkv"}
+def media_url(key: str, variant: str | None = None) -> str:
+    """Ссылка на неизменяемый (по хэшу содержимого) ключ: /media/{key} кэшируется бессрочно."""
+    return f"/api/v1/media/{key}" + (f"?variant={variant}" if variant else "")
 
 
-def _key_is_video(key: str) -> bool:
-    ext = key.rsplit(".", 1)[-1].lower() if "." in key else ""
-    return ext in _VIDEO_EXTS
+def photo_url(uid: int, index: int, key: str, variant: str | None = None) -> str:
+    """Ссылка на элемент photos[] через API; старые ключи — через /users/{id}/photo/{index}."""
+    if is_content_key(key):
+        return media_url(key, variant)
+    return f"/api/v1/users/{uid}/photo/{index}" + (f"?variant={variant}" if variant else "")
 
 
 class UserDetailSchema(BaseModel):
@@ -36,13 +48,22 @@ class UserDetailSchema(BaseModel):
     photo: Optional[str]
     photos: list[str] = []
     media_types: list[str] = []  # "image" | "video" for each item in photos
+    thumbnails: list[str] = []  # card-size copy (720px) of each item in photos, for feed cards
     is_active: bool
     referral_balance: float = 0.0
     last_seen: Optional[str] = None   # ISO-строка UTC
+    # Только при resolve_media: photos/photo — прямые ссылки, действительные до этого момента
+    media_expires_at: Optional[str] = None
 
     @classmethod
-    def from_entity(cls, user: UserEntity) -> "UserDetailSchema":
+    def from_entity(
+        cls,
+        user: UserEntity,
+        media_urls: dict[str, str] | None = None,
+        media_expires_at: datetime | None = None,
+    ) -> "UserDetailSchema":
         uid = user.telegram_id
+        media_urls = media_urls or {}
 
         photo = user.photo
         if photo and not photo.startswith("http"):
@@ -50,14 +71,27 @@ class UserDetailSchema(BaseModel):
 
         user_photos: list = getattr(user, "photos", []) or []
         if user_photos:
-            photos_urls = [f"/api/v1/users/{uid}/photo/{i}" for i in range(len(user_photos))]
-            media_types = ["video" if _key_is_video(k) else "image" for k in user_photos]
+            photos_urls = [
+                key if key.startswith("http") else media_urls.get(key, photo_url(uid, i, key))
+                for i, key in enumerate(user_photos)
+            ]
+            # /photo отдаёт первое фото из photos[]
+            if photo and not photo.startswith("http") and user_photos[0] in media_urls:
+                photo = photos_urls[0]
+            media_types = ["video" if is_video_key(k) else "image" for k in user_photos]
+            thumbnails = [
+                media_urls.get(variant_key(key, "card", "webp"), photo_url(uid, i, key, "card"))
+                if is_derivable(key) and not key.startswith("http") else photos_urls[i]
+                for i, key in enumerate(user_photos)
+            ]
         elif photo:
             photos_urls = [f"/api/v1/users/{uid}/photo"]
             media_types = ["image"]
+            thumbnails = photos_urls
         else:
             photos_urls = []
             media_types = []
+            thumbnails = []
 
         return UserDetailSchema(
             telegram_id=uid,
@@ -71,9 +105,11 @@ class UserDetailSchema(BaseModel):
             photo=photo,
             photos=photos_urls,
             media_types=media_types,
+            thumbnails=thumbnails,
             is_active=user.is_active,
             referral_balance=float(getattr(user, "referral_balance", 0) or 0),
             last_seen=_to_utc_iso(user.last_seen),
+            media_expires_at=_to_utc_iso(media_expires_at) if media_urls else None,
         )
 
 
@@ -83,3 +119,11 @@ class GetUsersResponseSchema(BaseQueryResponseSchema):
 
 class GetUsersFromResponseSchema(BaseModel):
     items: list[UserDetailSchema]
+
+
+class GetUsersFeedResponseSchema(GetUsersFromResponseSchema):
+    next_cursor: Optional[str] = None
+
+
+class GetUsersLikesResponseSchema(GetUsersFromResponseSchema):
+    next_cursor: Optional[str] = None
@@ -0,0 +1,172 @@
+"""
+Бенчмарк лайка: число команд MongoDB и задержка на один лайк.
+
+Сравнивает прежний путь лайка — те же запросы к MongoDB, что делали старые
+LikeActionUseCase и репозитории (повторное чтение анкеты, два count_documents за
+сутки, find_one перед insert_one, две проверки лайка для матча, $set кредита,
+отдельное чтение получателя) — с текущим execute(). Обе версии работают во временной
+базе <MONGO_DB_NAME>_bench, которая удаляется в конце. Уведомления в Telegram отключены.
+По умолчанию бесплатный дневной лимит 0: каждый лайк списывает swipe_credits, так
+что в обоих вариантах измеряется и запись кредита.
+
+    python -m app.benchmarks.likes [--users 200] [--mutual 0.5] [--daily-free 0]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+from datetime import (
+    datetime,
+    timezone,
+)
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.infra.repositories.mongo import (
+    MongoDBLikesRepository,
+    MongoDBMatchesRepository,
+    MongoDBSeenProfilesRepository,
+    MongoDBUserRepository,
+)
+from app.logic.services.likes import LikesService
+from app.logic.services.users import UsersService
+from app.logic.use_cases.like_action import LikeActionUseCase
+from app.settings.config import Config
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.commands: Counter = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def legacy_like(users, likes, daily_likes_free: int, from_user_id: int, to_user_id: int) -> None:
+    """Запросы прежнего execute() по порядку — точка отсчёта."""
+    pair = {"from_user": from_user_id, "to_user": to_user_id}
+    today = {
+        "from_user": from_user_id,
+        "created_at": {"$gte": datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)},
+    }
+    # can_like: анкета и дневной счётчик
+    await users.find_one({"telegram_id": from_user_id})
+    await likes.count_documents(today)
+    # execute: анкета ещё раз и проверка, что лайка нет
+    from_user = await users.find_one({"telegram_id": from_user_id})
+    if not await likes.find_one(pair):
+        # LikesService.create_like проверял существование повторно
+        await likes.find_one(pair)
+        await likes.insert_one({**pair, "created_at": datetime.now(timezone.utc)})
+        if await likes.count_documents(today) > daily_likes_free:
+            credits = from_user.get("swipe_credits", 0) or 0
+            if credits > 0:
+                await users.update_one({"telegram_id": from_user_id}, {"$set": {"swipe_credits": credits - 1}})
+    # check_match: два find_one
+    if await likes.find_one(pair) and await likes.find_one({"from_user": to_user_id, "to_user": from_user_id}):
+        await users.find_one({"telegram_id": to_user_id})
+
+
+def _mute_notifications() -> None:
+    from app.bot.utils import notificator
+
+    async def _noop(*args, **kwargs):
+        return None
+
+    for name in ("send_liked_message", "send_match_message", "send_superlike_message"):
+        setattr(notificator, name, _noop)
+
+
+async def _run(config: Config, users: int, mutual: float, daily_free: int) -> None:
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(config.mongodb_connection_uri, event_listeners=[counter])
+    db_name = f"{config.mongodb_dating_database}_bench"
+    db = client[db_name]
+    try:
+        await client.drop_database(db_name)
+        await db["users"].create_index([("telegram_id", 1)], unique=True)
+        await db["users"].insert_many([
+            {
+                "telegram_id": telegram_id, "name": f"user{telegram_id}", "gender": "Man", "is_active": True,
+                "swipe_credits": 1000,
+            }
+            for telegram_id in range(1, 2 * users + 3)
+        ])
+
+        def build(likes_collection: str) -> LikeActionUseCase:
+            common = {"mongo_db_client": client, "mongo_db_name": db_name}
+            seen = MongoDBSeenProfilesRepository(
+                **common,
+                mongo_db_collection_name=f"{likes_collection}_seen",
+                likes_collection_name=likes_collection,
+                dislikes_collection_name="dislikes",
+            )
+            matches = MongoDBMatchesRepository(
+                **common,
+                mongo_db_collection_name=f"{likes_collection}_matches",
+                likes_collection_name=likes_collection,
+            )
+            likes = MongoDBLikesRepository(
+                **common,
+                mongo_db_collection_name=likes_collection,
+                seen_repository=seen,
+                matches_repository=matches,
+            )
+            return LikeActionUseCase(
+                likes_service=LikesService(like_repository=likes, matches_repository=matches),
+                users_service=UsersService(
+                    user_repository=MongoDBUserRepository(**common, mongo_db_collection_name="users"),
+                ),
+                config=config,
+            )
+
+        pairs = [(telegram_id, telegram_id + 1) for telegram_id in range(1, users + 1)]
+        # Часть лайков — ответные: на них срабатывает матч
+        pairs += [(to_user, from_user) for from_user, to_user in pairs[: int(len(pairs) * mutual)]]
+
+        use_case = build("likes")
+        use_case.config = config.model_copy(update={"daily_likes_free": daily_free})
+        for title, likes_collection in (("legacy", "likes_legacy"), ("execute", "likes")):
+            # Прежняя схема: неуникальный индекс, уникальность — проверкой перед вставкой
+            await db[likes_collection].create_index(
+                [("from_user", 1), ("to_user", 1)], unique=likes_collection == "likes",
+            )
+            counter.commands.clear()
+            timings = []
+            for from_user_id, to_user_id in pairs:
+                started = time.perf_counter()
+                if title == "legacy":
+                    await legacy_like(db["users"], db[likes_collection], daily_free, from_user_id, to_user_id)
+                else:
+                    await use_case.execute(from_user_id, to_user_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            total = sum(counter.commands.values())
+            timings.sort()
+            print(
+                f"{title:8} {total / len(pairs):5.2f} commands/like  "
+                f"p50 {statistics.median(timings):6.2f} ms  "
+                f"p95 {timings[int(len(timings) * 0.95) - 1]:6.2f} ms  "
+                f"{dict(counter.commands)}"
+            )
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mongo round trips per like: legacy sequence vs execute().")
+    parser.add_argument("--users", type=int, default=200, help="number of first likes")
+    parser.add_argument("--mutual", type=float, default=0.5, help="share of likes answered back (matches)")
+    parser.add_argument("--daily-free", type=int, default=0, help="free likes per day; likes above spend credits")
+    args = parser.parse_args()
+
+    _mute_notifications()
+    asyncio.run(_run(Config(), args.users, args.mutual, args.daily_free))
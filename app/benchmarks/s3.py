@@ -0,0 +1,88 @@
+"""
+Бенчмарк S3Storage: пропускная способность presign и upload.
+
+Сравнивает прежнее поведение (новый aiobotocore-клиент на каждый вызов) с
+долгоживущим клиентом S3Storage. Presign не ходит в сеть и показывает стоимость
+создания клиента; upload (--uploads N) пишет небольшие объекты в bench/ текущего
+бакета и удаляет их в конце — там видна экономия на TCP/TLS-рукопожатиях.
+
+    python -m app.benchmarks.s3 [--presigns 2000] [--uploads 0] [--concurrency 20]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from app.infra.s3.storage import S3Storage
+from app.settings.config import Config
+
+
+@dataclass
+class PerCallS3Storage(S3Storage):
+    """Прежний S3Storage: клиент создаётся и закрывается в каждом вызове."""
+
+    @asynccontextmanager
+    async def get_client(self):
+        async with self.session.create_client("s3", **self._client_kwargs()) as client:
+            yield client
+
+
+def _storage(cls, config: Config) -> S3Storage:
+    return cls(
+        aws_access_key_id=config.aws_access_key_id,
+        aws_secret_access_key=config.aws_secret_access_key,
+        bucket_name=config.bucket_name,
+        region_name=config.region_name,
+        endpoint_url=config.s3_endpoint_url,
+        max_pool_connections=config.s3_max_pool_connections,
+    )
+
+
+async def _measure(calls: int, concurrency: int, call) -> float:
+    """Выполняет calls вызовов call(i) не более чем по concurrency одновременно. Возвращает оп/с."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await call(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return calls / (time.perf_counter() - started)
+
+
+async def _run(config: Config, presigns: int, uploads: int, concurrency: int) -> None:
+    payload = b"x" * 16 * 1024
+    prefix = f"bench/{uuid.uuid4().hex}"
+    for title, cls in (("per-call", PerCallS3Storage), ("shared", S3Storage)):
+        storage = _storage(cls, config)
+        await storage.open()
+        try:
+            rate = await _measure(
+                presigns, concurrency, lambda i: storage.get_presigned_url(f"{prefix}/{i}.jpg"),
+            )
+            line = f"{title:9} presign {rate:9.1f} op/s"
+            if uploads:
+                rate = await _measure(
+                    uploads, concurrency, lambda i: storage.upload_file(payload, f"{prefix}/{title}/{i}.jpg"),
+                )
+                line += f"  upload {rate:7.1f} op/s"
+            print(line)
+        finally:
+            if uploads:
+                async with storage.get_client() as client:
+                    for i in range(uploads):
+                        await client.delete_object(Bucket=storage.bucket_name, Key=f"{prefix}/{title}/{i}.jpg")
+            await storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="S3 presign/upload throughput: client per call vs shared client.")
+    parser.add_argument("--presigns", type=int, default=2000, help="number of presigned URLs")
+    parser.add_argument("--uploads", type=int, default=0, help="number of 16 KiB uploads (0 — skip, needs a bucket)")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent calls")
+    args = parser.parse_args()
+
+    asyncio.run(_run(Config(), args.presigns, args.uploads, args.concurrency))
@@ -0,0 +1,103 @@
+"""
+Бенчмарк отправки в Bot API: сообщений в секунду.
+
+Сравнивает прежнее поведение (новый Bot — новая aiohttp-сессия и коннектор — на каждое
+сообщение, как было в рассылке и реферальном бонусе) с общим Bot из контейнера и его
+пулом соединений. По умолчанию шлёт в локальную заглушку Bot API на 127.0.0.1: сеть
+не нужна, видна стоимость сессии и TCP-соединения. С --api можно указать свой сервер
+Bot API (например, локальный telegram-bot-api) — там добавятся и TLS-рукопожатия.
+
+    python -m app.benchmarks.telegram [--messages 2000] [--concurrency 20] [--api URL]
+"""
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+
+# Формат токена проверяется aiogram; заглушке он безразличен
+_TOKEN = "123456:bench"
+
+
+async def _start_stub() -> tuple[web.AppRunner, str]:
+    """Заглушка Bot API: на любой метод отвечает отправленным сообщением."""
+
+    async def handle(request: web.Request) -> web.Response:
+        data = await request.post()
+        return web.json_response({
+            "ok": True,
+            "result": {
+                "message_id": 1,
+                "date": int(time.time()),
+                "chat": {"id": int(data.get("chat_id", 1)), "type": "private"},
+                "text": data.get("text", ""),
+            },
+        })
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _measure(messages: int, concurrency: int, send) -> float:
+    """Отправляет messages сообщений не более чем по concurrency одновременно. Возвращает сообщений/с."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await send(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return messages / (time.perf_counter() - started)
+
+
+async def _run(messages: int, concurrency: int, api: str | None, token: str, chat_id: int, pool: int) -> None:
+    runner = None
+    if api is None:
+        runner, api = await _start_stub()
+    server = TelegramAPIServer.from_base(api)
+    try:
+        async def per_call(i: int):
+            bot = Bot(token=token, session=AiohttpSession(api=server))
+            try:
+                await bot.send_message(chat_id=chat_id, text=f"bench {i}")
+            finally:
+                await bot.session.close()
+
+        rate = await _measure(messages, concurrency, per_call)
+        print(f"{'per-call':9} {rate:9.1f} msg/s")
+
+        shared = Bot(token=token, session=AiohttpSession(api=server, limit=pool))
+        try:
+            rate = await _measure(
+                messages, concurrency, lambda i: shared.send_message(chat_id=chat_id, text=f"bench {i}"),
+            )
+            print(f"{'shared':9} {rate:9.1f} msg/s")
+        finally:
+            await shared.session.close()
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bot API send throughput: Bot per message vs shared Bot.")
+    parser.add_argument("--messages", type=int, default=2000, help="number of sendMessage calls")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent calls")
+    parser.add_argument("--pool", type=int, default=100, help="connection pool size of the shared Bot")
+    parser.add_argument("--api", default=None, help="Bot API base URL (default — local stub server)")
+    parser.add_argument("--token", default=_TOKEN, help="bot token for --api")
+    parser.add_argument("--chat-id", type=int, default=1, help="recipient chat for --api")
+    args = parser.parse_args()
+
+    asyncio.run(_run(args.messages, args.concurrency, args.api, args.token, args.chat_id, args.pool))
@@ -7,6 +7,11 @@ from app.bot.handlers.users.profile import profile
 from app.bot.keyboards.inline import like_dislike_keyboard, match_keyboard, swipe_card_keyboard
 from app.bot.utils.constants import match_text_message, profile_text_message
 from app.bot.utils.states import MessageCompose, ReportForm
+from app.bot.utils.swipe_session import (
+    UserSession,
+    load_session,
+    save_session,
+)
 from app.domain.entities.users import UserEntity
 from app.infra.repositories.base import BaseDislikesRepository
 from app.logic.init import init_container
@@ -108,23 +113,6 @@ async def handle_icebreaker_skip(callback: CallbackQuery):
         pass
 
 
-class UserSession:
-    def __init__(self, users, use_swipe_card: bool = False):
-        self.users = users
-        self.current_index = 0
-        self.use_swipe_card = use_swipe_card  # /match: Like, Skip, Message, Report
-
-    def has_more_users(self):
-        return self.current_index < len(self.users)
-
-    def get_next_user(self):
-        if self.has_more_users():
-            user = self.users[self.current_index]
-            self.current_index += 1
-            return user
-        return None
-
-
 async def send_user_profile(callback: CallbackQuery, user: UserEntity, use_swipe_card: bool = False):
     """Отправляет профиль пользователя. use_swipe_card=True — клавиатура с Message, Report."""
     try:
@@ -133,19 +121,18 @@ async def send_user_profile(callback: CallbackQuery, user: UserEntity, use_swipe
         pass
     kb = swipe_card_keyboard(user.telegram_id) if use_swipe_card else like_dislike_keyboard(user.telegram_id)
     try:
-        from app.bot.utils.notificator import _resolve_photo
+        from app.bot.utils.notificator import send_cached_photo
         photo_raw = getattr(user, "photos", []) or []
         photo_raw = photo_raw[0] if photo_raw else (user.photo or "")
-        resolved = await _resolve_photo(photo_raw, user.telegram_id) if photo_raw else None
-        if resolved:
-            from aiogram.types import BufferedInputFile
-            photo_input = BufferedInputFile(resolved, "photo.jpg") if isinstance(resolved, bytes) else resolved
-            await callback.message.answer_photo(
-                photo=photo_input,
-                caption=profile_text_message(user),
-                reply_markup=kb,
-                parse_mode="HTML",
-            )
+        sent = await send_cached_photo(
+            callback.message.answer_photo,
+            photo_raw,
+            user.telegram_id,
+            caption=profile_text_message(user),
+            reply_markup=kb,
+            parse_mode="HTML",
+        )
+        if sent:
             return
     except Exception:
         pass
@@ -164,8 +151,11 @@ async def send_user_profile(callback: CallbackQuery, user: UserEntity, use_swipe
         )
 
 
-async def process_next_user(callback: CallbackQuery, session: UserSession):
-    next_user = session.get_next_user()
+async def process_next_user(callback: CallbackQuery, session: UserSession, state: FSMContext | None = None):
+    next_user = await session.get_next_user()
+    if state is not None:
+        # Окно и курсор сдвинулись — сохраняем сессию в FSM
+        await save_session(state, session)
     if next_user:
         await send_user_profile(callback, next_user, use_swipe_card=session.use_swipe_card)
     else:
@@ -215,10 +205,13 @@ async def handle_like_user(
         )
         return
 
-    try:
-        user_liked = await users_service.get_user(liked_user_id)
-    except Exception:
-        user_liked = None
+    # При матче анкета уже загружена use-case'ом для уведомлений
+    user_liked = result.to_user
+    if result.is_match and user_liked is None:
+        try:
+            user_liked = await users_service.get_user(liked_user_id)
+        except Exception:
+            user_liked = None
 
     if result.is_match and user_liked:
         try:
@@ -240,28 +233,25 @@ async def handle_like_user(
             pass
         kb = match_keyboard(username=username, to_user_id=from_id, matched_user_id=to_id, bot_username=bot_username)
         try:
-            from app.bot.utils.notificator import _resolve_photo
+            from app.bot.utils.notificator import send_cached_photo
             photo_raw = getattr(user_liked, "photos", []) or []
             photo_raw = photo_raw[0] if photo_raw else (getattr(user_liked, "photo", None) or "")
-            resolved = await _resolve_photo(photo_raw, to_id) if photo_raw else None
-            if resolved:
-                from aiogram.types import BufferedInputFile
-                photo_input = BufferedInputFile(resolved, "photo.jpg") if isinstance(resolved, bytes) else resolved
-                await callback.message.answer_photo(
-                    photo=photo_input,
-                    caption=match_caption,
-                    reply_markup=kb,
-                    parse_mode="HTML",
-                )
-            else:
+            sent = await send_cached_photo(
+                callback.message.answer_photo,
+                photo_raw,
+                to_id,
+                caption=match_caption,
+                reply_markup=kb,
+                parse_mode="HTML",
+            )
+            if not sent:
                 await callback.message.answer(text=match_caption, reply_markup=kb, parse_mode="HTML")
         except Exception:
             await callback.message.answer(text=match_caption, reply_markup=kb, parse_mode="HTML")
     else:
-        data = await state.get_data()
-        session = data.get("session")
+        session = await load_session(state)
         if session:
-            await process_next_user(callback, session)
+            await process_next_user(callback, session, state)
 
 
 @callback_like_router.callback_query(
@@ -286,10 +276,9 @@ async def handle_dislike_user(
             to_user=disliked_user_id,
         )
 
-    data = await state.get_data()
-    session = data.get("session")
+    session = await load_session(state)
     if session:
-        await process_next_user(callback, session)
+        await process_next_user(callback, session, state)
 
 
 @callback_like_router.callback_query(F.data == "see_who_liked")
@@ -363,21 +352,8 @@ async def handle_see_who_liked(
             await profile(callback)
             return
 
-        liked_users = []
-        for user_id in pending:
-            try:
-                liked_users.append(await users_service.get_user(user_id))
-            except Exception:
-                pass
-
-        if not liked_users:
-            await callback.message.answer("Нет новых лайков 🤷")
-            await profile(callback)
-            return
-
-        session = UserSession(liked_users)
-        await state.update_data(session=session)
-        await process_next_user(callback, session)
+        # Анкеты грузятся по одной на карточку; недоступные сессия пропускает
+        await process_next_user(callback, UserSession(ids=pending), state)
     else:
         await callback.message.answer("Тебя ещё никто не лайкнул 🙈\nСвайпай анкеты — и лайки придут!")
         await profile(callback)
@@ -489,12 +465,10 @@ async def handle_report_button(
 @callback_like_router.callback_query(F.data == "report_cancel")
 async def handle_report_cancel(callback: CallbackQuery, state: FSMContext):
     await callback.answer("Отменено")
-    data = await state.get_data()
-    session = data.get("session")
+    session = await load_session(state)
     await state.clear()
     if session:
-        from app.bot.callbacks.users.likes import process_next_user
-        await process_next_user(callback, session)
+        await process_next_user(callback, session, state)
 
 
 @callback_like_router.callback_query(lambda c: c.data and c.data.startswith("like_back_"))
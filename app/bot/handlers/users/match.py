@@ -13,7 +13,6 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from punq import Container
 
 from app.bot.callbacks.users.likes import (
-    UserSession,
     process_next_user,
     send_user_profile,
 )
@@ -21,7 +20,11 @@ from app.bot.handlers.users.profile import profile
 from app.bot.handlers.users.registration import start_registration
 from app.bot.utils.constants import profile_text_message
 from app.bot.utils.states import MessageCompose, ReportForm
-from app.infra.repositories.base import BaseDislikesRepository
+from app.bot.utils.swipe_session import (
+    UserSession,
+    load_feed_ids,
+    save_session,
+)
 from app.logic.init import init_container
 from app.logic.services.base import BaseLikesService, BaseUsersService
 from app.logic.use_cases.like_action import LikeActionUseCase
@@ -33,9 +36,6 @@ match_router = Router(name="Match router")
 
 async def _start_match_flow(update: Message | CallbackQuery, state: FSMContext, container: Container):
     """Запускает сессию свайпов из best_result."""
-    users_service: BaseUsersService = container.resolve(BaseUsersService)
-    likes_service: BaseLikesService = container.resolve(BaseLikesService)
-    dislikes_repo: BaseDislikesRepository = container.resolve(BaseDislikesRepository)
     config: Config = container.resolve(Config)
 
     if not getattr(config, "enable_bot_match", True):
@@ -48,10 +48,7 @@ async def _start_match_flow(update: Message | CallbackQuery, state: FSMContext,
     user_id = update.from_user.id
 
     try:
-        already_liked = await likes_service.get_telegram_id_liked_from(user_id=user_id)
-        already_disliked = await dislikes_repo.get_disliked_ids(user_id=user_id)
-        exclude_ids = list(set(already_liked) | set(already_disliked))
-        users = await users_service.get_best_result_for_user(user_id, exclude_ids=exclude_ids)
+        feed_ids, next_cursor = await load_feed_ids(container, user_id)
     except Exception:
         target = update.message if isinstance(update, CallbackQuery) else update
         await target.answer("Ошибка загрузки анкет. Попробуй позже.")
@@ -66,7 +63,7 @@ async def _start_match_flow(update: Message | CallbackQuery, state: FSMContext,
     else:
         callback = None
 
-    if not users:
+    if not feed_ids:
         target = update.message if isinstance(update, CallbackQuery) else update
         await target.answer(
             "Пока нет новых анкет 🤷\nЗагляни позже или расширь критерии поиска.",
@@ -74,29 +71,29 @@ async def _start_match_flow(update: Message | CallbackQuery, state: FSMContext,
         await profile(update)
         return
 
-    session = UserSession(list(users), use_swipe_card=True)
-    await state.update_data(session=session)
+    # В FSM — только окно id и курсор; анкеты грузятся по одной на карточку
+    session = UserSession(ids=feed_ids, use_swipe_card=True, owner_id=user_id, next_cursor=next_cursor)
     if callback:
-        await process_next_user(callback, session)
+        await process_next_user(callback, session, state)
     else:
-        first_user = session.get_next_user()
+        first_user = await session.get_next_user(container)
+        await save_session(state, session)
         if first_user:
-            from aiogram.types import BufferedInputFile
             from app.bot.keyboards.inline import swipe_card_keyboard
-            from app.bot.utils.notificator import _resolve_photo
+            from app.bot.utils.notificator import send_cached_photo
             kb = swipe_card_keyboard(first_user.telegram_id)
             photo_raw = getattr(first_user, "photos", []) or []
             photo_raw = photo_raw[0] if photo_raw else (getattr(first_user, "photo", None) or "")
             try:
-                resolved = await _resolve_photo(photo_raw, first_user.telegram_id) if photo_raw else None
-                if resolved:
-                    photo_input = BufferedInputFile(resolved, "photo.jpg") if isinstance(resolved, bytes) else resolved
-                    await update.answer_photo(
-                        photo=photo_input,
-                        caption=profile_text_message(first_user),
-                        reply_markup=kb,
-                        parse_mode="HTML",
-                    )
+                sent = await send_cached_photo(
+                    update.answer_photo,
+                    photo_raw,
+                    first_user.telegram_id,
+                    caption=profile_text_message(first_user),
+                    reply_markup=kb,
+                    parse_mode="HTML",
+                )
+                if sent:
                     return
             except Exception:
                 pass
@@ -172,7 +169,7 @@ async def handle_message_compose_text(
         return
 
     try:
-        sender = await users_service.get_user(message.from_user.id)
+        sender = result.from_user or await users_service.get_user(message.from_user.id)
         from app.bot.utils.notificator import send_icebreaker_message
         await send_icebreaker_message(target_id=target_id, message=text, sender=sender)
     except Exception:
@@ -220,10 +217,13 @@ async def cmd_matches(message: Message, container: Container = init_container())
     users_service: BaseUsersService = container.resolve(BaseUsersService)
     config: Config = container.resolve(Config)
 
+    from app.infra.repositories.filters.likes import GetLikesFilters
+
     try:
-        liked_by_me = set(await likes_service.get_telegram_id_liked_from(message.from_user.id))
-        liked_me = set(await likes_service.get_users_ids_liked_by(message.from_user.id))
-        mutual_ids = list(liked_by_me & liked_me)
+        mutual_ids, next_cursor = await likes_service.get_matches_page(
+            user_id=message.from_user.id,
+            filters=GetLikesFilters(limit=20),
+        )
     except Exception:
         await message.answer("Ошибка загрузки матчей.")
         return
@@ -232,12 +232,10 @@ async def cmd_matches(message: Message, container: Container = init_container())
         await message.answer("Пока нет взаимных симпатий 💫\nСвайпай анкеты — и матчи появятся!")
         return
 
-    users = []
-    for uid in mutual_ids[:20]:
-        try:
-            users.append(await users_service.get_user(uid))
-        except Exception:
-            pass
+    try:
+        users = await users_service.get_users_by_ids(mutual_ids)
+    except Exception:
+        users = []
 
     lines = ["💕 <b>Твои матчи:</b>\n"]
     for u in users:
@@ -252,6 +250,6 @@ async def cmd_matches(message: Message, container: Container = init_container())
                 lines.append(f"• {name} — <a href='https://t.me/{bot_username}?start=chat_{message.from_user.id}_{uid}'>Написать</a>")
             else:
                 lines.append(f"• {name}")
-    if len(mutual_ids) > 20:
-        lines.append(f"\n<i>... и ещё {len(mutual_ids) - 20}</i>")
+    if next_cursor:
+        lines.append("\n<i>... и ещё — все матчи в приложении</i>")
     await message.answer("\n".join(lines), parse_mode="HTML")
@@ -6,7 +6,6 @@ from aiogram import (
 )
 from aiogram.filters import Command
 from aiogram.types import (
-    BufferedInputFile,
     CallbackQuery,
     Message,
 )
@@ -14,7 +13,7 @@ from punq import Container
 
 from app.bot.keyboards.inline import profile_inline_kb
 from app.bot.utils.constants import user_profile_text_message
-from app.bot.utils.notificator import _resolve_photo
+from app.bot.utils.notificator import send_cached_photo
 from app.logic.init import init_container
 from app.logic.services.base import BaseUsersService
 from app.settings.config import Config
@@ -106,19 +105,19 @@ async def profile(
     raw_photo = photos_list[0] if photos_list else (user.photo or "")
 
     if raw_photo:
-        resolved = await _resolve_photo(raw_photo, user_id=user.telegram_id)
-        if resolved:
-            try:
-                photo_input = BufferedInputFile(resolved, filename="photo.jpg") if isinstance(resolved, bytes) else resolved
-                await target.answer_photo(
-                    photo=photo_input,
-                    caption=caption,
-                    reply_markup=keyboard,
-                    parse_mode="HTML",
-                )
+        try:
+            sent = await send_cached_photo(
+                target.answer_photo,
+                raw_photo,
+                user.telegram_id,
+                caption=caption,
+                reply_markup=keyboard,
+                parse_mode="HTML",
+            )
+            if sent:
                 return
-            except Exception as e:
-                logger.warning(f"answer_photo failed: {e}")
+        except Exception as e:
+            logger.warning(f"answer_photo failed: {e}")
 
     # Fallback: показываем текст без фото
     await target.answer(
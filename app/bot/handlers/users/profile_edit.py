@@ -19,6 +19,10 @@ from app.bot.utils.states import (
 from app.domain.exceptions.base import ApplicationException
 from app.domain.values.users import AboutText
 from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.keys import (
+    content_hash,
+    content_key,
+)
 from app.logic.init import init_container
 from app.logic.services.base import BaseUsersService
 from app.settings.config import Config
@@ -98,13 +102,13 @@ async def photo_edit(
     await state.clear()
 
     uid = message.from_user.id
-    # S3-ключ в формате photos[]: {uid}_0.png — совпадает с Mini App
-    s3_key = f"{uid}_0.png"
+    # Неизменяемый ключ по хэшу содержимого — как у загрузок из Mini App
+    s3_key = content_key(uid, content_hash(photo_file_bytes), "jpg")
 
-    # Загружаем в S3 под стандартным ключом photos[0]
+    # Загружаем в S3 и ставим в photos[0]
     s3_ok = False
     try:
-        await uploader.upload_file(file=photo_file_bytes, file_name=s3_key)
+        await uploader.upload_file(file=photo_file_bytes, file_name=s3_key, content_type="image/jpeg")
         s3_ok = True
     except Exception:
         pass
@@ -19,6 +19,10 @@ from app.bot.utils.moderation import check_image_safe
 from app.bot.utils.states import UserForm
 from app.domain.exceptions.base import ApplicationException
 from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.keys import (
+    content_hash,
+    content_key,
+)
 from app.logic.init import init_container
 from app.logic.services.base import BaseUsersService
 from app.settings.config import Config
@@ -173,11 +177,13 @@ async def user_reg(
     await state.clear()
 
     # Загружаем в S3 (для веб-приложения)
-    s3_key = f"{message.from_user.id}_0.png"
+    # Telegram отдаёт фото в JPEG; ключ — по хэшу содержимого (неизменяемый)
+    s3_key = content_key(message.from_user.id, content_hash(photo_file_bytes), "jpg")
     try:
         await uploader.upload_file(
             file=photo_file_bytes,
             file_name=s3_key,
+            content_type="image/jpeg",
         )
         # Сохраняем S3-ключ в массиве photos[] для Mini App
         data["photos"] = [s3_key]
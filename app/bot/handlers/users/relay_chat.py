@@ -33,10 +33,10 @@ def _relay_reply_kb(sender_id: int, target_id: int) -> InlineKeyboardMarkup:
     ])
 
 
-def _check_match(service: BaseLikesService, user_a: int, user_b: int) -> bool:
+async def _check_match(service: BaseLikesService, user_a: int, user_b: int) -> bool:
     """Проверяет взаимный лайк."""
     try:
-        return service.check_match(from_user_id=user_a, to_user_id=user_b)
+        return await service.check_match(from_user_id=user_a, to_user_id=user_b)
     except Exception:
         return False
 
@@ -71,7 +71,7 @@ async def relay_start(message: Message, state: FSMContext, container: Container
     service: BaseLikesService = container.resolve(BaseLikesService)
     users_service: BaseUsersService = container.resolve(BaseUsersService)
 
-    if not _check_match(service, sender_id, target_id):
+    if not await _check_match(service, sender_id, target_id):
         await message.answer("❌ Сначала нужна взаимная симпатия. Свайпай анкеты!")
         return
 
@@ -154,7 +154,7 @@ async def relay_reply_callback(callback: CallbackQuery, state: FSMContext, conta
         return
 
     service: BaseLikesService = container.resolve(BaseLikesService)
-    if not _check_match(service, sender_id, target_id):
+    if not await _check_match(service, sender_id, target_id):
         await callback.answer("Матч больше не активен")
         return
 
@@ -1,6 +1,5 @@
 import logging
 import urllib.parse
-from datetime import datetime, timezone
 
 from aiogram import Router
 from aiogram.filters import CommandStart
@@ -75,11 +74,9 @@ async def start(message: Message, state: FSMContext, container: Container = init
         user = await service.get_user(telegram_id=message.from_user.id)
 
         if user.is_active:
-            # Обновляем last_seen
-            await service.update_user_info_after_reg(
-                telegram_id=message.from_user.id,
-                data={"last_seen": datetime.now(timezone.utc)},
-            )
+            # Обновляем last_seen (в MongoDB попадёт со следующей пачкой)
+            from app.infra.presence import BasePresenceTracker
+            await container.resolve(BasePresenceTracker).touch(message.from_user.id)
             await message.answer(
                 text=f"С возвращением, <b>{message.from_user.first_name}</b>! 💫",
                 parse_mode="HTML",
@@ -3,8 +3,7 @@ from aiogram import (
     Bot,
     Dispatcher,
 )
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
 
 from app.bot.callbacks.setup import register_callback_routers
 from app.bot.handlers.setup import register_routers
@@ -14,10 +13,9 @@ from app.settings.config import Config
 container = init_container()
 config: Config = container.resolve(Config)
 
-bot = Bot(
-    token=config.token,
-    default=DefaultBotProperties(parse_mode=ParseMode.HTML),
-)
-dp = Dispatcher()
+# Общий с контейнером клиент: API, воркеры и хендлеры шлют через один пул соединений
+bot: Bot = container.resolve(Bot)
+# FSM в Redis (REDIS_URL) — сценарии и свайпы не теряются при рестарте и видны всем процессам
+dp = Dispatcher(storage=container.resolve(BaseStorage))
 register_routers(dp)
 register_callback_routers(dp)
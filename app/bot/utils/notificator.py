@@ -1,25 +1,27 @@
 import logging
-import re
 
 import aiohttp
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
 from aiogram.types import BufferedInputFile
 
+from app.infra.s3.keys import (
+    is_content_key,
+    is_storage_key,
+    key_owner,
+)
+
 # Все импорты из app.bot.* делаются ЛЕНИВО внутри функций,
 # чтобы избежать циклического импорта через bot.main
 
 logger = logging.getLogger(__name__)
 
-# S3 ключ выглядит как: {digits}_{digit}.{ext}
-_S3_KEY_RE = re.compile(r"^\d+_\d+\.\w+$")
-
-
 def _is_s3_key(photo: str) -> bool:
     """Определяет, является ли photo S3-ключом (не file_id и не URL)."""
-    if not photo:
-        return False
-    if photo.startswith("http"):
-        return False
-    return bool(_S3_KEY_RE.match(photo))
+    return is_storage_key(photo)
 
 
 async def _resolve_photo(photo: str, user_id: int | None = None) -> str | bytes | None:
@@ -41,12 +43,16 @@ async def _resolve_photo(photo: str, user_id: int | None = None) -> str | bytes
         container = init_container()
         config: Config = container.resolve(Config)
         api_base = config.front_end_url.rstrip("/")
-        # Извлекаем user_id из ключа, если не передан
-        if user_id is None:
-            user_id = int(photo.split("_")[0])
-        # Индекс из ключа (7741189969_0.jpg → 0)
-        idx = int(photo.split("_")[1].split(".")[0])
-        url = f"{api_base}/api/v1/users/{user_id}/photo/{idx}"
+        # Карточка (720px, JPEG) — Telegram всё равно пережимает фото до 1280px
+        if is_content_key(photo):
+            url = f"{api_base}/api/v1/media/{photo}?variant=card"
+        else:
+            # Извлекаем user_id из ключа, если не передан
+            if user_id is None:
+                user_id = int(photo.split("_")[0])
+            # Индекс из ключа (7741189969_0.jpg → 0)
+            idx = int(photo.split("_")[1].split(".")[0])
+            url = f"{api_base}/api/v1/users/{user_id}/photo/{idx}?variant=card"
         timeout = aiohttp.ClientTimeout(total=3)
         async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.get(url, allow_redirects=True) as resp:
@@ -57,27 +63,79 @@ async def _resolve_photo(photo: str, user_id: int | None = None) -> str | bytes
     return None
 
 
+def _file_cache():
+    from app.infra.telegram_files import BaseTelegramFileCache
+    from app.logic.init import init_container
+    try:
+        return init_container().resolve(BaseTelegramFileCache)
+    except Exception as e:
+        logger.warning(f"Telegram file_id cache unavailable: {e}")
+        return None
+
+
+async def _cached_file_id(cache, s3_key: str) -> str | None:
+    try:
+        return await cache.get(s3_key)
+    except Exception as e:
+        logger.warning(f"file_id lookup failed for key={s3_key}: {e}")
+        return None
+
+
+async def send_cached_photo(send, photo_raw: str, user_id: int | None = None, **kwargs):
+    """
+    Отправляет фото анкеты через send (bot.send_photo, message.answer_photo) с kwargs.
+    S3-ключ отправляется по file_id, запомненному после первой отправки: без скачивания
+    из S3 и повторной загрузки в Telegram. Возвращает Message; None — фото недоступно.
+    Ошибки send пробрасываются.
+    """
+    if not photo_raw:
+        return None
+    cache = _file_cache() if _is_s3_key(photo_raw) else None
+    if cache is not None:
+        file_id = await _cached_file_id(cache, photo_raw)
+        if file_id:
+            try:
+                return await send(photo=file_id, **kwargs)
+            except TelegramBadRequest as e:
+                # file_id другого бота (смена токена) — загрузим заново
+                logger.warning(f"Cached file_id rejected for key={photo_raw}: {e}")
+                await cache.forget(key_owner(photo_raw), photo_raw)
+
+    resolved = await _resolve_photo(photo_raw, user_id)
+    if not resolved:
+        return None
+    photo_input = BufferedInputFile(resolved, filename="photo.jpg") if isinstance(resolved, bytes) else resolved
+    message = await send(photo=photo_input, **kwargs)
+    if cache is not None and isinstance(resolved, bytes) and getattr(message, "photo", None):
+        try:
+            # Самый крупный размер — Telegram отдаёт его для повторной отправки
+            await cache.set(photo_raw, message.photo[-1].file_id)
+        except Exception as e:
+            logger.warning(f"file_id store failed for key={photo_raw}: {e}")
+    return message
+
+
 async def _send_photo_or_text(chat_id: int, photo_raw, text: str, reply_markup, user_id: int | None = None):
     """Отправляет фото с caption или текст, правильно обрабатывая S3-ключи."""
     from app.bot.main import bot
     if photo_raw:
-        resolved = await _resolve_photo(photo_raw, user_id)
-        if resolved:
-            try:
-                if isinstance(resolved, bytes):
-                    photo_input = BufferedInputFile(resolved, filename="photo.jpg")
-                else:
-                    photo_input = resolved
-                await bot.send_photo(
-                    chat_id=chat_id,
-                    photo=photo_input,
-                    caption=text,
-                    reply_markup=reply_markup,
-                    parse_mode="HTML",
-                )
+        try:
+            sent = await send_cached_photo(
+                bot.send_photo,
+                photo_raw,
+                user_id,
+                chat_id=chat_id,
+                caption=text,
+                reply_markup=reply_markup,
+                parse_mode="HTML",
+            )
+            if sent:
                 return
-            except Exception as e:
-                logger.warning(f"send_photo failed: {e}")
+        except (TelegramRetryAfter, TelegramForbiddenError):
+            # Текстом не уйдёт тоже: лимит или бот заблокирован — решает вызывающий
+            raise
+        except Exception as e:
+            logger.warning(f"send_photo failed: {e}")
 
     await bot.send_message(
         chat_id=chat_id,
@@ -92,86 +150,105 @@ async def send_liked_message(to_user_id: int, sender=None):
     Уведомляет о новом лайке. Показывает фото лайкающего.
     VIP-получатели могут лайкнуть в ответ или написать.
     """
-    from app.bot.keyboards.inline import liked_by_keyboard
     try:
-        # Проверяем уровень подписки у получателя
-        is_premium_recipient = False  # Premium или VIP
-        is_vip_recipient = False      # только VIP
-        try:
-            from app.logic.init import init_container as _ic
-            from app.logic.services.base import BaseUsersService as _BUS
-            from datetime import datetime, timezone
-            _container = _ic()
-            _svc: _BUS = _container.resolve(_BUS)
-            _recipient = await _svc.get_user(telegram_id=to_user_id)
-            _pt = getattr(_recipient, "premium_type", None)
-            _until = getattr(_recipient, "premium_until", None)
-            if _until and hasattr(_until, "tzinfo") and _until.tzinfo is None:
-                _until = _until.replace(tzinfo=timezone.utc)
-            _sub_active = bool(_pt and _until and datetime.now(timezone.utc) < _until)
-            is_vip_recipient = _sub_active and _pt == "vip"
-            is_premium_recipient = _sub_active and _pt in ("vip", "premium")
-        except Exception:
-            pass
-
-        if sender:
-            sender_name = str(getattr(sender, "name", "Кто-то") or "Кто-то")
-            sender_id   = getattr(sender, "telegram_id", None)
-            sender_photo = getattr(sender, "photo", None)
-            sender_username = getattr(sender, "username", None) or None
-            gender_raw = str(getattr(sender, "gender", "") or "").lower()
-            is_male = gender_raw in ("man", "male", "мужской")
-            liked_verb = "лайкнул" if is_male else "лайкнула"
-
-            from aiogram.utils.keyboard import InlineKeyboardBuilder
-            from aiogram.types import InlineKeyboardButton
-
-            if is_premium_recipient:
-                # Premium / VIP: видят кто лайкнул, могут лайкнуть в ответ
+        await _deliver_liked(to_user_id, sender)
+    except Exception as e:
+        logger.warning(f"send_liked_message failed: {e}")
+
+
+def _new_likes_word(n: int) -> str:
+    if n % 10 == 1 and n % 100 != 11:
+        return "новый лайк"
+    if 2 <= n % 10 <= 4 and not 12 <= n % 100 <= 14:
+        return "новых лайка"
+    return "новых лайков"
+
+
+async def _deliver_liked(to_user_id: int, sender=None, count: int = 1):
+    """Лайк (count > 1 — склеенные лайки, sender — последний из них). Ошибки отправки пробрасываются."""
+    # Проверяем уровень подписки у получателя
+    is_premium_recipient = False  # Premium или VIP
+    is_vip_recipient = False      # только VIP
+    try:
+        from app.logic.init import init_container as _ic
+        from app.logic.services.base import BaseUsersService as _BUS
+        from datetime import datetime, timezone
+        _container = _ic()
+        _svc: _BUS = _container.resolve(_BUS)
+        _recipient = await _svc.get_user(telegram_id=to_user_id)
+        _pt = getattr(_recipient, "premium_type", None)
+        _until = getattr(_recipient, "premium_until", None)
+        if _until and hasattr(_until, "tzinfo") and _until.tzinfo is None:
+            _until = _until.replace(tzinfo=timezone.utc)
+        _sub_active = bool(_pt and _until and datetime.now(timezone.utc) < _until)
+        is_vip_recipient = _sub_active and _pt == "vip"
+        is_premium_recipient = _sub_active and _pt in ("vip", "premium")
+    except Exception:
+        pass
+
+    if sender:
+        sender_name = str(getattr(sender, "name", "Кто-то") or "Кто-то")
+        sender_id   = getattr(sender, "telegram_id", None)
+        sender_photo = getattr(sender, "photo", None)
+        sender_username = getattr(sender, "username", None) or None
+        gender_raw = str(getattr(sender, "gender", "") or "").lower()
+        is_male = gender_raw in ("man", "male", "мужской")
+        liked_verb = "лайкнул" if is_male else "лайкнула"
+
+        from aiogram.utils.keyboard import InlineKeyboardBuilder
+        from aiogram.types import InlineKeyboardButton
+
+        if is_premium_recipient:
+            # Premium / VIP: видят кто лайкнул, могут лайкнуть в ответ
+            if count > 1:
                 text = (
-                    f"❤️ <b>{sender_name} {liked_verb} твою анкету!</b>\n\n"
+                    f"❤️ <b>{sender_name} и ещё {count - 1} лайкнули твою анкету!</b>\n\n"
                     f"Хочешь ответить взаимностью?"
                 )
-                builder = InlineKeyboardBuilder()
-                builder.row(InlineKeyboardButton(
-                    text="💗 Лайкнуть в ответ",
-                    callback_data=f"like_back_{sender_id}",
-                ))
-                if is_vip_recipient and sender_username and sender_username.strip():
-                    # Написать первым — только VIP
-                    builder.row(InlineKeyboardButton(
-                        text="✍️ Написать",
-                        url=f"https://t.me/{sender_username.strip()}",
-                    ))
-                elif not is_vip_recipient:
-                    builder.row(InlineKeyboardButton(
-                        text="💎 Написать (нужен VIP)",
-                        callback_data="premium_info",
-                    ))
-                builder.row(InlineKeyboardButton(text="❌ Пропустить", callback_data="profile_page"))
-                kb = builder.as_markup()
             else:
-                # Бесплатный: не видит кто лайкнул
                 text = (
-                    f"❤️ <b>Кто-то лайкнул твою анкету!</b>\n\n"
-                    f"Оформи <b>Premium</b>, чтобы видеть кто и отвечать взаимностью 💎"
+                    f"❤️ <b>{sender_name} {liked_verb} твою анкету!</b>\n\n"
+                    f"Хочешь ответить взаимностью?"
                 )
-                builder = InlineKeyboardBuilder()
-                builder.row(InlineKeyboardButton(text="💎 Получить Premium", callback_data="premium_info"))
-                builder.row(InlineKeyboardButton(text="❌ Закрыть", callback_data="profile_page"))
-                kb = builder.as_markup()
-
-            await _send_photo_or_text(to_user_id, sender_photo, text, kb, user_id=sender_id)
+            builder = InlineKeyboardBuilder()
+            builder.row(InlineKeyboardButton(
+                text="💗 Лайкнуть в ответ",
+                callback_data=f"like_back_{sender_id}",
+            ))
+            if is_vip_recipient and sender_username and sender_username.strip():
+                # Написать первым — только VIP
+                builder.row(InlineKeyboardButton(
+                    text="✍️ Написать",
+                    url=f"https://t.me/{sender_username.strip()}",
+                ))
+            elif not is_vip_recipient:
+                builder.row(InlineKeyboardButton(
+                    text="💎 Написать (нужен VIP)",
+                    callback_data="premium_info",
+                ))
+            builder.row(InlineKeyboardButton(text="❌ Пропустить", callback_data="profile_page"))
+            kb = builder.as_markup()
         else:
-            # Нет данных об отправителе
-            from app.bot.keyboards.inline import liked_by_keyboard as _lbk
-            await _send_photo_or_text(
-                to_user_id, None,
-                "<b>Кто-то поставил тебе лайк 💗</b>\nХочешь узнать кто?",
-                _lbk(),
+            # Бесплатный: не видит кто лайкнул
+            who = f"{count} {_new_likes_word(count)}" if count > 1 else "Кто-то лайкнул твою анкету"
+            text = (
+                f"❤️ <b>{who}!</b>\n\n"
+                f"Оформи <b>Premium</b>, чтобы видеть кто и отвечать взаимностью 💎"
             )
-    except Exception as e:
-        logger.warning(f"send_liked_message failed: {e}")
+            builder = InlineKeyboardBuilder()
+            builder.row(InlineKeyboardButton(text="💎 Получить Premium", callback_data="premium_info"))
+            builder.row(InlineKeyboardButton(text="❌ Закрыть", callback_data="profile_page"))
+            kb = builder.as_markup()
+
+        await _send_photo_or_text(to_user_id, sender_photo, text, kb, user_id=sender_id)
+    else:
+        # Нет данных об отправителе
+        from app.bot.keyboards.inline import liked_by_keyboard as _lbk
+        await _send_photo_or_text(
+            to_user_id, None,
+            "<b>Кто-то поставил тебе лайк 💗</b>\nХочешь узнать кто?",
+            _lbk(),
+        )
 
 
 async def send_icebreaker_message(target_id: int, message: str, sender):
@@ -195,23 +272,27 @@ async def send_icebreaker_message(target_id: int, message: str, sender):
 
 async def send_superlike_message(target_id: int, sender):
     """Отправляет уведомление о суперлайке."""
-    from app.bot.keyboards.inline import liked_by_keyboard
     try:
-        sender_name = str(getattr(sender, "name", "Кто-то") or "Кто-то")
-        sender_photo = getattr(sender, "photo", None)
-        sender_id = getattr(sender, "telegram_id", None)
-
-        text = (
-            f"⭐ <b>{sender_name} отправил(а) тебе Суперлайк!</b>\n\n"
-            f"Ты очень понравился(ась) — он(а) специально выделил(а) тебя.\n"
-            f"Ответить взаимностью?"
-        )
-        kb = liked_by_keyboard()
-        await _send_photo_or_text(target_id, sender_photo, text, kb, user_id=sender_id)
+        await _deliver_superlike(target_id, sender)
     except Exception as e:
         logger.error(f"send_superlike_message failed: {e}")
 
 
+async def _deliver_superlike(target_id: int, sender):
+    from app.bot.keyboards.inline import liked_by_keyboard
+    sender_name = str(getattr(sender, "name", "Кто-то") or "Кто-то")
+    sender_photo = getattr(sender, "photo", None)
+    sender_id = getattr(sender, "telegram_id", None)
+
+    text = (
+        f"⭐ <b>{sender_name} отправил(а) тебе Суперлайк!</b>\n\n"
+        f"Ты очень понравился(ась) — он(а) специально выделил(а) тебя.\n"
+        f"Ответить взаимностью?"
+    )
+    kb = liked_by_keyboard()
+    await _send_photo_or_text(target_id, sender_photo, text, kb, user_id=sender_id)
+
+
 async def send_photo_liked_notification(owner_id: int, liker_name: str, photo_idx: int, owner_is_premium: bool):
     """Уведомляет владельца фото о лайке. Если Premium — показывает имя, иначе анонимно."""
     from app.bot.main import bot
@@ -258,6 +339,13 @@ async def send_match_message(to_user_id: int, matched_user, recipient_id: int |
     matched_user — пользователь, с которым произошёл матч (чьё фото/имя показываем)
     recipient_id — telegram_id получателя (для кнопки "Посмотреть профиль")
     """
+    try:
+        await _deliver_match(to_user_id, matched_user, recipient_id)
+    except Exception as e:
+        logger.error(f"send_match_message failed: {e}")
+
+
+async def _deliver_match(to_user_id: int, matched_user, recipient_id: int | None = None):
     from app.bot.keyboards.inline import match_keyboard
     from app.logic.init import init_container
     from app.settings.config import Config
@@ -277,22 +365,77 @@ async def send_match_message(to_user_id: int, matched_user, recipient_id: int |
     if username == "":
         username = None
 
-    try:
-        text = (
-            f"💕 <b>Взаимная симпатия!</b>\n\n"
-            f"<b>{name}</b>{(', ' + age) if age else ''}{(', ' + city) if city else ''}\n"
-        )
-        if username and username.strip():
-            text += f"👉 <a href='https://t.me/{username}'>Написать {name}</a>"
-
-        kb = match_keyboard(
-            username=username,
-            to_user_id=recipient_id or to_user_id,
-            matched_user_id=matched_id,
-            bot_username=bot_username,
-        )
+    text = (
+        f"💕 <b>Взаимная симпатия!</b>\n\n"
+        f"<b>{name}</b>{(', ' + age) if age else ''}{(', ' + city) if city else ''}\n"
+    )
+    if username and username.strip():
+        text += f"👉 <a href='https://t.me/{username}'>Написать {name}</a>"
+
+    kb = match_keyboard(
+        username=username,
+        to_user_id=recipient_id or to_user_id,
+        matched_user_id=matched_id,
+        bot_username=bot_username,
+    )
 
-        photo = getattr(matched_user, "photo", None)
-        await _send_photo_or_text(to_user_id, photo, text, kb, user_id=matched_id)
-    except Exception as e:
-        logger.error(f"send_match_message failed: {e}")
+    photo = getattr(matched_user, "photo", None)
+    await _send_photo_or_text(to_user_id, photo, text, kb, user_id=matched_id)
+
+
+async def deliver_notification(message) -> None:
+    """
+    Отправляет запись outbox (OutboxMessage). Анкеты читаются при отправке — текст и фото
+    актуальны. Ошибки Telegram (429, бот заблокирован) пробрасываются диспетчеру.
+    """
+    from app.infra.repositories.outbox import (
+        NOTIFICATION_LIKED,
+        NOTIFICATION_MATCH,
+        NOTIFICATION_SUPERLIKE,
+    )
+    from app.logic.init import init_container
+    from app.logic.services.base import BaseUsersService
+
+    service: BaseUsersService = init_container().resolve(BaseUsersService)
+
+    async def load(telegram_id: int | None):
+        if telegram_id is None:
+            return None
+        try:
+            return await service.get_user(telegram_id=telegram_id)
+        except Exception:
+            return None
+
+    payload = message.payload or {}
+    if message.kind == NOTIFICATION_LIKED:
+        await _deliver_liked(message.chat_id, await load(payload.get("sender_id")), count=message.count)
+    elif message.kind == NOTIFICATION_SUPERLIKE:
+        sender = await load(payload.get("sender_id"))
+        if sender is not None:
+            await _deliver_superlike(message.chat_id, sender)
+    elif message.kind == NOTIFICATION_MATCH:
+        matched = await load(payload.get("matched_id"))
+        if matched is not None:
+            await _deliver_match(message.chat_id, matched, recipient_id=message.chat_id)
+    else:
+        logger.warning(f"Unknown notification kind: {message.kind}")
+
+
+async def send_broadcast(job, chat_id: int) -> str | None:
+    """
+    Отправляет рассылку (BroadcastJob) одному получателю. Возвращает file_id фото — по нему
+    задание шлёт фото остальным без повторной загрузки. Ошибки Telegram пробрасываются.
+    """
+    from app.bot.main import bot
+    if not job.photo:
+        await bot.send_message(chat_id=chat_id, text=job.text, parse_mode=job.parse_mode)
+        return None
+    if job.photo_file_id:
+        await bot.send_photo(chat_id=chat_id, photo=job.photo_file_id, caption=job.text, parse_mode=job.parse_mode)
+        return job.photo_file_id
+    resolved = await _resolve_photo(job.photo)
+    if not resolved:
+        raise ValueError(f"Broadcast photo is unavailable: {job.photo}")
+    photo_input = BufferedInputFile(resolved, filename="photo.jpg") if isinstance(resolved, bytes) else resolved
+    message = await bot.send_photo(chat_id=chat_id, photo=photo_input, caption=job.text, parse_mode=job.parse_mode)
+    return message.photo[-1].file_id if getattr(message, "photo", None) else None
@@ -0,0 +1,97 @@
+"""
+Сессия свайпов бота в FSM-хранилище.
+
+В состоянии лежат только курсор ленты и небольшое окно id анкет: анкета загружается
+на каждую карточку. Состояние занимает сотни байт независимо от размера ленты,
+сериализуется в JSON (RedisStorage) и переживает рестарт и смену процесса бота.
+"""
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+from aiogram.fsm.context import FSMContext
+from punq import Container
+
+from app.domain.entities.users import UserEntity
+from app.logic.init import init_container
+from app.logic.services.base import BaseUsersService
+
+
+# id анкет, которые сессия держит заранее; дальше — следующая страница по курсору
+FEED_PAGE_SIZE = 20
+# Ключ сессии в данных FSM
+SESSION_KEY = "session"
+
+
+async def load_feed_ids(
+    container: Container,
+    user_id: int,
+    cursor: str | None = None,
+) -> tuple[list[int], str | None]:
+    """Одна страница ленты (только id, без уже лайкнутых/пропущенных)."""
+    from app.infra.repositories.filters.users import GetFeedFilters
+
+    users_service: BaseUsersService = container.resolve(BaseUsersService)
+    return await users_service.get_feed_ids_for_user(
+        user_id,
+        filters=GetFeedFilters(limit=FEED_PAGE_SIZE, cursor=cursor),
+    )
+
+
+@dataclass
+class UserSession:
+    ids: list[int] = field(default_factory=list)
+    use_swipe_card: bool = False  # /match: Like, Skip, Message, Report
+    # Для ленты: чья сессия и курсор следующей страницы (None — страниц больше нет)
+    owner_id: int | None = None
+    next_cursor: str | None = None
+
+    def has_more_users(self) -> bool:
+        return bool(self.ids) or bool(self.next_cursor and self.owner_id)
+
+    async def get_next_user(self, container: Container | None = None) -> UserEntity | None:
+        container = container or init_container()
+        users_service: BaseUsersService = container.resolve(BaseUsersService)
+        while True:
+            if not self.ids and self.next_cursor and self.owner_id:
+                # Окно просмотрено — догружаем следующую страницу id
+                try:
+                    self.ids, self.next_cursor = await load_feed_ids(container, self.owner_id, self.next_cursor)
+                except Exception:
+                    self.ids, self.next_cursor = [], None
+            if not self.ids:
+                return None
+            telegram_id = self.ids.pop(0)
+            try:
+                return await users_service.get_user(telegram_id=telegram_id)
+            except Exception:
+                # Анкету удалили после выдачи ленты — показываем следующую
+                continue
+
+    def to_state(self) -> dict:
+        return {
+            "ids": list(self.ids),
+            "swipe": self.use_swipe_card,
+            "owner": self.owner_id,
+            "cursor": self.next_cursor,
+        }
+
+    @classmethod
+    def from_state(cls, data) -> "UserSession | None":
+        if not isinstance(data, dict):
+            return None
+        return cls(
+            ids=[int(telegram_id) for telegram_id in data.get("ids") or []],
+            use_swipe_card=bool(data.get("swipe")),
+            owner_id=data.get("owner"),
+            next_cursor=data.get("cursor"),
+        )
+
+
+async def load_session(state: FSMContext) -> UserSession | None:
+    return UserSession.from_state((await state.get_data()).get(SESSION_KEY))
+
+
+async def save_session(state: FSMContext, session: UserSession) -> None:
+    await state.update_data({SESSION_KEY: session.to_state()})
@@ -36,6 +36,9 @@ class UserEntity(BaseEntity):
     superlike_credits: int = 0
     # Пакеты свайпов (40/80) — расходуются после исчерпания daily_likes_free
     swipe_credits: int = 0
+    # Дневной счётчик лайков: likes_today за сутки likes_day ("YYYY-MM-DD", UTC)
+    likes_today: int = 0
+    likes_day: Optional[str] = None
     # Буст профиля
     boost_until: Optional[datetime] = None
     boosts_this_week: int = 0
@@ -50,6 +53,7 @@ class UserEntity(BaseEntity):
     ai_traits: list = None                   # ["calm", "family_oriented"]
     ai_skills: list = None                   # ["cooking"]
     ai_appearance: list = None               # ["red_hair"]
+    ai_profile_hash: Optional[str] = None    # хэш имени/возраста/города/о себе на момент enrichment
 
     def __post_init__(self):
         if self.photos is None:
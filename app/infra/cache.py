@@ -0,0 +1,61 @@
+"""
+In-process LRU-кэш с TTL для горячих путей без I/O (presigned URL, photos[]).
+
+Кэш локален для процесса: при нескольких воркерах uvicorn инвалидация
+видна только в том, где произошла запись, поэтому TTL ограничивает устаревание.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Any,
+    Hashable,
+)
+
+
+@dataclass
+class TTLCache:
+    maxsize: int = 10_000
+    ttl_seconds: float = 60.0
+
+    # key → (момент истечения по time.monotonic, значение); порядок — от давно использованных
+    _items: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._items.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._items[key]
+            return default
+        self._items.move_to_end(key)
+        return value
+
+    def expires_in(self, key: Hashable) -> float:
+        """Сколько секунд ещё живёт запись (0 — нет или истекла)."""
+        item = self._items.get(key)
+        return max(0.0, item[0] - time.monotonic()) if item is not None else 0.0
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            self._items.pop(key, None)
+            return
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable) -> Any:
+        item = self._items.pop(key, None)
+        return item[1] if item is not None else None
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
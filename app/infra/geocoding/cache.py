@@ -39,6 +39,16 @@ def _doc_to_result(doc: dict) -> GeocodingResult | None:
         return None
 
 
+def _is_fresh(doc: dict) -> bool:
+    expires = doc.get("expires_at")
+    if not expires:
+        return False
+    # Motor без tz_aware возвращает naive datetime (UTC)
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires > datetime.now(timezone.utc)
+
+
 def _result_to_doc(r: GeocodingResult) -> dict:
     return {
         "lat": r.lat,
@@ -73,8 +83,7 @@ class CachedGeocoder(BaseGeocoder):
         h = _query_hash(query, "geocode")
         doc = await self.collection.find_one({"_id": h})
         if doc:
-            expires = doc.get("expires_at")
-            if expires and expires > datetime.now(timezone.utc):
+            if _is_fresh(doc):
                 return _doc_to_result(doc)
             await self.collection.delete_one({"_id": h})
 
@@ -101,8 +110,7 @@ class CachedGeocoder(BaseGeocoder):
         h = _query_hash(query, "reverse")
         doc = await self.collection.find_one({"_id": h})
         if doc:
-            expires = doc.get("expires_at")
-            if expires and expires > datetime.now(timezone.utc):
+            if _is_fresh(doc):
                 return _doc_to_result(doc)
             await self.collection.delete_one({"_id": h})
 
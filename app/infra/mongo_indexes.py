@@ -1,26 +1,397 @@
-"""Создание индексов MongoDB при старте приложения."""
+"""
+Реестр индексов MongoDB и их идемпотентная сверка.
+
+Все индексы legacy-коллекций описаны здесь, в одном месте (get_index_registry).
+reconcile_indexes() сравнивает реестр с index_information() каждой коллекции:
+  - отсутствующие индексы создаёт;
+  - индексы с теми же ключами, но другими опциями (unique/TTL/sparse) только показывает,
+    пересоздаёт лишь с rebuild=True; если новый индекс не создался (например, unique
+    на коллекции с дублями), прежний восстанавливается;
+  - совпадающие не трогает;
+  - лишние (не из реестра) только показывает, удаляет лишь с drop_extra=True.
+
+Вызывается из lifespan FastAPI при старте (без rebuild и drop_extra — старт ничего
+не удаляет) и вручную из CLI:
+    python -m app.infra.mongo_indexes [--dry-run] [--rebuild] [--drop-extra]
+"""
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass, field
+from typing import Any
 
 from motor.motor_asyncio import AsyncIOMotorClient
 
 logger = logging.getLogger(__name__)
 
 
-async def ensure_geo_indexes(
+@dataclass(frozen=True)
+class IndexSpec:
+    name: str
+    keys: tuple[tuple[str, Any], ...]
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: int | None = None
+    partial_filter: dict | None = None
+
+    def create_kwargs(self) -> dict:
+        kwargs: dict = {"name": self.name}
+        if self.unique:
+            kwargs["unique"] = True
+        if self.sparse:
+            kwargs["sparse"] = True
+        if self.expire_after_seconds is not None:
+            kwargs["expireAfterSeconds"] = self.expire_after_seconds
+        if self.partial_filter is not None:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        return kwargs
+
+    def same_keys(self, info: dict) -> bool:
+        return _normalize_keys(info.get("key", [])) == _normalize_keys(self.keys)
+
+    def same_options(self, info: dict) -> bool:
+        partial = info.get("partialFilterExpression")
+        return (
+            bool(info.get("unique", False)) == self.unique
+            and bool(info.get("sparse", False)) == self.sparse
+            and info.get("expireAfterSeconds") == self.expire_after_seconds
+            and (dict(partial) if partial is not None else None) == self.partial_filter
+        )
+
+
+def _restore_kwargs(name: str, info: dict) -> dict:
+    """Опции create_index, с которыми индекс name был создан (из index_information())."""
+    kwargs: dict = {"name": name}
+    for option in ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression"):
+        if info.get(option) is not None:
+            kwargs[option] = info[option]
+    return kwargs
+
+
+def _normalize_keys(keys) -> tuple:
+    # index_information() отдаёт направления как float (1.0) — приводим к int
+    result = []
+    for name, direction in keys:
+        if isinstance(direction, float) and direction.is_integer():
+            direction = int(direction)
+        result.append((name, direction))
+    return tuple(result)
+
+
+def get_index_registry(
+    users_collection: str = "users",
+    likes_collection: str = "likes",
+) -> dict[str, list[IndexSpec]]:
+    """Все индексы legacy-бэкенда: коллекция → список индексов."""
+    return {
+        users_collection: [
+            IndexSpec("telegram_id_unique", (("telegram_id", 1),), unique=True),
+            # Лента и AI-подбор: нормализованный пол → город (equality по gender_norm/city_canonical)
+            IndexSpec(
+                "feed_gender_norm_city",
+                (("gender_norm", 1), ("city_canonical", 1), ("telegram_id", 1)),
+            ),
+            IndexSpec("location_2dsphere", (("location", "2dsphere"),)),
+            # Админ-статистика: онлайн, новые пользователи, подписки
+            IndexSpec("last_seen_desc", (("last_seen", -1),)),
+            IndexSpec("created_at_desc", (("created_at", -1),)),
+            IndexSpec("premium_type_until", (("premium_type", 1), ("premium_until", 1)), sparse=True),
+            IndexSpec("referred_by", (("referred_by", 1),), sparse=True),
+        ],
+        likes_collection: [
+            IndexSpec("from_user_to_user_unique", (("from_user", 1), ("to_user", 1)), unique=True),
+            # count_likes_today и лайки «от меня» по дате (_id — keyset-пагинация без сортировки в памяти)
+            IndexSpec("from_user_created_at", (("from_user", 1), ("created_at", -1), ("_id", -1))),
+            # «кто меня лайкнул»
+            IndexSpec("to_user_created_at", (("to_user", 1), ("created_at", -1), ("_id", -1))),
+        ],
+        "dislikes": [
+            IndexSpec("from_user_to_user_unique", (("from_user", 1), ("to_user", 1)), unique=True),
+        ],
+        "matches": [
+            # Список мэтчей пользователя, новые первыми; проверка пары — по _id "a:b"
+            IndexSpec(
+                "users_status_matched_at",
+                (("users", 1), ("status", 1), ("matched_at", -1), ("_id", -1)),
+            ),
+        ],
+        "photo_likes": [
+            IndexSpec(
+                "owner_photo_from_user_unique",
+                (("owner_id", 1), ("photo_index", 1), ("from_user", 1)),
+                unique=True,
+            ),
+        ],
+        "photo_comments": [
+            IndexSpec("owner_photo_created_at", (("owner_id", 1), ("photo_index", 1), ("created_at", -1))),
+        ],
+        "geocode_cache": [
+            # Документы удаляются Mongo сразу после expires_at
+            IndexSpec("expires_at_ttl", (("expires_at", 1),), expire_after_seconds=0),
+        ],
+        "feed_queues": [
+            # Инвалидация: очереди, где есть анкета, и очереди её города/пола
+            IndexSpec("ids", (("ids", 1),)),
+            IndexSpec("target_gender_city", (("target_gender", 1), ("city_canonical", 1))),
+            # Очереди, которые давно не открывали, удаляются
+            IndexSpec("served_at_ttl", (("served_at", 1),), expire_after_seconds=14 * 24 * 3600),
+        ],
+        "auth_tokens": [
+            IndexSpec("token_unique", (("token", 1),), unique=True),
+            IndexSpec("expires_at_ttl", (("expires_at", 1),), expire_after_seconds=0),
+        ],
+        "transactions": [
+            IndexSpec("transaction_id_unique", (("transaction_id", 1),), unique=True, sparse=True),
+            IndexSpec("telegram_id_created_at", (("telegram_id", 1), ("created_at", -1))),
+        ],
+        "reports": [
+            IndexSpec("status_created_at", (("status", 1), ("created_at", -1))),
+        ],
+        "notification_outbox": [
+            # Диспетчер забирает готовые записи по available_at
+            IndexSpec("available_at", (("available_at", 1),)),
+            # Склейка лайков: ждущая запись получателя — одна на ключ
+            IndexSpec(
+                "coalesce_key_pending_unique",
+                (("coalesce_key", 1),),
+                unique=True,
+                partial_filter={"status": "pending", "coalesce_key": {"$exists": True}},
+            ),
+        ],
+        "broadcast_jobs": [
+            # BroadcastWorker берёт активное задание с истёкшей арендой
+            IndexSpec("status_lease_until", (("status", 1), ("lease_until", 1))),
+            IndexSpec("created_at", (("created_at", -1),)),
+        ],
+        "broadcast_recipients": [
+            # Идемпотентный перенос пачки получателей
+            IndexSpec("job_id_chat_id_unique", (("job_id", 1), ("chat_id", 1)), unique=True),
+            IndexSpec("job_id_status_chat_id", (("job_id", 1), ("status", 1), ("chat_id", 1))),
+            # Итоги по получателям старых рассылок не нужны
+            IndexSpec("created_at_ttl", (("created_at", 1),), expire_after_seconds=30 * 24 * 3600),
+        ],
+    }
+
+
+@dataclass
+class IndexReconcileReport:
+    created: list[str] = field(default_factory=list)
+    rebuilt: list[str] = field(default_factory=list)
+    # Ключи совпадают, опции нет — пересоздаются только с rebuild=True
+    mismatched: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    extra: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.created or self.rebuilt or self.dropped)
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "rebuilt": self.rebuilt,
+            "mismatched": self.mismatched,
+            "unchanged": self.unchanged,
+            "extra": self.extra,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    def format(self) -> str:
+        lines = []
+        for title, sign, items in (
+            ("created", "+", self.created),
+            ("rebuilt", "~", self.rebuilt),
+            ("dropped", "-", self.dropped),
+            ("mismatched", "*", self.mismatched),
+            ("extra", "?", self.extra),
+        ):
+            for item in items:
+                lines.append(f"{sign} {item} ({title})")
+        for item, error in self.failed.items():
+            lines.append(f"! {item}: {error}")
+        lines.append(
+            f"{len(self.created)} created, {len(self.rebuilt)} rebuilt, {len(self.mismatched)} mismatched, "
+            f"{len(self.unchanged)} unchanged, {len(self.extra)} extra, {len(self.failed)} failed"
+        )
+        return "\n".join(lines)
+
+
+async def reconcile_indexes(
     client: AsyncIOMotorClient,
     db_name: str,
-    users_collection: str,
+    registry: dict[str, list[IndexSpec]],
+    dry_run: bool = False,
+    drop_extra: bool = False,
+    rebuild: bool = False,
+) -> IndexReconcileReport:
+    """
+    Приводит индексы коллекций к реестру. Повторный запуск ничего не меняет.
+    rebuild — пересоздавать индексы с другими опциями или занятым именем; без него они
+    попадают в report.mismatched.
+    """
+    report = IndexReconcileReport()
+    db = client[db_name]
+
+    for collection_name, specs in registry.items():
+        col = db[collection_name]
+        try:
+            existing: dict[str, dict] = await col.index_information()
+        except Exception as e:
+            report.failed[collection_name] = str(e)
+            continue
+
+        matched: set[str] = {"_id_"}
+        for spec in specs:
+            label = f"{collection_name}.{spec.name}"
+            # Ищем сначала по ключам: индекс мог быть создан вручную под другим именем
+            current_name = next(
+                (name for name, info in existing.items() if spec.same_keys(info)),
+                None,
+            )
+            if current_name is not None:
+                matched.add(current_name)
+                if spec.same_options(existing[current_name]):
+                    report.unchanged.append(label)
+                    continue
+                await _rebuild_index(col, current_name, existing[current_name], spec, label, report, dry_run, rebuild)
+                continue
+
+            if spec.name in existing:
+                # Имя занято индексом с другими ключами — пересоздаём под реестр
+                matched.add(spec.name)
+                await _rebuild_index(col, spec.name, existing[spec.name], spec, label, report, dry_run, rebuild)
+                continue
+
+            report.created.append(label)
+            if dry_run:
+                continue
+            try:
+                await col.create_index(list(spec.keys), **spec.create_kwargs())
+            except Exception as e:
+                # Например, unique на коллекции с дублями — сообщаем, старт не роняем
+                report.failed[label] = str(e)
+
+        for name in existing:
+            if name in matched:
+                continue
+            label = f"{collection_name}.{name}"
+            if drop_extra and not dry_run:
+                try:
+                    await col.drop_index(name)
+                    report.dropped.append(label)
+                except Exception as e:
+                    report.failed[label] = str(e)
+            else:
+                report.extra.append(label)
+
+    return report
+
+
+async def _rebuild_index(
+    col,
+    old_name: str,
+    old_info: dict,
+    spec: IndexSpec,
+    label: str,
+    report: IndexReconcileReport,
+    dry_run: bool,
+    rebuild: bool,
 ) -> None:
-    """Создаёт 2dsphere индекс для location (если поле есть у документов)."""
-    col = client[db_name][users_collection]
-    indexes = await col.index_information()
-    if "location_2dsphere" in indexes:
+    """Пересоздаёт индекс old_name по spec. Не создался новый — возвращает прежний."""
+    if not rebuild:
+        report.mismatched.append(label)
+        return
+    report.rebuilt.append(label)
+    if dry_run:
+        return
+    try:
+        await col.drop_index(old_name)
+    except Exception as e:
+        report.failed[label] = str(e)
         return
     try:
-        await col.create_index([("location", "2dsphere")], name="location_2dsphere")
-        logger.info("Created 2dsphere index on %s.%s.location", db_name, users_collection)
+        await col.create_index(list(spec.keys), **spec.create_kwargs())
     except Exception as e:
-        # Индекс может не создаться если нет документов с location — это ок
-        logger.warning("Could not create location 2dsphere index: %s", e)
+        report.failed[label] = str(e)
+        try:
+            old_keys = list(_normalize_keys(old_info.get("key", [])))
+            await col.create_index(old_keys, **_restore_kwargs(old_name, old_info))
+        except Exception as restore_error:
+            report.failed[label] = f"{e}; previous index not restored: {restore_error}"
+
+
+async def ensure_indexes(
+    client: AsyncIOMotorClient,
+    config,
+    dry_run: bool = False,
+    drop_extra: bool = False,
+    rebuild: bool = False,
+) -> IndexReconcileReport:
+    """Сверка всех индексов реестра для базы из Config."""
+    registry = get_index_registry(
+        users_collection=config.mongodb_users_collection,
+        likes_collection=config.mongodb_likes_collection,
+    )
+    report = await reconcile_indexes(
+        client,
+        config.mongodb_dating_database,
+        registry,
+        dry_run=dry_run,
+        drop_extra=drop_extra,
+        rebuild=rebuild,
+    )
+    if report.has_changes or report.failed:
+        logger.info("Mongo indexes reconciled:\n%s", report.format())
+    if report.mismatched and not rebuild:
+        logger.warning(
+            "Mongo indexes differ from the registry, run `python -m app.infra.mongo_indexes --rebuild`: %s",
+            ", ".join(report.mismatched),
+        )
+    return report
+
+
+async def ensure_geo_indexes(
+    client: AsyncIOMotorClient,
+    db_name: str,
+    users_collection: str,
+) -> None:
+    """Создаёт 2dsphere индекс для location (часть общего реестра)."""
+    specs = [
+        spec for spec in get_index_registry(users_collection=users_collection)[users_collection]
+        if spec.name == "location_2dsphere"
+    ]
+    report = await reconcile_indexes(client, db_name, {users_collection: specs})
+    for label, error in report.failed.items():
+        logger.warning("Could not create index %s: %s", label, error)
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+
+    from app.settings.config import Config
+
+    parser = argparse.ArgumentParser(description="Reconcile MongoDB indexes with the registry.")
+    parser.add_argument("--dry-run", action="store_true", help="only print the diff")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="recreate indexes whose options differ from the registry",
+    )
+    parser.add_argument("--drop-extra", action="store_true", help="drop indexes missing from the registry")
+    args = parser.parse_args()
+
+    async def _main() -> int:
+        config = Config()
+        client = AsyncIOMotorClient(config.mongodb_connection_uri)
+        try:
+            report = await ensure_indexes(
+                client, config, dry_run=args.dry_run, drop_extra=args.drop_extra, rebuild=args.rebuild,
+            )
+        finally:
+            client.close()
+        print(report.format())
+        return 1 if report.failed else 0
+
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,125 @@
+"""
+Присутствие пользователей (last_seen) без записи в MongoDB на каждый пинг.
+
+Пинги Mini App и бота попадают в трекер: время последней активности и множество
+«грязных» id, которые PresenceFlushWorker раз в N секунд пишет в users одним bulk_write.
+Счётчики «онлайн» и проверка «в сети ли» отвечают из трекера.
+
+MemoryPresenceTracker — в памяти процесса (один воркер uvicorn).
+RedisPresenceTracker — общий для нескольких воркеров/реплик (REDIS_URL).
+"""
+import time
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import (
+    datetime,
+    timezone,
+)
+from typing import Any
+
+
+# Сколько держать время активности в трекере: самый длинный интервал «онлайн» — час
+PRESENCE_RETENTION_SECONDS = 2 * 3600
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+@dataclass
+class BasePresenceTracker(ABC):
+    @abstractmethod
+    async def touch(self, telegram_id: int, at: float | None = None) -> None:
+        """Отмечает активность (at — unix-время, по умолчанию сейчас)."""
+
+    @abstractmethod
+    async def last_seen(self, telegram_id: int) -> datetime | None:
+        """Последняя активность из трекера; None — не было за PRESENCE_RETENTION_SECONDS."""
+
+    @abstractmethod
+    async def count_online(self, within_seconds: float) -> int:
+        """Сколько пользователей были активны за последние within_seconds."""
+
+    @abstractmethod
+    async def drain(self) -> dict[int, datetime]:
+        """Забирает накопленные с прошлого вызова last_seen для записи в MongoDB."""
+
+    async def is_online(self, telegram_id: int, within_seconds: float = 300) -> bool:
+        seen = await self.last_seen(telegram_id)
+        return seen is not None and time.time() - seen.timestamp() <= within_seconds
+
+
+@dataclass
+class MemoryPresenceTracker(BasePresenceTracker):
+    _seen: dict[int, float] = field(default_factory=dict, init=False, repr=False)
+    _dirty: dict[int, float] = field(default_factory=dict, init=False, repr=False)
+
+    async def touch(self, telegram_id: int, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        # Более ранний пинг не отматывает время, но анкета всё равно попадёт в пачку:
+        # так возвращаются пинги после неудачной записи (datetime округляет до микросекунд)
+        at = max(at, self._seen.get(telegram_id, 0.0))
+        self._seen[telegram_id] = at
+        self._dirty[telegram_id] = at
+
+    async def last_seen(self, telegram_id: int) -> datetime | None:
+        at = self._seen.get(telegram_id)
+        return _to_datetime(at) if at is not None else None
+
+    async def count_online(self, within_seconds: float) -> int:
+        since = time.time() - within_seconds
+        return sum(1 for at in self._seen.values() if at >= since)
+
+    async def drain(self) -> dict[int, datetime]:
+        dirty, self._dirty = self._dirty, {}
+        # Старые записи больше не нужны ни для счётчиков, ни для записи
+        expired = time.time() - PRESENCE_RETENTION_SECONDS
+        self._seen = {telegram_id: at for telegram_id, at in self._seen.items() if at >= expired}
+        return {telegram_id: _to_datetime(at) for telegram_id, at in dirty.items()}
+
+
+@dataclass
+class RedisPresenceTracker(BasePresenceTracker):
+    """
+    presence:last_seen — sorted set (score = unix-время): счётчики через ZCOUNT.
+    presence:dirty — hash id → время, забирается атомарно (MULTI: HGETALL + DEL).
+    """
+
+    redis: Any  # redis.asyncio.Redis
+    key_prefix: str = "presence"
+
+    @property
+    def _seen_key(self) -> str:
+        return f"{self.key_prefix}:last_seen"
+
+    @property
+    def _dirty_key(self) -> str:
+        return f"{self.key_prefix}:dirty"
+
+    async def touch(self, telegram_id: int, at: float | None = None) -> None:
+        at = time.time() if at is None else at
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self._seen_key, {str(telegram_id): at}, gt=True)
+            pipe.hset(self._dirty_key, str(telegram_id), repr(at))
+            await pipe.execute()
+
+    async def last_seen(self, telegram_id: int) -> datetime | None:
+        at = await self.redis.zscore(self._seen_key, str(telegram_id))
+        return _to_datetime(float(at)) if at is not None else None
+
+    async def count_online(self, within_seconds: float) -> int:
+        return await self.redis.zcount(self._seen_key, time.time() - within_seconds, "+inf")
+
+    async def drain(self) -> dict[int, datetime]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hgetall(self._dirty_key)
+            pipe.delete(self._dirty_key)
+            pipe.zremrangebyscore(self._seen_key, "-inf", time.time() - PRESENCE_RETENTION_SECONDS)
+            dirty, _, _ = await pipe.execute()
+        return {int(telegram_id): _to_datetime(float(at)) for telegram_id, at in dirty.items()}
@@ -0,0 +1,88 @@
+"""
+Ограничение частоты отправки в Telegram: token bucket на весь бот и на каждый чат.
+
+Лимиты Bot API: около 30 сообщений в секунду всего и около одного в секунду в один чат
+(короткие всплески допускаются). Превышение даёт 429 с retry_after — тогда penalize()
+приостанавливает чат и общий поток на указанное время.
+"""
+import asyncio
+import time
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+from app.infra.cache import TTLCache
+
+
+@dataclass
+class TokenBucket:
+    rate: float  # токенов в секунду
+    capacity: float  # максимальный всплеск
+
+    _tokens: float | None = field(default=None, init=False, repr=False)
+    _updated: float = field(default=0.0, init=False, repr=False)
+    _paused_until: float = field(default=0.0, init=False, repr=False)
+
+    def _refill(self, now: float) -> None:
+        if self._tokens is None:
+            self._tokens = self.capacity
+        else:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now: float | None = None) -> float:
+        """Сколько секунд ждать до свободного токена (0 — можно сейчас)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+        return max(wait, self._paused_until - now)
+
+    def take(self) -> None:
+        self._tokens = (self._tokens if self._tokens is not None else self.capacity) - 1
+
+    def pause(self, seconds: float, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._paused_until = max(self._paused_until, now + seconds)
+
+
+@dataclass
+class TelegramRateLimiter:
+    global_rate: float = 25.0
+    chat_rate: float = 1.0
+    chat_burst: float = 3.0
+
+    _global: TokenBucket | None = field(default=None, init=False, repr=False)
+    # Бакет простаивающего чата через минуту снова полон — хранить его дольше незачем
+    _chats: TTLCache = field(
+        default_factory=lambda: TTLCache(maxsize=100_000, ttl_seconds=60),
+        init=False,
+        repr=False,
+    )
+
+    def __post_init__(self) -> None:
+        self._global = TokenBucket(rate=self.global_rate, capacity=max(1.0, self.global_rate))
+
+    def _chat(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+        # Продлевает жизнь записи на каждое обращение
+        self._chats.set(chat_id, bucket)
+        return bucket
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ждёт, пока можно отправить в chat_id, и занимает токены обоих бакетов."""
+        while True:
+            chat = self._chat(chat_id)
+            wait = max(chat.wait_time(), self._global.wait_time())
+            if wait <= 0:
+                chat.take()
+                self._global.take()
+                return
+            await asyncio.sleep(wait)
+
+    def penalize(self, chat_id: int, retry_after: float) -> None:
+        """429: чат и общий поток молчат retry_after секунд (какой лимит сработал, Telegram не сообщает)."""
+        self._chat(chat_id).pause(retry_after)
+        self._global.pause(retry_after)
@@ -3,12 +3,27 @@ from abc import (
     abstractmethod,
 )
 from dataclasses import dataclass
-from typing import Iterable
+from typing import (
+    Container,
+    Iterable,
+)
 
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
 from app.domain.values.users import AboutText
+from app.infra.repositories.broadcasts import BroadcastJob
+from app.infra.repositories.daily_likes import (
+    LIKE_SLOT_CREDIT,
+    LIKE_SLOT_FREE,
+    likes_used_today,
+)
+from app.infra.repositories.feed_queue import FeedQueueSlice
+from app.infra.repositories.outbox import (
+    OutboxMessage,
+    OutboxStats,
+)
 from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.seen import SeenProfiles
 
 
 @dataclass
@@ -51,11 +66,62 @@ class BaseUsersRepository(ABC):
     ) -> Iterable[UserEntity]: ...
 
     @abstractmethod
-    async def get_best_result_for_user(
+    async def get_feed_page(
         self,
         telegram_id: int,
         exclude_ids: list[int] | None = None,
-    ) -> Iterable[UserEntity]: ...
+        limit: int = 20,
+        after: dict | None = None,
+        seen: Container[int] | None = None,
+    ) -> tuple[list[UserEntity], dict | None]:
+        """Страница ленты и позиция для следующей страницы (None — дальше пусто)."""
+
+    async def rank_feed(
+        self,
+        telegram_id: int,
+        exclude_ids: list[int] | None = None,
+        limit: int = 20,
+        after: dict | None = None,
+        seen: Container[int] | None = None,
+    ) -> tuple[list[int], dict | None]:
+        """Только telegram_id страницы ленты. По умолчанию — через get_feed_page."""
+        users, next_position = await self.get_feed_page(
+            telegram_id=telegram_id,
+            exclude_ids=exclude_ids,
+            limit=limit,
+            after=after,
+            seen=seen,
+        )
+        return [user.telegram_id for user in users], next_position
+
+    async def get_users_in_order(
+        self,
+        telegram_ids: list[int],
+        projection: dict | None = None,
+    ) -> list[UserEntity]:
+        """
+        Анкеты по списку id в порядке списка (отсутствующие пропускаются).
+        projection — какие поля читать (например, USER_CARD_PROJECTION); None — все.
+        """
+        users = []
+        for telegram_id in telegram_ids:
+            user = await self.get_user_by_telegram_id(telegram_id)
+            if user:
+                users.append(user)
+        return users
+
+    async def get_feed_eligible_ids(self, telegram_ids: list[int]) -> set[int]:
+        """
+        Кого из telegram_ids сейчас можно показывать в ленте: не забанен, не скрыт, активен
+        (те же условия, что в rank_feed). Для id из готовых очередей рекомендаций.
+        """
+        users = await self.get_users_in_order(telegram_ids)
+        return {
+            user.telegram_id for user in users
+            if not getattr(user, "is_banned", False)
+            and not getattr(user, "profile_hidden", False)
+            and getattr(user, "is_active", True)
+        }
 
     async def get_ai_matchmaking_candidates(
         self,
@@ -67,10 +133,91 @@ class BaseUsersRepository(ABC):
         city: str | None = None,
         city_include_neighbors: bool = False,
         limit: int = 300,
+        seen: Container[int] | None = None,
     ) -> list[UserEntity]:
         """Кандидаты для AI-подбора по жестким фильтрам. По умолчанию — заглушка."""
         return []
 
+    async def set_city_coordinates(self, city: str, lat: float, lon: float) -> int:
+        """Сохраняет координаты города анкетам без координат. По умолчанию — заглушка."""
+        return 0
+
+    async def consume_credit(self, telegram_id: int, field: str) -> bool:
+        """
+        Списывает единицу счётчика field (swipe_credits, superlike_credits), если он больше нуля.
+        Возвращает False, если списывать нечего. По умолчанию — чтение и запись анкеты.
+        """
+        user = await self.get_user_by_telegram_id(telegram_id)
+        credits = getattr(user, field, 0) or 0 if user else 0
+        if credits <= 0:
+            return False
+        await self.update_user_info_after_register(telegram_id, {field: credits - 1})
+        return True
+
+    async def refund_credit(self, telegram_id: int, field: str) -> None:
+        """Возвращает единицу, списанную consume_credit. По умолчанию — чтение и запись анкеты."""
+        user = await self.get_user_by_telegram_id(telegram_id)
+        if user:
+            credits = getattr(user, field, 0) or 0
+            await self.update_user_info_after_register(telegram_id, {field: credits + 1})
+
+    async def update_last_seen_many(self, last_seen: dict) -> int:
+        """Записывает last_seen пачкой (telegram_id → datetime). По умолчанию — по одной анкете."""
+        for telegram_id, at in last_seen.items():
+            await self.update_user_info_after_register(telegram_id, {"last_seen": at})
+        return len(last_seen)
+
+    @abstractmethod
+    async def get_broadcast_audience(self, target: str, after: int | None, limit: int) -> list[int]:
+        """Следующие limit получателей рассылки target с telegram_id > after, по возрастанию id."""
+
+    @abstractmethod
+    async def count_broadcast_audience(self, target: str) -> int: ...
+
+    async def get_media_keys(self, telegram_ids: Iterable[int]) -> set[str]:
+        """Все ключи photos[] и photo указанных анкет (для сборщика медиа). По умолчанию — по одной анкете."""
+        keys: set[str] = set()
+        for telegram_id in set(telegram_ids):
+            user = await self.get_user_by_telegram_id(telegram_id)
+            if user:
+                keys.update(getattr(user, "photos", None) or [])
+                if getattr(user, "photo", None):
+                    keys.add(user.photo)
+        return keys
+
+    async def reserve_daily_like(self, telegram_id: int, day: str, limit: int | None = None) -> str | None:
+        """
+        Учитывает лайк в дневном счётчике до его записи.
+        limit — бесплатный лимит (None — без лимита: Premium, суперлайк); сверх лимита
+        списывается swipe_credits. Возвращает LIKE_SLOT_FREE / LIKE_SLOT_CREDIT,
+        None — лимит исчерпан и кредитов нет. По умолчанию — чтение и запись анкеты.
+        """
+        user = await self.get_user_by_telegram_id(telegram_id)
+        if not user:
+            return None
+        used = likes_used_today(user, day)
+        data: dict = {"likes_day": day, "likes_today": used + 1}
+        slot = LIKE_SLOT_FREE
+        if limit is not None and used >= limit:
+            credits = getattr(user, "swipe_credits", 0) or 0
+            if credits <= 0:
+                return None
+            data["swipe_credits"] = credits - 1
+            slot = LIKE_SLOT_CREDIT
+        await self.update_user_info_after_register(telegram_id, data)
+        return slot
+
+    async def release_daily_like(self, telegram_id: int, day: str, slot: str) -> None:
+        """Возвращает слот reserve_daily_like, если лайк не записался (повторный лайк)."""
+        user = await self.get_user_by_telegram_id(telegram_id)
+        used = likes_used_today(user, day) if user else 0
+        if used <= 0:
+            return
+        data: dict = {"likes_today": used - 1}
+        if slot == LIKE_SLOT_CREDIT:
+            data["swipe_credits"] = (getattr(user, "swipe_credits", 0) or 0) + 1
+        await self.update_user_info_after_register(telegram_id, data)
+
     @abstractmethod
     async def get_icebreaker_count(self, telegram_id: int) -> int: ...
 
@@ -111,6 +258,144 @@ class BaseDislikesRepository(ABC):
     async def remove_dislike(self, from_user: int, to_user: int) -> None: ...
 
 
+@dataclass
+class BaseSeenProfilesRepository(ABC):
+    """Просмотренные анкеты пользователя (лайки + пропуски) для исключения из ленты."""
+
+    @abstractmethod
+    async def get_seen(self, user_id: int) -> SeenProfiles: ...
+
+    @abstractmethod
+    async def add_seen(self, user_id: int, target_id: int, kind: str) -> None: ...
+
+    @abstractmethod
+    async def remove_seen(self, user_id: int, target_id: int, kind: str) -> None: ...
+
+
+@dataclass
+class BaseFeedQueueRepository(ABC):
+    """Материализованные очереди рекомендаций (см. app.infra.repositories.feed_queue)."""
+
+    @abstractmethod
+    async def get_slice(self, owner_id: int, offset: int, count: int) -> FeedQueueSlice | None: ...
+
+    @abstractmethod
+    async def save_queue(
+        self,
+        owner_id: int,
+        ids: list[int],
+        tail: dict | None,
+        target_gender: str | None,
+        city_key: str,
+    ) -> None: ...
+
+    @abstractmethod
+    async def mark_stale(self, candidate_id: int, gender: str | None, city_key: str) -> int: ...
+
+    @abstractmethod
+    async def touch(self, owner_id: int) -> None: ...
+
+    @abstractmethod
+    async def get_owner_ids_to_refresh(
+        self,
+        built_before,
+        served_after,
+        limit: int,
+    ) -> list[int]: ...
+
+
+@dataclass
+class BaseNotificationOutboxRepository(ABC):
+    """Очередь уведомлений бота (см. app.infra.repositories.outbox)."""
+
+    @abstractmethod
+    async def push(self, message: OutboxMessage, delay_seconds: float = 0) -> None:
+        """Ставит уведомление в очередь; склеиваемое — в ждущую запись того же получателя."""
+
+    @abstractmethod
+    async def claim(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        """Забирает до limit готовых записей; не подтверждённые за lease_seconds вернутся в очередь."""
+
+    @abstractmethod
+    async def ack(self, message: OutboxMessage) -> None: ...
+
+    @abstractmethod
+    async def retry(self, message: OutboxMessage, delay_seconds: float, failed: bool = True) -> None:
+        """Возвращает запись в очередь через delay_seconds; failed — засчитать неудачную попытку."""
+
+    @abstractmethod
+    async def stats(self) -> OutboxStats: ...
+
+
+@dataclass
+class BaseBroadcastsRepository(ABC):
+    """Задания рассылки и их получатели (см. app.infra.repositories.broadcasts)."""
+
+    @abstractmethod
+    async def create(self, job: BroadcastJob) -> BroadcastJob: ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> BroadcastJob | None: ...
+
+    @abstractmethod
+    async def list_recent(self, limit: int = 20) -> list[BroadcastJob]: ...
+
+    @abstractmethod
+    async def set_status(self, job_id: str, status: str, expected: Iterable[str]) -> bool:
+        """Переводит задание в status, если текущий статус из expected. False — переход невозможен."""
+
+    @abstractmethod
+    async def claim(self, lease_seconds: float) -> BroadcastJob | None:
+        """Берёт активное задание, не занятое другим процессом, на lease_seconds."""
+
+    @abstractmethod
+    async def release(self, job_id: str) -> None:
+        """Снимает аренду после пачки — следующее задание берётся по очереди."""
+
+    @abstractmethod
+    async def add_recipients(self, job_id: str, chat_ids: list[int], cursor: int) -> None:
+        """Добавляет получателей (pending) и сдвигает курсор; повтор после сбоя не дублирует."""
+
+    @abstractmethod
+    async def finish_audience(self, job_id: str) -> None: ...
+
+    @abstractmethod
+    async def pending_recipients(self, job_id: str, limit: int) -> list[int]: ...
+
+    @abstractmethod
+    async def record(self, job_id: str, results: dict[int, str]) -> None:
+        """Итоги пачки (chat_id → статус получателя) и счётчики задания."""
+
+    @abstractmethod
+    async def set_photo_file_id(self, job_id: str, file_id: str) -> None: ...
+
+    @abstractmethod
+    async def complete(self, job_id: str) -> None:
+        """Задание разослано: status=done, если его не отменили и не поставили на паузу."""
+
+
+@dataclass
+class BaseMatchesRepository(ABC):
+    """Взаимные симпатии: одна запись на пару с нормализованным ключом (меньший id первым)."""
+
+    @abstractmethod
+    async def activate(self, user_a: int, user_b: int) -> bool: ...
+
+    @abstractmethod
+    async def deactivate(self, user_a: int, user_b: int) -> None: ...
+
+    @abstractmethod
+    async def is_match(self, user_a: int, user_b: int) -> bool: ...
+
+    @abstractmethod
+    async def get_matches_page(
+        self,
+        user_id: int,
+        limit: int = 50,
+        before: dict | None = None,
+    ) -> tuple[list[int], dict | None]: ...
+
+
 @dataclass
 class BaseLikesRepository(ABC):
     @abstractmethod
@@ -130,3 +415,45 @@ class BaseLikesRepository(ABC):
 
     @abstractmethod
     async def count_likes_today(self, from_user: int) -> int: ...
+
+    async def add_like(self, like: LikesEntity) -> tuple[bool, bool]:
+        """
+        Идемпотентно ставит лайк. Возвращает (created, is_match):
+        created — лайка не было, is_match — есть встречный лайк.
+        """
+        from_user = like.from_user.as_generic_type()
+        to_user = like.to_user.as_generic_type()
+        created = not await self.check_like_is_exists(from_user, to_user)
+        if created:
+            await self.create_like(like)
+        return created, await self.check_like_is_exists(to_user, from_user)
+
+    async def get_likes_page(
+        self,
+        user_id: int,
+        incoming: bool = False,
+        limit: int = 50,
+        before: dict | None = None,
+        mutual_only: bool = False,
+    ) -> tuple[list[int], dict | None]:
+        """
+        Страница лайков пользователя, новые первыми (keyset по created_at).
+        incoming=False — кого лайкнул user_id, True — кто лайкнул user_id.
+        mutual_only — только взаимные лайки (матчи).
+        before — позиция последнего лайка предыдущей страницы.
+        По умолчанию — срез полного списка id (позиция {"o": смещение}).
+        """
+        if incoming:
+            ids = await self.get_users_ids_liked_by(user_id)
+        else:
+            ids = await self.get_users_ids_liked_from(user_id)
+        if mutual_only:
+            other = set(
+                await self.get_users_ids_liked_from(user_id)
+                if incoming else await self.get_users_ids_liked_by(user_id)
+            )
+            ids = [telegram_id for telegram_id in ids if telegram_id in other]
+        offset = int((before or {}).get("o", 0))
+        page = ids[offset:offset + limit]
+        has_more = offset + limit < len(ids)
+        return page, ({"o": offset + limit} if has_more else None)
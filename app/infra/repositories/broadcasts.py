@@ -0,0 +1,75 @@
+"""
+Рассылки администратора как задания (broadcast jobs).
+
+Задание хранит текст, аудиторию и курсор по telegram_id. BroadcastWorker пачками
+переносит получателей из анкет в broadcast_recipients (status=pending), рассылает
+пачку с соблюдением лимитов Telegram и записывает итог по каждому получателю.
+Курсор и статусы в базе — после рестарта рассылка продолжается с того же места,
+а пауза или отмена вступают в силу со следующей пачки.
+
+Фото загружается в Telegram один раз: file_id первой успешной отправки сохраняется
+в задании и используется для остальных получателей.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+
+BROADCAST_RUNNING = "running"
+BROADCAST_PAUSED = "paused"
+BROADCAST_CANCELLED = "cancelled"
+BROADCAST_DONE = "done"
+
+RECIPIENT_PENDING = "pending"
+RECIPIENT_SENT = "sent"
+RECIPIENT_FAILED = "failed"
+# Бот заблокирован или чат удалён
+RECIPIENT_BLOCKED = "blocked"
+
+# Аудитории рассылки (фильтры по анкетам — в репозитории пользователей)
+BROADCAST_TARGETS = frozenset({"all", "premium", "vip", "active_7d", "no_premium"})
+
+
+@dataclass
+class BroadcastJob:
+    text: str
+    target: str = "all"
+    # http-ссылка, Telegram file_id или S3-ключ
+    photo: str | None = None
+    parse_mode: str = "HTML"
+    status: str = BROADCAST_RUNNING
+    # Последний telegram_id, перенесённый в получатели; None — с начала
+    cursor: int | None = None
+    # Аудитория перенесена целиком — осталось дослать pending
+    audience_done: bool = False
+    # Размер аудитории на момент создания (для прогресса)
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    photo_file_id: str | None = None
+    id: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "target": self.target,
+            "text": self.text,
+            "photo": self.photo,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "blocked": self.blocked,
+            "processed": self.processed,
+            "progress": round(min(1.0, self.processed / self.total), 4) if self.total else 1.0,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "finished_at": self.finished_at,
+        }
@@ -277,16 +277,15 @@ def get_city_coords(city: str) -> tuple[float, float] | None:
         return CITY_COORDS.get(canonical)
 
     # Без учёта регистра
-    for k, v in CITY_COORDS.items():
-        if k.lower() == city_lower:
-            return v
+    key = _CITY_BY_LOWER.get(city_lower)
+    if key is not None:
+        return CITY_COORDS[key]
 
     # Частичное совпадение (≥3 символа, чтобы "го" не матчило)
     if len(city_lower) >= 3:
-        for k, v in CITY_COORDS.items():
-            kl = k.lower()
-            if kl.startswith(city_lower) or city_lower.startswith(kl):
-                return v
+        order = _CITY_PREFIX_INDEX_LOWER.first_related(city_lower)
+        if order is not None:
+            return CITY_COORDS[_CITY_KEYS[order]]
 
     return None
 
@@ -313,14 +312,13 @@ def resolve_to_canonical_city(raw: str) -> str:
         return CITY_ALIASES[s_lower]
     if s in CITY_COORDS:
         return s
-    for k in CITY_COORDS:
-        if _fold_yo(k.lower()) == s_lower:
-            return k
+    key = _CITY_BY_FOLDED.get(s_lower)
+    if key is not None:
+        return key
     if len(s_lower) >= 3:
-        for k in CITY_COORDS:
-            kl = _fold_yo(k.lower())
-            if kl.startswith(s_lower) or s_lower.startswith(kl):
-                return k
+        order = _CITY_PREFIX_INDEX_FOLDED.first_related(s_lower)
+        if order is not None:
+            return _CITY_KEYS[order]
     return s
 
 
@@ -344,18 +342,15 @@ def get_city_filter_values(city_input: str) -> list[str]:
             result.add(alt.lower())
     coords = CITY_COORDS.get(canon)
     if coords:
-        for key, val in CITY_COORDS.items():
-            if val == coords:
-                result.add(key)
-                result.add(key.lower())
-    for alias, target in CITY_ALIASES.items():
-        if target == canon:
-            result.add(alias)
-            result.add(alias.lower())
-    for reg, target in REGION_ALIASES.items():
-        if target == canon:
-            result.add(reg)
-            result.add(reg.lower())
+        for key in _CITIES_BY_COORDS.get(coords, ()):
+            result.add(key)
+            result.add(key.lower())
+    for alias in _ALIASES_BY_CITY.get(canon, ()):
+        result.add(alias)
+        result.add(alias.lower())
+    for reg in _REGIONS_BY_CITY.get(canon, ()):
+        result.add(reg)
+        result.add(reg.lower())
     canon_lower = canon.lower()
     result.add(f"{canon}, Россия")
     result.add(f"{canon}, РФ")
@@ -364,6 +359,68 @@ def get_city_filter_values(city_input: str) -> list[str]:
     return list(result)
 
 
+class _PrefixIndex:
+    """
+    Префиксное дерево по ключам городов (в порядке CITY_COORDS).
+    first_related(q) за O(len(q)) находит первый по порядку ключ k,
+    для которого k.startswith(q) или q.startswith(k) — как линейный обход словаря.
+    """
+
+    # Служебные ключи узла (символы строки — всегда str, коллизий нет)
+    _END = 0  # порядковый номер первого ключа, который заканчивается в этом узле
+    _MIN = 1  # минимальный порядковый номер среди ключей поддерева
+
+    def __init__(self, keys: list[str]):
+        self._root: dict = {}
+        for order, key in enumerate(keys):
+            node = self._root
+            node.setdefault(self._MIN, order)
+            for ch in key:
+                node = node.setdefault(ch, {})
+                node.setdefault(self._MIN, order)
+            node.setdefault(self._END, order)
+
+    def first_related(self, query: str) -> int | None:
+        best: int | None = None
+        node = self._root
+        for ch in query:
+            # Ключ, который является префиксом query
+            end = node.get(self._END)
+            if end is not None and (best is None or end < best):
+                best = end
+            node = node.get(ch)
+            if node is None:
+                return best
+        # Все ключи поддерева начинаются с query (включая равный query)
+        subtree = node.get(self._MIN)
+        if subtree is not None and (best is None or subtree < best):
+            best = subtree
+        return best
+
+
+def _build_inverse(mapping: dict) -> dict:
+    inverse: dict = {}
+    for key, value in mapping.items():
+        inverse.setdefault(value, []).append(key)
+    return inverse
+
+
+# ── Индексы для поиска городов: строятся один раз при импорте ─────────────────
+_CITY_KEYS: list[str] = list(CITY_COORDS)
+_CITY_BY_LOWER: dict[str, str] = {}
+_CITY_BY_FOLDED: dict[str, str] = {}
+for _key in _CITY_KEYS:
+    # setdefault — при совпадении побеждает первый ключ, как в линейном обходе
+    _CITY_BY_LOWER.setdefault(_key.lower(), _key)
+    _CITY_BY_FOLDED.setdefault(_fold_yo(_key.lower()), _key)
+del _key
+_CITY_PREFIX_INDEX_LOWER = _PrefixIndex([k.lower() for k in _CITY_KEYS])
+_CITY_PREFIX_INDEX_FOLDED = _PrefixIndex([_fold_yo(k.lower()) for k in _CITY_KEYS])
+_CITIES_BY_COORDS: dict[tuple[float, float], list[str]] = _build_inverse(CITY_COORDS)
+_ALIASES_BY_CITY: dict[str, list[str]] = _build_inverse(CITY_ALIASES)
+_REGIONS_BY_CITY: dict[str, list[str]] = _build_inverse(REGION_ALIASES)
+
+
 def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """Расстояние в км между двумя точками (Haversine formula)."""
     R = 6371.0
@@ -5,6 +5,10 @@ from typing import (
 
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
+from app.infra.repositories.normalization import (
+    normalize_city,
+    normalize_gender,
+)
 
 
 def convert_user_entity_to_document(user: UserEntity) -> dict:
@@ -13,8 +17,10 @@ def convert_user_entity_to_document(user: UserEntity) -> dict:
         "username": user.username,
         "name": user.name.as_generic_type() if user.name else None,
         "gender": user.gender.as_generic_type() if user.gender else None,
+        "gender_norm": normalize_gender(user.gender) if user.gender else None,
         "age": user.age.as_generic_type() if user.age else None,
         "city": user.city.as_generic_type() if user.city else None,
+        "city_canonical": (normalize_city(user.city) or None) if user.city else None,
         "looking_for": user.looking_for.as_generic_type() if user.looking_for else None,
         "intention": getattr(user, "intention", None),
         "about": user.about.as_generic_type() if user.about else None,
@@ -26,6 +32,8 @@ def convert_user_entity_to_document(user: UserEntity) -> dict:
         "premium_until": user.premium_until,
         "superlike_credits": user.superlike_credits or 0,
         "swipe_credits": getattr(user, "swipe_credits", 0) or 0,
+        "likes_today": getattr(user, "likes_today", 0) or 0,
+        "likes_day": getattr(user, "likes_day", None),
         "boost_until": user.boost_until,
         "boosts_this_week": user.boosts_this_week or 0,
         "boost_week_reset": user.boost_week_reset,
@@ -40,6 +48,25 @@ def convert_user_entity_to_document(user: UserEntity) -> dict:
     }
 
 
+# Поля анкеты для списков (лайки, матчи): без AI-полей и служебных данных
+USER_CARD_PROJECTION: dict = {
+    "_id": 0,
+    "telegram_id": 1,
+    "username": 1,
+    "name": 1,
+    "gender": 1,
+    "age": 1,
+    "city": 1,
+    "looking_for": 1,
+    "about": 1,
+    "photo": 1,
+    "photos": 1,
+    "is_active": 1,
+    "referral_balance": 1,
+    "last_seen": 1,
+}
+
+
 def convert_user_document_to_entity(user_document: Mapping[str, Any]) -> UserEntity:
     return UserEntity(
         telegram_id=int(user_document.get("telegram_id", 0)),
@@ -59,6 +86,8 @@ def convert_user_document_to_entity(user_document: Mapping[str, Any]) -> UserEnt
         premium_until=user_document.get("premium_until"),
         superlike_credits=int(user_document.get("superlike_credits") or 0),
         swipe_credits=int(user_document.get("swipe_credits") or 0),
+        likes_today=int(user_document.get("likes_today") or 0),
+        likes_day=user_document.get("likes_day"),
         boost_until=user_document.get("boost_until"),
         boosts_this_week=int(user_document.get("boosts_this_week") or 0),
         boost_week_reset=user_document.get("boost_week_reset"),
@@ -70,6 +99,7 @@ def convert_user_document_to_entity(user_document: Mapping[str, Any]) -> UserEnt
         ai_traits=user_document.get("ai_traits") or [],
         ai_skills=user_document.get("ai_skills") or [],
         ai_appearance=user_document.get("ai_appearance") or [],
+        ai_profile_hash=user_document.get("ai_profile_hash"),
     )
 
 
@@ -79,3 +109,11 @@ def convert_like_entity_to_document(like: LikesEntity) -> dict:
         "to_user": like.to_user.as_generic_type(),
         "created_at": like.created_at,
     }
+
+
+def convert_coords_to_geojson_point(lat: float, lon: float) -> dict:
+    """GeoJSON Point для 2dsphere-индекса (coordinates: [lon, lat])."""
+    return {
+        "type": "Point",
+        "coordinates": [float(lon), float(lat)],
+    }
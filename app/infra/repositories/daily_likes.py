@@ -0,0 +1,26 @@
+"""
+Дневной счётчик лайков на анкете: likes_today — сколько лайков поставлено
+за сутки likes_day ("YYYY-MM-DD", UTC). Сутки сменились — счётчик считается нулевым,
+сброс происходит при следующем лайке тем же атомарным обновлением.
+"""
+from datetime import (
+    datetime,
+    timezone,
+)
+
+
+# Лайк в пределах бесплатного дневного лимита
+LIKE_SLOT_FREE = "free"
+# Лайк сверх лимита — оплачен одним swipe_credits
+LIKE_SLOT_CREDIT = "credit"
+
+
+def likes_day(now: datetime | None = None) -> str:
+    return (now or datetime.now(timezone.utc)).strftime("%Y-%m-%d")
+
+
+def likes_used_today(user, day: str | None = None) -> int:
+    """Сколько лайков пользователь поставил за сутки day (по умолчанию — сегодня)."""
+    if getattr(user, "likes_day", None) != (day or likes_day()):
+        return 0
+    return getattr(user, "likes_today", 0) or 0
@@ -0,0 +1,21 @@
+"""
+Материализованная очередь рекомендаций: заранее ранжированные telegram_id ленты.
+
+Очередь строит фоновый FeedQueueWorker (тем же rank_feed, что и лента по запросу),
+лента читает из неё срез ids[offset:offset + n] — O(страницы), без ранжирования.
+tail — позиция rank_feed сразу после последней анкеты очереди: с неё лента
+продолжает по запросу, когда очередь закончилась.
+"""
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+
+@dataclass
+class FeedQueueSlice:
+    ids: list[int] = field(default_factory=list)
+    # Поколение очереди: растёт при каждой пересборке, offset из старого поколения недействителен
+    generation: int = 0
+    total: int = 0
+    tail: dict | None = None
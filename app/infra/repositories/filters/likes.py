@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+MAX_LIKES_PAGE_SIZE = 100
+
+
+@dataclass
+class GetLikesFilters:
+    limit: int = 50
+    cursor: str | None = None
@@ -5,3 +5,12 @@ from dataclasses import dataclass
 class GetAllUsersFilters:
     limit: int = 10
     offset: int = 0
+
+
+MAX_FEED_PAGE_SIZE = 100
+
+
+@dataclass
+class GetFeedFilters:
+    limit: int = 20
+    cursor: str | None = None
@@ -1,14 +1,43 @@
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import (
+    dataclass,
+    field,
+    replace,
+)
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from itertools import count
+from typing import (
+    Iterable,
+    Iterator,
+)
 
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
 from app.domain.values.users import AboutText
 from app.infra.repositories.base import (
+    BaseBroadcastsRepository,
     BaseLikesRepository,
+    BaseNotificationOutboxRepository,
     BaseUsersRepository,
 )
+from app.infra.repositories.broadcasts import (
+    BROADCAST_CANCELLED,
+    BROADCAST_DONE,
+    BROADCAST_RUNNING,
+    RECIPIENT_PENDING,
+    BroadcastJob,
+)
 from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.outbox import (
+    OUTBOX_PENDING,
+    OUTBOX_SENDING,
+    OutboxMessage,
+    OutboxStats,
+    coalesce_key,
+)
 
 
 @dataclass
@@ -60,6 +89,38 @@ class MemoryUsersRepository(BaseUsersRepository):
     async def get_users_liked_by(self, user_list: list[int]) -> Iterable[UserEntity]:
         return [user for user in self._users.values() if user.telegram_id in user_list]
 
+    async def get_broadcast_audience(self, target: str, after: int | None, limit: int) -> list[int]:
+        now = datetime.now(timezone.utc)
+        ids = sorted(
+            user.telegram_id for user in self._users.values()
+            if (after is None or user.telegram_id > after) and _in_broadcast_audience(user, target, now)
+        )
+        return ids[:limit]
+
+    async def count_broadcast_audience(self, target: str) -> int:
+        now = datetime.now(timezone.utc)
+        return sum(1 for user in self._users.values() if _in_broadcast_audience(user, target, now))
+
+
+def _in_broadcast_audience(user: UserEntity, target: str, now: datetime) -> bool:
+    """Тот же фильтр, что _broadcast_query в MongoDB-репозитории."""
+    if getattr(user, "is_banned", False):
+        return False
+    until = getattr(user, "premium_until", None)
+    if until is not None and until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    has_premium = until is not None and until > now
+    if target in ("premium", "vip"):
+        return getattr(user, "premium_type", None) == target and has_premium
+    if target == "active_7d":
+        last_seen = getattr(user, "last_seen", None)
+        if last_seen is not None and last_seen.tzinfo is None:
+            last_seen = last_seen.replace(tzinfo=timezone.utc)
+        return last_seen is not None and last_seen >= now - timedelta(days=7)
+    if target == "no_premium":
+        return not getattr(user, "premium_type", None) or (until is not None and until <= now)
+    return True
+
 
 class MemoryLikesRepository(BaseLikesRepository):
     def __init__(self):
@@ -88,3 +149,147 @@ class MemoryLikesRepository(BaseLikesRepository):
             for (from_user, to_user) in self.likes.keys()
             if to_user == user_id
         ]
+
+
+@dataclass
+class MemoryNotificationOutboxRepository(BaseNotificationOutboxRepository):
+    messages: dict = field(default_factory=dict)
+    _ids: Iterator[int] = field(default_factory=count, repr=False)
+
+    async def push(self, message: OutboxMessage, delay_seconds: float = 0) -> None:
+        now = datetime.now(timezone.utc)
+        key = coalesce_key(message.chat_id, message.kind)
+        for status, stored in self.messages.values():
+            if key is not None and status == OUTBOX_PENDING and coalesce_key(stored.chat_id, stored.kind) == key:
+                stored.payload = message.payload
+                stored.count += message.count
+                return
+        stored = replace(
+            message,
+            id=str(next(self._ids)),
+            attempts=0,
+            created_at=now,
+            available_at=now + timedelta(seconds=delay_seconds),
+        )
+        self.messages[stored.id] = (OUTBOX_PENDING, stored)
+
+    async def claim(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        ready = sorted(
+            (stored for _, stored in self.messages.values() if stored.available_at <= now),
+            key=lambda stored: stored.available_at,
+        )[:limit]
+        for stored in ready:
+            stored.available_at = now + timedelta(seconds=lease_seconds)
+            self.messages[stored.id] = (OUTBOX_SENDING, stored)
+        return [replace(stored) for stored in ready]
+
+    async def ack(self, message: OutboxMessage) -> None:
+        self.messages.pop(message.id, None)
+
+    async def retry(self, message: OutboxMessage, delay_seconds: float, failed: bool = True) -> None:
+        item = self.messages.get(message.id)
+        if item is None:
+            return
+        stored = item[1]
+        key = coalesce_key(stored.chat_id, stored.kind)
+        for status, pending in self.messages.values():
+            if key is not None and status == OUTBOX_PENDING and coalesce_key(pending.chat_id, pending.kind) == key:
+                # Новая ждущая запись получателя — склеиваем в неё, второй не будет
+                pending.count += stored.count
+                self.messages.pop(message.id)
+                return
+        stored.available_at = datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)
+        if failed:
+            stored.attempts += 1
+        self.messages[message.id] = (OUTBOX_PENDING, stored)
+
+    async def stats(self) -> OutboxStats:
+        stats = OutboxStats()
+        now = datetime.now(timezone.utc)
+        for status, stored in self.messages.values():
+            target = stats.sending if status == OUTBOX_SENDING else stats.pending
+            target[stored.kind] = target.get(stored.kind, 0) + 1
+            stats.oldest_seconds = max(stats.oldest_seconds, (now - stored.created_at).total_seconds())
+        return stats
+
+
+@dataclass
+class MemoryBroadcastsRepository(BaseBroadcastsRepository):
+    jobs: dict[str, BroadcastJob] = field(default_factory=dict)
+    # job_id → {chat_id: статус получателя}
+    recipients: dict[str, dict[int, str]] = field(default_factory=dict)
+    _leases: dict[str, datetime] = field(default_factory=dict, repr=False)
+    _ids: Iterator[int] = field(default_factory=count, repr=False)
+
+    async def create(self, job: BroadcastJob) -> BroadcastJob:
+        now = datetime.now(timezone.utc)
+        stored = replace(job, id=str(next(self._ids)), created_at=now, updated_at=now)
+        self.jobs[stored.id] = stored
+        self.recipients[stored.id] = {}
+        return replace(stored)
+
+    async def get(self, job_id: str) -> BroadcastJob | None:
+        job = self.jobs.get(job_id)
+        return replace(job) if job else None
+
+    async def list_recent(self, limit: int = 20) -> list[BroadcastJob]:
+        jobs = sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+        return [replace(job) for job in jobs[:limit]]
+
+    async def set_status(self, job_id: str, status: str, expected: Iterable[str]) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.status not in set(expected):
+            return False
+        job.status = status
+        job.updated_at = datetime.now(timezone.utc)
+        if status == BROADCAST_CANCELLED:
+            job.finished_at = job.updated_at
+        return True
+
+    async def claim(self, lease_seconds: float) -> BroadcastJob | None:
+        now = datetime.now(timezone.utc)
+        free = [
+            job for job in self.jobs.values()
+            if job.status == BROADCAST_RUNNING and self._leases.get(job.id, job.created_at) <= now
+        ]
+        if not free:
+            return None
+        job = min(free, key=lambda job: self._leases.get(job.id, job.created_at))
+        self._leases[job.id] = now + timedelta(seconds=lease_seconds)
+        return replace(job)
+
+    async def release(self, job_id: str) -> None:
+        self._leases[job_id] = datetime.now(timezone.utc)
+
+    async def add_recipients(self, job_id: str, chat_ids: list[int], cursor: int) -> None:
+        recipients = self.recipients.setdefault(job_id, {})
+        for chat_id in chat_ids:
+            recipients.setdefault(chat_id, RECIPIENT_PENDING)
+        self.jobs[job_id].cursor = cursor
+
+    async def finish_audience(self, job_id: str) -> None:
+        self.jobs[job_id].audience_done = True
+
+    async def pending_recipients(self, job_id: str, limit: int) -> list[int]:
+        recipients = self.recipients.get(job_id, {})
+        return sorted(chat_id for chat_id, status in recipients.items() if status == RECIPIENT_PENDING)[:limit]
+
+    async def record(self, job_id: str, results: dict[int, str]) -> None:
+        job = self.jobs[job_id]
+        recipients = self.recipients.setdefault(job_id, {})
+        for chat_id, status in results.items():
+            if recipients.get(chat_id) != RECIPIENT_PENDING:
+                continue
+            recipients[chat_id] = status
+            setattr(job, status, getattr(job, status) + 1)
+        job.updated_at = datetime.now(timezone.utc)
+
+    async def set_photo_file_id(self, job_id: str, file_id: str) -> None:
+        self.jobs[job_id].photo_file_id = file_id
+
+    async def complete(self, job_id: str) -> None:
+        job = self.jobs[job_id]
+        if job.status == BROADCAST_RUNNING:
+            job.status = BROADCAST_DONE
+            job.finished_at = job.updated_at = datetime.now(timezone.utc)
@@ -1,23 +1,71 @@
+import logging
 from abc import ABC
-from dataclasses import dataclass
-from typing import Iterable
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import Any, Callable, Container, Iterable
 
 from motor.core import AgnosticClient
 
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
 from app.domain.values.users import AboutText
+from app.infra.cache import TTLCache
 from app.infra.repositories.base import (
+    BaseBroadcastsRepository,
     BaseDislikesRepository,
+    BaseFeedQueueRepository,
     BaseLikesRepository,
+    BaseMatchesRepository,
+    BaseNotificationOutboxRepository,
+    BaseSeenProfilesRepository,
     BaseUsersRepository,
 )
+from app.infra.repositories.broadcasts import (
+    BROADCAST_CANCELLED,
+    BROADCAST_DONE,
+    BROADCAST_RUNNING,
+    RECIPIENT_PENDING,
+    BroadcastJob,
+)
 from app.infra.repositories.converters import (
+    convert_coords_to_geojson_point,
     convert_like_entity_to_document,
     convert_user_document_to_entity,
     convert_user_entity_to_document,
 )
+from app.infra.repositories.daily_likes import (
+    LIKE_SLOT_CREDIT,
+    LIKE_SLOT_FREE,
+)
+from app.infra.repositories.feed_queue import FeedQueueSlice
 from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.outbox import (
+    OUTBOX_PENDING,
+    OUTBOX_SENDING,
+    OutboxMessage,
+    OutboxStats,
+    coalesce_key,
+)
+from app.infra.repositories.normalization import (
+    GENDER_FEMALE,
+    GENDER_MALE,
+    normalize_city,
+    normalize_gender,
+    opposite_gender,
+    with_normalized_fields,
+)
+from app.infra.repositories.seen import (
+    SEEN_DISLIKED,
+    SEEN_KINDS,
+    SEEN_LIKED,
+    SeenProfiles,
+    SortedIdSet,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -353,8 +401,135 @@ for _k in list(_CITY_NEIGHBORS.keys()):
         _CITY_NEIGHBORS[_alt] = _CITY_NEIGHBORS[_k]
 
 
+def _with_location_sync(data: dict) -> dict:
+    """
+    $set анкеты + синхронизация GeoJSON location с lat/lon:
+    новые координаты → новый location; новый город без координат → старые
+    lat/lon/location снимаются (их заново проставит фоновый геокодинг).
+    """
+    update: dict = {"$set": dict(data)}
+    lat, lon = data.get("lat"), data.get("lon")
+    if lat is not None and lon is not None:
+        update["$set"]["location"] = convert_coords_to_geojson_point(lat, lon)
+    elif "city" in data and "lat" not in data and "lon" not in data:
+        update["$unset"] = {"lat": "", "lon": "", "location": ""}
+    return update
+
+
+# Ключ сортировки ленты (в этом порядке), telegram_id — для стабильности между страницами
+_FEED_SORT_FIELDS = ("city_match", "dist", "sub", "telegram_id")
+
+
+def _subscription_tier_expr(now) -> dict:
+    """Приоритет подписки в агрегации: boost=0, VIP=1, Premium=2, остальные=3."""
+    return {"$switch": {
+        "branches": [
+            {"case": {"$gt": ["$boost_until", now]}, "then": 0},
+            {"case": {"$and": [{"$eq": ["$premium_type", "vip"]}, {"$gt": ["$premium_until", now]}]}, "then": 1},
+            {"case": {"$and": [{"$eq": ["$premium_type", "premium"]}, {"$gt": ["$premium_until", now]}]}, "then": 2},
+        ],
+        "default": 3,
+    }}
+
+
+def _keyset_after_match(fields: tuple[str, ...], key: list) -> dict:
+    """$match для «строго после key» в лексикографическом порядке полей (все по возрастанию)."""
+    branches = []
+    for i, field_name in enumerate(fields):
+        branch = {fields[j]: key[j] for j in range(i)}
+        branch[field_name] = {"$gt": key[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+# Поля, достаточные для ранжирования ленты (без фото, анкеты, AI-полей)
+_FEED_SORT_PROJECTION = {
+    "_id": 0,
+    "telegram_id": 1,
+    "city": 1,
+    "city_canonical": 1,
+    "lat": 1,
+    "lon": 1,
+    "premium_type": 1,
+    "premium_until": 1,
+    "boost_until": 1,
+}
+
+
+# Сколько живёт photos[] в кэше процесса; запись в анкету инвалидирует его сразу
+PHOTOS_CACHE_TTL_SECONDS = 60
+
+
 @dataclass
 class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
+    # Куда отдавать города без координат (фоновый геокодинг); None — никуда
+    on_unresolved_city: Callable[[str], Any] | None = None
+    # Кого уведомлять об изменении анкеты (telegram_id, изменённые поля):
+    # очереди рекомендаций, AI-enrichment
+    on_profile_changed: list[Callable[[int, Iterable[str]], Any]] = field(default_factory=list, repr=False)
+    # telegram_id → photos[] для редиректов на фото (/users/{id}/photo/{index})
+    photos_cache: TTLCache = field(
+        default_factory=lambda: TTLCache(maxsize=50_000, ttl_seconds=PHOTOS_CACHE_TTL_SECONDS),
+        repr=False,
+    )
+
+    def _queue_unresolved_city(self, city: str) -> None:
+        if self.on_unresolved_city is None or not city:
+            return
+        try:
+            self.on_unresolved_city(city)
+        except Exception:
+            pass
+
+    def _notify_profile_changed(self, telegram_id: int, fields: Iterable[str]) -> None:
+        fields = tuple(fields)
+        if "photos" in fields:
+            self.photos_cache.pop(telegram_id)
+        for listener in self.on_profile_changed:
+            try:
+                listener(telegram_id, fields)
+            except Exception:
+                pass
+
+    async def set_city_coordinates(self, city: str, lat: float, lon: float) -> int:
+        """Сохраняет координаты города всем анкетам с этим городом, у которых их ещё нет."""
+        result = await self._collection.update_many(
+            {"city": city, "$or": [{"lat": None}, {"lon": None}]},
+            {"$set": {
+                "lat": lat,
+                "lon": lon,
+                "location": convert_coords_to_geojson_point(lat, lon),
+            }},
+        )
+        return result.modified_count
+
+    async def backfill_normalized_fields(self, batch_size: int = 500, force: bool = False) -> int:
+        """
+        Проставляет gender_norm/city_canonical анкетам, записанным до появления этих полей.
+        force=True — пересчитать у всех (например, после изменения справочника городов).
+        Возвращает число изменённых документов.
+        """
+        from pymongo import UpdateOne
+
+        query: dict = {} if force else {"$or": [
+            {"gender": {"$exists": True}, "gender_norm": {"$exists": False}},
+            {"city": {"$exists": True}, "city_canonical": {"$exists": False}},
+        ]}
+        updated = 0
+        operations: list[UpdateOne] = []
+        async for doc in self._collection.find(query, {"_id": 1, "gender": 1, "city": 1}):
+            fields = with_normalized_fields({"gender": doc.get("gender"), "city": doc.get("city")})
+            del fields["gender"], fields["city"]
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+            if len(operations) >= batch_size:
+                result = await self._collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+                operations = []
+        if operations:
+            result = await self._collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+        return updated
+
     async def get_user_by_telegram_id(self, telegram_id: int) -> UserEntity | None:
         user_document = await self._collection.find_one(
             filter={"telegram_id": telegram_id},
@@ -375,7 +550,105 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
     async def update_user_info_after_register(self, telegram_id: int, data: dict):
         await self._collection.update_one(
             filter={"telegram_id": telegram_id},
-            update={"$set": data},
+            update=_with_location_sync(with_normalized_fields(data)),
+        )
+        self._notify_profile_changed(telegram_id, data.keys())
+
+    async def consume_credit(self, telegram_id: int, field: str) -> bool:
+        """Атомарный $inc: списание только при field > 0, без чтения анкеты."""
+        result = await self._collection.update_one(
+            filter={"telegram_id": telegram_id, field: {"$gt": 0}},
+            update={"$inc": {field: -1}},
+        )
+        return bool(result.modified_count)
+
+    async def refund_credit(self, telegram_id: int, field: str) -> None:
+        await self._collection.update_one(
+            filter={"telegram_id": telegram_id},
+            update={"$inc": {field: 1}},
+        )
+
+    async def update_last_seen_many(self, last_seen: dict) -> int:
+        """Один bulk_write на все пинги за период; $max не даёт отмотать last_seen назад."""
+        from pymongo import UpdateOne
+
+        if not last_seen:
+            return 0
+        result = await self._collection.bulk_write(
+            [
+                UpdateOne({"telegram_id": telegram_id}, {"$max": {"last_seen": at}})
+                for telegram_id, at in last_seen.items()
+            ],
+            ordered=False,
+        )
+        return result.modified_count
+
+    async def get_broadcast_audience(self, target: str, after: int | None, limit: int) -> list[int]:
+        """Keyset-пагинация по telegram_id: пачка не зависит от размера аудитории."""
+        query = _broadcast_query(target)
+        if after is not None:
+            query["telegram_id"] = {"$gt": after}
+        cursor = self._collection.find(query, projection={"telegram_id": 1, "_id": 0}).sort("telegram_id", 1)
+        return [doc["telegram_id"] async for doc in cursor.limit(limit)]
+
+    async def count_broadcast_audience(self, target: str) -> int:
+        return await self._collection.count_documents(_broadcast_query(target))
+
+    async def get_media_keys(self, telegram_ids: Iterable[int]) -> set[str]:
+        """Один запрос по индексу telegram_id: медиа всех анкет пачки."""
+        ids = list(set(telegram_ids))
+        if not ids:
+            return set()
+        keys: set[str] = set()
+        cursor = self._collection.find({"telegram_id": {"$in": ids}}, projection={"photos": 1, "photo": 1})
+        async for doc in cursor:
+            keys.update(doc.get("photos") or [])
+            if doc.get("photo"):
+                keys.add(doc["photo"])
+        return keys
+
+    async def reserve_daily_like(self, telegram_id: int, day: str, limit: int | None = None) -> str | None:
+        """
+        Одно атомарное обновление анкеты: сброс счётчика при смене суток, +1 к likes_today
+        и, сверх limit, списание swipe_credits. Условие в фильтре не даёт параллельным
+        свайпам (бот и Mini App) превысить лимит.
+        """
+        from pymongo import ReturnDocument
+
+        used = {"$cond": [{"$eq": ["$likes_day", day]}, {"$ifNull": ["$likes_today", 0]}, 0]}
+        query: dict = {"telegram_id": telegram_id}
+        fields: dict = {"likes_day": day, "likes_today": {"$add": [used, 1]}}
+        if limit is not None:
+            query["$or"] = [
+                {"likes_day": {"$ne": day}},
+                {"likes_today": {"$lt": limit}},
+                {"swipe_credits": {"$gt": 0}},
+            ]
+            fields["swipe_credits"] = {"$cond": [
+                {"$gte": [used, limit]},
+                {"$subtract": ["$swipe_credits", 1]},
+                {"$ifNull": ["$swipe_credits", 0]},
+            ]}
+        before = await self._collection.find_one_and_update(
+            query,
+            [{"$set": fields}],
+            projection={"_id": 0, "likes_day": 1, "likes_today": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            return None
+        used_before = before.get("likes_today") or 0 if before.get("likes_day") == day else 0
+        if limit is not None and used_before >= limit:
+            return LIKE_SLOT_CREDIT
+        return LIKE_SLOT_FREE
+
+    async def release_daily_like(self, telegram_id: int, day: str, slot: str) -> None:
+        inc = {"likes_today": -1}
+        if slot == LIKE_SLOT_CREDIT:
+            inc["swipe_credits"] = 1
+        await self._collection.update_one(
+            filter={"telegram_id": telegram_id, "likes_day": day, "likes_today": {"$gt": 0}},
+            update={"$inc": inc},
         )
 
     async def update_user_about(self, telegram_id: int, about: AboutText):
@@ -383,6 +656,7 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             filter={"telegram_id": telegram_id},
             update={"$set": {"about": about.as_generic_type()}},
         )
+        self._notify_profile_changed(telegram_id, ("about",))
 
     async def update_user_ai_fields(self, telegram_id: int, ai_fields: dict) -> None:
         """Обновляет AI-поля анкеты (search_text, ai_traits, ai_skills, ai_appearance)."""
@@ -394,7 +668,9 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
         )
 
     async def create_user(self, user: UserEntity):
-        await self._collection.insert_one(convert_user_entity_to_document(user))
+        document = convert_user_entity_to_document(user)
+        await self._collection.insert_one(document)
+        self._notify_profile_changed(user.telegram_id, document.keys())
 
     async def check_user_exist_by_telegram_id(self, telegram_id: int) -> bool:
         return bool(
@@ -417,59 +693,79 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
 
         return chats, count
 
-    async def get_best_result_for_user(
-        self, telegram_id: int, exclude_ids: list[int] | None = None
-    ) -> Iterable[UserEntity]:
+    async def get_feed_page(
+        self,
+        telegram_id: int,
+        exclude_ids: list[int] | None = None,
+        limit: int = 20,
+        after: dict | None = None,
+        seen: Container[int] | None = None,
+    ) -> tuple[list[UserEntity], dict | None]:
+        """Страница ленты: ранжирование rank_feed + полные анкеты одним запросом."""
+        telegram_ids, next_position = await self.rank_feed(
+            telegram_id=telegram_id,
+            exclude_ids=exclude_ids,
+            limit=limit,
+            after=after,
+            seen=seen,
+        )
+        return await self.get_users_in_order(telegram_ids), next_position
+
+    async def rank_feed(
+        self,
+        telegram_id: int,
+        exclude_ids: list[int] | None = None,
+        limit: int = 20,
+        after: dict | None = None,
+        seen: Container[int] | None = None,
+    ) -> tuple[list[int], dict | None]:
         """
-        Возвращает ВСЕ подходящие анкеты противоположного пола,
-        отсортированные по расстоянию от пользователя (Haversine, Python).
-        Порядок: ближе → дальше → анкеты никогда не заканчиваются.
-        Внутри одной дистанционной группы: boost → VIP → Premium → бесплатные.
+        Возвращает telegram_id одной страницы ленты анкет противоположного пола.
+        Порядок: свой город → расстояние → boost/VIP/Premium/бесплатные,
+        при равенстве — telegram_id (чтобы порядок был стабильным между страницами).
+
+        Две фазы:
+          geo  — анкеты с GeoJSON location: $geoNear по 2dsphere-индексу, ранжирование,
+                 keyset-фильтр и limit выполняются в MongoDB;
+          rest — анкеты без location (идут после geo): ранжируются в Python по лёгкой
+                 проекции, расстояние — по lat/lon или CITY_COORDS.
+        Если координат пользователя нет или $geoNear недоступен — одна фаза all.
+
+        after — позиция в ленте {"p": фаза, "k": ключ сортировки последней анкеты}.
+        seen  — уже просмотренные анкеты (SeenProfiles); отсеиваются при чтении результата,
+                а не через $nin, поэтому размер истории свайпов не попадает в запрос.
+        exclude_ids — небольшой список дополнительных исключений, уходит в $nin.
+        Возвращает (telegram_id в порядке ленты, позиция для следующей страницы или None, если дальше пусто).
         """
-        from datetime import datetime, timezone, timedelta
-        import hashlib
-        import httpx
+        from datetime import datetime, timezone
+        from pymongo.errors import OperationFailure
         from app.infra.repositories.cities import (
             get_city_coords,
             haversine_km,
-            resolve_to_canonical_city,
         )
 
-        user = await self.get_user_by_telegram_id(telegram_id)
-        if user is None:
-            return []
+        user_document = await self._collection.find_one({"telegram_id": telegram_id})
+        if not user_document:
+            return [], None
+        user = convert_user_document_to_entity(user_document)
 
         excluded = set(exclude_ids or [])
         excluded.add(telegram_id)
         now = datetime.now(timezone.utc)
 
         # ── Гендерный фильтр: СТРОГО противоположный пол ─────────────
-        _ALL_MALE   = ["Man", "man", "Male", "male", "Мужской", "мужской", "м", "m"]
-        _ALL_FEMALE = ["Female", "female", "Женский", "женский", "Woman", "woman", "ж", "f"]
-
-        raw_gender = getattr(user, "gender", None)
-        user_gender = ""
-        if raw_gender is not None:
-            user_gender = str(
-                raw_gender.as_generic_type() if hasattr(raw_gender, "as_generic_type") else raw_gender
-            ).strip().lower()
-
-        gender_filter: dict | None = None
-        if user_gender in ("man", "male", "мужской", "м", "m"):
-            gender_filter = {"$in": _ALL_FEMALE}
-        elif user_gender in ("female", "женский", "woman", "ж", "f"):
-            gender_filter = {"$in": _ALL_MALE}
+        target_gender = opposite_gender(normalize_gender(getattr(user, "gender", None)))
 
         # Без определённого пола — не показываем никого (не угадываем)
-        if not gender_filter:
-            return []
+        if not target_gender:
+            return [], None
 
         # ── Базовый фильтр ───────────────────────────────────────────
         base: dict = {
             "telegram_id": {"$nin": list(excluded)},
             "is_banned":   {"$ne": True},
             "profile_hidden": {"$ne": True},
-            "gender":      gender_filter,
+            "gender_norm": target_gender,
             "$and": [
                 {"$or": [{"is_active": True}, {"is_active": {"$exists": False}}]},
                 {"$or": [
@@ -479,13 +775,6 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             ],
         }
 
-        docs: list[dict] = []
-        async for doc in self._collection.find(base):
-            docs.append(doc)
-
-        if not docs:
-            return []
-
         # ── Координаты пользователя ───────────────────────────────────
         raw_city = getattr(user, "city", None)
         user_city = ""
@@ -496,8 +785,8 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
         user_lat: float | None = None
         user_lon: float | None = None
 
-        raw_lat = getattr(user, "lat", None)
-        raw_lon = getattr(user, "lon", None)
+        raw_lat = user_document.get("lat")
+        raw_lon = user_document.get("lon")
         try:
             if raw_lat is not None and raw_lon is not None:
                 user_lat = float(raw_lat)
@@ -509,73 +798,97 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             coords = get_city_coords(user_city)
             if coords:
                 user_lat, user_lon = coords
-
-        # ── Кэш координат города/кандидата ────────────────────────────
-        geocode_col = self.mongo_db_client[self.mongo_db_name]["geocode_cache"]
-        _coord_cache: dict[str, tuple[float, float] | None] = {}
-
-        async def _resolve_city_coords(city_name: str) -> tuple[float, float] | None:
-            city_name = (city_name or "").strip()
-            if not city_name:
-                return None
-            if city_name in _coord_cache:
-                return _coord_cache[city_name]
-
-            # 1) Пытаемся взять координаты из кэша Mongo geocode_cache
-            cache_key = hashlib.sha256(f"geocode:{city_name.lower()}".encode("utf-8")).hexdigest()
+            else:
+                self._queue_unresolved_city(user_city)
+
+        has_geo = user_lat is not None and user_lon is not None
+        phase = (after or {}).get("p") or ("geo" if has_geo else "all")
+        after_key = (after or {}).get("k")
+        if phase not in ("geo", "rest", "all") or (phase == "geo" and not has_geo):
+            raise ValueError(f"Unknown feed phase: {phase!r}")
+
+        # ── Фаза geo: $geoNear + ранжирование и limit в MongoDB ──────
+        page_keys: list[list] = []
+        user_city_key = normalize_city(user_city)
+        if phase == "geo":
+            pipeline: list[dict] = [
+                {"$geoNear": {
+                    "near": convert_coords_to_geojson_point(user_lat, user_lon),
+                    "distanceField": "dist_m",
+                    "key": "location",
+                    "query": base,
+                    "spherical": True,
+                }},
+                {"$project": {
+                    "_id": 0,
+                    "telegram_id": 1,
+                    "city_match": (
+                        {"$cond": [{"$eq": ["$city_canonical", user_city_key]}, 0, 1]}
+                        if user_city_key else {"$literal": 1}
+                    ),
+                    "dist": {"$divide": ["$dist_m", 1000.0]},
+                    "sub": _subscription_tier_expr(now),
+                }},
+                # Свой город дальше 100 км (неточные координаты) — считаем 0 км
+                {"$set": {"dist": {"$cond": [
+                    {"$and": [{"$eq": ["$city_match", 0]}, {"$gt": ["$dist", 100]}]},
+                    0.0,
+                    "$dist",
+                ]}}},
+            ]
+            if after_key is not None:
+                pipeline.append({"$match": _keyset_after_match(_FEED_SORT_FIELDS, after_key)})
+            pipeline += [
+                {"$sort": {field: 1 for field in _FEED_SORT_FIELDS}},
+                # Запас на просмотренные анкеты: читаем курсор, пока не наберём limit + 1
+                {"$limit": limit + 1 + (len(seen) if seen is not None else 0)},
+            ]
             try:
-                doc = await geocode_col.find_one({"_id": cache_key})
-                if doc and doc.get("lat") is not None and doc.get("lon") is not None:
-                    coords = (float(doc["lat"]), float(doc["lon"]))
-                    _coord_cache[city_name] = coords
-                    return coords
-            except Exception:
-                pass
+                rows = await self._aggregate_unseen(pipeline, seen, limit + 1)
+            except OperationFailure as e:
+                # Нет 2dsphere-индекса или битые location — ранжируем всё в Python
+                logger.warning("Feed $geoNear failed, falling back to in-process ranking: %s", e)
+                phase, after_key, rows = "all", None, []
+            else:
+                page_keys = [[row[field] for field in _FEED_SORT_FIELDS] for row in rows[:limit]]
+                if len(rows) > limit:
+                    return [key[-1] for key in page_keys], {"p": "geo", "k": page_keys[-1]}
+                # geo-анкеты закончились — добираем страницу анкетами без location
+                phase, after_key = "rest", None
+
+        # ── Фазы rest/all: ранжирование в Python по лёгкой проекции ──
+        rest_query = dict(base)
+        if phase == "rest":
+            rest_query["location"] = {"$exists": False}
+
+        remaining = limit - len(page_keys)
+        if remaining <= 0:
+            # Страница уже заполнена geo-анкетами — проверяем только, есть ли что-то дальше
+            has_more = False
+            async for doc in self._collection.find(rest_query, projection={"_id": 0, "telegram_id": 1}):
+                if seen is None or doc.get("telegram_id") not in seen:
+                    has_more = True
+                    break
+            return [key[-1] for key in page_keys], ({"p": phase, "k": None} if has_more else None)
 
-            # 2) Геокодинг через Nominatim (без ручных списков городов)
-            try:
-                async with httpx.AsyncClient(timeout=4.0) as client:
-                    r = await client.get(
-                        "https://nominatim.openstreetmap.org/search",
-                        params={
-                            "q": city_name,
-                            "format": "json",
-                            "limit": 1,
-                            "addressdetails": 0,
-                        },
-                        headers={"User-Agent": "KupidonAI-DatingBot/1.0"},
-                    )
-                    r.raise_for_status()
-                    items = r.json()
-                    if isinstance(items, list) and items:
-                        lat = float(items[0]["lat"])
-                        lon = float(items[0]["lon"])
-                        coords = (lat, lon)
-                        _coord_cache[city_name] = coords
-                        try:
-                            await geocode_col.update_one(
-                                {"_id": cache_key},
-                                {
-                                    "$set": {
-                                        "_id": cache_key,
-                                        "query": city_name,
-                                        "lat": lat,
-                                        "lon": lon,
-                                        "expires_at": datetime.now(timezone.utc) + timedelta(days=90),
-                                    }
-                                },
-                                upsert=True,
-                            )
-                        except Exception:
-                            pass
-                        return coords
-            except Exception:
-                pass
+        docs: list[dict] = []
+        async for doc in self._collection.find(rest_query, projection=_FEED_SORT_PROJECTION):
+            if seen is not None and doc.get("telegram_id") in seen:
+                continue
+            docs.append(doc)
+
+        # Координаты кандидатов: только предрассчитанные lat/lon или CITY_COORDS.
+        # Города, которых нет в локальной таблице, уходят в фоновый геокодинг
+        # (on_unresolved_city) — лента никогда не ждёт сеть.
+        _coord_cache: dict[str, tuple[float, float] | None] = {}
 
-            # 3) Последний fallback — локальная карта городов
-            coords = get_city_coords(city_name)
-            _coord_cache[city_name] = coords
-            return coords
+        def _city_coords(city_name: str) -> tuple[float, float] | None:
+            if city_name not in _coord_cache:
+                coords = get_city_coords(city_name)
+                _coord_cache[city_name] = coords
+                if coords is None:
+                    self._queue_unresolved_city(city_name)
+            return _coord_cache[city_name]
 
         def _candidate_coords(doc: dict) -> tuple[float, float] | None:
             try:
@@ -586,27 +899,7 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             except (TypeError, ValueError):
                 pass
             city = (doc.get("city") or "").strip()
-            return _coord_cache.get(city)
-
-        # Предзаполняем координаты пользователя/кандидатов (чтобы сортировка шла по геопозиции)
-        if (user_lat is None or user_lon is None) and user_city:
-            user_coords = await _resolve_city_coords(user_city)
-            if user_coords:
-                user_lat, user_lon = user_coords
-
-        unresolved_cities = []
-        seen_cities = set()
-        for d in docs:
-            if d.get("lat") is not None and d.get("lon") is not None:
-                continue
-            city = (d.get("city") or "").strip()
-            if not city or city in seen_cities:
-                continue
-            seen_cities.add(city)
-            unresolved_cities.append(city)
-        # Ограничиваем число внешних геозапросов за один ранжирующий проход
-        for city in unresolved_cities[:25]:
-            await _resolve_city_coords(city)
+            return _city_coords(city) if city else None
 
         # ── Безопасное сравнение datetime (naive/aware) ────────────────
         def _is_future(dt) -> bool:
@@ -620,22 +913,16 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
                 return False
 
         # ── Ключ сортировки: 1) свой город 2) по расстоянию 3) подписка ─
-        user_city_lower = user_city.lower() if user_city else ""
-        user_city_canonical = resolve_to_canonical_city(user_city) if user_city else ""
-
         def _sort_key(doc: dict) -> tuple:
-            # 1) Свой город — всегда первые
-            doc_city_raw = (doc.get("city") or "").strip()
-            doc_city = doc_city_raw.lower()
-            doc_city_canonical = resolve_to_canonical_city(doc_city_raw) if doc_city_raw else ""
-            city_match = 0 if (
-                (doc_city and user_city_lower and doc_city == user_city_lower)
-                or (doc_city_canonical and user_city_canonical and doc_city_canonical == user_city_canonical)
-            ) else 1
+            # 1) Свой город — всегда первые (city_canonical считается при записи анкеты)
+            doc_city_key = doc.get("city_canonical")
+            if doc_city_key is None and doc.get("city"):
+                doc_city_key = normalize_city(doc.get("city"))
+            city_match = 0 if user_city_key and doc_city_key == user_city_key else 1
 
             # 2) Расстояние в км
             dist = 999999.0
-            if user_lat is not None and user_lon is not None:
+            if has_geo:
                 crd = _candidate_coords(doc)
                 if crd:
                     try:
@@ -659,11 +946,76 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             else:
                 sub = 3
 
-            return (city_match, dist, sub)
+            return (city_match, dist, sub, doc.get("telegram_id") or 0)
+
+        keyed = [_sort_key(doc) for doc in docs]
+        if after_key is not None:
+            after_tuple = tuple(after_key)
+            keyed = [key for key in keyed if key > after_tuple]
+        keyed.sort()
+
+        rest_keys = [list(key) for key in keyed[:remaining]]
+        next_position = {"p": phase, "k": rest_keys[-1]} if len(keyed) > remaining else None
+        page_keys += rest_keys
 
-        docs.sort(key=_sort_key)
+        return [key[-1] for key in page_keys], next_position
 
-        return [convert_user_document_to_entity(doc) for doc in docs]
+    async def _aggregate_unseen(
+        self,
+        pipeline: list[dict],
+        seen: Container[int] | None,
+        count: int,
+    ) -> list[dict]:
+        """Первые count строк pipeline, которых нет в seen. Курсор закрывается, как только строк хватает."""
+        rows: list[dict] = []
+        cursor = self._collection.aggregate(pipeline, batchSize=max(count, 1))
+        try:
+            async for row in cursor:
+                if seen is not None and row.get("telegram_id") in seen:
+                    continue
+                rows.append(row)
+                if len(rows) >= count:
+                    break
+        finally:
+            await cursor.close()
+        return rows
+
+    async def get_users_in_order(
+        self,
+        telegram_ids: list[int],
+        projection: dict | None = None,
+    ) -> list[UserEntity]:
+        """Анкеты по списку id одним запросом, в порядке списка. projection — какие поля читать."""
+        if not telegram_ids:
+            return []
+        if projection is not None and not projection.get("telegram_id"):
+            projection = {**projection, "telegram_id": 1}
+        documents: dict[int, dict] = {}
+        async for doc in self._collection.find(
+            {"telegram_id": {"$in": list(telegram_ids)}},
+            projection=projection,
+        ):
+            documents[doc["telegram_id"]] = doc
+        return [
+            convert_user_document_to_entity(documents[telegram_id])
+            for telegram_id in telegram_ids
+            if telegram_id in documents
+        ]
+
+    async def get_feed_eligible_ids(self, telegram_ids: list[int]) -> set[int]:
+        """Кого из telegram_ids можно показывать в ленте — одним запросом по статусным полям rank_feed."""
+        if not telegram_ids:
+            return set()
+        cursor = self._collection.find(
+            {
+                "telegram_id": {"$in": list(telegram_ids)},
+                "is_banned": {"$ne": True},
+                "profile_hidden": {"$ne": True},
+                "$or": [{"is_active": True}, {"is_active": {"$exists": False}}],
+            },
+            projection={"telegram_id": 1, "_id": 0},
+        )
+        return {doc["telegram_id"] async for doc in cursor}
 
     async def get_ai_matchmaking_candidates(
         self,
@@ -675,32 +1027,33 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
         city: str | None = None,
         city_include_neighbors: bool = False,
         limit: int = 300,
+        seen: Container[int] | None = None,
     ) -> list[UserEntity]:
-        """Кандидаты для AI-подбора. HARD фильтры: пол, город, возраст, активность, фото."""
-        from app.infra.repositories.cities import get_city_coords, get_city_filter_values, haversine_km, resolve_to_canonical_city
+        """
+        Кандидаты для AI-подбора. HARD фильтры: пол, город, возраст, активность, фото.
+        Порядок: искомый город → соседние города → остальные, внутри — по расстоянию.
+        Анкеты с location ранжирует и обрезает MongoDB ($geoNear), анкеты без
+        координат добираются в конец списка.
+        seen — уже лайкнутые анкеты, отсеиваются при чтении (как в get_feed_page).
+        """
+        from pymongo.errors import OperationFailure
+        from app.infra.repositories.cities import get_city_coords, haversine_km, resolve_to_canonical_city
 
-        user = await self.get_user_by_telegram_id(telegram_id)
-        if user is None:
+        user_document = await self._collection.find_one({"telegram_id": telegram_id})
+        if not user_document:
             return []
+        user = convert_user_document_to_entity(user_document)
 
         excluded = set(exclude_ids or [])
         excluded.add(telegram_id)
 
-        _ALL_MALE = [
-            "Man", "man", "Male", "male", "Мужской", "мужской", "м", "m",
-            "мужчина", "парень", "male", "men",
-        ]
-        _ALL_FEMALE = [
-            "Female", "female", "Женский", "женский", "Woman", "woman", "ж", "f",
-            "женщина", "девушка", "girl", "women",
-        ]
-        gender_filter = {"$in": _ALL_FEMALE} if target_gender == "female" else {"$in": _ALL_MALE}
+        gender_filter = GENDER_FEMALE if target_gender == "female" else GENDER_MALE
 
         base: dict = {
             "telegram_id": {"$nin": list(excluded)},
             "is_banned": {"$ne": True},
             "profile_hidden": {"$ne": True},
-            "gender": gender_filter,
+            "gender_norm": gender_filter,
             "$and": [
                 {"$or": [{"is_active": True}, {"is_active": {"$exists": False}}]},
                 {
@@ -721,27 +1074,18 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             if age_q:
                 base["age"] = age_q
 
+        canonical_city_for_sort = resolve_to_canonical_city(city or "") if city else ""
+        city_key = normalize_city(city) if city else ""
+        neighbor_keys: list[str] = []
         if city:
-            canonical_city = resolve_to_canonical_city(city)
-            city_values = list(get_city_filter_values(city))
-            if city_include_neighbors:
-                for nb in _CITY_NEIGHBORS.get(canonical_city, []):
-                    city_values.extend(get_city_filter_values(nb))
-            city_values = list(dict.fromkeys(city_values))
-            base["$and"] = list(base.get("$and", []))
-            base["$and"].append({"city": {"$in": city_values}})
-
-        docs: list[dict] = []
-        async for doc in self._collection.find(base).limit(limit * 2):
-            docs.append(doc)
-
-        if not docs:
-            return []
+            neighbor_keys = [normalize_city(nb) for nb in _CITY_NEIGHBORS.get(canonical_city_for_sort, [])]
+            city_keys = [city_key] + (neighbor_keys if city_include_neighbors else [])
+            base["city_canonical"] = {"$in": list(dict.fromkeys(city_keys))}
 
         raw_city = getattr(user, "city", None)
         user_city = str(raw_city.as_generic_type() if hasattr(raw_city, "as_generic_type") else raw_city or "").strip()
         user_lat, user_lon = None, None
-        raw_lat, raw_lon = getattr(user, "lat", None), getattr(user, "lon", None)
+        raw_lat, raw_lon = user_document.get("lat"), user_document.get("lon")
         if raw_lat is not None and raw_lon is not None:
             try:
                 user_lat, user_lon = float(raw_lat), float(raw_lon)
@@ -752,6 +1096,57 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             if coords:
                 user_lat, user_lon = coords
 
+        # ── Анкеты с location: ранжирование и limit в MongoDB ─────────
+        geo_docs: list[dict] = []
+        rest_query = base
+        if user_lat is not None and user_lon is not None:
+            if city_key:
+                city_match_expr: dict | int = {"$cond": [
+                    {"$eq": ["$city_canonical", city_key]},
+                    0,
+                    {"$cond": [{"$in": ["$city_canonical", neighbor_keys]}, 0.5, 1]},
+                ]}
+            else:
+                city_match_expr = {"$literal": 1}
+            pipeline = [
+                {"$geoNear": {
+                    "near": convert_coords_to_geojson_point(user_lat, user_lon),
+                    "distanceField": "_dist_m",
+                    "key": "location",
+                    "query": base,
+                    "spherical": True,
+                }},
+                {"$set": {
+                    "_city_match": city_match_expr,
+                    "_dist": {"$divide": ["$_dist_m", 1000.0]},
+                }},
+                {"$set": {"_dist": {"$cond": [
+                    {"$and": [{"$eq": ["$_city_match", 0]}, {"$gt": ["$_dist", 100]}]},
+                    0.0,
+                    "$_dist",
+                ]}}},
+                {"$sort": {"_city_match": 1, "_dist": 1, "telegram_id": 1}},
+                {"$limit": limit + (len(seen) if seen is not None else 0)},
+            ]
+            try:
+                geo_docs = await self._aggregate_unseen(pipeline, seen, limit)
+                rest_query = {**base, "location": {"$exists": False}}
+            except OperationFailure as e:
+                logger.warning("AI candidates $geoNear failed, falling back to in-process ranking: %s", e)
+                geo_docs = []
+
+        remaining = limit - len(geo_docs)
+        if remaining <= 0:
+            return [convert_user_document_to_entity(d) for d in geo_docs]
+
+        # ── Анкеты без location: ранжирование в Python ─────────────────
+        docs: list[dict] = []
+        extra = len(seen) if seen is not None else 0
+        async for doc in self._collection.find(rest_query).limit(remaining * 2 + extra):
+            if seen is not None and doc.get("telegram_id") in seen:
+                continue
+            docs.append(doc)
+
         _coord_cache: dict[str, tuple[float, float] | None] = {}
 
         def _candidate_coords(d: dict) -> tuple[float, float] | None:
@@ -765,17 +1160,13 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
                 _coord_cache[c] = get_city_coords(c)
             return _coord_cache[c]
 
-        canonical_city_for_sort = resolve_to_canonical_city(city or "") if city else ""
-        user_city_lower = user_city.lower()
-
         def _ai_sort_key(d: dict) -> tuple:
-            doc_raw = (d.get("city") or "").strip()
-            doc_canonical = resolve_to_canonical_city(doc_raw) if doc_raw else ""
-            city_match = 0 if canonical_city_for_sort and doc_canonical == canonical_city_for_sort else 1
-            if city_match == 1 and canonical_city_for_sort:
-                neighbors = _CITY_NEIGHBORS.get(canonical_city_for_sort, [])
-                if doc_canonical in neighbors:
-                    city_match = 0.5
+            doc_key = d.get("city_canonical")
+            if doc_key is None and d.get("city"):
+                doc_key = normalize_city(d.get("city"))
+            city_match = 0 if city_key and doc_key == city_key else 1
+            if city_match == 1 and doc_key and doc_key in neighbor_keys:
+                city_match = 0.5
             dist = 999999.0
             if user_lat is not None and user_lon is not None:
                 crd = _candidate_coords(d)
@@ -786,41 +1177,13 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             return (city_match, dist)
 
         docs.sort(key=_ai_sort_key)
-        return [convert_user_document_to_entity(d) for d in docs[:limit]]
+        return [convert_user_document_to_entity(d) for d in geo_docs + docs[:remaining]]
 
     async def get_users_liked_from(self, user_list: list[int]) -> Iterable[UserEntity]:
-        users_documents = self._collection.find(
-            filter={"telegram_id": {"$in": user_list}},
-        )
-
-        result = []
-        async for user_document in users_documents:
-            telegram_id = user_document.get("telegram_id")
-            if telegram_id:
-                user_entity = await self.get_user_by_telegram_id(
-                    telegram_id=telegram_id,
-                )
-                if user_entity:
-                    result.append(user_entity)
-
-        return result
+        return await self.get_users_in_order(user_list)
 
     async def get_users_liked_by(self, user_list: list[int]) -> Iterable[UserEntity]:
-        users_documents = self._collection.find(
-            filter={"telegram_id": {"$in": user_list}},
-        )
-
-        result = []
-        async for user_document in users_documents:
-            telegram_id = user_document.get("telegram_id")
-            if telegram_id:
-                user_entity = await self.get_user_by_telegram_id(
-                    telegram_id=telegram_id,
-                )
-                if user_entity:
-                    result.append(user_entity)
-
-        return result
+        return await self.get_users_in_order(user_list)
 
     async def get_icebreaker_count(self, telegram_id: int) -> int:
         """
@@ -895,6 +1258,13 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
         )
 
     async def get_photos(self, telegram_id: int) -> list[str]:
+        photos = self.photos_cache.get(telegram_id)
+        if photos is None:
+            photos = await self._load_photos(telegram_id)
+            self.photos_cache.set(telegram_id, photos)
+        return list(photos)
+
+    async def _load_photos(self, telegram_id: int) -> list[str]:
         doc = await self._collection.find_one(
             filter={"telegram_id": telegram_id},
             projection={"photos": 1},
@@ -908,10 +1278,11 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             filter={"telegram_id": telegram_id},
             update={"$push": {"photos": s3_key}},
         )
+        self._notify_profile_changed(telegram_id, ("photos",))
         return await self.get_photos(telegram_id)
 
     async def remove_photo(self, telegram_id: int, index: int) -> list[str]:
-        photos = await self.get_photos(telegram_id)
+        photos = await self._load_photos(telegram_id)
         if index < 0 or index >= len(photos):
             return photos
         photos.pop(index)
@@ -920,10 +1291,11 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             filter={"telegram_id": telegram_id},
             update={"$set": {"photos": photos, "photo": main_photo}},
         )
+        self._notify_profile_changed(telegram_id, ("photos", "photo"))
         return photos
 
     async def replace_photo(self, telegram_id: int, index: int, s3_key: str) -> list[str]:
-        photos = await self.get_photos(telegram_id)
+        photos = await self._load_photos(telegram_id)
         if index < 0 or index >= len(photos):
             return photos
         photos[index] = s3_key
@@ -934,11 +1306,34 @@ class MongoDBUserRepository(BaseUsersRepository, BaseMongoDBRepository):
             filter={"telegram_id": telegram_id},
             update={"$set": update_data},
         )
+        self._notify_profile_changed(telegram_id, update_data.keys())
         return photos
 
 
+async def _sync_seen(
+    seen_repository: BaseSeenProfilesRepository | None,
+    add: bool,
+    user_id: int,
+    target_id: int,
+    kind: str,
+) -> None:
+    """Обновляет user_seen вслед за likes/dislikes. Ошибка не ломает сам лайк/пропуск."""
+    if seen_repository is None:
+        return
+    try:
+        if add:
+            await seen_repository.add_seen(user_id, target_id, kind)
+        else:
+            await seen_repository.remove_seen(user_id, target_id, kind)
+    except Exception as e:
+        logger.warning("Could not update seen profiles of %s: %s", user_id, e)
+
+
 @dataclass
 class MongoDBLikesRepository(BaseLikesRepository, BaseMongoDBRepository):
+    seen_repository: BaseSeenProfilesRepository | None = None
+    matches_repository: BaseMatchesRepository | None = None
+
     async def check_like_is_exists(self, from_user: int, to_user: int) -> bool:
         return bool(
             await self._collection.find_one(
@@ -946,13 +1341,57 @@ class MongoDBLikesRepository(BaseLikesRepository, BaseMongoDBRepository):
                     "from_user": from_user,
                     "to_user": to_user,
                 },
+                projection={"_id": 1},
             ),
         )
 
     async def create_like(self, like: LikesEntity) -> LikesEntity:
-        await self._collection.insert_one(convert_like_entity_to_document(like))
+        await self.add_like(like)
         return like
 
+    async def add_like(self, like: LikesEntity) -> tuple[bool, bool]:
+        """
+        Лайк за один upsert по уникальному индексу (from_user, to_user) — повторный
+        лайк ничего не пишет. Затем одна точечная проверка встречного лайка.
+        """
+        import asyncio
+        from pymongo.errors import DuplicateKeyError
+
+        document = convert_like_entity_to_document(like)
+        from_user, to_user = document["from_user"], document["to_user"]
+        try:
+            result = await self._collection.update_one(
+                {"from_user": from_user, "to_user": to_user},
+                {"$setOnInsert": document},
+                upsert=True,
+            )
+            created = result.upserted_id is not None
+        except DuplicateKeyError:
+            # Тот же лайк параллельно вставил другой запрос
+            created = False
+
+        # Встречный лайк ищем после записи своего: при одновременных лайках
+        # хотя бы одна сторона увидит другую. user_seen обновляется параллельно.
+        reverse = self._collection.find_one(
+            {"from_user": to_user, "to_user": from_user},
+            projection={"_id": 1},
+        )
+        if created:
+            back, _ = await asyncio.gather(
+                reverse,
+                _sync_seen(self.seen_repository, True, from_user, to_user, SEEN_LIKED),
+            )
+        else:
+            back = await reverse
+        is_match = back is not None
+
+        if is_match and created and self.matches_repository is not None:
+            try:
+                await self.matches_repository.activate(from_user, to_user)
+            except Exception as e:
+                logger.warning("Could not store match %s-%s: %s", from_user, to_user, e)
+        return created, is_match
+
     async def delete_like(self, from_user: int, to_user: int):
         await self._collection.delete_one(
             filter={
@@ -960,6 +1399,12 @@ class MongoDBLikesRepository(BaseLikesRepository, BaseMongoDBRepository):
                 "to_user": to_user,
             },
         )
+        await _sync_seen(self.seen_repository, False, from_user, to_user, SEEN_LIKED)
+        if self.matches_repository is not None:
+            try:
+                await self.matches_repository.deactivate(from_user, to_user)
+            except Exception as e:
+                logger.warning("Could not remove match %s-%s: %s", from_user, to_user, e)
 
     async def get_users_ids_liked_from(self, user_id: int) -> list[int]:
         users_documents = self._collection.find(
@@ -995,6 +1440,260 @@ class MongoDBLikesRepository(BaseLikesRepository, BaseMongoDBRepository):
             "created_at": {"$gte": today_start},
         })
 
+    async def get_likes_page(
+        self,
+        user_id: int,
+        incoming: bool = False,
+        limit: int = 50,
+        before: dict | None = None,
+        mutual_only: bool = False,
+    ) -> tuple[list[int], dict | None]:
+        """
+        Страница лайков, новые первыми: сортировка (created_at, _id) по убыванию,
+        индексы from_user_created_at / to_user_created_at.
+        Позиция — {"t": created_at последнего лайка (ISO) или None, "i": его _id}.
+        Лайки без created_at (старые записи) идут в конце.
+        """
+        from datetime import datetime
+        from bson import ObjectId
+        from bson.errors import InvalidId
+
+        own_field, other_field = ("to_user", "from_user") if incoming else ("from_user", "to_user")
+        match: dict = {own_field: user_id}
+        if before is not None:
+            try:
+                last_id = ObjectId(before["i"])
+            except InvalidId as e:
+                raise ValueError(str(e)) from e
+            last_at = datetime.fromisoformat(before["t"]) if before.get("t") else None
+            if last_at is None:
+                match.update({"created_at": None, "_id": {"$lt": last_id}})
+            else:
+                match["$or"] = [
+                    {"created_at": {"$lt": last_at}},
+                    {"created_at": last_at, "_id": {"$lt": last_id}},
+                    {"created_at": None},
+                ]
+
+        pipeline: list[dict] = [
+            {"$match": match},
+            {"$sort": {"created_at": -1, "_id": -1}},
+        ]
+        if mutual_only:
+            # Встречный лайк — точечный поиск по уникальному индексу (from_user, to_user)
+            pipeline += [
+                {"$lookup": {
+                    "from": self.mongo_db_collection_name,
+                    "let": {"other": f"${other_field}"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$and": [
+                            {"$eq": [f"${own_field}", "$$other"]},
+                            {"$eq": [f"${other_field}", user_id]},
+                        ]}}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 1}},
+                    ],
+                    "as": "_back",
+                }},
+                {"$match": {"_back.0": {"$exists": True}}},
+            ]
+        pipeline += [
+            {"$limit": limit + 1},
+            {"$project": {"_id": 1, "created_at": 1, other_field: 1}},
+        ]
+        rows = [row async for row in self._collection.aggregate(pipeline)]
+
+        page = rows[:limit]
+        ids = [row[other_field] for row in page if row.get(other_field)]
+        if len(rows) <= limit or not page:
+            return ids, None
+        last = page[-1]
+        created_at = last.get("created_at")
+        return ids, {
+            "t": created_at.isoformat() if created_at else None,
+            "i": str(last["_id"]),
+        }
+
+
+MATCH_ACTIVE = "active"
+MATCH_UNMATCHED = "unmatched"
+
+
+def _match_key(user_a: int, user_b: int) -> tuple[str, int, int]:
+    """Ключ пары не зависит от порядка: меньший id первым."""
+    low, high = sorted((user_a, user_b))
+    return f"{low}:{high}", low, high
+
+
+# Отметки о завершённых разовых миграциях данных: {_id: имя миграции, done_at}
+MIGRATIONS_COLLECTION = "migrations"
+MATCHES_BACKFILL_MIGRATION = "matches_from_likes"
+
+
+@dataclass
+class MongoDBMatchesRepository(BaseMatchesRepository, BaseMongoDBRepository):
+    """
+    Мэтчи — коллекция 'matches', один документ на пару:
+    {_id: "a:b" (a < b), user_a_id, user_b_id, users: [a, b], status, created_at, matched_at, updated_at}.
+    Пишется из MongoDBLikesRepository при встречном лайке, старые пары переносит backfill_from_likes.
+    """
+
+    likes_collection_name: str = "likes"
+
+    async def activate(self, user_a: int, user_b: int) -> bool:
+        """Отмечает пару мэтчем. Возвращает True, если мэтч новый (не был активен)."""
+        from datetime import datetime, timezone
+        from pymongo.errors import DuplicateKeyError
+
+        key, low, high = _match_key(user_a, user_b)
+        now = datetime.now(timezone.utc)
+        try:
+            result = await self._collection.update_one(
+                {"_id": key, "status": {"$ne": MATCH_ACTIVE}},
+                {
+                    "$set": {"status": MATCH_ACTIVE, "matched_at": now, "updated_at": now},
+                    "$setOnInsert": {
+                        "user_a_id": low,
+                        "user_b_id": high,
+                        "users": [low, high],
+                        "created_at": now,
+                    },
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Документ уже есть и активен — upsert попытался вставить дубль _id
+            return False
+        return bool(result.upserted_id is not None or result.modified_count)
+
+    async def deactivate(self, user_a: int, user_b: int) -> None:
+        from datetime import datetime, timezone
+
+        key, _, _ = _match_key(user_a, user_b)
+        await self._collection.update_one(
+            {"_id": key, "status": MATCH_ACTIVE},
+            {"$set": {"status": MATCH_UNMATCHED, "updated_at": datetime.now(timezone.utc)}},
+        )
+
+    async def is_match(self, user_a: int, user_b: int) -> bool:
+        key, _, _ = _match_key(user_a, user_b)
+        return bool(
+            await self._collection.find_one(
+                {"_id": key, "status": MATCH_ACTIVE},
+                projection={"_id": 1},
+            ),
+        )
+
+    async def get_matches_page(
+        self,
+        user_id: int,
+        limit: int = 50,
+        before: dict | None = None,
+    ) -> tuple[list[int], dict | None]:
+        """
+        Мэтчи пользователя, новые первыми: (matched_at, _id) по убыванию,
+        индекс users_status_matched_at. Позиция — {"t": matched_at (ISO), "i": _id}.
+        """
+        from datetime import datetime
+
+        match: dict = {"users": user_id, "status": MATCH_ACTIVE}
+        if before is not None:
+            last_at = datetime.fromisoformat(before["t"])
+            last_id = str(before["i"])
+            match["$or"] = [
+                {"matched_at": {"$lt": last_at}},
+                {"matched_at": last_at, "_id": {"$lt": last_id}},
+            ]
+        cursor = self._collection.find(
+            match,
+            projection={"user_a_id": 1, "user_b_id": 1, "matched_at": 1},
+        ).sort([("matched_at", -1), ("_id", -1)]).limit(limit + 1)
+        rows = [row async for row in cursor]
+
+        page = rows[:limit]
+        ids = [
+            row["user_b_id"] if row.get("user_a_id") == user_id else row["user_a_id"]
+            for row in page
+        ]
+        if len(rows) <= limit or not page:
+            return ids, None
+        last = page[-1]
+        return ids, {"t": last["matched_at"].isoformat(), "i": last["_id"]}
+
+    async def backfill_from_likes(self, batch_size: int = 500, force: bool = False) -> int:
+        """
+        Переносит существующие взаимные лайки в matches. Уже записанные пары не трогает.
+        Завершённый перенос отмечается в коллекции migrations; без force повторно не выполняется.
+        Прерванный (рестарт, ошибка) перенос повторяется целиком — запись пар идемпотентна,
+        а живые мэтчи, записанные до него, не мешают перенести остальные.
+        Возвращает число обработанных пар.
+        """
+        from datetime import datetime, timezone
+        from pymongo import UpdateOne
+
+        migrations = self.mongo_db_client[self.mongo_db_name][MIGRATIONS_COLLECTION]
+        if not force and await migrations.find_one({"_id": MATCHES_BACKFILL_MIGRATION}):
+            return 0
+        likes_collection_name = self.likes_collection_name
+        likes = self.mongo_db_client[self.mongo_db_name][likes_collection_name]
+        pipeline = [
+            # Каждая пара один раз — со стороны меньшего id
+            {"$match": {"$expr": {"$lt": ["$from_user", "$to_user"]}}},
+            {"$lookup": {
+                "from": likes_collection_name,
+                "let": {"a": "$from_user", "b": "$to_user"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$and": [
+                        {"$eq": ["$from_user", "$$b"]},
+                        {"$eq": ["$to_user", "$$a"]},
+                    ]}}},
+                    {"$limit": 1},
+                    {"$project": {"_id": 0, "created_at": 1}},
+                ],
+                "as": "_back",
+            }},
+            {"$match": {"_back.0": {"$exists": True}}},
+            {"$project": {
+                "_id": 0,
+                "from_user": 1,
+                "to_user": 1,
+                "matched_at": {"$max": ["$created_at", {"$arrayElemAt": ["$_back.created_at", 0]}]},
+            }},
+        ]
+
+        now = datetime.now(timezone.utc)
+        total = 0
+        ops: list = []
+        async for row in likes.aggregate(pipeline):
+            key, low, high = _match_key(row["from_user"], row["to_user"])
+            matched_at = row.get("matched_at") or now
+            ops.append(UpdateOne(
+                {"_id": key},
+                {"$setOnInsert": {
+                    "user_a_id": low,
+                    "user_b_id": high,
+                    "users": [low, high],
+                    "status": MATCH_ACTIVE,
+                    "created_at": matched_at,
+                    "matched_at": matched_at,
+                    "updated_at": now,
+                }},
+                upsert=True,
+            ))
+            if len(ops) >= batch_size:
+                await self._collection.bulk_write(ops, ordered=False)
+                total += len(ops)
+                ops = []
+        if ops:
+            await self._collection.bulk_write(ops, ordered=False)
+            total += len(ops)
+        await migrations.update_one(
+            {"_id": MATCHES_BACKFILL_MIGRATION},
+            {"$set": {"done_at": datetime.now(timezone.utc), "pairs": total}},
+            upsert=True,
+        )
+        return total
+
 
 @dataclass
 class MongoDBPhotoLikesRepository(BaseMongoDBRepository):
@@ -1072,6 +1771,8 @@ class MongoDBPhotoCommentsRepository(BaseMongoDBRepository):
 class MongoDBDislikesRepository(BaseDislikesRepository, BaseMongoDBRepository):
     """Дизлайки (пропущенные анкеты) — хранятся в коллекции 'dislikes'."""
 
+    seen_repository: BaseSeenProfilesRepository | None = None
+
     async def add_dislike(self, from_user: int, to_user: int) -> None:
         from datetime import datetime, timezone
         await self._collection.update_one(
@@ -1080,6 +1781,7 @@ class MongoDBDislikesRepository(BaseDislikesRepository, BaseMongoDBRepository):
                       "created_at": datetime.now(timezone.utc)}},
             upsert=True,
         )
+        await _sync_seen(self.seen_repository, True, from_user, to_user, SEEN_DISLIKED)
 
     async def get_disliked_ids(self, user_id: int) -> list[int]:
         cursor = self._collection.find({"from_user": user_id}, {"to_user": 1})
@@ -1087,3 +1789,509 @@ class MongoDBDislikesRepository(BaseDislikesRepository, BaseMongoDBRepository):
 
     async def remove_dislike(self, from_user: int, to_user: int) -> None:
         await self._collection.delete_one({"from_user": from_user, "to_user": to_user})
+        await _sync_seen(self.seen_repository, False, from_user, to_user, SEEN_DISLIKED)
+
+
+@dataclass
+class MongoDBSeenProfilesRepository(BaseSeenProfilesRepository, BaseMongoDBRepository):
+    """
+    Просмотренные анкеты — коллекция 'user_seen', один документ на пользователя:
+    {_id: telegram_id, liked: blob, disliked: blob, v: версия}.
+    Блобы — упакованные SortedIdSet. Документ один раз строится из likes/dislikes,
+    дальше меняется по одному id (optimistic lock по v).
+    """
+
+    likes_collection_name: str = "likes"
+    dislikes_collection_name: str = "dislikes"
+    max_update_attempts: int = 5
+
+    async def get_seen(self, user_id: int) -> SeenProfiles:
+        seen, _ = await self._load(user_id)
+        return seen
+
+    async def add_seen(self, user_id: int, target_id: int, kind: str) -> None:
+        await self._update(user_id, target_id, kind, add=True)
+
+    async def remove_seen(self, user_id: int, target_id: int, kind: str) -> None:
+        await self._update(user_id, target_id, kind, add=False)
+
+    async def _load(self, user_id: int) -> tuple[SeenProfiles, int]:
+        doc = await self._collection.find_one({"_id": user_id})
+        if doc is None:
+            doc = await self._build(user_id)
+        seen = SeenProfiles(
+            liked=SortedIdSet.from_bytes(doc.get(SEEN_LIKED)),
+            disliked=SortedIdSet.from_bytes(doc.get(SEEN_DISLIKED)),
+        )
+        return seen, doc.get("v", 0)
+
+    async def _build(self, user_id: int) -> dict:
+        """Первое обращение: собираем множества из likes/dislikes (один раз на пользователя)."""
+        from bson import Binary
+        from pymongo.errors import DuplicateKeyError
+
+        db = self.mongo_db_client[self.mongo_db_name]
+        doc: dict = {"_id": user_id, "v": 0}
+        for kind, collection_name in (
+            (SEEN_LIKED, self.likes_collection_name),
+            (SEEN_DISLIKED, self.dislikes_collection_name),
+        ):
+            ids = SortedIdSet([
+                d["to_user"]
+                async for d in db[collection_name].find({"from_user": user_id}, {"_id": 0, "to_user": 1})
+                if d.get("to_user")
+            ])
+            doc[kind] = Binary(ids.to_bytes())
+        try:
+            await self._collection.insert_one(doc)
+        except DuplicateKeyError:
+            # Параллельный запрос построил документ раньше — берём его
+            existing = await self._collection.find_one({"_id": user_id})
+            if existing is not None:
+                return existing
+        return doc
+
+    async def _update(self, user_id: int, target_id: int, kind: str, add: bool) -> None:
+        from bson import Binary
+
+        if kind not in SEEN_KINDS:
+            raise ValueError(f"Unknown seen kind: {kind!r}")
+        for _ in range(self.max_update_attempts):
+            seen, version = await self._load(user_id)
+            ids = seen.get(kind)
+            changed = ids.add(target_id) if add else ids.discard(target_id)
+            if not changed:
+                return
+            result = await self._collection.update_one(
+                {"_id": user_id, "v": version},
+                {"$set": {kind: Binary(ids.to_bytes()), "v": version + 1}},
+            )
+            if result.modified_count:
+                return
+        # Не удалось записать из-за гонки — сбрасываем документ, он пересоберётся из likes/dislikes
+        logger.warning("Seen profiles of %s rebuilt after concurrent updates", user_id)
+        await self._collection.delete_one({"_id": user_id})
+
+
+@dataclass
+class MongoDBFeedQueueRepository(BaseFeedQueueRepository, BaseMongoDBRepository):
+    """
+    Очереди рекомендаций — коллекция 'feed_queues', один документ на владельца:
+    {_id: telegram_id, ids: [...], n, g: поколение, tail, target_gender, city_canonical,
+     built_at, served_at, stale}.
+    """
+
+    async def get_slice(self, owner_id: int, offset: int, count: int) -> FeedQueueSlice | None:
+        doc = await self._collection.find_one(
+            {"_id": owner_id},
+            projection={"ids": {"$slice": [offset, count]}, "n": 1, "g": 1, "tail": 1},
+        )
+        if doc is None:
+            return None
+        return FeedQueueSlice(
+            ids=list(doc.get("ids") or []),
+            generation=doc.get("g", 0),
+            total=doc.get("n", 0),
+            tail=doc.get("tail"),
+        )
+
+    async def save_queue(
+        self,
+        owner_id: int,
+        ids: list[int],
+        tail: dict | None,
+        target_gender: str | None,
+        city_key: str,
+    ) -> None:
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc)
+        await self._collection.update_one(
+            {"_id": owner_id},
+            {
+                "$set": {
+                    "ids": ids,
+                    "n": len(ids),
+                    "tail": tail,
+                    "target_gender": target_gender,
+                    "city_canonical": city_key or None,
+                    "built_at": now,
+                    "stale": False,
+                },
+                "$inc": {"g": 1},
+                "$setOnInsert": {"served_at": now},
+            },
+            upsert=True,
+        )
+
+    async def mark_stale(self, candidate_id: int, gender: str | None, city_key: str) -> int:
+        """Помечает очереди, на которые могло повлиять изменение анкеты candidate_id."""
+        branches: list[dict] = [{"ids": candidate_id}]
+        if gender:
+            branches.append({"target_gender": gender, "city_canonical": city_key or None})
+        result = await self._collection.update_many(
+            {"$or": branches, "stale": {"$ne": True}},
+            {"$set": {"stale": True}},
+        )
+        return result.modified_count
+
+    async def touch(self, owner_id: int) -> None:
+        from datetime import datetime, timezone
+        await self._collection.update_one(
+            {"_id": owner_id},
+            {"$set": {"served_at": datetime.now(timezone.utc)}},
+        )
+
+    async def get_owner_ids_to_refresh(
+        self,
+        built_before,
+        served_after,
+        limit: int,
+    ) -> list[int]:
+        """Очереди активных владельцев: помеченные stale или собранные раньше built_before."""
+        cursor = self._collection.find(
+            {
+                "served_at": {"$gte": served_after},
+                "$or": [{"stale": True}, {"built_at": {"$lt": built_before}}],
+            },
+            projection={"_id": 1},
+        ).sort("built_at", 1).limit(limit)
+        return [doc["_id"] async for doc in cursor]
+
+
+def _broadcast_query(target: str) -> dict:
+    """Фильтр анкет для аудитории рассылки (BROADCAST_TARGETS)."""
+    from datetime import datetime, timedelta, timezone
+    now = datetime.now(timezone.utc)
+    query: dict = {"is_banned": {"$ne": True}}
+    if target == "premium":
+        query["premium_type"] = "premium"
+        query["premium_until"] = {"$gt": now}
+    elif target == "vip":
+        query["premium_type"] = "vip"
+        query["premium_until"] = {"$gt": now}
+    elif target == "active_7d":
+        query["last_seen"] = {"$gte": now - timedelta(days=7)}
+    elif target == "no_premium":
+        query["$or"] = [
+            {"premium_type": None},
+            {"premium_type": {"$exists": False}},
+            {"premium_until": {"$lte": now}},
+        ]
+    return query
+
+
+def _outbox_message(doc: dict) -> OutboxMessage:
+    return OutboxMessage(
+        chat_id=doc["chat_id"],
+        kind=doc["kind"],
+        payload=doc.get("payload") or {},
+        count=doc.get("count", 1),
+        attempts=doc.get("attempts", 0),
+        id=str(doc["_id"]),
+        created_at=doc.get("created_at"),
+        available_at=doc.get("available_at"),
+    )
+
+
+@dataclass
+class MongoDBNotificationOutboxRepository(BaseNotificationOutboxRepository, BaseMongoDBRepository):
+    """
+    Коллекция 'notification_outbox': {chat_id, kind, payload, count, attempts, status,
+    coalesce_key, created_at, available_at}. Готова к отправке запись с available_at <= now;
+    взятая диспетчером получает status=sending и available_at = now + lease — если процесс
+    упадёт до ack, запись вернётся в очередь сама.
+    """
+
+    async def push(self, message: OutboxMessage, delay_seconds: float = 0) -> None:
+        from datetime import datetime, timedelta, timezone
+        now = datetime.now(timezone.utc)
+        available_at = now + timedelta(seconds=delay_seconds)
+        key = coalesce_key(message.chat_id, message.kind)
+        if key is None:
+            await self._collection.insert_one({
+                "chat_id": message.chat_id,
+                "kind": message.kind,
+                "payload": message.payload,
+                "count": message.count,
+                "attempts": 0,
+                "status": OUTBOX_PENDING,
+                "created_at": now,
+                "available_at": available_at,
+            })
+            return
+        from pymongo.errors import DuplicateKeyError
+
+        # Склейка: последний отправитель и счётчик — в ждущую запись получателя.
+        # Ждущая запись на ключ одна (уникальный частичный индекс coalesce_key_pending_unique)
+        for attempt in range(3):
+            try:
+                await self._collection.update_one(
+                    {"coalesce_key": key, "status": OUTBOX_PENDING},
+                    {
+                        "$set": {"payload": message.payload},
+                        "$inc": {"count": message.count},
+                        "$setOnInsert": {
+                            "chat_id": message.chat_id,
+                            "kind": message.kind,
+                            "attempts": 0,
+                            "created_at": now,
+                            "available_at": available_at,
+                        },
+                    },
+                    upsert=True,
+                )
+                return
+            except DuplicateKeyError:
+                # Параллельный push вставил запись первым — повтор её обновит
+                if attempt == 2:
+                    raise
+
+    async def claim(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        from datetime import datetime, timedelta, timezone
+        from pymongo import ReturnDocument
+        now = datetime.now(timezone.utc)
+        claimed: list[OutboxMessage] = []
+        # По одной записи: find_one_and_update атомарен, две реплики не возьмут одно и то же
+        for _ in range(limit):
+            doc = await self._collection.find_one_and_update(
+                {"available_at": {"$lte": now}},
+                {"$set": {"status": OUTBOX_SENDING, "available_at": now + timedelta(seconds=lease_seconds)}},
+                sort=[("available_at", 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is None:
+                break
+            claimed.append(_outbox_message(doc))
+        return claimed
+
+    async def ack(self, message: OutboxMessage) -> None:
+        from bson import ObjectId
+        await self._collection.delete_one({"_id": ObjectId(message.id)})
+
+    async def retry(self, message: OutboxMessage, delay_seconds: float, failed: bool = True) -> None:
+        from datetime import datetime, timedelta, timezone
+        from bson import ObjectId
+        from pymongo.errors import DuplicateKeyError
+        oid = ObjectId(message.id)
+        key = coalesce_key(message.chat_id, message.kind)
+        # Пока запись отправлялась, у получателя могла появиться новая ждущая — склеиваем в неё
+        if key is not None and await self._fold_into_pending(oid, key, message.count):
+            return
+        update: dict = {
+            "$set": {
+                "status": OUTBOX_PENDING,
+                "available_at": datetime.now(timezone.utc) + timedelta(seconds=delay_seconds),
+            },
+        }
+        if failed:
+            update["$inc"] = {"attempts": 1}
+        try:
+            await self._collection.update_one({"_id": oid}, update)
+        except DuplicateKeyError:
+            # Ждущая запись появилась между проверкой и возвратом
+            await self._fold_into_pending(oid, key, message.count)
+
+    async def _fold_into_pending(self, oid, key: str, count: int) -> bool:
+        """Прибавляет count к ждущей записи ключа key и удаляет запись oid. False — ждущей нет."""
+        result = await self._collection.update_one(
+            {"coalesce_key": key, "status": OUTBOX_PENDING},
+            {"$inc": {"count": count}},
+        )
+        if not result.matched_count:
+            return False
+        await self._collection.delete_one({"_id": oid})
+        return True
+
+    async def stats(self) -> OutboxStats:
+        from datetime import datetime, timezone
+        stats = OutboxStats()
+        oldest = None
+        cursor = self._collection.aggregate([
+            {"$group": {
+                "_id": {"status": "$status", "kind": "$kind"},
+                "n": {"$sum": 1},
+                "oldest": {"$min": "$created_at"},
+            }},
+        ])
+        async for row in cursor:
+            status, kind = row["_id"].get("status"), row["_id"].get("kind")
+            target = stats.sending if status == OUTBOX_SENDING else stats.pending
+            target[kind] = target.get(kind, 0) + row["n"]
+            if row.get("oldest") is not None and (oldest is None or row["oldest"] < oldest):
+                oldest = row["oldest"]
+        if oldest is not None:
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            stats.oldest_seconds = max(0.0, (datetime.now(timezone.utc) - oldest).total_seconds())
+        return stats
+
+
+def _broadcast_job(doc: dict) -> BroadcastJob:
+    return BroadcastJob(
+        text=doc["text"],
+        target=doc.get("target", "all"),
+        photo=doc.get("photo"),
+        parse_mode=doc.get("parse_mode", "HTML"),
+        status=doc.get("status", BROADCAST_RUNNING),
+        cursor=doc.get("cursor"),
+        audience_done=doc.get("audience_done", False),
+        total=doc.get("total", 0),
+        sent=doc.get("sent", 0),
+        failed=doc.get("failed", 0),
+        blocked=doc.get("blocked", 0),
+        photo_file_id=doc.get("photo_file_id"),
+        id=str(doc["_id"]),
+        created_at=doc.get("created_at"),
+        updated_at=doc.get("updated_at"),
+        finished_at=doc.get("finished_at"),
+    )
+
+
+@dataclass
+class MongoDBBroadcastsRepository(BaseBroadcastsRepository, BaseMongoDBRepository):
+    """
+    Коллекции 'broadcast_jobs' (задание, курсор, счётчики, lease_until) и
+    'broadcast_recipients': {job_id, chat_id, status, created_at, updated_at} —
+    уникальный (job_id, chat_id) делает перенос пачки идемпотентным.
+    """
+    recipients_collection_name: str = "broadcast_recipients"
+
+    @property
+    def _recipients(self):
+        return self.mongo_db_client[self.mongo_db_name][self.recipients_collection_name]
+
+    @staticmethod
+    def _oid(job_id: str):
+        from bson import ObjectId
+        from bson.errors import InvalidId
+        try:
+            return ObjectId(job_id)
+        except (InvalidId, TypeError):
+            return None
+
+    async def create(self, job: BroadcastJob) -> BroadcastJob:
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc)
+        doc = {
+            "text": job.text,
+            "target": job.target,
+            "photo": job.photo,
+            "parse_mode": job.parse_mode,
+            "status": job.status,
+            "cursor": job.cursor,
+            "audience_done": job.audience_done,
+            "total": job.total,
+            "sent": 0,
+            "failed": 0,
+            "blocked": 0,
+            "photo_file_id": job.photo_file_id,
+            "created_at": now,
+            "updated_at": now,
+            "lease_until": now,
+        }
+        result = await self._collection.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return _broadcast_job(doc)
+
+    async def get(self, job_id: str) -> BroadcastJob | None:
+        oid = self._oid(job_id)
+        doc = await self._collection.find_one({"_id": oid}) if oid else None
+        return _broadcast_job(doc) if doc else None
+
+    async def list_recent(self, limit: int = 20) -> list[BroadcastJob]:
+        cursor = self._collection.find({}).sort("created_at", -1).limit(limit)
+        return [_broadcast_job(doc) async for doc in cursor]
+
+    async def set_status(self, job_id: str, status: str, expected: Iterable[str]) -> bool:
+        from datetime import datetime, timezone
+        oid = self._oid(job_id)
+        if oid is None:
+            return False
+        now = datetime.now(timezone.utc)
+        update = {"status": status, "updated_at": now}
+        if status == BROADCAST_CANCELLED:
+            update["finished_at"] = now
+        result = await self._collection.update_one(
+            {"_id": oid, "status": {"$in": list(expected)}},
+            {"$set": update},
+        )
+        return result.modified_count > 0
+
+    async def claim(self, lease_seconds: float) -> BroadcastJob | None:
+        from datetime import datetime, timedelta, timezone
+        now = datetime.now(timezone.utc)
+        doc = await self._collection.find_one_and_update(
+            {"status": BROADCAST_RUNNING, "lease_until": {"$lte": now}},
+            {"$set": {"lease_until": now + timedelta(seconds=lease_seconds)}},
+            sort=[("lease_until", 1)],
+        )
+        return _broadcast_job(doc) if doc else None
+
+    async def release(self, job_id: str) -> None:
+        from datetime import datetime, timezone
+        await self._collection.update_one(
+            {"_id": self._oid(job_id)},
+            {"$set": {"lease_until": datetime.now(timezone.utc)}},
+        )
+
+    async def add_recipients(self, job_id: str, chat_ids: list[int], cursor: int) -> None:
+        from datetime import datetime, timezone
+        from pymongo.errors import BulkWriteError
+        now = datetime.now(timezone.utc)
+        if chat_ids:
+            try:
+                await self._recipients.insert_many(
+                    [
+                        {"job_id": job_id, "chat_id": chat_id, "status": RECIPIENT_PENDING, "created_at": now}
+                        for chat_id in chat_ids
+                    ],
+                    ordered=False,
+                )
+            except BulkWriteError:
+                # Пачка уже переносилась до сбоя — дубли отброшены уникальным индексом
+                pass
+        await self._collection.update_one(
+            {"_id": self._oid(job_id)},
+            {"$set": {"cursor": cursor, "updated_at": now}},
+        )
+
+    async def finish_audience(self, job_id: str) -> None:
+        await self._collection.update_one({"_id": self._oid(job_id)}, {"$set": {"audience_done": True}})
+
+    async def pending_recipients(self, job_id: str, limit: int) -> list[int]:
+        cursor = self._recipients.find(
+            {"job_id": job_id, "status": RECIPIENT_PENDING},
+            projection={"chat_id": 1, "_id": 0},
+        ).sort("chat_id", 1).limit(limit)
+        return [doc["chat_id"] async for doc in cursor]
+
+    async def record(self, job_id: str, results: dict[int, str]) -> None:
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc)
+        by_status: dict[str, list[int]] = {}
+        for chat_id, status in results.items():
+            by_status.setdefault(status, []).append(chat_id)
+        # Запрос на статус; счётчики — по реально сменившим pending (повтор пачки не задвоит)
+        counters: dict[str, int] = {}
+        for status, chat_ids in by_status.items():
+            result = await self._recipients.update_many(
+                {"job_id": job_id, "chat_id": {"$in": chat_ids}, "status": RECIPIENT_PENDING},
+                {"$set": {"status": status, "updated_at": now}},
+            )
+            if result.modified_count:
+                counters[status] = result.modified_count
+        update: dict = {"$set": {"updated_at": now}}
+        if counters:
+            update["$inc"] = counters
+        await self._collection.update_one({"_id": self._oid(job_id)}, update)
+
+    async def set_photo_file_id(self, job_id: str, file_id: str) -> None:
+        await self._collection.update_one({"_id": self._oid(job_id)}, {"$set": {"photo_file_id": file_id}})
+
+    async def complete(self, job_id: str) -> None:
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc)
+        await self._collection.update_one(
+            {"_id": self._oid(job_id), "status": BROADCAST_RUNNING},
+            {"$set": {"status": BROADCAST_DONE, "updated_at": now, "finished_at": now}},
+        )
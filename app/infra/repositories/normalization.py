@@ -0,0 +1,61 @@
+"""
+Нормализованные поля анкеты для индексируемых equality-запросов.
+
+gender_norm    — "male" / "female" вместо десятка написаний пола;
+city_canonical — ключ города: каноническое имя (resolve_to_canonical_city),
+                 в нижнем регистре и с ё → е. Неизвестные города нормализуются так же.
+Поля считаются один раз при записи анкеты, а не на каждом запросе ленты.
+"""
+from app.infra.repositories.cities import (
+    _fold_yo,
+    resolve_to_canonical_city,
+)
+
+
+GENDER_MALE = "male"
+GENDER_FEMALE = "female"
+
+_MALE_VALUES = frozenset({
+    "man", "male", "мужской", "м", "m", "мужчина", "парень", "men",
+})
+_FEMALE_VALUES = frozenset({
+    "female", "woman", "женский", "ж", "f", "женщина", "девушка", "girl", "women",
+})
+
+
+def normalize_gender(raw) -> str | None:
+    if raw is None:
+        return None
+    value = str(raw.as_generic_type() if hasattr(raw, "as_generic_type") else raw).strip().lower()
+    if value in _MALE_VALUES:
+        return GENDER_MALE
+    if value in _FEMALE_VALUES:
+        return GENDER_FEMALE
+    return None
+
+
+def opposite_gender(gender_norm: str | None) -> str | None:
+    if gender_norm == GENDER_MALE:
+        return GENDER_FEMALE
+    if gender_norm == GENDER_FEMALE:
+        return GENDER_MALE
+    return None
+
+
+def normalize_city(raw) -> str:
+    if raw is None:
+        return ""
+    value = str(raw.as_generic_type() if hasattr(raw, "as_generic_type") else raw).strip()
+    if not value:
+        return ""
+    return _fold_yo(resolve_to_canonical_city(value).lower())
+
+
+def with_normalized_fields(data: dict) -> dict:
+    """Копия data с gender_norm/city_canonical для тех полей, что есть в data."""
+    result = dict(data)
+    if "gender" in data:
+        result["gender_norm"] = normalize_gender(data["gender"])
+    if "city" in data:
+        result["city_canonical"] = normalize_city(data["city"]) or None
+    return result
@@ -0,0 +1,58 @@
+"""
+Очередь уведомлений бота (outbox).
+
+Лайк/матч/суперлайк не отправляется в Telegram внутри запроса: use-case кладёт запись
+в outbox, а NotificationDispatcherWorker рассылает её с соблюдением лимитов Telegram,
+повторами при 429 и ошибках. Запись хранит только id участников — тексты и фото
+собираются при отправке из актуальных анкет.
+
+Лайки одному получателю склеиваются: пока запись ждёт отправки, новые лайки
+увеличивают count («N новых лайков») вместо отдельных сообщений.
+"""
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import datetime
+
+
+NOTIFICATION_LIKED = "liked"
+NOTIFICATION_SUPERLIKE = "superlike"
+NOTIFICATION_MATCH = "match"
+# Виды, которые склеиваются по получателю
+COALESCED_KINDS = frozenset({NOTIFICATION_LIKED})
+
+OUTBOX_PENDING = "pending"
+OUTBOX_SENDING = "sending"
+
+
+def coalesce_key(chat_id: int, kind: str) -> str | None:
+    return f"{kind}:{chat_id}" if kind in COALESCED_KINDS else None
+
+
+@dataclass
+class OutboxMessage:
+    chat_id: int
+    kind: str
+    # id участников: sender_id (лайк, суперлайк), matched_id (матч)
+    payload: dict = field(default_factory=dict)
+    # Сколько событий склеено в запись
+    count: int = 1
+    # Неудачных попыток (429 не считается)
+    attempts: int = 0
+    id: str | None = None
+    created_at: datetime | None = None
+    available_at: datetime | None = None
+
+
+@dataclass
+class OutboxStats:
+    # Ждут отправки / взяты диспетчером — по видам
+    pending: dict[str, int] = field(default_factory=dict)
+    sending: dict[str, int] = field(default_factory=dict)
+    # Возраст самой старой записи, секунды
+    oldest_seconds: float = 0.0
+
+    @property
+    def depth(self) -> int:
+        return sum(self.pending.values()) + sum(self.sending.values())
@@ -0,0 +1,104 @@
+"""
+Компактное множество просмотренных анкет (лайки/пропуски) одного пользователя.
+
+Хранится как отсортированный array('q') telegram_id. Проверка принадлежности —
+bisect за O(log n), без построения Python-set на каждый запрос ленты.
+В MongoDB пишется упакованным блобом: дельты соседних id (int64 LE) + zlib.
+Дельты отсортированных id малы, поэтому блоб в несколько раз меньше
+BSON-массива, а распаковка идёт целиком на C (zlib, frombytes, accumulate).
+"""
+from __future__ import annotations
+
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from dataclasses import (
+    dataclass,
+    field,
+)
+from itertools import accumulate
+from typing import Iterable
+
+
+SEEN_LIKED = "liked"
+SEEN_DISLIKED = "disliked"
+SEEN_KINDS = (SEEN_LIKED, SEEN_DISLIKED)
+
+
+class SortedIdSet:
+    """Отсортированное множество int64 без повторов."""
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids = array("q", sorted(set(ids)))
+
+    def __contains__(self, telegram_id) -> bool:
+        ids = self._ids
+        i = bisect_left(ids, telegram_id)
+        return i < len(ids) and ids[i] == telegram_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def add(self, telegram_id: int) -> bool:
+        """Добавляет id. Возвращает False, если он уже был."""
+        i = bisect_left(self._ids, telegram_id)
+        if i < len(self._ids) and self._ids[i] == telegram_id:
+            return False
+        self._ids.insert(i, telegram_id)
+        return True
+
+    def discard(self, telegram_id: int) -> bool:
+        """Удаляет id. Возвращает False, если его не было."""
+        i = bisect_left(self._ids, telegram_id)
+        if i < len(self._ids) and self._ids[i] == telegram_id:
+            del self._ids[i]
+            return True
+        return False
+
+    def to_bytes(self) -> bytes:
+        if not self._ids:
+            return b""
+        deltas = array("q", [self._ids[0]])
+        deltas.extend(b - a for a, b in zip(self._ids, self._ids[1:]))
+        if sys.byteorder != "little":
+            deltas.byteswap()
+        return zlib.compress(deltas.tobytes())
+
+    @classmethod
+    def from_bytes(cls, blob: bytes | None) -> SortedIdSet:
+        result = cls()
+        if not blob:
+            return result
+        deltas = array("q")
+        deltas.frombytes(zlib.decompress(blob))
+        if sys.byteorder != "little":
+            deltas.byteswap()
+        result._ids = array("q", accumulate(deltas))
+        return result
+
+
+@dataclass
+class SeenProfiles:
+    """Просмотренные анкеты: лайкнутые и пропущенные. `in` проверяет оба множества."""
+
+    liked: SortedIdSet = field(default_factory=SortedIdSet)
+    disliked: SortedIdSet = field(default_factory=SortedIdSet)
+
+    def __contains__(self, telegram_id) -> bool:
+        return telegram_id in self.liked or telegram_id in self.disliked
+
+    def __len__(self) -> int:
+        return len(self.liked) + len(self.disliked)
+
+    def get(self, kind: str) -> SortedIdSet:
+        if kind == SEEN_LIKED:
+            return self.liked
+        if kind == SEEN_DISLIKED:
+            return self.disliked
+        raise ValueError(f"Unknown seen kind: {kind!r}")
@@ -1,12 +1,45 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+)
+
+
+class UploadTooLargeError(Exception):
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds {max_bytes} bytes")
+        self.max_bytes = max_bytes
 
 
 class BaseS3Storage(ABC):
     @abstractmethod
     async def upload_file(self, file: bytes, file_name: str, content_type: str = "image/jpeg") -> str: ...
 
+    @abstractmethod
+    async def upload_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        max_bytes: int | None = None,
+    ) -> int: ...
+
     @abstractmethod
     async def download_file(self, file_name: str) -> bytes: ...
 
     @abstractmethod
     async def get_presigned_url(self, file_name: str, expires: int = 3600) -> str: ...
+
+    @abstractmethod
+    async def file_exists(self, file_name: str) -> bool: ...
+
+    @abstractmethod
+    async def copy_file(self, source_name: str, file_name: str) -> None: ...
+
+    @abstractmethod
+    def list_files(self, prefix: str) -> AsyncIterator[tuple[str, datetime]]:
+        """(ключ, время изменения) всех объектов с префиксом prefix."""
+
+    @abstractmethod
+    async def delete_files(self, file_names: list[str]) -> int: ...
@@ -0,0 +1,149 @@
+"""
+Производные изображений: уменьшенные копии фото анкеты в WebP и JPEG.
+
+При загрузке фото {key} рядом с оригиналом сохраняются {stem}@{variant}.{webp|jpg}
+для каждого размера из VARIANT_SIZES. Ресайз и кодирование — CPU-работа, она идёт
+в пуле процессов, чтобы не блокировать event loop. Для фото, загруженных до появления
+производных, pick() возвращает оригинал (наличие проверяется HEAD и кэшируется).
+"""
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+from app.infra.cache import TTLCache
+from app.infra.s3.base import BaseS3Storage
+
+
+logger = logging.getLogger(__name__)
+
+
+# Размер по длинной стороне, px. Меньше оригинала не увеличиваем
+VARIANT_SIZES = {
+    "thumb": 200,
+    "card": 720,
+    "full": 1600,
+}
+# Расширение → (формат Pillow, Content-Type, качество)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", 78),
+    "jpg": ("JPEG", "image/jpeg", 82),
+}
+# Анимированные GIF и видео не пережимаются
+DERIVABLE_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "webp"})
+
+
+def variant_key(s3_key: str, variant: str, fmt: str) -> str:
+    stem = s3_key.rsplit(".", 1)[0] if "." in s3_key else s3_key
+    return f"{stem}@{variant}.{fmt}"
+
+
+def is_derivable(s3_key: str) -> bool:
+    return "." in s3_key and s3_key.rsplit(".", 1)[-1].lower() in DERIVABLE_EXTENSIONS
+
+
+def expects_variant(s3_key: str, variant: str | None) -> bool:
+    """У s3_key должна быть производная variant (если pick вернул исходник — её не нашлось)."""
+    return variant in VARIANT_SIZES and is_derivable(s3_key)
+
+
+def render_derivatives(data: bytes) -> dict[tuple[str, str], bytes]:
+    """(variant, fmt) → байты. Выполняется в процессе пула — только чистые вычисления."""
+    from PIL import (
+        Image,
+        ImageOps,
+    )
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        rendered: dict[tuple[str, str], bytes] = {}
+        for variant, size in VARIANT_SIZES.items():
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.Resampling.LANCZOS)
+            for fmt, (pil_format, _, quality) in VARIANT_FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, pil_format, quality=quality, optimize=True)
+                rendered[(variant, fmt)] = buffer.getvalue()
+    return rendered
+
+
+@dataclass
+class ImageDerivativesPipeline:
+    storage: BaseS3Storage
+    # Процессов в пуле; 0 — рендер в потоке (тесты, однопроцессный запуск)
+    max_workers: int = 2
+
+    _pool: ProcessPoolExecutor | None = field(default=None, init=False, repr=False)
+    # Ключ производной → есть ли она в бакете
+    _exists: TTLCache = field(
+        default_factory=lambda: TTLCache(maxsize=100_000, ttl_seconds=24 * 3600),
+        init=False,
+        repr=False,
+    )
+
+    async def render(self, data: bytes) -> dict[tuple[str, str], bytes]:
+        """Производные для загружаемого файла; пусто — не изображение или Pillow не справился."""
+        try:
+            if self.max_workers <= 0:
+                return await asyncio.to_thread(render_derivatives, data)
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return await asyncio.get_running_loop().run_in_executor(self._pool, render_derivatives, data)
+        except Exception as e:
+            logger.warning("Image derivatives failed: %s", e)
+            return {}
+
+    async def store(self, s3_key: str, rendered: dict[tuple[str, str], bytes]) -> int:
+        """Загружает производные рядом с s3_key. Возвращает число сохранённых."""
+
+        async def upload(variant: str, fmt: str, data: bytes) -> bool:
+            key = variant_key(s3_key, variant, fmt)
+            try:
+                await self.storage.upload_file(file=data, file_name=key, content_type=VARIANT_FORMATS[fmt][1])
+            except Exception as e:
+                logger.warning("Derivative upload failed for %s: %s", key, e)
+                self._exists.pop(key)
+                return False
+            self._exists.set(key, True)
+            return True
+
+        # Замена фото без производных (GIF) не должна отдавать производные прежнего
+        for variant in VARIANT_SIZES:
+            for fmt in VARIANT_FORMATS:
+                if (variant, fmt) not in rendered:
+                    self._exists.pop(variant_key(s3_key, variant, fmt))
+        results = await asyncio.gather(*(upload(variant, fmt, data) for (variant, fmt), data in rendered.items()))
+        return sum(results)
+
+    async def pick(self, s3_key: str, variant: str | None, fmt: str = "jpg") -> str:
+        """Ключ производной, если она есть, иначе сам s3_key."""
+        if fmt not in VARIANT_FORMATS or not expects_variant(s3_key, variant):
+            return s3_key
+        key = variant_key(s3_key, variant, fmt)
+        exists = self._exists.get(key)
+        if exists is None:
+            try:
+                exists = await self.storage.file_exists(key)
+            except Exception as e:
+                logger.warning("Derivative lookup failed for %s: %s", key, e)
+                return s3_key
+            # Отсутствие перепроверяется чаще: производные могут дозагрузиться
+            self._exists.set(key, exists, ttl_seconds=None if exists else 600)
+        return key if exists else s3_key
+
+    def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,76 @@
+"""
+Ключи медиа в бакете.
+
+Новые файлы хранятся по хэшу содержимого: media/{telegram_id}/{sha256[:32]}.{ext}.
+Такой объект никогда не перезаписывается — URL можно кэшировать бессрочно, а замена
+или удаление фото лишь убирает ключ из photos[]; осиротевшие объекты удаляет
+MediaSweeperWorker. Старые ключи {telegram_id}_{index}.{ext} продолжают работать.
+"""
+import hashlib
+import re
+
+
+MEDIA_PREFIX = "media/"
+# Видео сначала загружается сюда (хэш известен только после потока), затем копируется
+UPLOADS_PREFIX = "uploads/"
+
+# Content-Type объекта по расширению ключа
+_CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "webp": "image/webp",
+    "gif": "image/gif",
+    "mp4": "video/mp4",
+    "mov": "video/quicktime",
+    "webm": "video/webm",
+    "avi": "video/x-msvideo",
+    "mkv": "video/x-matroska",
+}
+
+_CONTENT_KEY_RE = re.compile(r"^media/\d+/[0-9a-f]{32}(@[a-z]+)?\.[a-z0-9]+$")
+_LEGACY_KEY_RE = re.compile(r"^\d+_\d+\.\w+$")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def content_key(telegram_id: int, digest: str, ext: str) -> str:
+    return f"{MEDIA_PREFIX}{telegram_id}/{digest[:32]}.{ext}"
+
+
+def is_content_key(key: str) -> bool:
+    return bool(key) and bool(_CONTENT_KEY_RE.match(key))
+
+
+def is_storage_key(key: str) -> bool:
+    """S3-ключ (новый или legacy), а не http-ссылка и не Telegram file_id."""
+    return bool(key) and (is_content_key(key) or bool(_LEGACY_KEY_RE.match(key)))
+
+
+def key_owner(key: str) -> int | None:
+    """telegram_id владельца из S3-ключа (media/{id}/… или {id}_{index}.{ext}); None — не S3-ключ."""
+    if is_content_key(key):
+        return int(key.split("/", 2)[1])
+    if is_storage_key(key):
+        return int(key.split("_", 1)[0])
+    return None
+
+
+def key_stem(key: str) -> str:
+    """Общая часть оригинала и его производных: media/1/ab.jpg, media/1/ab@card.webp → media/1/ab."""
+    return key.rsplit(".", 1)[0].split("@", 1)[0]
+
+
+def media_content_type(key: str) -> str:
+    return _CONTENT_TYPES.get(key.rsplit(".", 1)[-1].lower(), "image/jpeg")
+
+
+def is_video_key(key: str) -> bool:
+    return media_content_type(key).startswith("video/")
+
+
+def media_etag(key: str) -> str:
+    """Строгий ETag неизменяемого объекта: хэш (и вариант) из самого ключа."""
+    return '"' + key.rsplit("/", 1)[-1] + '"'
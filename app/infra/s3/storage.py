@@ -1,15 +1,31 @@
+import asyncio
 import logging
 from abc import ABC
-from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack, asynccontextmanager
 from dataclasses import dataclass, field
+from datetime import datetime
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+)
 
 from aiobotocore.session import get_session
 
-from app.infra.s3.base import BaseS3Storage
+from app.infra.cache import TTLCache
+from app.infra.s3.base import (
+    BaseS3Storage,
+    UploadTooLargeError,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# Presigned URL из кэша отдаётся, пока до его истечения больше этого запаса
+PRESIGNED_URL_MARGIN_SECONDS = 300
+# Часть multipart upload (минимум S3 — 5 МБ для всех частей, кроме последней)
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+
 @dataclass
 class BaseS3Client(ABC):
     aws_access_key_id: str
@@ -17,10 +33,17 @@ class BaseS3Client(ABC):
     bucket_name: str
     region_name: str
     endpoint_url: str = ""
+    # Размер пула соединений единственного клиента (параллельные запросы к S3)
+    max_pool_connections: int = 50
     session: object = field(default_factory=get_session, init=False, repr=False)
 
-    @asynccontextmanager
-    async def get_client(self):
+    # Один клиент на процесс: пул соединений и TLS-сессии переиспользуются между запросами.
+    # Открывается в lifespan (open), при первом обращении — если lifespan его не открыл.
+    _client: object = field(default=None, init=False, repr=False)
+    _client_stack: AsyncExitStack | None = field(default=None, init=False, repr=False)
+    _client_lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+
+    def _client_kwargs(self) -> dict:
         kwargs = dict(
             aws_access_key_id=self.aws_access_key_id,
             aws_secret_access_key=self.aws_secret_access_key,
@@ -38,15 +61,47 @@ class BaseS3Client(ABC):
                 connect_timeout=10,
                 read_timeout=20,
                 retries={"max_attempts": 2},
+                max_pool_connections=self.max_pool_connections,
             )
         except ImportError:
             pass
+        return kwargs
 
-        async with self.session.create_client("s3", **kwargs) as client:
-            yield client
+    async def open(self):
+        """Создаёт долгоживущий клиент (идемпотентно)."""
+        if self._client is not None:
+            return self._client
+        async with self._client_lock:
+            if self._client is None:
+                stack = AsyncExitStack()
+                self._client = await stack.enter_async_context(
+                    self.session.create_client("s3", **self._client_kwargs()),
+                )
+                self._client_stack = stack
+        return self._client
+
+    async def close(self) -> None:
+        """Закрывает клиент и его пул соединений."""
+        stack, self._client_stack, self._client = self._client_stack, None, None
+        if stack is not None:
+            await stack.aclose()
+
+    @asynccontextmanager
+    async def get_client(self):
+        """Общий клиент; выход из контекста его не закрывает."""
+        yield await self.open()
 
 
+@dataclass
 class S3Storage(BaseS3Storage, BaseS3Client):
+    # Presigned URL — чистый HMAC по ключу, пересчитывать его на каждую картинку незачем
+    presigned_cache_size: int = 50_000
+
+    _presigned_urls: TTLCache = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._presigned_urls = TTLCache(maxsize=self.presigned_cache_size)
+
     async def upload_file(self, file: bytes, file_name: str, content_type: str = "image/jpeg") -> str:
         """Загружает файл в S3 и возвращает S3-ключ (не presigned URL)."""
         logger.info(f"S3 upload: bucket={self.bucket_name}, key={file_name}, size={len(file)}")
@@ -64,6 +119,69 @@ class S3Storage(BaseS3Storage, BaseS3Client):
             logger.error(f"S3 upload FAILED: key={file_name}, error={e}")
             raise
 
+    async def upload_stream(
+        self,
+        chunks: AsyncIterable[bytes],
+        file_name: str,
+        content_type: str = "application/octet-stream",
+        max_bytes: int | None = None,
+    ) -> int:
+        """
+        Загружает поток частями (multipart upload): в памяти не больше одной части.
+        Превышение max_bytes прерывает загрузку (UploadTooLargeError), начатый upload отменяется.
+        Файл меньше одной части уходит одним put_object. Возвращает размер в байтах.
+        """
+        buffer = bytearray()
+        total = 0
+        parts: list[dict] = []
+        upload_id = None
+        async with self.get_client() as client:
+            try:
+                async for chunk in chunks:
+                    total += len(chunk)
+                    if max_bytes is not None and total > max_bytes:
+                        raise UploadTooLargeError(max_bytes)
+                    buffer.extend(chunk)
+                    while len(buffer) >= MULTIPART_PART_SIZE:
+                        if upload_id is None:
+                            created = await client.create_multipart_upload(
+                                Bucket=self.bucket_name, Key=file_name, ContentType=content_type,
+                            )
+                            upload_id = created["UploadId"]
+                        part = bytes(buffer[:MULTIPART_PART_SIZE])
+                        del buffer[:MULTIPART_PART_SIZE]
+                        parts.append(await self._upload_part(client, file_name, upload_id, len(parts) + 1, part))
+
+                if upload_id is None:
+                    await client.put_object(
+                        Bucket=self.bucket_name, Key=file_name, Body=bytes(buffer), ContentType=content_type,
+                    )
+                else:
+                    if buffer:
+                        last = await self._upload_part(client, file_name, upload_id, len(parts) + 1, bytes(buffer))
+                        parts.append(last)
+                    await client.complete_multipart_upload(
+                        Bucket=self.bucket_name,
+                        Key=file_name,
+                        UploadId=upload_id,
+                        MultipartUpload={"Parts": parts},
+                    )
+            except BaseException:
+                if upload_id is not None:
+                    try:
+                        await client.abort_multipart_upload(Bucket=self.bucket_name, Key=file_name, UploadId=upload_id)
+                    except Exception as e:
+                        logger.warning(f"S3 multipart abort failed: key={file_name}, error={e}")
+                raise
+        logger.info(f"S3 stream upload OK: {file_name}, size={total}, parts={len(parts) or 1}")
+        return total
+
+    async def _upload_part(self, client, file_name: str, upload_id: str, number: int, body: bytes) -> dict:
+        result = await client.upload_part(
+            Bucket=self.bucket_name, Key=file_name, UploadId=upload_id, PartNumber=number, Body=body,
+        )
+        return {"ETag": result["ETag"], "PartNumber": number}
+
     async def download_file(self, file_name: str) -> bytes:
         """Скачивает файл из S3 и возвращает байты."""
         logger.info(f"S3 download: bucket={self.bucket_name}, key={file_name}")
@@ -80,12 +198,67 @@ class S3Storage(BaseS3Storage, BaseS3Client):
                          f"endpoint={self.endpoint_url}, error={type(e).__name__}: {e}")
             raise
 
-    async def get_presigned_url(self, file_name: str, expires: int = 3600) -> str:
-        """Генерирует presigned URL для скачивания файла."""
+    async def file_exists(self, file_name: str) -> bool:
+        """HEAD объекта: True — есть, False — 404. Прочие ошибки пробрасываются."""
+        from botocore.exceptions import ClientError
+
         async with self.get_client() as client:
-            url = await client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": self.bucket_name, "Key": file_name},
-                ExpiresIn=expires,
+            try:
+                await client.head_object(Bucket=self.bucket_name, Key=file_name)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    return False
+                raise
+        return True
+
+    async def copy_file(self, source_name: str, file_name: str) -> None:
+        """Копия объекта внутри бакета (без скачивания)."""
+        async with self.get_client() as client:
+            await client.copy_object(
+                Bucket=self.bucket_name,
+                Key=file_name,
+                CopySource={"Bucket": self.bucket_name, "Key": source_name},
             )
+
+    async def list_files(self, prefix: str) -> AsyncIterator[tuple[str, datetime]]:
+        async with self.get_client() as client:
+            paginator = client.get_paginator("list_objects_v2")
+            async for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for item in page.get("Contents", []):
+                    yield item["Key"], item["LastModified"]
+
+    async def delete_files(self, file_names: list[str]) -> int:
+        """Удаляет объекты пачками по 1000 (предел DeleteObjects). Возвращает число удалённых."""
+        deleted = 0
+        async with self.get_client() as client:
+            for start in range(0, len(file_names), 1000):
+                batch = file_names[start:start + 1000]
+                result = await client.delete_objects(
+                    Bucket=self.bucket_name,
+                    Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+                )
+                deleted += len(batch) - len(result.get("Errors", []))
+        return deleted
+
+    async def get_presigned_url(self, file_name: str, expires: int = 3600) -> str:
+        """Генерирует presigned URL для скачивания файла."""
+        url, _ = await self.get_presigned_url_cached(file_name, expires)
         return url
+
+    async def get_presigned_url_cached(self, file_name: str, expires: int = 3600) -> tuple[str, int]:
+        """
+        Presigned URL из кэша (или новый) и сколько секунд его можно кэшировать у клиента:
+        URL остаётся действительным ещё минимум PRESIGNED_URL_MARGIN_SECONDS после этого срока.
+        """
+        cache_key = (file_name, expires)
+        url = self._presigned_urls.get(cache_key)
+        if url is None:
+            async with self.get_client() as client:
+                url = await client.generate_presigned_url(
+                    "get_object",
+                    Params={"Bucket": self.bucket_name, "Key": file_name},
+                    ExpiresIn=expires,
+                )
+            self._presigned_urls.set(cache_key, url, ttl_seconds=expires - PRESIGNED_URL_MARGIN_SECONDS)
+            return url, max(0, expires - PRESIGNED_URL_MARGIN_SECONDS)
+        return url, int(self._presigned_urls.expires_in(cache_key))
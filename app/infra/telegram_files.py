@@ -0,0 +1,118 @@
+"""
+Telegram file_id фото анкет, уже загруженных ботом.
+
+Первый send_photo по S3-ключу загружает байты в Telegram; file_id из ответа запоминается
+и дальше фото отправляется по нему — без скачивания из S3 и повторной загрузки.
+Записи сгруппированы по владельцу фото и сбрасываются при изменении его photos[]/photo.
+
+MemoryTelegramFileCache — в памяти процесса.
+RedisTelegramFileCache — общий для нескольких воркеров/реплик (REDIS_URL).
+"""
+import asyncio
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Any,
+    Iterable,
+)
+
+from app.infra.cache import TTLCache
+from app.infra.s3.keys import key_owner
+
+
+# Изменение этих полей анкеты сбрасывает file_id её фото
+PHOTO_FIELDS = frozenset({"photos", "photo"})
+# file_id у Telegram бессрочный; срок лишь ограничивает записи брошенных анкет
+FILE_ID_TTL_SECONDS = 30 * 24 * 3600
+
+
+@dataclass
+class BaseTelegramFileCache(ABC):
+    _pending: set = field(default_factory=set, init=False, repr=False)
+
+    @abstractmethod
+    async def get(self, s3_key: str) -> str | None: ...
+
+    @abstractmethod
+    async def set(self, s3_key: str, file_id: str) -> None: ...
+
+    @abstractmethod
+    async def forget(self, telegram_id: int, s3_key: str | None = None) -> None:
+        """Сбрасывает file_id фото анкеты (s3_key — только одного)."""
+
+    def notify_profile_changed(self, telegram_id: int, fields: Iterable[str]) -> bool:
+        """Вызывается репозиторием после записи анкеты. Не блокирует."""
+        if PHOTO_FIELDS.isdisjoint(fields):
+            return False
+        task = asyncio.get_running_loop().create_task(self.forget(telegram_id))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return True
+
+
+@dataclass
+class MemoryTelegramFileCache(BaseTelegramFileCache):
+    # telegram_id владельца → {s3_key: file_id}
+    _owners: TTLCache = field(
+        default_factory=lambda: TTLCache(maxsize=100_000, ttl_seconds=FILE_ID_TTL_SECONDS),
+        init=False,
+        repr=False,
+    )
+
+    async def get(self, s3_key: str) -> str | None:
+        owner = key_owner(s3_key)
+        if owner is None:
+            return None
+        return (self._owners.get(owner) or {}).get(s3_key)
+
+    async def set(self, s3_key: str, file_id: str) -> None:
+        owner = key_owner(s3_key)
+        if owner is None:
+            return
+        file_ids = self._owners.get(owner) or {}
+        file_ids[s3_key] = file_id
+        self._owners.set(owner, file_ids)
+
+    async def forget(self, telegram_id: int, s3_key: str | None = None) -> None:
+        if s3_key is None:
+            self._owners.pop(telegram_id)
+            return
+        (self._owners.get(telegram_id) or {}).pop(s3_key, None)
+
+
+@dataclass
+class RedisTelegramFileCache(BaseTelegramFileCache):
+    """tg_file_ids:{telegram_id} — hash s3_key → file_id."""
+
+    redis: Any  # redis.asyncio.Redis
+    key_prefix: str = "tg_file_ids"
+
+    def _key(self, telegram_id: int) -> str:
+        return f"{self.key_prefix}:{telegram_id}"
+
+    async def get(self, s3_key: str) -> str | None:
+        owner = key_owner(s3_key)
+        if owner is None:
+            return None
+        return await self.redis.hget(self._key(owner), s3_key)
+
+    async def set(self, s3_key: str, file_id: str) -> None:
+        owner = key_owner(s3_key)
+        if owner is None:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(self._key(owner), s3_key, file_id)
+            pipe.expire(self._key(owner), FILE_ID_TTL_SECONDS)
+            await pipe.execute()
+
+    async def forget(self, telegram_id: int, s3_key: str | None = None) -> None:
+        if s3_key is None:
+            await self.redis.delete(self._key(telegram_id))
+        else:
+            await self.redis.hdel(self._key(telegram_id), s3_key)
@@ -1,6 +1,8 @@
 """
 Candidate Preselection: получает кандидатов для AI-подбора по жестким фильтрам.
 """
+from typing import Container
+
 from app.domain.entities.users import UserEntity
 from app.infra.repositories.base import BaseUsersRepository
 from app.logic.ai_matchmaking.query_parser import ParsedQuery
@@ -13,10 +15,12 @@ async def get_ai_candidates(
     exclude_ids: list[int] | None = None,
     city_include_neighbors: bool = False,
     limit: int = 300,
+    seen: Container[int] | None = None,
 ) -> list[UserEntity]:
     """
     Возвращает кандидатов для ранжирования.
     HARD фильтры: target_gender, age_min/max, city (с нормализацией).
+    seen — уже лайкнутые анкеты (отсеиваются в репозитории, без $nin).
     """
     candidates = await repository.get_ai_matchmaking_candidates(
         telegram_id=telegram_id,
@@ -27,5 +31,6 @@ async def get_ai_candidates(
         city=parsed_query.city,
         city_include_neighbors=city_include_neighbors,
         limit=limit,
+        seen=seen,
     )
     return candidates if isinstance(candidates, list) else list(candidates)
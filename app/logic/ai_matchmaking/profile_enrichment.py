@@ -3,6 +3,7 @@ Profile Enrichment: извлекает AI-теги из текста анкет
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 
@@ -31,6 +32,11 @@ def _build_search_text(user: UserEntity) -> str:
     return " ".join(parts) if parts else ""
 
 
+def profile_content_hash(user: UserEntity) -> str:
+    """Хэш полей, из которых строится enrichment (имя, возраст, город, о себе)."""
+    return hashlib.sha1(_build_search_text(user).encode("utf-8")).hexdigest()
+
+
 def _normalize_extracted_tags(tags: list[str]) -> list[str]:
     """Оставляет только теги из общего словаря."""
     allowed = set()
@@ -43,7 +49,9 @@ def _normalize_extracted_tags(tags: list[str]) -> list[str]:
 async def enrich_profile_for_ai(user: UserEntity, api_key: str) -> dict:
     """
     Обогащает анкету для AI-поиска.
-    Возвращает dict для $set в MongoDB: search_text, ai_traits, ai_skills, ai_appearance.
+    Возвращает dict для $set в MongoDB: search_text, ai_traits, ai_skills, ai_appearance
+    и ai_profile_hash — только если результат окончательный (OpenAI ответил или
+    текста «о себе» нет); после ошибки OpenAI хэша нет и анкета обогатится повторно.
     """
     from openai import AsyncOpenAI
 
@@ -60,6 +68,7 @@ async def enrich_profile_for_ai(user: UserEntity, api_key: str) -> dict:
         about = user.about.as_generic_type() if hasattr(user.about, "as_generic_type") else str(user.about)
 
     if not about or not about.strip():
+        result["ai_profile_hash"] = profile_content_hash(user)
         return result
 
     all_tags = (
@@ -106,6 +115,7 @@ ai_appearance: внешность если упомянута (red_hair, blonde,
         result["ai_traits"] = _normalize_extracted_tags(data.get("ai_traits") or [])
         result["ai_skills"] = _normalize_extracted_tags(data.get("ai_skills") or [])
         result["ai_appearance"] = _normalize_extracted_tags(data.get("ai_appearance") or [])
+        result["ai_profile_hash"] = profile_content_hash(user)
     except Exception as e:
         logger.warning(f"Profile enrichment failed for user {user.telegram_id}: {e}")
 
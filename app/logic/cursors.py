@@ -0,0 +1,25 @@
+"""
+Непрозрачные курсоры для keyset-пагинации.
+
+Курсор — это urlsafe-base64 от компактного JSON с ключом сортировки
+последнего отданного элемента. Клиент не разбирает курсор, а просто
+передаёт его обратно за следующей страницей.
+"""
+import base64
+import json
+from typing import Any
+
+from app.logic.exceptions.pagination import InvalidCursorException
+
+
+def encode_cursor(payload: Any) -> str:
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorException(cursor)
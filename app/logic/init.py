@@ -1,5 +1,12 @@
+from datetime import timedelta
 from functools import lru_cache
 
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
 from motor.motor_asyncio import AsyncIOMotorClient
 from punq import (
     Container,
@@ -8,23 +15,45 @@ from punq import (
 
 from app.infra.geocoding import CachedGeocoder, NominatimGeocoder
 from app.infra.geocoding.base import BaseGeocoder
+from app.infra.presence import (
+    BasePresenceTracker,
+    MemoryPresenceTracker,
+    RedisPresenceTracker,
+)
+from app.infra.rate_limit import TelegramRateLimiter
 from app.infra.repositories.base import (
+    BaseBroadcastsRepository,
     BaseDislikesRepository,
+    BaseFeedQueueRepository,
     BaseLikesRepository,
+    BaseMatchesRepository,
+    BaseNotificationOutboxRepository,
+    BaseSeenProfilesRepository,
     BaseUsersRepository,
 )
 from app.infra.repositories.mongo import (
+    MongoDBBroadcastsRepository,
     MongoDBDislikesRepository,
+    MongoDBFeedQueueRepository,
     MongoDBLikesRepository,
+    MongoDBMatchesRepository,
+    MongoDBNotificationOutboxRepository,
     MongoDBPhotoCommentsRepository,
     MongoDBPhotoLikesRepository,
+    MongoDBSeenProfilesRepository,
     MongoDBUserRepository,
 )
 from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.derivatives import ImageDerivativesPipeline
 from app.infra.s3.storage import (
     BaseS3Client,
     S3Storage,
 )
+from app.infra.telegram_files import (
+    BaseTelegramFileCache,
+    MemoryTelegramFileCache,
+    RedisTelegramFileCache,
+)
 from app.logic.services.base import (
     BaseLikesService,
     BaseUsersService,
@@ -32,6 +61,17 @@ from app.logic.services.base import (
 from app.logic.services.likes import LikesService
 from app.logic.services.users import UsersService
 from app.logic.use_cases.like_action import LikeActionUseCase
+from app.logic.workers.backfill import (
+    MatchesBackfillWorker,
+    NormalizedFieldsBackfillWorker,
+)
+from app.logic.workers.broadcasts import BroadcastWorker
+from app.logic.workers.enrichment import ProfileEnrichmentWorker
+from app.logic.workers.geocoding import GeocodingWorker
+from app.logic.workers.media import MediaSweeperWorker
+from app.logic.workers.notifications import NotificationDispatcherWorker
+from app.logic.workers.presence import PresenceFlushWorker
+from app.logic.workers.recommendations import FeedQueueWorker
 from app.settings.config import Config
 
 
@@ -47,6 +87,44 @@ def _init_container() -> Container:
 
     config: Config = container.resolve(Config)
 
+    def init_bot() -> Bot:
+        # Один клиент Bot API на процесс: соединения к api.telegram.org переиспользуются
+        session = AiohttpSession(limit=config.bot_pool_limit, timeout=config.bot_request_timeout)
+        return Bot(
+            token=config.token,
+            session=session,
+            default=DefaultBotProperties(parse_mode=ParseMode.HTML),
+        )
+
+    container.register(
+        Bot,
+        factory=init_bot,
+        scope=Scope.singleton,
+    )
+
+    def init_fsm_storage() -> BaseStorage:
+        if config.redis_url:
+            from aiogram.fsm.storage.redis import (
+                DefaultKeyBuilder,
+                RedisStorage,
+            )
+            from redis.asyncio import Redis
+            ttl = timedelta(hours=config.fsm_ttl_hours)
+            # Общее состояние для нескольких процессов бота; переживает рестарт
+            return RedisStorage(
+                redis=Redis.from_url(config.redis_url),
+                key_builder=DefaultKeyBuilder(prefix="fsm"),
+                state_ttl=ttl,
+                data_ttl=ttl,
+            )
+        return MemoryStorage()
+
+    container.register(
+        BaseStorage,
+        factory=init_fsm_storage,
+        scope=Scope.singleton,
+    )
+
     def create_mongodb_client():
         return AsyncIOMotorClient(
             config.mongodb_connection_uri,
@@ -67,13 +145,57 @@ def _init_container() -> Container:
             mongo_db_collection_name=config.mongodb_users_collection,
         )
 
+    def init_seen_profiles_repository() -> BaseSeenProfilesRepository:
+        return MongoDBSeenProfilesRepository(
+            mongo_db_client=client,
+            mongo_db_name=config.mongodb_dating_database,
+            mongo_db_collection_name="user_seen",
+            likes_collection_name=config.mongodb_likes_collection,
+            dislikes_collection_name="dislikes",
+        )
+
     def init_likes_mongodb_repository() -> BaseLikesRepository:
         return MongoDBLikesRepository(
             mongo_db_client=client,
             mongo_db_name=config.mongodb_dating_database,
             mongo_db_collection_name=config.mongodb_likes_collection,
+            seen_repository=container.resolve(BaseSeenProfilesRepository),
+            matches_repository=container.resolve(BaseMatchesRepository),
         )
 
+    container.register(
+        BaseSeenProfilesRepository,
+        factory=init_seen_profiles_repository,
+        scope=Scope.singleton,
+    )
+
+    def init_matches_repository() -> BaseMatchesRepository:
+        return MongoDBMatchesRepository(
+            mongo_db_client=client,
+            mongo_db_name=config.mongodb_dating_database,
+            mongo_db_collection_name="matches",
+            likes_collection_name=config.mongodb_likes_collection,
+        )
+
+    container.register(
+        BaseMatchesRepository,
+        factory=init_matches_repository,
+        scope=Scope.singleton,
+    )
+
+    def init_feed_queue_repository() -> BaseFeedQueueRepository:
+        return MongoDBFeedQueueRepository(
+            mongo_db_client=client,
+            mongo_db_name=config.mongodb_dating_database,
+            mongo_db_collection_name="feed_queues",
+        )
+
+    container.register(
+        BaseFeedQueueRepository,
+        factory=init_feed_queue_repository,
+        scope=Scope.singleton,
+    )
+
     container.register(
         BaseUsersRepository,
         factory=init_users_mongodb_repository,
@@ -86,35 +208,41 @@ def _init_container() -> Container:
         scope=Scope.singleton,
     )
 
-    def create_s3_client() -> BaseS3Client:
-        return BaseS3Client(
+    def init_s3_storage() -> S3Storage:
+        return S3Storage(
             aws_access_key_id=config.aws_access_key_id,
             aws_secret_access_key=config.aws_secret_access_key,
             bucket_name=config.bucket_name,
             region_name=config.region_name,
             endpoint_url=config.s3_endpoint_url,
+            max_pool_connections=config.s3_max_pool_connections,
         )
 
+    container.register(
+        BaseS3Storage,
+        factory=init_s3_storage,
+        scope=Scope.singleton,
+    )
+
+    def create_s3_client() -> BaseS3Client:
+        # Тот же объект, что и BaseS3Storage: один клиент и один пул соединений на процесс
+        return container.resolve(BaseS3Storage)
+
     container.register(
         BaseS3Client,
         factory=create_s3_client,
         scope=Scope.singleton,
     )
 
-    def init_s3_storage() -> S3Storage:
-        s3_client = container.resolve(BaseS3Client)
-
-        return S3Storage(
-            aws_access_key_id=s3_client.aws_access_key_id,
-            aws_secret_access_key=s3_client.aws_secret_access_key,
-            bucket_name=s3_client.bucket_name,
-            region_name=s3_client.region_name,
-            endpoint_url=s3_client.endpoint_url,
+    def init_image_derivatives_pipeline() -> ImageDerivativesPipeline:
+        return ImageDerivativesPipeline(
+            storage=container.resolve(BaseS3Storage),
+            max_workers=config.image_workers,
         )
 
     container.register(
-        BaseS3Storage,
-        factory=init_s3_storage,
+        ImageDerivativesPipeline,
+        factory=init_image_derivatives_pipeline,
         scope=Scope.singleton,
     )
 
@@ -122,10 +250,15 @@ def _init_container() -> Container:
         return UsersService(
             user_repository=container.resolve(BaseUsersRepository),
             config=config,
+            seen_repository=container.resolve(BaseSeenProfilesRepository),
+            feed_queue_repository=container.resolve(BaseFeedQueueRepository),
         )
 
     def init_likes_service() -> LikesService:
-        return LikesService(like_repository=container.resolve(BaseLikesRepository))
+        return LikesService(
+            like_repository=container.resolve(BaseLikesRepository),
+            matches_repository=container.resolve(BaseMatchesRepository),
+        )
 
     container.register(
         BaseUsersService,
@@ -144,6 +277,7 @@ def _init_container() -> Container:
             mongo_db_client=client,
             mongo_db_name=config.mongodb_dating_database,
             mongo_db_collection_name="dislikes",
+            seen_repository=container.resolve(BaseSeenProfilesRepository),
         )
 
     container.register(
@@ -152,11 +286,25 @@ def _init_container() -> Container:
         scope=Scope.singleton,
     )
 
+    def init_notification_outbox() -> BaseNotificationOutboxRepository:
+        return MongoDBNotificationOutboxRepository(
+            mongo_db_client=client,
+            mongo_db_name=config.mongodb_dating_database,
+            mongo_db_collection_name="notification_outbox",
+        )
+
+    container.register(
+        BaseNotificationOutboxRepository,
+        factory=init_notification_outbox,
+        scope=Scope.singleton,
+    )
+
     def init_like_action_use_case() -> LikeActionUseCase:
         return LikeActionUseCase(
             likes_service=container.resolve(BaseLikesService),
             users_service=container.resolve(BaseUsersService),
             config=config,
+            outbox=container.resolve(BaseNotificationOutboxRepository),
         )
 
     container.register(
@@ -212,4 +360,200 @@ def _init_container() -> Container:
         scope=Scope.singleton,
     )
 
+    def init_geocoding_worker() -> GeocodingWorker:
+        users_repository = container.resolve(BaseUsersRepository)
+        worker = GeocodingWorker(
+            geocoder=container.resolve(BaseGeocoder),
+            users_repository=users_repository,
+        )
+        # Лента отдаёт воркеру города, для которых нет координат
+        if isinstance(users_repository, MongoDBUserRepository):
+            users_repository.on_unresolved_city = worker.enqueue
+        return worker
+
+    container.register(
+        GeocodingWorker,
+        factory=init_geocoding_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_normalized_fields_backfill_worker() -> NormalizedFieldsBackfillWorker:
+        return NormalizedFieldsBackfillWorker(
+            users_repository=container.resolve(BaseUsersRepository),
+        )
+
+    container.register(
+        NormalizedFieldsBackfillWorker,
+        factory=init_normalized_fields_backfill_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_matches_backfill_worker() -> MatchesBackfillWorker:
+        return MatchesBackfillWorker(
+            matches_repository=container.resolve(BaseMatchesRepository),
+        )
+
+    container.register(
+        MatchesBackfillWorker,
+        factory=init_matches_backfill_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_feed_queue_worker() -> FeedQueueWorker:
+        users_repository = container.resolve(BaseUsersRepository)
+        worker = FeedQueueWorker(
+            users_repository=users_repository,
+            feed_queue_repository=container.resolve(BaseFeedQueueRepository),
+            seen_repository=container.resolve(BaseSeenProfilesRepository),
+        )
+        # Изменения анкет инвалидируют очереди, лента без очереди просит её собрать
+        if isinstance(users_repository, MongoDBUserRepository):
+            users_repository.on_profile_changed.append(worker.notify_profile_changed)
+        users_service = container.resolve(BaseUsersService)
+        if isinstance(users_service, UsersService):
+            users_service.on_feed_queue_miss = worker.request_build
+        return worker
+
+    container.register(
+        FeedQueueWorker,
+        factory=init_feed_queue_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_profile_enrichment_worker() -> ProfileEnrichmentWorker:
+        users_repository = container.resolve(BaseUsersRepository)
+        worker = ProfileEnrichmentWorker(
+            users_repository=users_repository,
+            openai_api_key=config.openai_api_key,
+        )
+        # Правки имени/возраста/города/«о себе» ставят анкету в очередь enrichment
+        if isinstance(users_repository, MongoDBUserRepository):
+            users_repository.on_profile_changed.append(worker.notify_profile_changed)
+        return worker
+
+    container.register(
+        ProfileEnrichmentWorker,
+        factory=init_profile_enrichment_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_presence_tracker() -> BasePresenceTracker:
+        if config.redis_url:
+            from redis.asyncio import Redis
+            return RedisPresenceTracker(redis=Redis.from_url(config.redis_url, decode_responses=True))
+        return MemoryPresenceTracker()
+
+    container.register(
+        BasePresenceTracker,
+        factory=init_presence_tracker,
+        scope=Scope.singleton,
+    )
+
+    def init_presence_flush_worker() -> PresenceFlushWorker:
+        return PresenceFlushWorker(
+            presence_tracker=container.resolve(BasePresenceTracker),
+            users_repository=container.resolve(BaseUsersRepository),
+            flush_interval_seconds=config.presence_flush_seconds,
+        )
+
+    container.register(
+        PresenceFlushWorker,
+        factory=init_presence_flush_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_telegram_file_cache() -> BaseTelegramFileCache:
+        if config.redis_url:
+            from redis.asyncio import Redis
+            cache = RedisTelegramFileCache(redis=Redis.from_url(config.redis_url, decode_responses=True))
+        else:
+            cache = MemoryTelegramFileCache()
+        # Смена фото сбрасывает file_id прежних
+        users_repository = container.resolve(BaseUsersRepository)
+        if isinstance(users_repository, MongoDBUserRepository):
+            users_repository.on_profile_changed.append(cache.notify_profile_changed)
+        return cache
+
+    container.register(
+        BaseTelegramFileCache,
+        factory=init_telegram_file_cache,
+        scope=Scope.singleton,
+    )
+
+    # Один лимитер на процесс: уведомления и рассылки делят лимиты одного бота
+    def init_telegram_rate_limiter() -> TelegramRateLimiter:
+        return TelegramRateLimiter(global_rate=config.notify_global_rate, chat_rate=config.notify_chat_rate)
+
+    container.register(
+        TelegramRateLimiter,
+        factory=init_telegram_rate_limiter,
+        scope=Scope.singleton,
+    )
+
+    async def deliver_notification(message):
+        from app.bot.utils.notificator import deliver_notification
+        await deliver_notification(message)
+
+    def init_notification_dispatcher_worker() -> NotificationDispatcherWorker:
+        return NotificationDispatcherWorker(
+            outbox=container.resolve(BaseNotificationOutboxRepository),
+            deliver=deliver_notification,
+            limiter=container.resolve(TelegramRateLimiter),
+            concurrency=config.notify_concurrency,
+        )
+
+    container.register(
+        NotificationDispatcherWorker,
+        factory=init_notification_dispatcher_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_broadcasts_repo() -> BaseBroadcastsRepository:
+        return MongoDBBroadcastsRepository(
+            mongo_db_client=client,
+            mongo_db_name=config.mongodb_dating_database,
+            mongo_db_collection_name="broadcast_jobs",
+            recipients_collection_name="broadcast_recipients",
+        )
+
+    container.register(
+        BaseBroadcastsRepository,
+        factory=init_broadcasts_repo,
+        scope=Scope.singleton,
+    )
+
+    async def send_broadcast(job, chat_id: int):
+        from app.bot.utils.notificator import send_broadcast
+        return await send_broadcast(job, chat_id)
+
+    def init_broadcast_worker() -> BroadcastWorker:
+        return BroadcastWorker(
+            broadcasts=container.resolve(BaseBroadcastsRepository),
+            users_repository=container.resolve(BaseUsersRepository),
+            send=send_broadcast,
+            limiter=container.resolve(TelegramRateLimiter),
+            batch_size=config.broadcast_batch_size,
+            concurrency=config.broadcast_concurrency,
+        )
+
+    container.register(
+        BroadcastWorker,
+        factory=init_broadcast_worker,
+        scope=Scope.singleton,
+    )
+
+    def init_media_sweeper_worker() -> MediaSweeperWorker:
+        return MediaSweeperWorker(
+            storage=container.resolve(BaseS3Storage),
+            users_repository=container.resolve(BaseUsersRepository),
+            interval_seconds=config.media_sweep_interval_hours * 3600,
+            grace_seconds=config.media_sweep_grace_hours * 3600,
+        )
+
+    container.register(
+        MediaSweeperWorker,
+        factory=init_media_sweeper_worker,
+        scope=Scope.singleton,
+    )
+
     return container
@@ -8,7 +8,11 @@ from typing import Iterable
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
 from app.domain.values.users import AboutText
-from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.filters.likes import GetLikesFilters
+from app.infra.repositories.filters.users import (
+    GetAllUsersFilters,
+    GetFeedFilters,
+)
 
 
 @dataclass
@@ -28,6 +32,18 @@ class BaseUsersService(ABC):
     @abstractmethod
     async def update_user_about_info(self, telegram_id: int, about: AboutText): ...
 
+    @abstractmethod
+    async def consume_credit(self, telegram_id: int, field: str) -> bool: ...
+
+    @abstractmethod
+    async def refund_credit(self, telegram_id: int, field: str) -> None: ...
+
+    @abstractmethod
+    async def reserve_daily_like(self, telegram_id: int, day: str, limit: int | None = None) -> str | None: ...
+
+    @abstractmethod
+    async def release_daily_like(self, telegram_id: int, day: str, slot: str) -> None: ...
+
     @abstractmethod
     async def check_user_is_active(self, telegram_id: int) -> bool: ...
 
@@ -35,7 +51,22 @@ class BaseUsersService(ABC):
     async def get_all_users(self, filters: GetAllUsersFilters): ...
 
     @abstractmethod
-    async def get_best_result_for_user(self, telegram_id: int, exclude_ids: list[int] | None = None): ...
+    async def get_best_result_for_user(
+        self,
+        telegram_id: int,
+        filters: GetFeedFilters,
+        exclude_ids: list[int] | None = None,
+    ) -> tuple[list[UserEntity], str | None]: ...
+
+    async def get_feed_ids_for_user(
+        self,
+        telegram_id: int,
+        filters: GetFeedFilters,
+        exclude_ids: list[int] | None = None,
+    ) -> tuple[list[int], str | None]:
+        """Страница ленты без анкет, только telegram_id. По умолчанию — из get_best_result_for_user."""
+        users, next_cursor = await self.get_best_result_for_user(telegram_id, filters, exclude_ids)
+        return [user.telegram_id for user in users], next_cursor
 
     @abstractmethod
     async def get_users_liked_from(
@@ -49,6 +80,9 @@ class BaseUsersService(ABC):
         users_list: list[int],
     ) -> Iterable[UserEntity]: ...
 
+    @abstractmethod
+    async def get_users_by_ids(self, telegram_ids: list[int]) -> list[UserEntity]: ...
+
     @abstractmethod
     async def get_icebreaker_count(self, telegram_id: int) -> int: ...
 
@@ -89,6 +123,9 @@ class BaseLikesService(ABC):
         to_user_id: int,
     ) -> bool: ...
 
+    @abstractmethod
+    async def like(self, from_user_id: int, to_user_id: int) -> tuple[LikesEntity | None, bool]: ...
+
     @abstractmethod
     async def delete_like(self, from_user_id: int, to_user_id: int): ...
 
@@ -98,6 +135,22 @@ class BaseLikesService(ABC):
     @abstractmethod
     async def get_users_ids_liked_by(self, user_id: int) -> list[int]: ...
 
+    @abstractmethod
+    async def get_likes_page(
+        self,
+        user_id: int,
+        filters: GetLikesFilters,
+        incoming: bool = False,
+        mutual_only: bool = False,
+    ) -> tuple[list[int], str | None]: ...
+
+    @abstractmethod
+    async def get_matches_page(
+        self,
+        user_id: int,
+        filters: GetLikesFilters,
+    ) -> tuple[list[int], str | None]: ...
+
     @abstractmethod
     async def check_match(self, from_user_id: int, to_user_id: int) -> bool: ...
 
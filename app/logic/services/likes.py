@@ -2,20 +2,35 @@ from dataclasses import dataclass
 
 from app.domain.entities.likes import LikesEntity
 from app.domain.values.likes import Like
-from app.infra.repositories.base import BaseLikesRepository
+from app.infra.repositories.base import (
+    BaseLikesRepository,
+    BaseMatchesRepository,
+)
+from app.infra.repositories.filters.likes import (
+    GetLikesFilters,
+    MAX_LIKES_PAGE_SIZE,
+)
+from app.logic.cursors import (
+    decode_cursor,
+    encode_cursor,
+)
 from app.logic.exceptions.likes import (
     LikeAlreadyExistsException,
     LikeIsNotExistsException,
     LikeTheSameUserException,
 )
+from app.logic.exceptions.pagination import InvalidCursorException
 from app.logic.services.base import BaseLikesService
 
 
 @dataclass
 class LikesService(BaseLikesService):
     like_repository: BaseLikesRepository
+    matches_repository: BaseMatchesRepository | None = None
 
     async def check_match(self, from_user_id: int, to_user_id: int) -> bool:
+        if self.matches_repository is not None:
+            return await self.matches_repository.is_match(from_user_id, to_user_id)
         if await self.like_repository.check_like_is_exists(
             from_user_id,
             to_user_id,
@@ -43,6 +58,24 @@ class LikesService(BaseLikesService):
         await self.like_repository.create_like(new_like)
         return new_like
 
+    async def like(self, from_user_id: int, to_user_id: int) -> tuple[LikesEntity | None, bool]:
+        """
+        Идемпотентный лайк: (новый лайк или None, если он уже был; is_match).
+        Повторный лайк — не ошибка.
+        """
+        from_user = Like(value=from_user_id)
+        to_user = Like(value=to_user_id)
+
+        if from_user == to_user:
+            raise LikeTheSameUserException()
+
+        new_like = LikesEntity(
+            from_user=from_user,
+            to_user=to_user,
+        )
+        created, is_match = await self.like_repository.add_like(new_like)
+        return (new_like if created else None), is_match
+
     async def delete_like(self, from_user_id: int, to_user_id: int):
         if await self.like_repository.check_like_is_exists(from_user_id, to_user_id):
             await self.like_repository.delete_like(
@@ -65,6 +98,61 @@ class LikesService(BaseLikesService):
         )
         return telegram_ids
 
+    async def get_likes_page(
+        self,
+        user_id: int,
+        filters: GetLikesFilters,
+        incoming: bool = False,
+        mutual_only: bool = False,
+    ) -> tuple[list[int], str | None]:
+        """telegram_id страницы лайков (новые первыми) + курсор следующей страницы."""
+        before = decode_cursor(filters.cursor) if filters.cursor else None
+        if before is not None and not isinstance(before, dict):
+            raise InvalidCursorException(filters.cursor)
+        limit = max(1, min(filters.limit, MAX_LIKES_PAGE_SIZE))
+
+        try:
+            telegram_ids, next_position = await self.like_repository.get_likes_page(
+                user_id=user_id,
+                incoming=incoming,
+                limit=limit,
+                before=before,
+                mutual_only=mutual_only,
+            )
+        except (ValueError, TypeError, KeyError):
+            if before is None:
+                raise
+            raise InvalidCursorException(filters.cursor)
+        next_cursor = encode_cursor(next_position) if next_position is not None else None
+        return telegram_ids, next_cursor
+
+    async def get_matches_page(
+        self,
+        user_id: int,
+        filters: GetLikesFilters,
+    ) -> tuple[list[int], str | None]:
+        """telegram_id страницы мэтчей (новые первыми) + курсор следующей страницы."""
+        if self.matches_repository is None:
+            return await self.get_likes_page(user_id=user_id, filters=filters, mutual_only=True)
+
+        before = decode_cursor(filters.cursor) if filters.cursor else None
+        if before is not None and not isinstance(before, dict):
+            raise InvalidCursorException(filters.cursor)
+        limit = max(1, min(filters.limit, MAX_LIKES_PAGE_SIZE))
+
+        try:
+            telegram_ids, next_position = await self.matches_repository.get_matches_page(
+                user_id=user_id,
+                limit=limit,
+                before=before,
+            )
+        except (ValueError, TypeError, KeyError):
+            if before is None:
+                raise
+            raise InvalidCursorException(filters.cursor)
+        next_cursor = encode_cursor(next_position) if next_position is not None else None
+        return telegram_ids, next_cursor
+
     async def check_like_is_exists(self, from_user_id: int, to_user_id: int) -> bool:
         return await self.like_repository.check_like_is_exists(
             from_user=from_user_id,
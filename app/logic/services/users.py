@@ -1,10 +1,29 @@
 from dataclasses import dataclass
-from typing import Iterable
+from typing import (
+    Any,
+    Callable,
+    Container,
+    Iterable,
+)
 
 from app.domain.entities.users import UserEntity
 from app.domain.values.users import AboutText
-from app.infra.repositories.base import BaseUsersRepository
-from app.infra.repositories.filters.users import GetAllUsersFilters
+from app.infra.repositories.base import (
+    BaseFeedQueueRepository,
+    BaseSeenProfilesRepository,
+    BaseUsersRepository,
+)
+from app.infra.repositories.converters import USER_CARD_PROJECTION
+from app.infra.repositories.filters.users import (
+    MAX_FEED_PAGE_SIZE,
+    GetAllUsersFilters,
+    GetFeedFilters,
+)
+from app.logic.cursors import (
+    decode_cursor,
+    encode_cursor,
+)
+from app.logic.exceptions.pagination import InvalidCursorException
 from app.logic.exceptions.users import (
     UserAlreadyExistsException,
     UserNotFoundException,
@@ -17,6 +36,11 @@ from app.settings.config import Config
 class UsersService(BaseUsersService):
     user_repository: BaseUsersRepository
     config: Config | None = None
+    seen_repository: BaseSeenProfilesRepository | None = None
+    # Предрассчитанные очереди ленты; None — лента всегда ранжируется по запросу
+    feed_queue_repository: BaseFeedQueueRepository | None = None
+    # Кому сообщить, что очереди пользователя нет (фоновая сборка)
+    on_feed_queue_miss: Callable[[int], Any] | None = None
 
     async def get_user(self, telegram_id: int) -> UserEntity | None:
         user = await self.user_repository.get_user_by_telegram_id(
@@ -41,30 +65,24 @@ class UsersService(BaseUsersService):
             telegram_id=telegram_id,
             data=data,
         )
-        await self._enrich_user_profile_if_needed(telegram_id)
+
+    async def consume_credit(self, telegram_id: int, field: str) -> bool:
+        return await self.user_repository.consume_credit(telegram_id=telegram_id, field=field)
+
+    async def refund_credit(self, telegram_id: int, field: str) -> None:
+        await self.user_repository.refund_credit(telegram_id=telegram_id, field=field)
+
+    async def reserve_daily_like(self, telegram_id: int, day: str, limit: int | None = None) -> str | None:
+        return await self.user_repository.reserve_daily_like(telegram_id=telegram_id, day=day, limit=limit)
+
+    async def release_daily_like(self, telegram_id: int, day: str, slot: str) -> None:
+        await self.user_repository.release_daily_like(telegram_id=telegram_id, day=day, slot=slot)
 
     async def update_user_about_info(self, telegram_id: int, about: AboutText):
         await self.user_repository.update_user_about(
             telegram_id=telegram_id,
             about=about,
         )
-        await self._enrich_user_profile_if_needed(telegram_id)
-
-    async def _enrich_user_profile_if_needed(self, telegram_id: int) -> None:
-        """Запускает AI-enrichment анкеты после обновления. При ошибке OpenAI — не падает."""
-        if not self.config or not self.config.openai_api_key:
-            return
-        try:
-            user = await self.user_repository.get_user_by_telegram_id(telegram_id)
-            if not user:
-                return
-            from app.logic.ai_matchmaking.profile_enrichment import enrich_profile_for_ai
-
-            ai_fields = await enrich_profile_for_ai(user, self.config.openai_api_key)
-            if ai_fields:
-                await self.user_repository.update_user_ai_fields(telegram_id, ai_fields)
-        except Exception:
-            pass
 
     async def create_user(self, user: UserEntity) -> UserEntity:
         if await self.check_user_exist(user_id=user.telegram_id):
@@ -80,10 +98,140 @@ class UsersService(BaseUsersService):
     async def get_all_users(self, filters: GetAllUsersFilters) -> Iterable[UserEntity]:
         return await self.user_repository.get_all_user(filters=filters)
 
-    async def get_best_result_for_user(self, telegram_id: int, exclude_ids: list[int] | None = None):
-        return await self.user_repository.get_best_result_for_user(
+    async def get_best_result_for_user(
+        self,
+        telegram_id: int,
+        filters: GetFeedFilters,
+        exclude_ids: list[int] | None = None,
+    ) -> tuple[list[UserEntity], str | None]:
+        """
+        Страница ленты + непрозрачный курсор следующей страницы (None — анкеты закончились).
+        Лайкнутые и пропущенные анкеты исключаются по seen_repository; exclude_ids — доп. исключения.
+        Сначала читается готовая очередь рекомендаций, после неё (и без неё) — ранжирование по запросу.
+        """
+        telegram_ids, next_cursor = await self.get_feed_ids_for_user(telegram_id, filters, exclude_ids)
+        users = await self.user_repository.get_users_in_order(telegram_ids)
+        return users, next_cursor
+
+    async def get_feed_ids_for_user(
+        self,
+        telegram_id: int,
+        filters: GetFeedFilters,
+        exclude_ids: list[int] | None = None,
+    ) -> tuple[list[int], str | None]:
+        """Та же страница ленты, но только telegram_id — анкеты вызывающий грузит сам, когда нужны."""
+        after = decode_cursor(filters.cursor) if filters.cursor else None
+        if after is not None and not isinstance(after, dict):
+            raise InvalidCursorException(filters.cursor)
+        limit = max(1, min(filters.limit, MAX_FEED_PAGE_SIZE))
+        # Лайкнутые и пропущенные анкеты — одним компактным документом, без $nin
+        seen = (
+            await self.seen_repository.get_seen(telegram_id)
+            if self.seen_repository is not None else None
+        )
+
+        try:
+            if self.feed_queue_repository is not None and (after is None or after.get("p") == "q"):
+                telegram_ids, next_position = await self._rank_from_queue(
+                    telegram_id, exclude_ids, limit, after, seen,
+                )
+            else:
+                telegram_ids, next_position = await self.user_repository.rank_feed(
+                    telegram_id=telegram_id,
+                    exclude_ids=exclude_ids,
+                    limit=limit,
+                    after=after,
+                    seen=seen,
+                )
+        except (ValueError, TypeError, IndexError):
+            # Курсор декодировался, но не описывает позицию в ленте
+            if after is None:
+                raise
+            raise InvalidCursorException(filters.cursor)
+        next_cursor = encode_cursor(next_position) if next_position is not None else None
+        return telegram_ids, next_cursor
+
+    async def _rank_from_queue(
+        self,
+        telegram_id: int,
+        exclude_ids: list[int] | None,
+        limit: int,
+        after: dict | None,
+        seen: Container[int] | None,
+    ) -> tuple[list[int], dict | None]:
+        """
+        Страница из очереди рекомендаций: позиция {"p": "q", "o": смещение, "g": поколение}.
+        Очередь закончилась — добираем страницу по запросу с tail очереди.
+        """
+        offset = max(0, int((after or {}).get("o", 0)))
+        generation = (after or {}).get("g")
+        excluded = set(exclude_ids or [])
+        if after is None:
+            await self.feed_queue_repository.touch(telegram_id)
+
+        telegram_ids: list[int] = []
+        queue = None
+        while len(telegram_ids) < limit:
+            queue = await self.feed_queue_repository.get_slice(telegram_id, offset, limit * 2)
+            if queue is None:
+                break
+            if generation is not None and queue.generation != generation:
+                # Очередь пересобрана между страницами — читаем новую сначала,
+                # уже пролистанные анкеты отсеет seen
+                generation, offset = queue.generation, 0
+                continue
+            generation = queue.generation
+            if not queue.ids:
+                break
+            fresh = [
+                candidate_id for candidate_id in queue.ids
+                if candidate_id not in excluded and (seen is None or candidate_id not in seen)
+            ]
+            # Очередь собрана заранее: забаненные, скрытые и неактивные с тех пор анкеты отсеиваем
+            eligible = await self.user_repository.get_feed_eligible_ids(fresh) if fresh else set()
+            for candidate_id in queue.ids:
+                offset += 1
+                if candidate_id not in eligible or candidate_id in telegram_ids:
+                    continue
+                telegram_ids.append(candidate_id)
+                if len(telegram_ids) >= limit:
+                    break
+
+        if queue is None and not telegram_ids:
+            # Холодный старт: очереди ещё нет — ранжируем по запросу и просим собрать очередь
+            if self.on_feed_queue_miss is not None:
+                try:
+                    self.on_feed_queue_miss(telegram_id)
+                except Exception:
+                    pass
+            return await self.user_repository.rank_feed(
+                telegram_id=telegram_id,
+                exclude_ids=exclude_ids,
+                limit=limit,
+                seen=seen,
+            )
+
+        if len(telegram_ids) >= limit:
+            has_more = queue is not None and (offset < queue.total or queue.tail is not None)
+            return telegram_ids, ({"p": "q", "o": offset, "g": generation} if has_more else None)
+
+        tail = queue.tail if queue is not None else None
+        if tail is None:
+            return telegram_ids, None
+        more_ids, next_position = await self.user_repository.rank_feed(
             telegram_id=telegram_id,
-            exclude_ids=exclude_ids,
+            exclude_ids=list(excluded | set(telegram_ids)),
+            limit=limit - len(telegram_ids),
+            after=tail,
+            seen=seen,
+        )
+        return telegram_ids + more_ids, next_position
+
+    async def get_users_by_ids(self, telegram_ids: list[int]) -> list[UserEntity]:
+        """Карточки анкет для списков (лайки, матчи): один запрос, порядок telegram_ids."""
+        return await self.user_repository.get_users_in_order(
+            telegram_ids,
+            projection=USER_CARD_PROJECTION,
         )
 
     async def get_users_liked_from(self, users_list: list[int]) -> Iterable[UserEntity]:
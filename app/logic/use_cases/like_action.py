@@ -2,6 +2,7 @@
 Единый use-case для лайка: бот и API вызывают этот сервис.
 Проверки лимитов, swipe_credits, матчи и уведомления — в одном месте.
 """
+import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Optional
@@ -9,10 +10,26 @@ from typing import Optional
 from app.domain.entities.likes import LikesEntity
 from app.domain.entities.users import UserEntity
 from app.domain.exceptions.base import ApplicationException
+from app.infra.repositories.base import BaseNotificationOutboxRepository
+from app.infra.repositories.daily_likes import (
+    likes_day,
+    likes_used_today,
+)
+from app.infra.repositories.outbox import (
+    NOTIFICATION_LIKED,
+    NOTIFICATION_MATCH,
+    NOTIFICATION_SUPERLIKE,
+    OutboxMessage,
+)
 from app.logic.services.base import BaseLikesService, BaseUsersService
 from app.settings.config import Config
 
 
+logger = logging.getLogger(__name__)
+
+_NO_SUPERLIKES_MESSAGE = "Нет суперлайков. Купи суперлайк в разделе Premium."
+
+
 def _is_premium_active(user: UserEntity) -> bool:
     pt = getattr(user, "premium_type", None)
     until = getattr(user, "premium_until", None)
@@ -29,6 +46,9 @@ class LikeActionResult:
     like: Optional[LikesEntity] = None
     is_match: bool = False
     error_message: Optional[str] = None  # При лимите — текст для CTA
+    # Уже загруженные анкеты — вызывающему не нужно читать их повторно
+    from_user: Optional[UserEntity] = None
+    to_user: Optional[UserEntity] = None
 
 
 @dataclass
@@ -38,6 +58,28 @@ class LikeActionUseCase:
     likes_service: BaseLikesService
     users_service: BaseUsersService
     config: Config
+    # Очередь уведомлений; None — отправка в Telegram прямо в запросе
+    outbox: BaseNotificationOutboxRepository | None = None
+
+    def _limit_message(self) -> str:
+        return (
+            f"Лимит лайков на сегодня ({self.config.daily_likes_free}) исчерпан. "
+            "Оформи Premium для безлимитных лайков или купи пакет свайпов."
+        )
+
+    def _limit_error(self, from_user: UserEntity, is_superlike: bool) -> Optional[str]:
+        """Проверка по уже загруженной анкете, без обращений к MongoDB."""
+        if is_superlike:
+            sl = getattr(from_user, "superlike_credits", 0) or 0
+            if sl <= 0:
+                return _NO_SUPERLIKES_MESSAGE
+            return None
+
+        if not _is_premium_active(from_user):
+            swipe_credits = getattr(from_user, "swipe_credits", 0) or 0
+            if likes_used_today(from_user) >= self.config.daily_likes_free and swipe_credits <= 0:
+                return self._limit_message()
+        return None
 
     async def can_like(
         self,
@@ -53,23 +95,8 @@ class LikeActionUseCase:
         except ApplicationException:
             return False, "Пользователь не найден"
 
-        is_premium = _is_premium_active(from_user)
-
-        if is_superlike:
-            sl = getattr(from_user, "superlike_credits", 0) or 0
-            if sl <= 0:
-                return False, "Нет суперлайков. Купи суперлайк в разделе Premium."
-
-        if not is_premium and not is_superlike:
-            today = await self.likes_service.count_likes_today(from_user_id=from_user_id)
-            swipe_credits = getattr(from_user, "swipe_credits", 0) or 0
-            if today >= self.config.daily_likes_free and swipe_credits <= 0:
-                return False, (
-                    f"Лимит лайков на сегодня ({self.config.daily_likes_free}) исчерпан. "
-                    "Оформи Premium для безлимитных лайков или купи пакет свайпов."
-                )
-
-        return True, None
+        err = self._limit_error(from_user, is_superlike)
+        return err is None, err
 
     async def execute(
         self,
@@ -80,57 +107,66 @@ class LikeActionUseCase:
         """
         Выполняет лайк: проверяет лимиты, создаёт like, отправляет уведомления.
         При лимите возвращает success=False и error_message.
-        """
-        can, err = await self.can_like(from_user_id, is_superlike=is_superlike)
-        if not can:
-            return LikeActionResult(success=False, error_message=err)
 
+        Обращения к MongoDB: анкета, атомарный +1 к дневному счётчику (он же списывает
+        swipe_credits сверх лимита), upsert лайка, проверка встречного лайка.
+        Суперлайк списывается атомарно до записи лайка и возвращается, если лайк не создан.
+        """
         try:
             from_user = await self.users_service.get_user(telegram_id=from_user_id)
         except ApplicationException:
             return LikeActionResult(success=False, error_message="Пользователь не найден")
 
-        # Уже лайкнули — не ошибка, просто проверяем матч
-        already = await self.likes_service.check_like_is_exists(
-            from_user_id=from_user_id,
-            to_user_id=to_user_id,
+        err = self._limit_error(from_user, is_superlike)
+        if err:
+            return LikeActionResult(success=False, error_message=err, from_user=from_user)
+
+        # Анкета могла устареть: суперлайк списывается до лайка, параллельные свайпы не уйдут в минус
+        if is_superlike and not await self.users_service.consume_credit(from_user_id, "superlike_credits"):
+            return LikeActionResult(success=False, error_message=_NO_SUPERLIKES_MESSAGE, from_user=from_user)
+
+        # Слот в дневном счётчике берётся до записи лайка: лимит держится и при
+        # параллельных свайпах. Premium и суперлайки только считаются.
+        day = likes_day()
+        limited = not is_superlike and not _is_premium_active(from_user)
+        slot = await self.users_service.reserve_daily_like(
+            from_user_id,
+            day,
+            limit=self.config.daily_likes_free if limited else None,
         )
+        if slot is None:
+            await self._refund_superlike(from_user_id, is_superlike)
+            return LikeActionResult(success=False, error_message=self._limit_message(), from_user=from_user)
 
-        if not already:
-            try:
-                like = await self.likes_service.create_like(
-                    from_user_id=from_user_id,
-                    to_user_id=to_user_id,
-                )
-            except ApplicationException:
+        # Повторный лайк — не ошибка: лайк не пишется, матч всё равно проверяется
+        try:
+            like, is_match = await self.likes_service.like(
+                from_user_id=from_user_id,
+                to_user_id=to_user_id,
+            )
+        except Exception as e:
+            # Лайк не записан (в том числе таймаут или сбой MongoDB) — слот и суперлайк возвращаются
+            await self.users_service.release_daily_like(from_user_id, day, slot)
+            await self._refund_superlike(from_user_id, is_superlike)
+            if isinstance(e, ApplicationException):
                 return LikeActionResult(success=False, error_message="Не удалось создать лайк")
+            raise
 
-            # Списываем кредиты
-            if is_superlike:
-                new_sl = max(0, (getattr(from_user, "superlike_credits", 0) or 0) - 1)
-                await self.users_service.update_user_info_after_reg(
-                    telegram_id=from_user_id,
-                    data={"superlike_credits": new_sl},
-                )
-            elif not _is_premium_active(from_user):
-                today = await self.likes_service.count_likes_today(from_user_id=from_user_id)
-                if today > self.config.daily_likes_free:
-                    # Этот лайк сверх дневного лимита — списываем swipe_credits
-                    credits = getattr(from_user, "swipe_credits", 0) or 0
-                    if credits > 0:
-                        await self.users_service.update_user_info_after_reg(
-                            telegram_id=from_user_id,
-                            data={"swipe_credits": credits - 1},
-                        )
-        else:
-            like = None  # Лайк уже был
-
-        is_match = await self.likes_service.check_match(
-            from_user_id=from_user_id,
-            to_user_id=to_user_id,
-        )
+        if like is None:
+            # Лайк уже был — слот и кредиты возвращаются
+            await self.users_service.release_daily_like(from_user_id, day, slot)
+            await self._refund_superlike(from_user_id, is_superlike)
 
         # Уведомления
+        user_to = None
+        if self.outbox is not None:
+            await self._enqueue_notifications(from_user_id, to_user_id, is_superlike, is_match)
+            return LikeActionResult(
+                success=True,
+                like=like,
+                is_match=is_match,
+                from_user=from_user,
+            )
         try:
             from app.bot.utils.notificator import (
                 send_liked_message,
@@ -160,4 +196,34 @@ class LikeActionUseCase:
             success=True,
             like=like,
             is_match=is_match,
+            from_user=from_user,
+            to_user=user_to,
         )
+
+    async def _refund_superlike(self, from_user_id: int, is_superlike: bool) -> None:
+        if is_superlike:
+            await self.users_service.refund_credit(from_user_id, "superlike_credits")
+
+    async def _enqueue_notifications(
+        self,
+        from_user_id: int,
+        to_user_id: int,
+        is_superlike: bool,
+        is_match: bool,
+    ) -> None:
+        """Запись в outbox вместо отправки: лайк не ждёт Telegram. Обычные лайки копятся и склеиваются."""
+        if is_superlike:
+            messages = [OutboxMessage(to_user_id, NOTIFICATION_SUPERLIKE, {"sender_id": from_user_id})]
+        elif is_match:
+            messages = [
+                OutboxMessage(to_user_id, NOTIFICATION_MATCH, {"matched_id": from_user_id}),
+                OutboxMessage(from_user_id, NOTIFICATION_MATCH, {"matched_id": to_user_id}),
+            ]
+        else:
+            messages = [OutboxMessage(to_user_id, NOTIFICATION_LIKED, {"sender_id": from_user_id})]
+        delay = self.config.notify_like_coalesce_seconds if messages[0].kind == NOTIFICATION_LIKED else 0
+        for message in messages:
+            try:
+                await self.outbox.push(message, delay_seconds=delay)
+            except Exception as e:
+                logger.warning("Notification enqueue failed for %s: %s", message.chat_id, e)
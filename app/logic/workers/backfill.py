@@ -0,0 +1,42 @@
+"""Разовые фоновые миграции данных при старте приложения."""
+import logging
+from dataclasses import dataclass
+
+from app.infra.repositories.base import (
+    BaseMatchesRepository,
+    BaseUsersRepository,
+)
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NormalizedFieldsBackfillWorker(BaseWorker):
+    """Проставляет gender_norm/city_canonical анкетам, записанным до появления этих полей."""
+
+    users_repository: BaseUsersRepository
+
+    async def run(self) -> None:
+        backfill = getattr(self.users_repository, "backfill_normalized_fields", None)
+        if backfill is None:
+            return
+        updated = await backfill()
+        if updated:
+            logger.info("Backfilled gender_norm/city_canonical for %d profiles", updated)
+
+
+@dataclass
+class MatchesBackfillWorker(BaseWorker):
+    """Переносит взаимные лайки, поставленные до появления коллекции matches."""
+
+    matches_repository: BaseMatchesRepository
+
+    async def run(self) -> None:
+        backfill = getattr(self.matches_repository, "backfill_from_likes", None)
+        if backfill is None:
+            return
+        stored = await backfill()
+        if stored:
+            logger.info("Backfilled %d matches from mutual likes", stored)
@@ -0,0 +1,50 @@
+"""Базовый фоновый воркер: одна asyncio-задача, запуск/остановка из lifespan."""
+import asyncio
+import logging
+from abc import (
+    ABC,
+    abstractmethod,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BaseWorker(ABC):
+    _task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run_safe(), name=type(self).__name__)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run_safe(self) -> None:
+        try:
+            await self.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("%s crashed", type(self).__name__)
+
+    @abstractmethod
+    async def run(self) -> None:
+        """Основной цикл воркера. Должен работать до отмены задачи."""
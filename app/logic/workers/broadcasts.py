@@ -0,0 +1,127 @@
+"""
+Рассылки администратора: задания из BaseBroadcastsRepository.
+
+За один шаг воркер берёт задание (аренда, чтобы две реплики не слали одно и то же),
+переносит следующую пачку аудитории в получатели и рассылает её параллельно через
+общий с уведомлениями TelegramRateLimiter. 429 приостанавливает чат и общий поток и
+повторяет отправку; заблокировавшие бота получают статус blocked, прочие ошибки — failed.
+Задания обслуживаются по очереди пачками, поэтому пауза и отмена срабатывают быстро.
+"""
+import asyncio
+import logging
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Awaitable,
+    Callable,
+)
+
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from app.infra.rate_limit import TelegramRateLimiter
+from app.infra.repositories.base import (
+    BaseBroadcastsRepository,
+    BaseUsersRepository,
+)
+from app.infra.repositories.broadcasts import (
+    RECIPIENT_BLOCKED,
+    RECIPIENT_FAILED,
+    RECIPIENT_SENT,
+    BroadcastJob,
+)
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastWorker(BaseWorker):
+    broadcasts: BaseBroadcastsRepository
+    users_repository: BaseUsersRepository
+    # Отправляет задание одному получателю; возвращает file_id фото, если оно было
+    send: Callable[[BroadcastJob, int], Awaitable[str | None]]
+    limiter: TelegramRateLimiter = field(default_factory=TelegramRateLimiter)
+    batch_size: int = 200
+    concurrency: int = 20
+    poll_interval_seconds: float = 2.0
+    lease_seconds: float = 300.0
+    # Сколько раз повторять отправку после 429
+    max_attempts: int = 3
+
+    async def run(self) -> None:
+        while True:
+            try:
+                processed = await self.process_once()
+            except Exception as e:
+                logger.warning("Broadcast step failed: %s", e)
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    async def process_once(self) -> int:
+        """Одна пачка одного задания. Возвращает число обработанных получателей (0 — нечего делать)."""
+        job = await self.broadcasts.claim(self.lease_seconds)
+        if job is None:
+            return 0
+        try:
+            return await self._process_batch(job)
+        finally:
+            await self.broadcasts.release(job.id)
+
+    async def _process_batch(self, job: BroadcastJob) -> int:
+        # Сначала — получатели, перенесённые до сбоя, но не обработанные
+        chat_ids = await self.broadcasts.pending_recipients(job.id, self.batch_size)
+        if not chat_ids:
+            if not job.audience_done:
+                chat_ids = await self.users_repository.get_broadcast_audience(job.target, job.cursor, self.batch_size)
+            if not chat_ids:
+                if job.audience_done:
+                    await self.broadcasts.complete(job.id)
+                    logger.info("Broadcast %s done: sent=%d failed=%d blocked=%d",
+                                job.id, job.sent, job.failed, job.blocked)
+                else:
+                    await self.broadcasts.finish_audience(job.id)
+                return 0
+            await self.broadcasts.add_recipients(job.id, chat_ids, cursor=chat_ids[-1])
+
+        results: dict[int, str] = {}
+        pending = list(chat_ids)
+        # Фото загружается один раз: пока нет file_id, отправки идут по одной
+        while job.photo and not job.photo_file_id and pending:
+            chat_id = pending.pop(0)
+            results[chat_id] = await self._send_one(job, chat_id)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(chat_id: int) -> None:
+            async with semaphore:
+                results[chat_id] = await self._send_one(job, chat_id)
+
+        await asyncio.gather(*(send(chat_id) for chat_id in pending))
+        await self.broadcasts.record(job.id, results)
+        return len(results)
+
+    async def _send_one(self, job: BroadcastJob, chat_id: int) -> str:
+        for _ in range(self.max_attempts):
+            await self.limiter.acquire(chat_id)
+            try:
+                file_id = await self.send(job, chat_id)
+            except TelegramRetryAfter as e:
+                self.limiter.penalize(chat_id, e.retry_after)
+                continue
+            except TelegramForbiddenError:
+                return RECIPIENT_BLOCKED
+            except Exception as e:
+                logger.warning("Broadcast %s to %s failed: %s", job.id, chat_id, e)
+                return RECIPIENT_FAILED
+            if file_id and not job.photo_file_id:
+                job.photo_file_id = file_id
+                await self.broadcasts.set_photo_file_id(job.id, file_id)
+            return RECIPIENT_SENT
+        return RECIPIENT_FAILED
@@ -0,0 +1,76 @@
+"""
+Фоновый AI-enrichment анкет (search_text, ai_traits, ai_skills, ai_appearance).
+
+Репозиторий сообщает воркеру об изменённых полях анкеты. Обогащение запускается только
+при изменении имени, возраста, города или «о себе», не раньше debounce_seconds после
+последней правки (регистрация по шагам — один запрос к OpenAI), по одному на пользователя.
+Если хэш этих полей совпадает с ai_profile_hash анкеты, OpenAI не вызывается.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import Iterable
+
+from app.infra.repositories.base import BaseUsersRepository
+from app.logic.ai_matchmaking import profile_enrichment
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Поля анкеты, из которых строится enrichment (см. profile_enrichment._build_search_text)
+ENRICHMENT_FIELDS = frozenset({"name", "age", "city", "about"})
+
+
+@dataclass
+class ProfileEnrichmentWorker(BaseWorker):
+    users_repository: BaseUsersRepository
+    openai_api_key: str = ""
+    debounce_seconds: float = 30.0
+    poll_interval_seconds: float = 5.0
+
+    # telegram_id → момент (time.monotonic), не раньше которого обогащать
+    _due: dict[int, float] = field(default_factory=dict, init=False, repr=False)
+
+    def notify_profile_changed(self, telegram_id: int, fields: Iterable[str]) -> bool:
+        """Вызывается репозиторием после записи анкеты. Не блокирует."""
+        if not self.openai_api_key or ENRICHMENT_FIELDS.isdisjoint(fields):
+            return False
+        # Повторная правка сдвигает срок — пользователь ещё заполняет анкету
+        self._due[telegram_id] = time.monotonic() + self.debounce_seconds
+        return True
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval_seconds)
+            await self.process_once()
+
+    async def process_once(self, now: float | None = None) -> int:
+        """Обогащает анкеты, у которых истёк debounce. Возвращает число вызовов OpenAI."""
+        now = time.monotonic() if now is None else now
+        ready = [telegram_id for telegram_id, due in self._due.items() if due <= now]
+        enriched = 0
+        for telegram_id in ready:
+            self._due.pop(telegram_id, None)
+            try:
+                if await self.enrich(telegram_id):
+                    enriched += 1
+            except Exception as e:
+                logger.warning("Profile enrichment failed for %s: %s", telegram_id, e)
+        return enriched
+
+    async def enrich(self, telegram_id: int) -> bool:
+        user = await self.users_repository.get_user_by_telegram_id(telegram_id)
+        if not user:
+            return False
+        if getattr(user, "ai_profile_hash", None) == profile_enrichment.profile_content_hash(user):
+            return False
+        ai_fields = await profile_enrichment.enrich_profile_for_ai(user, self.openai_api_key)
+        if ai_fields:
+            await self.users_repository.update_user_ai_fields(telegram_id, ai_fields)
+        return True
@@ -0,0 +1,91 @@
+"""
+Фоновый геокодинг городов из анкет.
+
+Лента не ходит в сеть: если у кандидата нет lat/lon и города нет в CITY_COORDS,
+город ставится в очередь (enqueue). Воркер по одному геокодирует города через
+CachedGeocoder → NominatimGeocoder (кэш в geocode_cache, не чаще 1 req/s)
+и сохраняет lat/lon/location всем анкетам с этим городом.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import (
+    dataclass,
+    field,
+)
+
+from app.infra.geocoding.base import BaseGeocoder
+from app.infra.repositories.base import BaseUsersRepository
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GeocodingWorker(BaseWorker):
+    geocoder: BaseGeocoder
+    users_repository: BaseUsersRepository
+    max_queue_size: int = 1000
+    # Через сколько секунд можно повторить город, который не удалось геокодировать
+    retry_after_seconds: float = 3600.0
+
+    _queue: asyncio.Queue = field(init=False, repr=False)
+    _pending: set[str] = field(default_factory=set, init=False, repr=False)
+    _failed_until: dict[str, float] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+
+    def enqueue(self, city: str) -> bool:
+        """Ставит город в очередь без ожидания. Дубликаты и недавние неудачи отбрасываются."""
+        city = (city or "").strip()
+        if not city:
+            return False
+        key = city.lower()
+        if key in self._pending:
+            return False
+        failed_until = self._failed_until.get(key)
+        if failed_until is not None and failed_until > time.monotonic():
+            return False
+        try:
+            self._queue.put_nowait(city)
+        except asyncio.QueueFull:
+            return False
+        self._pending.add(key)
+        return True
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue.qsize()
+
+    async def run(self) -> None:
+        while True:
+            city = await self._queue.get()
+            try:
+                await self.process(city)
+            except Exception as e:
+                logger.warning("Geocoding worker failed for %r: %s", city, e)
+                self._mark_failed(city)
+            finally:
+                self._pending.discard(city.lower())
+                self._queue.task_done()
+
+    async def process(self, city: str) -> int:
+        """Геокодирует город и сохраняет координаты анкетам. Возвращает число обновлённых анкет."""
+        result = await self.geocoder.geocode(city)
+        if result is None:
+            self._mark_failed(city)
+            return 0
+        updated = await self.users_repository.set_city_coordinates(
+            city=city,
+            lat=result.lat,
+            lon=result.lon,
+        )
+        logger.info("Geocoded %r → %.4f,%.4f (%d profiles)", city, result.lat, result.lon, updated)
+        return updated
+
+    def _mark_failed(self, city: str) -> None:
+        if len(self._failed_until) > 10_000:
+            self._failed_until.clear()
+        self._failed_until[city.lower()] = time.monotonic() + self.retry_after_seconds
@@ -0,0 +1,77 @@
+"""
+Сборщик осиротевших медиа в S3.
+
+Файлы анкет лежат под неизменяемыми ключами media/{telegram_id}/{hash}.{ext} и никогда
+не перезаписываются: замена и удаление фото только убирают ключ из photos[]. Воркер
+периодически обходит бакет и удаляет объекты (вместе с производными), на которые не
+ссылается ни одна анкета, а также брошенные временные загрузки uploads/. Свежие объекты
+не трогаются grace_seconds: между загрузкой и записью в photos[] проходит время.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+from app.infra.repositories.base import BaseUsersRepository
+from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.keys import (
+    MEDIA_PREFIX,
+    UPLOADS_PREFIX,
+    is_content_key,
+    key_owner,
+    key_stem,
+)
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MediaSweeperWorker(BaseWorker):
+    storage: BaseS3Storage
+    users_repository: BaseUsersRepository
+    interval_seconds: float = 6 * 3600
+    grace_seconds: float = 24 * 3600
+    # Сколько ключей проверяется одним запросом к MongoDB
+    page_size: int = 1000
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep_once()
+            except Exception as e:
+                logger.warning("Media sweep failed: %s", e)
+
+    async def sweep_once(self, now: datetime | None = None) -> int:
+        """Один проход по бакету. Возвращает число удалённых объектов."""
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(seconds=self.grace_seconds)
+
+        stale_uploads = [key async for key, modified in self.storage.list_files(UPLOADS_PREFIX) if modified < cutoff]
+        deleted = await self.storage.delete_files(stale_uploads) if stale_uploads else 0
+
+        page: list[str] = []
+        async for key, modified in self.storage.list_files(MEDIA_PREFIX):
+            if modified >= cutoff or not is_content_key(key):
+                continue
+            page.append(key)
+            if len(page) >= self.page_size:
+                deleted += await self._delete_unreferenced(page)
+                page = []
+        if page:
+            deleted += await self._delete_unreferenced(page)
+
+        if deleted:
+            logger.info("Media sweep: deleted %d objects", deleted)
+        return deleted
+
+    async def _delete_unreferenced(self, keys: list[str]) -> int:
+        owners = {key_owner(key) for key in keys}
+        referenced = {key_stem(key) for key in await self.users_repository.get_media_keys(owners)}
+        orphans = [key for key in keys if key_stem(key) not in referenced]
+        return await self.storage.delete_files(orphans) if orphans else 0
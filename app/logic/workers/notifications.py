@@ -0,0 +1,111 @@
+"""
+Диспетчер уведомлений бота: забирает записи outbox и отправляет их в Telegram.
+
+Отправка идёт параллельно (concurrency), но через TelegramRateLimiter — общий и
+початовый token bucket. 429 (retry_after) приостанавливает чат и общий поток и
+возвращает запись в очередь без списания попытки; прочие ошибки — повтор с
+экспоненциальной задержкой до max_attempts. Получатель, заблокировавший бота,
+из очереди просто удаляется.
+"""
+import asyncio
+import logging
+from dataclasses import (
+    dataclass,
+    field,
+)
+from typing import (
+    Awaitable,
+    Callable,
+)
+
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from app.infra.rate_limit import TelegramRateLimiter
+from app.infra.repositories.base import BaseNotificationOutboxRepository
+from app.infra.repositories.outbox import OutboxMessage
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DispatcherStats:
+    sent: int = 0
+    rate_limited: int = 0
+    retried: int = 0
+    dropped: int = 0
+
+
+@dataclass
+class NotificationDispatcherWorker(BaseWorker):
+    outbox: BaseNotificationOutboxRepository
+    deliver: Callable[[OutboxMessage], Awaitable[None]]
+    limiter: TelegramRateLimiter = field(default_factory=TelegramRateLimiter)
+    batch_size: int = 100
+    concurrency: int = 20
+    poll_interval_seconds: float = 1.0
+    # Сколько запись принадлежит взявшему её процессу; после — вернётся в очередь
+    lease_seconds: float = 120.0
+    max_attempts: int = 5
+    backoff_base_seconds: float = 5.0
+    backoff_max_seconds: float = 600.0
+
+    stats: DispatcherStats = field(default_factory=DispatcherStats, init=False)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                processed = await self.dispatch_once()
+            except Exception as e:
+                logger.warning("Notification dispatch failed: %s", e)
+                processed = 0
+            if processed < self.batch_size:
+                await asyncio.sleep(self.poll_interval_seconds)
+
+    async def dispatch_once(self) -> int:
+        """Отправляет одну пачку готовых записей. Возвращает её размер."""
+        messages = await self.outbox.claim(self.batch_size, self.lease_seconds)
+        if not messages:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(message: OutboxMessage) -> None:
+            async with semaphore:
+                await self._send(message)
+
+        await asyncio.gather(*(send(message) for message in messages))
+        return len(messages)
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempts)
+
+    async def _send(self, message: OutboxMessage) -> None:
+        await self.limiter.acquire(message.chat_id)
+        try:
+            await self.deliver(message)
+        except TelegramRetryAfter as e:
+            self.stats.rate_limited += 1
+            self.limiter.penalize(message.chat_id, e.retry_after)
+            await self.outbox.retry(message, e.retry_after, failed=False)
+            return
+        except TelegramForbiddenError as e:
+            self.stats.dropped += 1
+            logger.info("Notification %s to %s dropped: %s", message.kind, message.chat_id, e)
+            await self.outbox.ack(message)
+            return
+        except Exception as e:
+            if message.attempts + 1 >= self.max_attempts:
+                self.stats.dropped += 1
+                logger.warning("Notification %s to %s dropped after %d attempts: %s",
+                               message.kind, message.chat_id, message.attempts + 1, e)
+                await self.outbox.ack(message)
+            else:
+                self.stats.retried += 1
+                await self.outbox.retry(message, self._backoff(message.attempts))
+            return
+        self.stats.sent += 1
+        await self.outbox.ack(message)
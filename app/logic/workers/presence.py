@@ -0,0 +1,48 @@
+"""Периодическая запись last_seen из трекера присутствия в MongoDB."""
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from app.infra.presence import BasePresenceTracker
+from app.infra.repositories.base import BaseUsersRepository
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PresenceFlushWorker(BaseWorker):
+    presence_tracker: BasePresenceTracker
+    users_repository: BaseUsersRepository
+    flush_interval_seconds: float = 30.0
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Presence flush failed: %s", e)
+
+    async def flush(self) -> int:
+        """Пишет накопленные last_seen одним bulk_write. Возвращает число анкет в пачке."""
+        last_seen = await self.presence_tracker.drain()
+        if not last_seen:
+            return 0
+        try:
+            await self.users_repository.update_last_seen_many(last_seen)
+        except Exception:
+            # Вернуть в трекер — запишутся следующим проходом
+            for telegram_id, at in last_seen.items():
+                await self.presence_tracker.touch(telegram_id, at.timestamp())
+            raise
+        return len(last_seen)
+
+    async def stop(self) -> None:
+        await super().stop()
+        # Пинги после последнего прохода не теряются при остановке
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning("Presence flush on stop failed: %s", e)
@@ -0,0 +1,145 @@
+"""
+Фоновый пересчёт очередей рекомендаций (feed_queues).
+
+Лента читает готовую очередь ранжированных id (см. app.infra.repositories.feed_queue).
+Воркер поддерживает очереди актуальными:
+  - изменилась анкета (регистрация, город/пол, фото, буст, подписка) — помечает stale
+    очереди, где она есть или может появиться, и пересобирает очередь самой анкеты;
+  - лента не нашла очередь (холодный старт) — собирает её;
+  - очереди активных пользователей пересобираются не реже refresh_after_seconds
+    (истекающие бусты/подписки, изменения в обход репозитория).
+"""
+import asyncio
+import logging
+from dataclasses import (
+    dataclass,
+    field,
+)
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+from typing import Iterable
+
+from app.infra.repositories.base import (
+    BaseFeedQueueRepository,
+    BaseSeenProfilesRepository,
+    BaseUsersRepository,
+)
+from app.infra.repositories.normalization import (
+    normalize_city,
+    normalize_gender,
+    opposite_gender,
+)
+from app.logic.workers.base import BaseWorker
+
+
+logger = logging.getLogger(__name__)
+
+
+# Поля анкеты, от которых зависят фильтры и порядок ленты
+RANKING_FIELDS = frozenset({
+    "gender", "city", "lat", "lon", "age",
+    "photo", "photos",
+    "is_active", "is_banned", "profile_hidden",
+    "premium_type", "premium_until", "boost_until",
+})
+
+
+@dataclass
+class FeedQueueWorker(BaseWorker):
+    users_repository: BaseUsersRepository
+    feed_queue_repository: BaseFeedQueueRepository
+    seen_repository: BaseSeenProfilesRepository | None = None
+    queue_size: int = 200
+    refresh_after_seconds: float = 900.0
+    # Очереди пользователей, не открывавших ленту дольше, не пересобираются
+    active_days: int = 7
+    batch_size: int = 50
+    poll_interval_seconds: float = 5.0
+
+    _changed: set[int] = field(default_factory=set, init=False, repr=False)
+    _requested: set[int] = field(default_factory=set, init=False, repr=False)
+    _wakeup: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+
+    def notify_profile_changed(self, telegram_id: int, fields: Iterable[str]) -> bool:
+        """Вызывается репозиторием после записи анкеты. Не блокирует."""
+        if RANKING_FIELDS.isdisjoint(fields):
+            return False
+        self._changed.add(telegram_id)
+        self._wakeup.set()
+        return True
+
+    def request_build(self, owner_id: int) -> None:
+        """Лента не нашла очередь — собрать при ближайшем проходе."""
+        self._requested.add(owner_id)
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.process_once()
+            except Exception as e:
+                logger.warning("Feed queue refresh failed: %s", e)
+
+    async def process_once(self) -> int:
+        """Один проход: инвалидация изменённых анкет и пересборка очередей. Возвращает число пересобранных."""
+        changed, self._changed = self._changed, set()
+        requested, self._requested = self._requested, set()
+
+        for telegram_id in changed:
+            try:
+                await self._invalidate(telegram_id)
+            except Exception as e:
+                logger.warning("Could not invalidate feed queues for %s: %s", telegram_id, e)
+
+        now = datetime.now(timezone.utc)
+        owners = list(dict.fromkeys([*requested, *changed]))
+        owners += await self.feed_queue_repository.get_owner_ids_to_refresh(
+            built_before=now - timedelta(seconds=self.refresh_after_seconds),
+            served_after=now - timedelta(days=self.active_days),
+            limit=self.batch_size,
+        )
+
+        rebuilt = 0
+        for owner_id in dict.fromkeys(owners):
+            try:
+                if await self.rebuild(owner_id):
+                    rebuilt += 1
+            except Exception as e:
+                logger.warning("Could not rebuild feed queue for %s: %s", owner_id, e)
+        return rebuilt
+
+    async def rebuild(self, owner_id: int) -> bool:
+        user = await self.users_repository.get_user_by_telegram_id(owner_id)
+        if not user:
+            return False
+        seen = (
+            await self.seen_repository.get_seen(owner_id)
+            if self.seen_repository is not None else None
+        )
+        ids, tail = await self.users_repository.rank_feed(
+            telegram_id=owner_id,
+            limit=self.queue_size,
+            seen=seen,
+        )
+        await self.feed_queue_repository.save_queue(
+            owner_id=owner_id,
+            ids=ids,
+            tail=tail,
+            target_gender=opposite_gender(normalize_gender(getattr(user, "gender", None))),
+            city_key=normalize_city(getattr(user, "city", None)),
+        )
+        return True
+
+    async def _invalidate(self, telegram_id: int) -> None:
+        user = await self.users_repository.get_user_by_telegram_id(telegram_id)
+        gender = normalize_gender(getattr(user, "gender", None)) if user else None
+        city_key = normalize_city(getattr(user, "city", None)) if user else ""
+        await self.feed_queue_repository.mark_stale(telegram_id, gender, city_key)
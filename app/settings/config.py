@@ -6,6 +6,9 @@ class Config(BaseSettings):
     token: str = Field(alias="BOT_TOKEN")
     bot_username: str = Field(default="", alias="BOT_USERNAME")
     url_webhook: str = Field(alias="WEBHOOK_URL", default="https://lsjlove.duckdns.org")
+    # Общий Bot процесса: соединений к Bot API в пуле и таймаут запроса, секунды
+    bot_pool_limit: int = Field(default=100, alias="BOT_POOL_LIMIT")
+    bot_request_timeout: float = Field(default=30.0, alias="BOT_REQUEST_TIMEOUT")
 
     mongodb_connection_uri: str = Field(alias="MONGO_DB_CONNECTION_URI")
     mongodb_dating_database: str = Field(
@@ -38,6 +41,16 @@ class Config(BaseSettings):
         default="https://s3.us-east-005.backblazeb2.com",
         alias="S3_ENDPOINT_URL",
     )
+    # Пул соединений единственного S3-клиента приложения
+    s3_max_pool_connections: int = Field(default=50, alias="S3_MAX_POOL_CONNECTIONS")
+    # Публичный CDN перед бакетом (https://cdn.example.com): resolve_media отдаёт {base}/{key}
+    # вместо presigned URL. Пусто — бакет приватный
+    media_public_base_url: str = Field(default="", alias="MEDIA_PUBLIC_BASE_URL")
+    # Лимиты размера загружаемых файлов (проверяются по мере чтения потока)
+    max_image_upload_mb: int = Field(default=15, alias="MAX_IMAGE_UPLOAD_MB")
+    max_video_upload_mb: int = Field(default=60, alias="MAX_VIDEO_UPLOAD_MB")
+    # Процессов для ресайза фото при загрузке (0 — в потоке основного процесса)
+    image_workers: int = Field(default=2, alias="IMAGE_WORKERS")
 
     # Platega платёжная система
     platega_merchant_id: str = Field(default="", alias="PLATEGA_MERCHANT_ID")
@@ -83,6 +96,26 @@ class Config(BaseSettings):
     )
     geocode_cache_ttl_days: int = Field(default=90, alias="GEOCODE_CACHE_TTL_DAYS")
 
+    # Redis — общее состояние для нескольких воркеров (присутствие); пусто — в памяти процесса
+    redis_url: str = Field(default="", alias="REDIS_URL")
+    # Как часто last_seen из пингов пишется в MongoDB (одним bulk_write)
+    presence_flush_seconds: float = Field(default=30.0, alias="PRESENCE_FLUSH_SECONDS")
+    # Состояние диалогов бота (FSM) в Redis: сколько хранить брошенные сценарии и сессии свайпов
+    fsm_ttl_hours: float = Field(default=72.0, alias="FSM_TTL_HOURS")
+
+    # Уведомления бота (outbox): лимиты Telegram и склейка лайков одному получателю
+    notify_global_rate: float = Field(default=25.0, alias="NOTIFY_GLOBAL_RATE")
+    notify_chat_rate: float = Field(default=1.0, alias="NOTIFY_CHAT_RATE")
+    notify_concurrency: int = Field(default=20, alias="NOTIFY_CONCURRENCY")
+    notify_like_coalesce_seconds: float = Field(default=15.0, alias="NOTIFY_LIKE_COALESCE_SECONDS")
+    # Рассылки администратора: размер пачки получателей и параллельность (лимиты — общие с уведомлениями)
+    broadcast_batch_size: int = Field(default=200, alias="BROADCAST_BATCH_SIZE")
+    broadcast_concurrency: int = Field(default=20, alias="BROADCAST_CONCURRENCY")
+
+    # Сборщик медиа: как часто обходить бакет и сколько не трогать свежие объекты
+    media_sweep_interval_hours: float = Field(default=6.0, alias="MEDIA_SWEEP_INTERVAL_HOURS")
+    media_sweep_grace_hours: float = Field(default=24.0, alias="MEDIA_SWEEP_GRACE_HOURS")
+
     # Feature flags (миграция без жёсткого обрыва)
     enable_webapp: bool = Field(default=False, alias="ENABLE_WEBAPP")
     enable_bot_match: bool = Field(default=True, alias="ENABLE_BOT_MATCH")
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from punq import Container
+
+from app.application.api.v1.users.media import resolve_media
+from app.application.api.v1.users.schemas import UserDetailSchema
+from app.infra.s3.base import BaseS3Storage
+from app.infra.s3.derivatives import (
+    ImageDerivativesPipeline,
+    variant_key,
+)
+from app.logic.init import init_container
+
+
+class FakeStorage:
+    def __init__(self):
+        self.signed: list[str] = []
+
+    async def get_presigned_url_cached(self, file_name: str, expires: int = 3600) -> tuple[str, int]:
+        self.signed.append(file_name)
+        return f"https://s3.example.com/{file_name}?sig=1", 3000
+
+
+def _user(telegram_id: int, photos: list[str]) -> SimpleNamespace:
+    return SimpleNamespace(
+        telegram_id=telegram_id, name="Аня", username=None, gender="Woman", age=25, city="Москва",
+        looking_for=None, about=None, photo=photos[0] if photos else None, photos=photos,
+        is_active=True, referral_balance=0, last_seen=None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_page_media_is_resolved_in_one_pass():
+    storage = FakeStorage()
+    users = [_user(1, ["1_0.jpg", "https://example.com/a.jpg"]), _user(2, ["2_0.jpg", "2_1.mp4"])]
+
+    media = await resolve_media(users, storage)
+
+    assert sorted(storage.signed) == ["1_0.jpg", "2_0.jpg", "2_1.mp4"]
+    assert media.expires_at is not None
+
+    detail = UserDetailSchema.from_entity(users[0], media_urls=media.urls, media_expires_at=media.expires_at)
+    assert detail.photos == ["https://s3.example.com/1_0.jpg?sig=1", "https://example.com/a.jpg"]
+    assert detail.photo == detail.photos[0]
+    assert detail.media_expires_at is not None
+
+    placeholder = UserDetailSchema.from_entity(users[1])
+    assert placeholder.photos == ["/api/v1/users/2/photo/0", "/api/v1/users/2/photo/1"]
+    assert placeholder.thumbnails == ["/api/v1/users/2/photo/0?variant=card", "/api/v1/users/2/photo/1"]
+    assert placeholder.media_expires_at is None
+
+
+@pytest.mark.asyncio
+async def test_public_cdn_urls_do_not_expire():
+    storage = FakeStorage()
+
+    media = await resolve_media([_user(1, ["1_0.jpg"])], storage, public_base_url="https://cdn.example.com/")
+
+    assert media.urls == {"1_0.jpg": "https://cdn.example.com/1_0.jpg"}
+    assert media.expires_at is None
+    assert storage.signed == []
+
+
+def test_content_keys_link_to_immutable_media_endpoint():
+    key = "media/1/" + "a" * 32 + ".jpg"
+    detail = UserDetailSchema.from_entity(_user(1, [key, "1_1.jpg"]))
+
+    assert detail.photos == [f"/api/v1/media/{key}", "/api/v1/users/1/photo/1"]
+    assert detail.thumbnails == [f"/api/v1/media/{key}?variant=card", "/api/v1/users/1/photo/1?variant=card"]
+
+
+class FlakyDerivativesStorage:
+    """Исходник и card-производная; HEAD производной падает, пока failing."""
+
+    def __init__(self, key: str):
+        self.files = {key: b"original", variant_key(key, "card", "jpg"): b"card"}
+        self.failing = True
+
+    async def file_exists(self, file_name: str) -> bool:
+        if self.failing:
+            raise RuntimeError("S3 timeout")
+        return file_name in self.files
+
+    async def download_file(self, file_name: str) -> bytes:
+        return self.files[file_name]
+
+
+def test_missing_variant_is_not_cached_as_immutable(app):
+    key = "media/1/" + "a" * 32 + ".jpg"
+    storage = FlakyDerivativesStorage(key)
+    container = Container()
+    container.register(BaseS3Storage, instance=storage)
+    container.register(ImageDerivativesPipeline, instance=ImageDerivativesPipeline(storage=storage, max_workers=0))
+    app.dependency_overrides[init_container] = lambda: container
+    client = TestClient(app)
+
+    response = client.get(f"/api/v1/media/{key}?variant=card")
+    assert response.content == b"original"
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert "etag" not in response.headers
+
+    storage.failing = False
+    response = client.get(f"/api/v1/media/{key}?variant=card")
+    assert response.content == b"card"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["etag"]
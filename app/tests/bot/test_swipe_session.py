@@ -0,0 +1,96 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import (
+    DefaultKeyBuilder,
+    RedisStorage,
+)
+from punq import Container
+
+from app.bot.utils.swipe_session import (
+    UserSession,
+    load_session,
+    save_session,
+)
+from app.logic.services.base import BaseUsersService
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class FeedUsersService:
+    """Лента страницами по два id; анкета 3 удалена после выдачи ленты."""
+
+    def __init__(self, ids: list[int], deleted: frozenset[int] = frozenset({3})):
+        self.ids = ids
+        self.deleted = deleted
+        self.loaded: list[int] = []
+
+    async def get_feed_ids_for_user(self, telegram_id, filters, exclude_ids=None):
+        offset = int(filters.cursor or 0)
+        page = self.ids[offset:offset + 2]
+        next_cursor = str(offset + 2) if offset + 2 < len(self.ids) else None
+        return page, next_cursor
+
+    async def get_user(self, telegram_id: int):
+        if telegram_id in self.deleted:
+            raise LookupError(telegram_id)
+        self.loaded.append(telegram_id)
+        return SimpleNamespace(telegram_id=telegram_id)
+
+
+def _container(service) -> Container:
+    container = Container()
+    container.register(BaseUsersService, instance=service)
+    return container
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+@pytest.fixture
+def state(redis) -> FSMContext:
+    storage = RedisStorage(redis=redis, key_builder=DefaultKeyBuilder(prefix="fsm"))
+    return FSMContext(storage=storage, key=StorageKey(bot_id=1, chat_id=10, user_id=10))
+
+
+@pytest.mark.asyncio
+async def test_session_in_redis_holds_only_cursor_and_id_window(state, redis):
+    await save_session(state, UserSession(ids=[1, 2], use_swipe_card=True, owner_id=10, next_cursor="2"))
+
+    (key,) = await redis.keys("fsm:*:data")
+    stored = json.loads(await redis.get(key))
+    assert stored == {"session": {"ids": [1, 2], "swipe": True, "owner": 10, "cursor": "2"}}
+
+    session = await load_session(state)
+    assert session == UserSession(ids=[1, 2], use_swipe_card=True, owner_id=10, next_cursor="2")
+
+
+@pytest.mark.asyncio
+async def test_cards_are_loaded_one_by_one_across_pages(state):
+    service = FeedUsersService([1, 2, 3, 4, 5])
+    container = _container(service)
+    session = UserSession(ids=[1, 2], use_swipe_card=True, owner_id=10, next_cursor="2")
+
+    shown = []
+    while (user := await session.get_next_user(container)) is not None:
+        shown.append(user.telegram_id)
+        # Каждый свайп — новое чтение сессии из хранилища, как в хендлерах
+        await save_session(state, session)
+        session = await load_session(state)
+
+    assert shown == [1, 2, 4, 5]
+    assert service.loaded == [1, 2, 4, 5]
+    assert not session.has_more_users()
+
+
+@pytest.mark.asyncio
+async def test_missing_or_foreign_state_has_no_session(state):
+    assert await load_session(state) is None
+    await state.update_data(session="legacy")
+    assert await load_session(state) is None
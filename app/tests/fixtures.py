@@ -60,3 +60,28 @@ def init_dummy_container() -> Container:
     )
 
     return container
+
+
+class ListLikesRepository(BaseLikesRepository):
+    """Лайки списком пар (from_user, to_user); страницы — реализация по умолчанию из базового класса."""
+
+    def __init__(self, likes: list[tuple[int, int]]):
+        self.likes = likes
+
+    async def check_like_is_exists(self, from_user: int, to_user: int) -> bool:
+        return (from_user, to_user) in self.likes
+
+    async def create_like(self, like):
+        raise NotImplementedError
+
+    async def delete_like(self, from_user: int, to_user: int):
+        raise NotImplementedError
+
+    async def get_users_ids_liked_from(self, user_id: int) -> list[int]:
+        return [to_user for from_user, to_user in self.likes if from_user == user_id]
+
+    async def get_users_ids_liked_by(self, user_id: int) -> list[int]:
+        return [from_user for from_user, to_user in self.likes if to_user == user_id]
+
+    async def count_likes_today(self, from_user: int) -> int:
+        return 0
@@ -0,0 +1,42 @@
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+from app.domain.entities.users import UserEntity
+from app.domain.values.users import Name
+from app.infra.repositories.memory import _in_broadcast_audience
+
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+
+
+def make_user(telegram_id: int, **kwargs) -> UserEntity:
+    return UserEntity(telegram_id=telegram_id, name=Name("Тест"), **kwargs)
+
+
+def audience(users: list[UserEntity], target: str) -> list[int]:
+    return [user.telegram_id for user in users if _in_broadcast_audience(user, target, NOW)]
+
+
+def test_memory_audience_matches_mongo_filter():
+    users = [
+        make_user(1),
+        make_user(2, premium_type="premium", premium_until=NOW + timedelta(days=3)),
+        # Просроченный VIP — уже без премиума
+        make_user(3, premium_type="vip", premium_until=NOW - timedelta(days=1)),
+        # Наивная дата считается UTC
+        make_user(4, premium_type="vip", premium_until=(NOW + timedelta(days=1)).replace(tzinfo=None)),
+        make_user(5, last_seen=NOW - timedelta(days=2)),
+        make_user(6, last_seen=NOW - timedelta(days=30)),
+    ]
+    banned = make_user(7, last_seen=NOW)
+    banned.is_banned = True
+    users.append(banned)
+
+    assert audience(users, "all") == [1, 2, 3, 4, 5, 6]
+    assert audience(users, "premium") == [2]
+    assert audience(users, "vip") == [4]
+    assert audience(users, "active_7d") == [5]
+    assert audience(users, "no_premium") == [1, 3, 5, 6]
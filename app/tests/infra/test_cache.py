@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from app.infra.cache import TTLCache
+from app.infra.repositories.mongo import MongoDBUserRepository
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl_seconds=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.set("a", 1, ttl_seconds=30)
+    now[0] += 11
+    assert cache.get("c") is None
+    assert cache.expires_in("a") == pytest.approx(19)
+    assert cache.pop("a") == 1
+    assert len(cache) == 0
+
+
+class FakeUsersCollection:
+    def __init__(self, photos: list[str]):
+        self.document = {"telegram_id": 1, "photos": photos}
+        self.reads = 0
+
+    async def find_one(self, filter, projection=None):
+        self.reads += 1
+        return {"photos": list(self.document["photos"])}
+
+    async def update_one(self, filter, update):
+        if "$push" in update:
+            self.document["photos"].append(update["$push"]["photos"])
+        else:
+            self.document.update(update["$set"])
+
+
+@pytest.mark.asyncio
+async def test_photos_are_cached_until_profile_photos_change():
+    collection = FakeUsersCollection(["a.jpg"])
+    repository = MongoDBUserRepository(
+        mongo_db_client={"db": {"users": collection}},
+        mongo_db_name="db",
+        mongo_db_collection_name="users",
+    )
+
+    assert await repository.get_photos(1) == ["a.jpg"]
+    assert await repository.get_photos(1) == ["a.jpg"]
+    assert collection.reads == 1
+
+    assert await repository.add_photo(1, "b.jpg") == ["a.jpg", "b.jpg"]
+    assert await repository.replace_photo(1, 0, "c.jpg") == ["c.jpg", "b.jpg"]
+    assert await repository.get_photos(1) == ["c.jpg", "b.jpg"]
+    assert await repository.remove_photo(1, 1) == ["c.jpg"]
+    assert await repository.get_photos(1) == ["c.jpg"]
@@ -0,0 +1,109 @@
+import pytest
+
+from app.infra.repositories.cities import (
+    _fold_yo,
+    _normalize_city,
+    CITY_ALIASES,
+    CITY_COORDS,
+    get_city_coords,
+    get_city_filter_values,
+    REGION_ALIASES,
+    resolve_to_canonical_city,
+)
+
+
+def _linear_coords(city: str):
+    # Прежняя реализация: линейный обход CITY_COORDS
+    if not city:
+        return None
+    city = _normalize_city(city)
+    if not city:
+        return None
+    city_lower = city.lower()
+    if city_lower in CITY_ALIASES:
+        return CITY_COORDS.get(CITY_ALIASES[city_lower])
+    if city in CITY_COORDS:
+        return CITY_COORDS[city]
+    if city_lower in REGION_ALIASES:
+        return CITY_COORDS.get(REGION_ALIASES[city_lower])
+    for k, v in CITY_COORDS.items():
+        if k.lower() == city_lower:
+            return v
+    if len(city_lower) >= 3:
+        for k, v in CITY_COORDS.items():
+            kl = k.lower()
+            if kl.startswith(city_lower) or city_lower.startswith(kl):
+                return v
+    return None
+
+
+def _linear_canonical(raw: str) -> str:
+    if not raw or not str(raw).strip():
+        return ""
+    s = _normalize_city(str(raw).strip())
+    if not s:
+        return ""
+    s_lower = _fold_yo(s.lower())
+    if s_lower in REGION_ALIASES:
+        return REGION_ALIASES[s_lower]
+    if s_lower in CITY_ALIASES:
+        return CITY_ALIASES[s_lower]
+    if s in CITY_COORDS:
+        return s
+    for k in CITY_COORDS:
+        if _fold_yo(k.lower()) == s_lower:
+            return k
+    if len(s_lower) >= 3:
+        for k in CITY_COORDS:
+            kl = _fold_yo(k.lower())
+            if kl.startswith(s_lower) or s_lower.startswith(kl):
+                return k
+    return s
+
+
+def _linear_filter_values(canon: str) -> set[str]:
+    result: set[str] = set()
+    coords = CITY_COORDS.get(canon)
+    if coords:
+        for key, val in CITY_COORDS.items():
+            if val == coords:
+                result.update((key, key.lower()))
+    for alias, target in CITY_ALIASES.items():
+        if target == canon:
+            result.update((alias, alias.lower()))
+    for reg, target in REGION_ALIASES.items():
+        if target == canon:
+            result.update((reg, reg.lower()))
+    return result
+
+
+def _inputs() -> list[str]:
+    values = {"", "   ", "г.", "Го", "xyz", "Неизвестноград", "г. Москва", "город Казань, РФ"}
+    for key in (*CITY_COORDS, *CITY_ALIASES, *REGION_ALIASES):
+        values.update((key, key.lower(), key.upper(), _fold_yo(key), key.replace("е", "ё")))
+        values.update((f"г. {key}", f" {key} ", f"{key}, ru", f"{key}ский"))
+        # Префиксы любой длины — проверка частичного совпадения
+        for i in range(1, len(key)):
+            values.add(key[:i])
+    return sorted(values)
+
+
+INPUTS = _inputs()
+
+
+def test_get_city_coords_matches_linear_scan():
+    mismatches = [v for v in INPUTS if get_city_coords(v) != _linear_coords(v)]
+    assert mismatches == []
+
+
+def test_resolve_to_canonical_city_matches_linear_scan():
+    mismatches = [v for v in INPUTS if resolve_to_canonical_city(v) != _linear_canonical(v)]
+    assert mismatches == []
+
+
+@pytest.mark.parametrize("city", ["Москва", "moscow", "Питер", "Королёв", "Казань"])
+def test_get_city_filter_values_contains_all_spellings(city):
+    values = set(get_city_filter_values(city))
+    canon = resolve_to_canonical_city(city)
+    assert _linear_filter_values(canon) <= values
+    assert {canon, canon.lower(), canon.upper(), f"г. {canon}"} <= values
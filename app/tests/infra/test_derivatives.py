@@ -0,0 +1,62 @@
+import io
+
+import pytest
+from PIL import Image
+
+from app.infra.s3.derivatives import (
+    ImageDerivativesPipeline,
+    VARIANT_SIZES,
+    variant_key,
+)
+
+
+class FakeStorage:
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.heads = 0
+
+    async def upload_file(self, file: bytes, file_name: str, content_type: str = "image/jpeg") -> str:
+        self.files[file_name] = file
+        return file_name
+
+    async def file_exists(self, file_name: str) -> bool:
+        self.heads += 1
+        return file_name in self.files
+
+
+def _photo(width: int = 3000, height: int = 2000) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 80)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_upload_produces_sized_webp_and_jpeg_variants():
+    storage = FakeStorage()
+    pipeline = ImageDerivativesPipeline(storage=storage, max_workers=0)
+    original = _photo()
+
+    rendered = await pipeline.render(original)
+    assert await pipeline.store("1_0.png", rendered) == len(VARIANT_SIZES) * 2
+
+    for variant, size in VARIANT_SIZES.items():
+        for fmt in ("webp", "jpg"):
+            data = storage.files[variant_key("1_0.png", variant, fmt)]
+            with Image.open(io.BytesIO(data)) as image:
+                assert max(image.size) == size
+    assert len(storage.files["1_0@card.webp"]) * 10 < len(original)
+
+
+@pytest.mark.asyncio
+async def test_pick_falls_back_to_original_without_derivatives():
+    storage = FakeStorage()
+    pipeline = ImageDerivativesPipeline(storage=storage, max_workers=0)
+    await pipeline.store("1_0.jpg", await pipeline.render(_photo(800, 600)))
+
+    assert await pipeline.pick("1_0.jpg", "thumb", "webp") == "1_0@thumb.webp"
+    assert await pipeline.pick("2_0.jpg", "card", "jpg") == "2_0.jpg"
+    assert await pipeline.pick("2_0.jpg", "card", "jpg") == "2_0.jpg"
+    assert storage.heads == 1
+    assert await pipeline.pick("1_1.mp4", "card", "jpg") == "1_1.mp4"
+    assert await pipeline.pick("1_0.jpg", None) == "1_0.jpg"
+    assert await pipeline.render(b"not an image") == {}
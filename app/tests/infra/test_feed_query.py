@@ -0,0 +1,51 @@
+import itertools
+
+from app.infra.repositories.mongo import (
+    _FEED_SORT_FIELDS,
+    _keyset_after_match,
+    _with_location_sync,
+)
+
+
+def _matches(query: dict, doc: dict) -> bool:
+    for branch in query["$or"]:
+        ok = True
+        for field, cond in branch.items():
+            if isinstance(cond, dict):
+                ok = ok and doc[field] > cond["$gt"]
+            else:
+                ok = ok and doc[field] == cond
+        if ok:
+            return True
+    return False
+
+
+def test_keyset_after_match_is_strictly_after_in_sort_order():
+    keys = list(itertools.product([0, 1], [0.0, 12.5], [0, 3], [10, 20]))
+    after = [0, 12.5, 0, 20]
+
+    query = _keyset_after_match(_FEED_SORT_FIELDS, after)
+    selected = [
+        key for key in keys
+        if _matches(query, dict(zip(_FEED_SORT_FIELDS, key)))
+    ]
+
+    assert selected == [key for key in sorted(keys) if key > tuple(after)]
+
+
+def test_location_is_set_together_with_coordinates():
+    update = _with_location_sync({"city": "Казань", "lat": 55.79, "lon": 49.12})
+
+    assert update["$set"]["location"] == {"type": "Point", "coordinates": [49.12, 55.79]}
+    assert "$unset" not in update
+
+
+def test_city_without_coordinates_drops_stale_location():
+    update = _with_location_sync({"city": "Новый Город"})
+
+    assert update["$set"] == {"city": "Новый Город"}
+    assert set(update["$unset"]) == {"lat", "lon", "location"}
+
+
+def test_unrelated_update_keeps_location():
+    assert _with_location_sync({"last_seen": 1}) == {"$set": {"last_seen": 1}}
@@ -0,0 +1,36 @@
+from app.infra.s3.derivatives import variant_key
+from app.infra.s3.keys import (
+    content_hash,
+    content_key,
+    is_content_key,
+    is_storage_key,
+    is_video_key,
+    key_stem,
+    media_etag,
+)
+
+
+def test_content_key_depends_only_on_bytes():
+    key = content_key(42, content_hash(b"photo"), "jpg")
+
+    assert key == content_key(42, content_hash(b"photo"), "jpg")
+    assert key != content_key(42, content_hash(b"other"), "jpg")
+    assert key.startswith("media/42/") and key.endswith(".jpg")
+    assert is_content_key(key) and is_storage_key(key)
+
+
+def test_derivatives_share_stem_with_original():
+    key = content_key(42, content_hash(b"photo"), "png")
+    card = variant_key(key, "card", "webp")
+
+    assert is_content_key(card)
+    assert key_stem(card) == key_stem(key)
+    assert media_etag(card) != media_etag(key)
+
+
+def test_legacy_and_foreign_keys():
+    assert not is_content_key("42_0.jpg") and is_storage_key("42_0.jpg")
+    assert not is_storage_key("https://example.com/a.jpg")
+    assert not is_storage_key("AgACAgIAAxkBAAI")
+    assert not is_content_key("media/42/../secret.jpg")
+    assert is_video_key("media/42/" + "a" * 32 + ".mp4")
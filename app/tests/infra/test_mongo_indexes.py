@@ -0,0 +1,120 @@
+import pytest
+
+from app.infra.mongo_indexes import (
+    IndexSpec,
+    reconcile_indexes,
+)
+
+
+class FakeCollection:
+    def __init__(self, indexes: dict | None = None):
+        self.indexes = {"_id_": {"key": [("_id", 1)], "v": 2}}
+        self.indexes.update(indexes or {})
+        self.created: list[str] = []
+        self.dropped: list[str] = []
+        # Имена индексов, создание которых падает (например, unique на дублях)
+        self.failing: set[str] = set()
+
+    async def index_information(self) -> dict:
+        return dict(self.indexes)
+
+    async def create_index(self, keys, name: str, **options):
+        if name in self.failing:
+            raise RuntimeError("E11000 duplicate key error")
+        self.created.append(name)
+        self.indexes[name] = {"key": [(k, float(d) if isinstance(d, int) else d) for k, d in keys], **options}
+
+    async def drop_index(self, name: str):
+        self.dropped.append(name)
+        self.indexes.pop(name)
+
+
+class FakeClient:
+    def __init__(self, collections: dict[str, FakeCollection]):
+        self.collections = collections
+
+    def __getitem__(self, db_name: str):
+        return self.collections
+
+
+REGISTRY = {
+    "likes": [
+        IndexSpec("from_user_to_user_unique", (("from_user", 1), ("to_user", 1)), unique=True),
+        IndexSpec("to_user_created_at", (("to_user", 1), ("created_at", -1))),
+    ],
+    "geocode_cache": [
+        IndexSpec("expires_at_ttl", (("expires_at", 1),), expire_after_seconds=0),
+    ],
+}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_creates_missing_and_is_idempotent():
+    collections = {"likes": FakeCollection(), "geocode_cache": FakeCollection()}
+    client = FakeClient(collections)
+
+    first = await reconcile_indexes(client, "dating", REGISTRY)
+    second = await reconcile_indexes(client, "dating", REGISTRY)
+
+    assert sorted(first.created) == [
+        "geocode_cache.expires_at_ttl",
+        "likes.from_user_to_user_unique",
+        "likes.to_user_created_at",
+    ]
+    assert not second.has_changes
+    assert len(second.unchanged) == 3
+    assert collections["geocode_cache"].indexes["expires_at_ttl"]["expireAfterSeconds"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_rebuilds_changed_options_and_reports_extra():
+    likes = FakeCollection({
+        # те же ключи, но без unique и под другим именем
+        "from_user_1_to_user_1": {"key": [("from_user", 1.0), ("to_user", 1.0)]},
+        "legacy_idx": {"key": [("is_match", 1.0)]},
+    })
+    client = FakeClient({"likes": likes, "geocode_cache": FakeCollection()})
+
+    report = await reconcile_indexes(client, "dating", REGISTRY, rebuild=True)
+
+    assert report.rebuilt == ["likes.from_user_to_user_unique"]
+    assert likes.dropped == ["from_user_1_to_user_1"]
+    assert likes.indexes["from_user_to_user_unique"]["unique"] is True
+    assert report.extra == ["likes.legacy_idx"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_dry_run_changes_nothing():
+    likes = FakeCollection()
+    client = FakeClient({"likes": likes, "geocode_cache": FakeCollection()})
+
+    report = await reconcile_indexes(client, "dating", REGISTRY, dry_run=True)
+
+    assert len(report.created) == 3
+    assert likes.created == []
+
+
+@pytest.mark.asyncio
+async def test_reconcile_without_rebuild_only_reports_changed_options():
+    likes = FakeCollection({"from_user_1_to_user_1": {"key": [("from_user", 1.0), ("to_user", 1.0)]}})
+    client = FakeClient({"likes": likes, "geocode_cache": FakeCollection()})
+
+    report = await reconcile_indexes(client, "dating", REGISTRY)
+
+    assert report.mismatched == ["likes.from_user_to_user_unique"]
+    assert report.rebuilt == []
+    assert likes.dropped == []
+    assert "from_user_1_to_user_1" in likes.indexes
+
+
+@pytest.mark.asyncio
+async def test_failed_rebuild_restores_previous_index():
+    likes = FakeCollection({"from_user_1_to_user_1": {"key": [("from_user", 1.0), ("to_user", 1.0)]}})
+    likes.failing.add("from_user_to_user_unique")
+    client = FakeClient({"likes": likes, "geocode_cache": FakeCollection()})
+
+    report = await reconcile_indexes(client, "dating", REGISTRY, rebuild=True)
+
+    assert "duplicate key" in report.failed["likes.from_user_to_user_unique"]
+    assert likes.indexes["from_user_1_to_user_1"]["key"] == [("from_user", 1.0), ("to_user", 1.0)]
+    assert "from_user_to_user_unique" not in likes.indexes
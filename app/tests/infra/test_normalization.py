@@ -0,0 +1,62 @@
+import pytest
+
+from app.domain.values.users import (
+    City,
+    Gender,
+)
+from app.infra.repositories.normalization import (
+    normalize_city,
+    normalize_gender,
+    opposite_gender,
+    with_normalized_fields,
+)
+
+
+@pytest.mark.parametrize(
+    "raw,expected",
+    [
+        ("Man", "male"),
+        (" мужской ", "male"),
+        ("m", "male"),
+        ("Женский", "female"),
+        ("woman", "female"),
+        ("девушка", "female"),
+        ("", None),
+        ("другое", None),
+        (None, None),
+    ],
+)
+def test_normalize_gender(raw, expected):
+    assert normalize_gender(raw) == expected
+
+
+def test_opposite_gender():
+    assert opposite_gender("male") == "female"
+    assert opposite_gender("female") == "male"
+    assert opposite_gender(None) is None
+
+
+def test_normalize_city_folds_spellings_to_one_key():
+    key = normalize_city("Москва")
+
+    assert key == "москва"
+    assert normalize_city("г. Москва") == key
+    assert normalize_city("МОСКВА") == key
+    assert normalize_city("Королёв") == normalize_city("королев")
+    assert normalize_city("Неизвестноград") == "неизвестноград"
+    assert normalize_city("") == ""
+
+
+def test_normalize_accepts_value_objects():
+    assert normalize_gender(Gender("Female")) == "female"
+    assert normalize_city(City("Казань")) == "казань"
+
+
+def test_with_normalized_fields_only_touches_present_fields():
+    assert with_normalized_fields({"about": "hi"}) == {"about": "hi"}
+    assert with_normalized_fields({"gender": "Man", "city": "Питер"}) == {
+        "gender": "Man",
+        "gender_norm": "male",
+        "city": "Питер",
+        "city_canonical": "санкт-петербург",
+    }
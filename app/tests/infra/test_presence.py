@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from app.infra.presence import MemoryPresenceTracker
+from app.logic.workers.presence import PresenceFlushWorker
+
+
+class FakeUsersRepository:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches: list[dict] = []
+
+    async def update_last_seen_many(self, last_seen: dict) -> int:
+        if self.fail:
+            raise RuntimeError("mongo is down")
+        self.batches.append(last_seen)
+        return len(last_seen)
+
+
+@pytest.mark.asyncio
+async def test_pings_are_counted_from_memory():
+    tracker = MemoryPresenceTracker()
+    now = time.time()
+    await tracker.touch(1, now)
+    await tracker.touch(2, now - 600)
+    await tracker.touch(3, now - 4000)
+
+    assert await tracker.count_online(300) == 1
+    assert await tracker.count_online(3600) == 2
+    assert await tracker.is_online(1)
+    assert not await tracker.is_online(2)
+    assert not await tracker.is_online(42)
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_one_batch_per_interval():
+    tracker = MemoryPresenceTracker()
+    users = FakeUsersRepository()
+    worker = PresenceFlushWorker(presence_tracker=tracker, users_repository=users)
+    for _ in range(3):
+        await tracker.touch(1)
+    await tracker.touch(2)
+
+    assert await worker.flush() == 2
+    assert await worker.flush() == 0
+    assert len(users.batches) == 1
+    assert set(users.batches[0]) == {1, 2}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_pings_for_next_pass():
+    tracker = MemoryPresenceTracker()
+    worker = PresenceFlushWorker(presence_tracker=tracker, users_repository=FakeUsersRepository(fail=True))
+    await tracker.touch(1)
+
+    with pytest.raises(RuntimeError):
+        await worker.flush()
+
+    worker.users_repository = FakeUsersRepository()
+    assert await worker.flush() == 1
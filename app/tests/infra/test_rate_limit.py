@@ -0,0 +1,34 @@
+import pytest
+
+from app.infra.rate_limit import (
+    TelegramRateLimiter,
+    TokenBucket,
+)
+
+
+def test_bucket_allows_burst_then_refills_at_rate():
+    bucket = TokenBucket(rate=2.0, capacity=3.0)
+
+    for _ in range(3):
+        assert bucket.wait_time(now=100.0) == 0
+        bucket.take()
+    assert bucket.wait_time(now=100.0) == pytest.approx(0.5)
+    assert bucket.wait_time(now=100.5) == 0
+
+
+def test_pause_blocks_until_retry_after():
+    bucket = TokenBucket(rate=10.0, capacity=10.0)
+    bucket.pause(7.0, now=100.0)
+
+    assert bucket.wait_time(now=101.0) == pytest.approx(6.0)
+    assert bucket.wait_time(now=107.0) == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_spaces_messages_to_one_chat_only():
+    limiter = TelegramRateLimiter(global_rate=1000.0, chat_rate=1.0, chat_burst=1.0)
+
+    for chat_id in range(50):
+        await limiter.acquire(chat_id)
+    assert limiter._chat(0).wait_time() > 0
+    assert limiter._chat(50).wait_time() == 0
@@ -0,0 +1,107 @@
+import pytest
+
+from app.infra.s3.base import UploadTooLargeError
+from app.infra.s3.storage import (
+    MULTIPART_PART_SIZE,
+    S3Storage,
+)
+
+
+def _storage() -> S3Storage:
+    return S3Storage(
+        aws_access_key_id="key",
+        aws_secret_access_key="secret",
+        bucket_name="bucket",
+        region_name="us-east-005",
+        endpoint_url="https://s3.example.com",
+        max_pool_connections=7,
+    )
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_across_calls_and_closed_on_shutdown():
+    storage = _storage()
+    client = await storage.open()
+    try:
+        assert client._client_config.max_pool_connections == 7
+        async with storage.get_client() as first:
+            pass
+        async with storage.get_client() as second:
+            pass
+        assert first is second is client
+
+        url = await storage.get_presigned_url("photos/1.jpg")
+        assert "photos/1.jpg" in url
+        assert await storage.open() is client
+    finally:
+        await storage.close()
+
+    reopened = await storage.open()
+    assert reopened is not client
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_presigned_urls_are_cached_with_remaining_lifetime():
+    storage = _storage()
+    try:
+        url, max_age = await storage.get_presigned_url_cached("photos/1.jpg", expires=3600)
+        again, cached_max_age = await storage.get_presigned_url_cached("photos/1.jpg", expires=3600)
+
+        assert again == url
+        assert 0 < cached_max_age <= max_age < 3600
+        assert await storage.get_presigned_url("photos/2.jpg") != url
+    finally:
+        await storage.close()
+
+
+class FakeMultipartClient:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.parts: list[int] = []
+
+    async def put_object(self, **kwargs):
+        self.calls.append("put_object")
+
+    async def create_multipart_upload(self, **kwargs):
+        self.calls.append("create")
+        return {"UploadId": "u1"}
+
+    async def upload_part(self, Body, PartNumber, **kwargs):
+        self.parts.append(len(Body))
+        return {"ETag": f"e{PartNumber}"}
+
+    async def complete_multipart_upload(self, MultipartUpload, **kwargs):
+        self.calls.append(f"complete:{len(MultipartUpload['Parts'])}")
+
+    async def abort_multipart_upload(self, **kwargs):
+        self.calls.append("abort")
+
+
+async def _chunks(total: int, size: int = 1024 * 1024):
+    for start in range(0, total, size):
+        yield b"x" * min(size, total - start)
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_sends_bounded_parts():
+    storage = _storage()
+    storage._client = client = FakeMultipartClient()
+
+    assert await storage.upload_stream(_chunks(20 * 1024 * 1024), "1_0.mp4", "video/mp4") == 20 * 1024 * 1024
+    assert client.parts == [MULTIPART_PART_SIZE, MULTIPART_PART_SIZE, 20 * 1024 * 1024 - 2 * MULTIPART_PART_SIZE]
+    assert client.calls == ["create", "complete:3"]
+
+    client.calls.clear()
+    await storage.upload_stream(_chunks(1024), "1_1.jpg", "image/jpeg")
+    assert client.calls == ["put_object"]
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_aborts_over_limit():
+    storage = _storage()
+    storage._client = client = FakeMultipartClient()
+
+    with pytest.raises(UploadTooLargeError):
+        await storage.upload_stream(_chunks(30 * 1024 * 1024), "1_0.mp4", max_bytes=12 * 1024 * 1024)
+    assert client.calls == ["create", "abort"]
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from app.infra.repositories.seen import (
+    SEEN_DISLIKED,
+    SEEN_LIKED,
+    SeenProfiles,
+    SortedIdSet,
+)
+
+
+def test_sorted_id_set_membership_and_updates():
+    ids = SortedIdSet([30, 10, 20, 10])
+
+    assert list(ids) == [10, 20, 30]
+    assert 20 in ids
+    assert 25 not in ids
+
+    assert ids.add(25) is True
+    assert ids.add(25) is False
+    assert ids.discard(10) is True
+    assert ids.discard(10) is False
+    assert list(ids) == [20, 25, 30]
+
+
+def test_sorted_id_set_blob_round_trip():
+    rng = random.Random(7)
+    values = {rng.randint(1, 8_000_000_000) for _ in range(5000)}
+    ids = SortedIdSet(values)
+
+    blob = ids.to_bytes()
+    restored = SortedIdSet.from_bytes(blob)
+
+    assert list(restored) == sorted(values)
+    # Упакованные дельты заметно меньше «сырых» 8 байт на id
+    assert len(blob) < len(values) * 8
+
+
+@pytest.mark.parametrize("blob", [None, b""])
+def test_sorted_id_set_empty_blob(blob):
+    assert len(SortedIdSet.from_bytes(blob)) == 0
+    assert SortedIdSet().to_bytes() == b""
+
+
+def test_seen_profiles_checks_both_kinds():
+    seen = SeenProfiles(liked=SortedIdSet([1, 2]), disliked=SortedIdSet([3]))
+
+    assert 1 in seen and 3 in seen
+    assert 4 not in seen
+    assert seen.get(SEEN_LIKED) is seen.liked
+    assert seen.get(SEEN_DISLIKED) is seen.disliked
+    with pytest.raises(ValueError):
+        seen.get("unknown")
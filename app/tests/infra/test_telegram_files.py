@@ -0,0 +1,76 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.infra.s3.keys import (
+    content_hash,
+    content_key,
+)
+from app.infra.telegram_files import MemoryTelegramFileCache
+
+
+KEY = content_key(7, content_hash(b"photo"), "jpg")
+
+
+class FakeSend:
+    def __init__(self):
+        self.photos: list = []
+
+    async def __call__(self, photo, **kwargs):
+        self.photos.append(photo)
+        file_id = photo if isinstance(photo, str) else f"file-{len(self.photos)}"
+        return SimpleNamespace(photo=[SimpleNamespace(file_id="small"), SimpleNamespace(file_id=file_id)])
+
+
+@pytest.fixture
+def notificator(monkeypatch):
+    from app.bot.utils import notificator
+
+    cache = MemoryTelegramFileCache()
+    downloads: list[str] = []
+
+    async def resolve(photo, user_id=None):
+        if not notificator._is_s3_key(photo):
+            return photo
+        downloads.append(photo)
+        return b"jpeg-bytes"
+
+    monkeypatch.setattr(notificator, "_file_cache", lambda: cache)
+    monkeypatch.setattr(notificator, "_resolve_photo", resolve)
+    return SimpleNamespace(module=notificator, cache=cache, downloads=downloads)
+
+
+@pytest.mark.asyncio
+async def test_photo_is_uploaded_once_then_sent_by_file_id(notificator):
+    send = FakeSend()
+
+    await notificator.module.send_cached_photo(send, KEY, caption="a")
+    await notificator.module.send_cached_photo(send, KEY, caption="b")
+
+    assert notificator.downloads == [KEY]
+    assert send.photos[1] == "file-1"
+    assert await notificator.cache.get(KEY) == "file-1"
+
+
+@pytest.mark.asyncio
+async def test_photo_change_forgets_owner_file_ids(notificator):
+    await notificator.cache.set(KEY, "file-1")
+    await notificator.cache.set("8_0.jpg", "file-2")
+
+    assert not notificator.cache.notify_profile_changed(7, ("about",))
+    assert notificator.cache.notify_profile_changed(7, ("photos",))
+    await asyncio.sleep(0)
+
+    assert await notificator.cache.get(KEY) is None
+    assert await notificator.cache.get("8_0.jpg") == "file-2"
+
+
+@pytest.mark.asyncio
+async def test_telegram_file_ids_are_sent_as_is(notificator):
+    send = FakeSend()
+
+    await notificator.module.send_cached_photo(send, "AgACAgIAAxkBAAI", caption="a")
+
+    assert send.photos == ["AgACAgIAAxkBAAI"]
+    assert notificator.downloads == []
@@ -0,0 +1,121 @@
+import pytest
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from aiogram.methods import SendMessage
+
+from app.infra.rate_limit import TelegramRateLimiter
+from app.infra.repositories.broadcasts import (
+    BROADCAST_DONE,
+    BROADCAST_PAUSED,
+    BROADCAST_RUNNING,
+    RECIPIENT_BLOCKED,
+    RECIPIENT_PENDING,
+    RECIPIENT_SENT,
+    BroadcastJob,
+)
+from app.infra.repositories.memory import MemoryBroadcastsRepository
+from app.logic.workers.broadcasts import BroadcastWorker
+
+
+class AudienceRepository:
+    """Аудитория рассылки — отсортированный список telegram_id."""
+
+    def __init__(self, ids: list[int]):
+        self.ids = sorted(ids)
+        self.pages: list[int | None] = []
+
+    async def get_broadcast_audience(self, target: str, after: int | None, limit: int) -> list[int]:
+        self.pages.append(after)
+        return [i for i in self.ids if after is None or i > after][:limit]
+
+
+class FakeTelegram:
+    def __init__(self, errors: dict[int, list[Exception]] | None = None):
+        self.errors = errors or {}
+        self.uploads = 0
+        self.delivered: list[int] = []
+
+    async def __call__(self, job: BroadcastJob, chat_id: int) -> str | None:
+        queue = self.errors.get(chat_id)
+        if queue:
+            raise queue.pop(0)
+        self.delivered.append(chat_id)
+        if job.photo and not job.photo_file_id:
+            self.uploads += 1
+            return "file-id"
+        return job.photo_file_id
+
+
+def _worker(broadcasts, audience, telegram, batch_size=3) -> BroadcastWorker:
+    return BroadcastWorker(
+        broadcasts=broadcasts,
+        users_repository=audience,
+        send=telegram,
+        limiter=TelegramRateLimiter(global_rate=1000.0, chat_rate=1000.0),
+        batch_size=batch_size,
+    )
+
+
+async def _drain(worker: BroadcastWorker, steps: int = 20) -> None:
+    for _ in range(steps):
+        await worker.process_once()
+
+
+@pytest.mark.asyncio
+async def test_broadcast_goes_in_batches_and_uploads_photo_once():
+    broadcasts = MemoryBroadcastsRepository()
+    audience = AudienceRepository(list(range(1, 8)))
+    telegram = FakeTelegram()
+    job = await broadcasts.create(BroadcastJob(text="hi", photo="https://example.com/a.jpg", total=7))
+
+    await _drain(_worker(broadcasts, audience, telegram))
+
+    stored = await broadcasts.get(job.id)
+    assert stored.status == BROADCAST_DONE
+    assert (stored.sent, stored.processed) == (7, 7)
+    assert sorted(telegram.delivered) == list(range(1, 8))
+    assert telegram.uploads == 1 and stored.photo_file_id == "file-id"
+    # Курсор по telegram_id: каждая пачка продолжает с последнего id
+    assert audience.pages == [None, 3, 6, 7]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_recipient_is_retried_and_blocked_is_recorded():
+    method = SendMessage(chat_id=1, text="x")
+    broadcasts = MemoryBroadcastsRepository()
+    telegram = FakeTelegram({
+        1: [TelegramRetryAfter(method, "Too Many Requests", retry_after=0)],
+        2: [TelegramForbiddenError(method, "bot was blocked by the user")],
+    })
+    job = await broadcasts.create(BroadcastJob(text="hi"))
+
+    await _drain(_worker(broadcasts, AudienceRepository([1, 2, 3]), telegram))
+
+    stored = await broadcasts.get(job.id)
+    assert (stored.sent, stored.blocked, stored.failed) == (2, 1, 0)
+    assert broadcasts.recipients[job.id] == {1: RECIPIENT_SENT, 2: RECIPIENT_BLOCKED, 3: RECIPIENT_SENT}
+
+
+@pytest.mark.asyncio
+async def test_paused_broadcast_resumes_from_pending_recipients():
+    broadcasts = MemoryBroadcastsRepository()
+    audience = AudienceRepository(list(range(1, 7)))
+    telegram = FakeTelegram()
+    job = await broadcasts.create(BroadcastJob(text="hi"))
+    # Процесс упал после переноса пачки: получатели pending, курсор сдвинут
+    await broadcasts.add_recipients(job.id, [1, 2, 3], cursor=3)
+    assert await broadcasts.set_status(job.id, BROADCAST_PAUSED, (BROADCAST_RUNNING,))
+    worker = _worker(broadcasts, audience, telegram)
+
+    await _drain(worker)
+    assert telegram.delivered == []
+    assert set(broadcasts.recipients[job.id].values()) == {RECIPIENT_PENDING}
+
+    assert await broadcasts.set_status(job.id, BROADCAST_RUNNING, (BROADCAST_PAUSED,))
+    await _drain(worker)
+
+    assert sorted(telegram.delivered) == list(range(1, 7))
+    assert audience.pages == [3, 6]
+    assert (await broadcasts.get(job.id)).status == BROADCAST_DONE
@@ -0,0 +1,23 @@
+import pytest
+
+from app.logic.cursors import (
+    decode_cursor,
+    encode_cursor,
+)
+from app.logic.exceptions.pagination import InvalidCursorException
+
+
+def test_cursor_roundtrip():
+    key = [0, 12.345678901234, 2, 987654321]
+
+    cursor = encode_cursor(key)
+
+    assert isinstance(cursor, str)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "@@@", "e30"[:2]])
+def test_cursor_invalid(cursor: str):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor)
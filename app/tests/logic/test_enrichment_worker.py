@@ -0,0 +1,75 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.logic.ai_matchmaking import profile_enrichment
+from app.logic.workers.enrichment import ProfileEnrichmentWorker
+
+
+class FakeUsersRepository:
+    def __init__(self):
+        self.users = {1: SimpleNamespace(telegram_id=1, name="Аня", age=25, city="Москва", about="Люблю горы")}
+        self.saved: dict[int, dict] = {}
+
+    async def get_user_by_telegram_id(self, telegram_id: int):
+        return self.users.get(telegram_id)
+
+    async def update_user_ai_fields(self, telegram_id: int, ai_fields: dict) -> None:
+        self.saved[telegram_id] = ai_fields
+        self.users[telegram_id].ai_profile_hash = ai_fields.get("ai_profile_hash")
+
+
+@pytest.fixture()
+def openai_calls(monkeypatch) -> list[int]:
+    calls: list[int] = []
+
+    async def fake_enrich(user, api_key):
+        calls.append(user.telegram_id)
+        return {"search_text": "", "ai_profile_hash": profile_enrichment.profile_content_hash(user)}
+
+    monkeypatch.setattr(profile_enrichment, "enrich_profile_for_ai", fake_enrich)
+    return calls
+
+
+def _worker(repository, api_key="sk-test") -> ProfileEnrichmentWorker:
+    return ProfileEnrichmentWorker(users_repository=repository, openai_api_key=api_key, debounce_seconds=30)
+
+
+def test_only_profile_text_fields_schedule_enrichment():
+    worker = _worker(FakeUsersRepository())
+
+    assert not worker.notify_profile_changed(1, ["last_seen"])
+    assert not worker.notify_profile_changed(1, ["swipe_credits", "premium_until"])
+    assert worker.notify_profile_changed(1, ["about"])
+    assert not _worker(FakeUsersRepository(), api_key="").notify_profile_changed(1, ["about"])
+
+
+@pytest.mark.asyncio
+async def test_edits_are_debounced_and_deduplicated(openai_calls):
+    repository = FakeUsersRepository()
+    worker = _worker(repository)
+
+    worker.notify_profile_changed(1, ["name"])
+    worker.notify_profile_changed(1, ["age", "city"])
+    worker.notify_profile_changed(1, ["about"])
+
+    assert await worker.process_once() == 0
+    assert await worker.process_once(now=time.monotonic() + 31) == 1
+    assert openai_calls == [1]
+    assert await worker.process_once(now=time.monotonic() + 62) == 0
+
+
+@pytest.mark.asyncio
+async def test_unchanged_profile_text_skips_openai(openai_calls):
+    repository = FakeUsersRepository()
+    worker = _worker(repository)
+    await worker.enrich(1)
+
+    worker.notify_profile_changed(1, ["city"])
+    assert await worker.process_once(now=time.monotonic() + 31) == 0
+
+    repository.users[1].about = "Люблю море"
+    worker.notify_profile_changed(1, ["about"])
+    assert await worker.process_once(now=time.monotonic() + 31) == 1
+    assert openai_calls == [1, 1]
@@ -0,0 +1,171 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.infra.repositories.feed_queue import FeedQueueSlice
+from app.infra.repositories.filters.users import GetFeedFilters
+from app.logic.services.users import UsersService
+from app.logic.workers.recommendations import FeedQueueWorker
+
+
+class FakeUsersRepository:
+    """Лента — фиксированный порядок ranking, позиция {"p": "all", "k": индекс}."""
+
+    def __init__(self, ranking: list[int]):
+        self.ranking = ranking
+        self.rank_calls = 0
+        # Забаненные, скрытые или неактивные анкеты
+        self.ineligible: set[int] = set()
+
+    async def get_user_by_telegram_id(self, telegram_id: int):
+        return SimpleNamespace(telegram_id=telegram_id, gender="Man", city="Москва")
+
+    async def rank_feed(self, telegram_id, exclude_ids=None, limit=20, after=None, seen=None):
+        self.rank_calls += 1
+        start = (after or {}).get("k", -1) + 1
+        excluded = set(exclude_ids or [])
+        ids, index = [], start
+        for index in range(start, len(self.ranking)):
+            candidate = self.ranking[index]
+            if candidate in excluded or (seen is not None and candidate in seen):
+                continue
+            ids.append(candidate)
+            if len(ids) == limit:
+                break
+        has_more = ids and index < len(self.ranking) - 1
+        return ids, ({"p": "all", "k": index} if has_more else None)
+
+    async def get_users_in_order(self, telegram_ids):
+        return [SimpleNamespace(telegram_id=telegram_id) for telegram_id in telegram_ids]
+
+    async def get_feed_eligible_ids(self, telegram_ids):
+        return set(telegram_ids) - self.ineligible
+
+
+class FakeFeedQueueRepository:
+    def __init__(self):
+        self.queues: dict[int, dict] = {}
+        self.stale: list[tuple] = []
+
+    async def get_slice(self, owner_id, offset, count):
+        queue = self.queues.get(owner_id)
+        if queue is None:
+            return None
+        return FeedQueueSlice(
+            ids=queue["ids"][offset:offset + count],
+            generation=queue["g"],
+            total=len(queue["ids"]),
+            tail=queue["tail"],
+        )
+
+    async def save_queue(self, owner_id, ids, tail, target_gender, city_key):
+        generation = self.queues.get(owner_id, {}).get("g", 0) + 1
+        self.queues[owner_id] = {"ids": ids, "tail": tail, "g": generation, "target": target_gender}
+
+    async def mark_stale(self, candidate_id, gender, city_key):
+        self.stale.append((candidate_id, gender, city_key))
+        return 0
+
+    async def touch(self, owner_id):
+        pass
+
+    async def get_owner_ids_to_refresh(self, built_before, served_after, limit):
+        return []
+
+
+async def _read_feed(service: UsersService, owner_id: int, limit: int) -> list[int]:
+    seen_ids, cursor = [], None
+    while True:
+        users, cursor = await service.get_best_result_for_user(
+            owner_id, filters=GetFeedFilters(limit=limit, cursor=cursor),
+        )
+        seen_ids += [user.telegram_id for user in users]
+        if cursor is None:
+            return seen_ids
+
+
+@pytest.mark.asyncio
+async def test_feed_without_queue_falls_back_and_requests_build():
+    users_repository = FakeUsersRepository(ranking=[10, 11, 12])
+    requested: list[int] = []
+    service = UsersService(
+        user_repository=users_repository,
+        feed_queue_repository=FakeFeedQueueRepository(),
+        on_feed_queue_miss=requested.append,
+    )
+
+    assert await _read_feed(service, owner_id=1, limit=2) == [10, 11, 12]
+    assert requested == [1]
+
+
+@pytest.mark.asyncio
+async def test_feed_reads_queue_then_continues_from_tail():
+    users_repository = FakeUsersRepository(ranking=list(range(100, 110)))
+    queues = FakeFeedQueueRepository()
+    worker = FeedQueueWorker(
+        users_repository=users_repository,
+        feed_queue_repository=queues,
+        queue_size=4,
+    )
+    await worker.rebuild(1)
+    users_repository.rank_calls = 0
+    service = UsersService(user_repository=users_repository, feed_queue_repository=queues)
+
+    assert await _read_feed(service, owner_id=1, limit=3) == list(range(100, 110))
+    # Первая страница целиком из очереди, ранжирование по запросу — только после неё
+    assert queues.queues[1]["target"] == "female"
+    assert users_repository.rank_calls == 3
+
+
+@pytest.mark.asyncio
+async def test_feed_restarts_rebuilt_queue_without_repeating_seen():
+    users_repository = FakeUsersRepository(ranking=[1, 2, 3, 4])
+    queues = FakeFeedQueueRepository()
+    await queues.save_queue(7, [1, 2, 3, 4], None, "female", "москва")
+    service = UsersService(user_repository=users_repository, feed_queue_repository=queues)
+
+    users, cursor = await service.get_best_result_for_user(7, filters=GetFeedFilters(limit=2))
+    assert [user.telegram_id for user in users] == [1, 2]
+
+    # Пересборка между страницами: новая очередь читается сначала, просмотренные отсеиваются
+    await queues.save_queue(7, [2, 1, 5, 3], None, "female", "москва")
+    service.seen_repository = SimpleNamespace(get_seen=_async_return({1, 2}))
+    users, cursor = await service.get_best_result_for_user(7, filters=GetFeedFilters(limit=2, cursor=cursor))
+
+    assert [user.telegram_id for user in users] == [5, 3]
+    assert cursor is None
+
+
+@pytest.mark.asyncio
+async def test_feed_skips_queued_profiles_banned_after_build():
+    users_repository = FakeUsersRepository(ranking=[])
+    queues = FakeFeedQueueRepository()
+    await queues.save_queue(7, [1, 2, 3, 4], None, "female", "москва")
+    service = UsersService(user_repository=users_repository, feed_queue_repository=queues)
+
+    # Анкету 2 забанили, 3 скрыли уже после сборки очереди
+    users_repository.ineligible = {2, 3}
+
+    assert await _read_feed(service, owner_id=7, limit=2) == [1, 4]
+
+
+def _async_return(value):
+    async def _call(*args, **kwargs):
+        return value
+    return _call
+
+
+@pytest.mark.asyncio
+async def test_worker_invalidates_only_on_ranking_fields():
+    queues = FakeFeedQueueRepository()
+    worker = FeedQueueWorker(
+        users_repository=FakeUsersRepository(ranking=[]),
+        feed_queue_repository=queues,
+    )
+
+    assert worker.notify_profile_changed(5, ["about"]) is False
+    assert worker.notify_profile_changed(5, ["boost_until"]) is True
+
+    assert await worker.process_once() == 1
+    assert queues.stale == [(5, "male", "москва")]
+    assert 5 in queues.queues
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from app.infra.geocoding.base import (
+    BaseGeocoder,
+    GeocodingResult,
+)
+from app.logic.workers.geocoding import GeocodingWorker
+
+
+class FakeGeocoder(BaseGeocoder):
+    def __init__(self, known: dict[str, tuple[float, float]]):
+        self.known = known
+        self.calls: list[str] = []
+
+    async def geocode(self, query: str) -> GeocodingResult | None:
+        self.calls.append(query)
+        coords = self.known.get(query)
+        if coords is None:
+            return None
+        return GeocodingResult(
+            lat=coords[0],
+            lon=coords[1],
+            city_name=query,
+            region_name="",
+            country_name="",
+            display_name=query,
+        )
+
+    async def reverse_geocode(self, lat: float, lon: float) -> GeocodingResult | None:
+        return None
+
+
+class FakeUsersRepository:
+    def __init__(self):
+        self.saved: dict[str, tuple[float, float]] = {}
+
+    async def set_city_coordinates(self, city: str, lat: float, lon: float) -> int:
+        self.saved[city] = (lat, lon)
+        return 1
+
+
+def test_enqueue_deduplicates_pending_cities():
+    worker = GeocodingWorker(geocoder=FakeGeocoder({}), users_repository=FakeUsersRepository())
+
+    assert worker.enqueue("Урюпинск") is True
+    assert worker.enqueue(" урюпинск ") is False
+    assert worker.enqueue("") is False
+    assert worker.queue_size == 1
+
+
+@pytest.mark.asyncio
+async def test_worker_persists_resolved_coordinates():
+    geocoder = FakeGeocoder({"Урюпинск": (50.8, 42.0)})
+    repository = FakeUsersRepository()
+    worker = GeocodingWorker(geocoder=geocoder, users_repository=repository)
+
+    worker.enqueue("Урюпинск")
+    worker.enqueue("Нигдеград")
+    await worker.start()
+    await asyncio.wait_for(worker._queue.join(), timeout=1)
+    await worker.stop()
+
+    assert repository.saved == {"Урюпинск": (50.8, 42.0)}
+    # Неудачный город не переспрашиваем до истечения retry_after_seconds
+    assert worker.enqueue("Нигдеград") is False
+    assert worker.enqueue("Урюпинск") is True
@@ -0,0 +1,240 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.infra.repositories.daily_likes import (
+    LIKE_SLOT_CREDIT,
+    LIKE_SLOT_FREE,
+    likes_day,
+    likes_used_today,
+)
+from app.logic.services.likes import LikesService
+from app.logic.use_cases.like_action import LikeActionUseCase
+from app.tests.fixtures import ListLikesRepository
+
+
+class AppendLikesRepository(ListLikesRepository):
+    """Лайки списком пар; add_like — реализация по умолчанию из базового класса."""
+
+    async def create_like(self, like):
+        self.likes.append((like.from_user.as_generic_type(), like.to_user.as_generic_type()))
+        return like
+
+
+class CountingLikesService:
+    """Считает обращения use-case'а к хранилищу лайков."""
+
+    def __init__(self, service: LikesService):
+        self.service = service
+        self.calls: list[str] = []
+
+    async def like(self, from_user_id: int, to_user_id: int):
+        self.calls.append("like")
+        return await self.service.like(from_user_id, to_user_id)
+
+
+class FakeUsersService:
+    """Одна анкета-отправитель; дневной счётчик и кредиты — в self.fields."""
+
+    def __init__(self, **fields):
+        self.fields = {"likes_today": 0, "likes_day": likes_day(), "swipe_credits": 0, **fields}
+        self.calls: list[str] = []
+        self.consumed: list[str] = []
+
+    async def get_user(self, telegram_id: int):
+        self.calls.append("get_user")
+        return SimpleNamespace(telegram_id=telegram_id, **self.fields)
+
+    async def consume_credit(self, telegram_id: int, field: str) -> bool:
+        self.calls.append("consume_credit")
+        if self.fields.get(field, 0) <= 0:
+            return False
+        self.fields[field] -= 1
+        self.consumed.append(field)
+        return True
+
+    async def refund_credit(self, telegram_id: int, field: str) -> None:
+        self.calls.append("refund_credit")
+        self.fields[field] += 1
+        self.consumed.remove(field)
+
+    async def reserve_daily_like(self, telegram_id: int, day: str, limit: int | None = None):
+        self.calls.append("reserve_daily_like")
+        used = likes_used_today(SimpleNamespace(**self.fields), day)
+        slot = LIKE_SLOT_FREE
+        if limit is not None and used >= limit:
+            if self.fields["swipe_credits"] <= 0:
+                return None
+            self.fields["swipe_credits"] -= 1
+            self.consumed.append("swipe_credits")
+            slot = LIKE_SLOT_CREDIT
+        self.fields.update(likes_day=day, likes_today=used + 1)
+        return slot
+
+    async def release_daily_like(self, telegram_id: int, day: str, slot: str) -> None:
+        self.calls.append("release_daily_like")
+        self.fields["likes_today"] -= 1
+        if slot == LIKE_SLOT_CREDIT:
+            self.fields["swipe_credits"] += 1
+            self.consumed.remove("swipe_credits")
+
+
+@pytest.fixture(autouse=True)
+def _silent_notifications(monkeypatch):
+    from app.bot.utils import notificator
+
+    async def _noop(*args, **kwargs):
+        return None
+
+    for name in ("send_liked_message", "send_match_message", "send_superlike_message"):
+        monkeypatch.setattr(notificator, name, _noop)
+
+
+def _use_case(likes, **user_fields):
+    likes_service = CountingLikesService(LikesService(AppendLikesRepository(likes)))
+    users_service = FakeUsersService(**user_fields)
+    use_case = LikeActionUseCase(
+        likes_service=likes_service,
+        users_service=users_service,
+        config=SimpleNamespace(daily_likes_free=2),
+    )
+    return use_case, likes_service, users_service
+
+
+def test_likes_counter_resets_on_new_day():
+    user = SimpleNamespace(likes_today=7, likes_day="2026-01-01")
+
+    assert likes_used_today(user, "2026-01-01") == 7
+    assert likes_used_today(user, "2026-01-02") == 0
+    assert likes_used_today(SimpleNamespace()) == 0
+
+
+@pytest.mark.asyncio
+async def test_free_like_reads_sender_once_and_counts_atomically():
+    use_case, likes_service, users_service = _use_case([])
+
+    result = await use_case.execute(1, 2)
+
+    assert result.success and result.like is not None and not result.is_match
+    assert likes_service.calls == ["like"]
+    assert users_service.calls == ["get_user", "reserve_daily_like"]
+    assert users_service.fields["likes_today"] == 1
+    assert result.from_user.telegram_id == 1
+
+
+@pytest.mark.asyncio
+async def test_yesterdays_counter_does_not_block():
+    use_case, _, users_service = _use_case([], likes_today=2, likes_day="2000-01-01")
+
+    result = await use_case.execute(1, 2)
+
+    assert result.success
+    assert users_service.fields["likes_today"] == 1
+    assert users_service.consumed == []
+
+
+@pytest.mark.asyncio
+async def test_repeated_like_is_not_charged_and_reports_match():
+    use_case, _, users_service = _use_case([(1, 2), (2, 1)], likes_today=5, swipe_credits=3)
+
+    result = await use_case.execute(1, 2)
+
+    assert result.success and result.like is None and result.is_match
+    assert users_service.consumed == []
+    assert users_service.fields == {"likes_today": 5, "likes_day": likes_day(), "swipe_credits": 3}
+    assert result.to_user.telegram_id == 2
+
+
+@pytest.mark.asyncio
+async def test_like_over_daily_limit_consumes_swipe_credit():
+    use_case, _, users_service = _use_case([], likes_today=2, swipe_credits=1)
+
+    result = await use_case.execute(1, 2)
+
+    assert result.success
+    assert users_service.consumed == ["swipe_credits"]
+    assert users_service.fields["likes_today"] == 3
+
+
+@pytest.mark.asyncio
+async def test_limit_without_credits_rejects_before_writing():
+    use_case, likes_service, users_service = _use_case([], likes_today=2)
+
+    result = await use_case.execute(1, 2)
+
+    assert not result.success
+    assert likes_service.calls == []
+    assert users_service.calls == ["get_user"]
+
+
+@pytest.mark.asyncio
+async def test_superlike_is_counted_without_limit():
+    use_case, likes_service, users_service = _use_case([], likes_today=2, superlike_credits=1)
+
+    result = await use_case.execute(1, 2, is_superlike=True)
+
+    assert result.success
+    assert likes_service.calls == ["like"]
+    assert users_service.consumed == ["superlike_credits"]
+    assert users_service.fields["likes_today"] == 3
+
+
+@pytest.mark.asyncio
+async def test_superlike_spent_concurrently_is_rejected_before_writing():
+    use_case, likes_service, users_service = _use_case([], superlike_credits=1)
+
+    async def stale_profile(telegram_id: int):
+        # Анкета прочитана до того, как параллельный суперлайк списал последний кредит
+        users_service.fields["superlike_credits"] = 0
+        return SimpleNamespace(telegram_id=telegram_id, **{**users_service.fields, "superlike_credits": 1})
+
+    users_service.get_user = stale_profile
+    result = await use_case.execute(1, 2, is_superlike=True)
+
+    assert not result.success and "суперлайк" in result.error_message
+    assert likes_service.calls == []
+    assert users_service.consumed == []
+
+
+@pytest.mark.asyncio
+async def test_repeated_superlike_refunds_credit():
+    use_case, _, users_service = _use_case([(1, 2)], superlike_credits=1)
+
+    result = await use_case.execute(1, 2, is_superlike=True)
+
+    assert result.success and result.like is None
+    assert users_service.fields["superlike_credits"] == 1
+    assert users_service.consumed == []
+    assert users_service.fields["likes_today"] == 0
+
+
+@pytest.mark.asyncio
+async def test_storage_error_releases_slot_and_superlike():
+    use_case, likes_service, users_service = _use_case([], superlike_credits=1)
+
+    async def timeout(from_user_id: int, to_user_id: int):
+        raise TimeoutError("mongo timeout")
+
+    likes_service.like = timeout
+    with pytest.raises(TimeoutError):
+        await use_case.execute(1, 2, is_superlike=True)
+
+    assert users_service.fields["superlike_credits"] == 1
+    assert users_service.fields["likes_today"] == 0
+    assert users_service.consumed == []
+
+
+@pytest.mark.asyncio
+async def test_notifications_go_to_outbox_and_likes_coalesce():
+    from app.infra.repositories.memory import MemoryNotificationOutboxRepository
+
+    use_case, _, _ = _use_case([(3, 1)])
+    use_case.outbox = MemoryNotificationOutboxRepository()
+    use_case.config = SimpleNamespace(daily_likes_free=10, notify_like_coalesce_seconds=0)
+
+    await use_case.execute(1, 2)
+    await use_case.execute(1, 3)
+    await use_case.execute(4, 2)
+
+    queued = sorted((m.chat_id, m.kind, m.count) for _, m in use_case.outbox.messages.values())
+    assert queued == [(1, "match", 1), (2, "liked", 2), (3, "match", 1)]
@@ -0,0 +1,36 @@
+import pytest
+
+from app.infra.repositories.filters.likes import GetLikesFilters
+from app.logic.exceptions.pagination import InvalidCursorException
+from app.logic.services.likes import LikesService
+from app.tests.fixtures import ListLikesRepository
+
+
+async def _all_pages(service: LikesService, user_id: int, **kwargs) -> list[int]:
+    ids, cursor = [], None
+    while True:
+        page, cursor = await service.get_likes_page(
+            user_id, filters=GetLikesFilters(limit=2, cursor=cursor), **kwargs,
+        )
+        ids += page
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.asyncio
+async def test_likes_pages_cover_all_likes_once():
+    service = LikesService(like_repository=ListLikesRepository(
+        [(1, 10), (1, 11), (1, 12), (10, 1), (12, 1), (13, 1), (2, 1)],
+    ))
+
+    assert await _all_pages(service, 1) == [10, 11, 12]
+    assert await _all_pages(service, 1, incoming=True) == [10, 12, 13, 2]
+    assert await _all_pages(service, 1, mutual_only=True) == [10, 12]
+
+
+@pytest.mark.asyncio
+async def test_likes_page_rejects_foreign_cursor():
+    service = LikesService(like_repository=ListLikesRepository([]))
+
+    with pytest.raises(InvalidCursorException):
+        await service.get_likes_page(1, filters=GetLikesFilters(cursor="bm90LWpzb24"))
@@ -0,0 +1,90 @@
+import pytest
+
+from app.infra.repositories.base import BaseMatchesRepository
+from app.infra.repositories.filters.likes import GetLikesFilters
+from app.infra.repositories.mongo import _match_key
+from app.logic.exceptions.pagination import InvalidCursorException
+from app.logic.services.likes import LikesService
+from app.tests.fixtures import ListLikesRepository
+
+
+class DictMatchesRepository(BaseMatchesRepository):
+    """Мэтчи в dict по ключу пары; порядок вставки — порядок matched_at."""
+
+    def __init__(self):
+        self.matches: dict[str, int] = {}
+        self.clock = 0
+
+    async def activate(self, user_a: int, user_b: int) -> bool:
+        key, _, _ = _match_key(user_a, user_b)
+        if key in self.matches:
+            return False
+        self.clock += 1
+        self.matches[key] = self.clock
+        return True
+
+    async def deactivate(self, user_a: int, user_b: int) -> None:
+        self.matches.pop(_match_key(user_a, user_b)[0], None)
+
+    async def is_match(self, user_a: int, user_b: int) -> bool:
+        return _match_key(user_a, user_b)[0] in self.matches
+
+    async def get_matches_page(self, user_id: int, limit: int = 50, before: dict | None = None):
+        rows = sorted(
+            ((at, key) for key, at in self.matches.items() if str(user_id) in key.split(":")),
+            reverse=True,
+        )
+        if before is not None:
+            rows = [row for row in rows if row < (int(before["t"]), before["i"])]
+        page = rows[:limit]
+        ids = [next(int(uid) for uid in key.split(":") if int(uid) != user_id) for _, key in page]
+        if len(rows) <= limit:
+            return ids, None
+        return ids, {"t": page[-1][0], "i": page[-1][1]}
+
+
+def test_match_key_does_not_depend_on_order():
+    assert _match_key(20, 3) == _match_key(3, 20) == ("3:20", 3, 20)
+
+
+@pytest.mark.asyncio
+async def test_check_match_uses_matches_repository():
+    matches = DictMatchesRepository()
+    service = LikesService(
+        like_repository=ListLikesRepository([(1, 2), (2, 1)]),
+        matches_repository=matches,
+    )
+
+    # Лайки взаимные, но мэтч не записан — ответ только из matches
+    assert not await service.check_match(1, 2)
+    await matches.activate(2, 1)
+    assert await service.check_match(1, 2)
+    assert await service.check_match(2, 1)
+
+
+@pytest.mark.asyncio
+async def test_matches_pages_newest_first():
+    matches = DictMatchesRepository()
+    for other in (10, 11, 12, 13, 14):
+        await matches.activate(other, 1)
+    await matches.activate(10, 11)
+    await matches.deactivate(1, 12)
+    service = LikesService(like_repository=ListLikesRepository([]), matches_repository=matches)
+
+    ids, cursor = [], None
+    while True:
+        page, cursor = await service.get_matches_page(1, GetLikesFilters(limit=2, cursor=cursor))
+        ids += page
+        if cursor is None:
+            break
+    assert ids == [14, 13, 11, 10]
+
+    with pytest.raises(InvalidCursorException):
+        await service.get_matches_page(1, GetLikesFilters(cursor="garbage"))
+
+
+@pytest.mark.asyncio
+async def test_matches_page_without_repository_uses_mutual_likes():
+    service = LikesService(like_repository=ListLikesRepository([(1, 10), (10, 1), (1, 11)]))
+
+    assert await service.get_matches_page(1, GetLikesFilters()) == ([10], None)
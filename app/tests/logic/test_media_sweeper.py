@@ -0,0 +1,71 @@
+from datetime import (
+    datetime,
+    timedelta,
+    timezone,
+)
+
+import pytest
+
+from app.infra.s3.derivatives import variant_key
+from app.infra.s3.keys import (
+    content_hash,
+    content_key,
+)
+from app.logic.workers.media import MediaSweeperWorker
+
+
+NOW = datetime(2026, 1, 10, tzinfo=timezone.utc)
+OLD = NOW - timedelta(days=3)
+
+
+class FakeStorage:
+    def __init__(self, files: dict[str, datetime]):
+        self.files = files
+
+    async def list_files(self, prefix: str):
+        for key in sorted(self.files):
+            if key.startswith(prefix):
+                yield key, self.files[key]
+
+    async def delete_files(self, file_names: list[str]) -> int:
+        for key in file_names:
+            self.files.pop(key, None)
+        return len(file_names)
+
+
+class FakeUsersRepository:
+    def __init__(self, photos: dict[int, list[str]]):
+        self.photos = photos
+        self.queries = 0
+
+    async def get_media_keys(self, telegram_ids) -> set[str]:
+        self.queries += 1
+        return {key for telegram_id in telegram_ids for key in self.photos.get(telegram_id, [])}
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_unreferenced_media_with_derivatives():
+    kept = content_key(1, content_hash(b"kept"), "jpg")
+    replaced = content_key(1, content_hash(b"replaced"), "png")
+    fresh = content_key(1, content_hash(b"fresh"), "jpg")
+    deleted_user = content_key(2, content_hash(b"gone"), "mp4")
+    storage = FakeStorage({
+        kept: OLD,
+        variant_key(kept, "card", "webp"): OLD,
+        replaced: OLD,
+        variant_key(replaced, "card", "webp"): OLD,
+        variant_key(replaced, "thumb", "jpg"): OLD,
+        fresh: NOW - timedelta(hours=1),
+        deleted_user: OLD,
+        "uploads/abc.mp4": OLD,
+        "uploads/new.mp4": NOW,
+        "1_0.jpg": OLD,
+    })
+    repository = FakeUsersRepository({1: [kept]})
+    worker = MediaSweeperWorker(storage=storage, users_repository=repository, page_size=2)
+
+    assert await worker.sweep_once(now=NOW) == 5
+    assert sorted(storage.files) == sorted([
+        kept, variant_key(kept, "card", "webp"), fresh, "uploads/new.mp4", "1_0.jpg",
+    ])
+    assert repository.queries == 3
@@ -0,0 +1,109 @@
+import pytest
+from aiogram.exceptions import (
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from aiogram.methods import SendMessage
+
+from app.infra.rate_limit import TelegramRateLimiter
+from app.infra.repositories.memory import MemoryNotificationOutboxRepository
+from app.infra.repositories.outbox import (
+    NOTIFICATION_LIKED,
+    NOTIFICATION_MATCH,
+    OutboxMessage,
+)
+from app.logic.workers.notifications import NotificationDispatcherWorker
+
+
+def _method(chat_id: int) -> SendMessage:
+    return SendMessage(chat_id=chat_id, text="x")
+
+
+class FakeTelegram:
+    """Отдаёт заданные ошибки по chat_id, остальное «отправляет»."""
+
+    def __init__(self, errors: dict[int, list[Exception]] | None = None):
+        self.errors = errors or {}
+        self.sent: list[tuple[int, str, int]] = []
+
+    async def __call__(self, message: OutboxMessage) -> None:
+        queue = self.errors.get(message.chat_id)
+        if queue:
+            raise queue.pop(0)
+        self.sent.append((message.chat_id, message.kind, message.count))
+
+
+def _worker(outbox, telegram) -> NotificationDispatcherWorker:
+    return NotificationDispatcherWorker(
+        outbox=outbox,
+        deliver=telegram,
+        limiter=TelegramRateLimiter(global_rate=1000.0, chat_rate=1000.0),
+        backoff_base_seconds=0,
+        max_attempts=2,
+    )
+
+
+@pytest.mark.asyncio
+async def test_burst_of_likes_is_sent_as_one_message():
+    outbox = MemoryNotificationOutboxRepository()
+    for sender_id in range(5):
+        await outbox.push(OutboxMessage(1, NOTIFICATION_LIKED, {"sender_id": sender_id}))
+    await outbox.push(OutboxMessage(1, NOTIFICATION_MATCH, {"matched_id": 9}))
+    telegram = FakeTelegram()
+
+    assert await _worker(outbox, telegram).dispatch_once() == 2
+    assert sorted(telegram.sent) == [(1, NOTIFICATION_LIKED, 5), (1, NOTIFICATION_MATCH, 1)]
+    assert (await outbox.stats()).depth == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_reschedules_without_spending_attempt():
+    outbox = MemoryNotificationOutboxRepository()
+    await outbox.push(OutboxMessage(1, NOTIFICATION_MATCH, {"matched_id": 2}))
+    telegram = FakeTelegram({1: [TelegramRetryAfter(_method(1), "Too Many Requests", retry_after=30)]})
+    worker = _worker(outbox, telegram)
+
+    await worker.dispatch_once()
+
+    (_, stored), = outbox.messages.values()
+    assert stored.attempts == 0
+    assert worker.stats.rate_limited == 1
+    assert worker.limiter._chat(1).wait_time() > 25
+    assert await worker.dispatch_once() == 0
+
+
+@pytest.mark.asyncio
+async def test_blocked_recipient_and_exhausted_retries_are_dropped():
+    outbox = MemoryNotificationOutboxRepository()
+    await outbox.push(OutboxMessage(1, NOTIFICATION_MATCH, {"matched_id": 2}))
+    await outbox.push(OutboxMessage(2, NOTIFICATION_MATCH, {"matched_id": 1}))
+    telegram = FakeTelegram({
+        1: [TelegramForbiddenError(_method(1), "bot was blocked by the user")],
+        2: [RuntimeError("network"), RuntimeError("network")],
+    })
+    worker = _worker(outbox, telegram)
+
+    await worker.dispatch_once()
+    assert worker.stats.dropped == 1 and worker.stats.retried == 1
+    await worker.dispatch_once()
+
+    assert worker.stats.dropped == 2
+    assert outbox.messages == {}
+    assert telegram.sent == []
+
+
+@pytest.mark.asyncio
+async def test_retried_likes_fold_into_newer_pending_record():
+    outbox = MemoryNotificationOutboxRepository()
+    await outbox.push(OutboxMessage(1, NOTIFICATION_LIKED, {"sender_id": 2}))
+    claimed, = await outbox.claim(10, lease_seconds=60)
+    # Пока запись отправлялась, пришли ещё два лайка
+    await outbox.push(OutboxMessage(1, NOTIFICATION_LIKED, {"sender_id": 3}))
+    await outbox.push(OutboxMessage(1, NOTIFICATION_LIKED, {"sender_id": 4}))
+
+    await outbox.retry(claimed, delay_seconds=0)
+
+    (status, stored), = outbox.messages.values()
+    assert status == "pending"
+    assert stored.count == 3
+    assert stored.payload == {"sender_id": 4}
@@ -1,17 +1,67 @@
 "use client";
-import { useState } from "react";
+import { useEffect, useState } from "react";
 import { BackEnd_URL } from "@/config/url";
 
+type BroadcastJob = {
+    id: string;
+    status: "running" | "paused" | "cancelled" | "done";
+    sent: number;
+    failed: number;
+    blocked: number;
+    total: number;
+    progress: number;
+};
+
+const statusLabels: Record<BroadcastJob["status"], string> = {
+    running: "⏳ Рассылка идёт",
+    paused: "⏸ Рассылка на паузе",
+    cancelled: "✕ Рассылка отменена",
+    done: "✓ Рассылка завершена",
+};
+
+const controlButton = {
+    padding: "8px 16px", borderRadius: 8, cursor: "pointer", fontSize: 13,
+    border: "1px solid rgba(255,255,255,0.15)", background: "rgba(255,255,255,0.08)", color: "#fff",
+};
+
 export default function AdminBroadcast() {
     const [text, setText] = useState("");
     const [photoUrl, setPhotoUrl] = useState("");
     const [target, setTarget] = useState("all");
     const [sending, setSending] = useState(false);
-    const [result, setResult] = useState<{ sent: number; failed: number; total: number } | null>(null);
+    const [result, setResult] = useState<BroadcastJob | null>(null);
     const [error, setError] = useState("");
 
     const adminKey = () => localStorage.getItem("kupidon_admin_key") || "";
 
+    // Рассылка идёт в фоне — опрашиваем прогресс, пока задание активно
+    useEffect(() => {
+        if (!result || (result.status !== "running" && result.status !== "paused")) return;
+        const timer = setTimeout(async () => {
+            try {
+                const res = await fetch(`${BackEnd_URL}/api/v1/admin/broadcasts/${result.id}`, {
+                    headers: { "X-Admin-Key": adminKey() },
+                });
+                if (res.ok) setResult(await res.json());
+            } catch {
+                // Следующий опрос повторит запрос
+            }
+        }, 2000);
+        return () => clearTimeout(timer);
+    }, [result]);
+
+    const control = async (action: "pause" | "resume" | "cancel") => {
+        if (!result) return;
+        if (action === "cancel" && !confirm("Отменить рассылку?")) return;
+        const res = await fetch(`${BackEnd_URL}/api/v1/admin/broadcasts/${result.id}/${action}`, {
+            method: "POST",
+            headers: { "X-Admin-Key": adminKey() },
+        });
+        const data = await res.json();
+        if (!res.ok) { setError(data.detail || "Ошибка"); return; }
+        setResult(data);
+    };
+
     const send = async (e: React.FormEvent) => {
         e.preventDefault();
         if (!text.trim()) { setError("Введите текст сообщения"); return; }
@@ -53,15 +103,25 @@ export default function AdminBroadcast() {
 
             {result && (
                 <div style={{ background: "#065f46", borderRadius: 12, padding: 20, marginBottom: 24, border: "1px solid #10b981" }}>
-                    <div style={{ color: "#10b981", fontWeight: 700, fontSize: 16, marginBottom: 8 }}>✓ Рассылка завершена</div>
-                    <div style={{ display: "grid", gridTemplateColumns: "1fr 1fr 1fr", gap: 16 }}>
-                        {[["Отправлено", result.sent, "#10b981"], ["Ошибок", result.failed, "#f87171"], ["Всего", result.total, "#fff"]].map(([l, v, c]) => (
+                    <div style={{ color: "#10b981", fontWeight: 700, fontSize: 16, marginBottom: 8 }}>
+                        {statusLabels[result.status]} — {Math.round(result.progress * 100)}%
+                    </div>
+                    <div style={{ display: "grid", gridTemplateColumns: "1fr 1fr 1fr 1fr", gap: 16 }}>
+                        {[["Отправлено", result.sent, "#10b981"], ["Ошибок", result.failed, "#f87171"], ["Заблокировали", result.blocked, "#f59e0b"], ["Всего", result.total, "#fff"]].map(([l, v, c]) => (
                             <div key={l as string}>
                                 <div style={{ color: "rgba(255,255,255,0.5)", fontSize: 12 }}>{l}</div>
                                 <div style={{ color: c as string, fontSize: 24, fontWeight: 700 }}>{v}</div>
                             </div>
                         ))}
                     </div>
+                    {(result.status === "running" || result.status === "paused") && (
+                        <div style={{ display: "flex", gap: 8, marginTop: 16 }}>
+                            {result.status === "running"
+                                ? <button type="button" style={controlButton} onClick={() => control("pause")}>⏸ Пауза</button>
+                                : <button type="button" style={controlButton} onClick={() => control("resume")}>▶ Продолжить</button>}
+                            <button type="button" style={controlButton} onClick={() => control("cancel")}>✕ Отменить</button>
+                        </div>
+                    )}
                 </div>
             )}
 
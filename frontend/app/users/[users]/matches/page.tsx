@@ -40,6 +40,8 @@ export default function MatchesPage({ params }: { params: { users: string } }) {
     const [matches, setMatches] = useState<MatchUser[]>([]);
     const [botUsername, setBotUsername] = useState<string>("");
     const [loading, setLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [imgErrors, setImgErrors] = useState<Record<number, boolean>>({});
     const [navigating, setNavigating] = useState<number | null>(null);
     const router = useRouter();
@@ -60,9 +62,10 @@ export default function MatchesPage({ params }: { params: { users: string } }) {
                 cache: "no-store",
                 signal: ctrl.signal,
             });
-            if (!res.ok) { setMatches([]); return; }
+            if (!res.ok) { setMatches([]); setNextCursor(null); return; }
             const data = await res.json();
             setMatches(data.items ?? []);
+            setNextCursor(data.next_cursor ?? null);
             setBotUsername(typeof data.bot_username === "string" ? data.bot_username : "");
             setImgErrors({});
         } catch (e: any) {
@@ -72,6 +75,29 @@ export default function MatchesPage({ params }: { params: { users: string } }) {
         }
     }, [userId]);
 
+    // Следующая страница матчей (курсор из предыдущего ответа)
+    const loadMore = useCallback(async () => {
+        if (!nextCursor || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const res = await fetch(
+                `${BackEnd_URL}/api/v1/likes/matches/${userId}?cursor=${encodeURIComponent(nextCursor)}`,
+                { cache: "no-store" },
+            );
+            if (!res.ok) return;
+            const data = await res.json();
+            setMatches(prev => {
+                const known = new Set(prev.map(u => u.telegram_id));
+                return [...prev, ...(data.items ?? []).filter((u: MatchUser) => !known.has(u.telegram_id))];
+            });
+            setNextCursor(data.next_cursor ?? null);
+        } catch {
+            // оставляем курсор — можно нажать ещё раз
+        } finally {
+            setLoadingMore(false);
+        }
+    }, [nextCursor, loadingMore, userId]);
+
     // Первая загрузка
     useEffect(() => {
         fetchMatches();
@@ -118,7 +144,9 @@ export default function MatchesPage({ params }: { params: { users: string } }) {
                 <div>
                     <h1 className="text-lg font-bold">💌 Матчи</h1>
                     <p className="text-xs mt-0.5" style={{ color: "rgba(255,255,255,0.4)" }}>
-                        {matches.length > 0 ? `${matches.length} взаимных симпатий` : "Взаимные симпатии"}
+                        {matches.length > 0
+                            ? `${matches.length}${nextCursor ? "+" : ""} взаимных симпатий`
+                            : "Взаимные симпатии"}
                     </p>
                 </div>
                 <button
@@ -245,6 +273,16 @@ export default function MatchesPage({ params }: { params: { users: string } }) {
                             </div>
                         );
                     })}
+                    {nextCursor && (
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="mt-1 py-2.5 rounded-2xl text-sm font-medium text-white/70 transition-all active:scale-95 disabled:opacity-50"
+                            style={{ background: "rgba(255,255,255,0.06)" }}
+                        >
+                            {loadingMore ? "Загрузка..." : "Показать ещё"}
+                        </button>
+                    )}
                 </div>
             )}
 
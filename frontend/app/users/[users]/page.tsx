@@ -6,16 +6,17 @@ import { SwipeCard } from "@/components/swipe-card";
 import { BottomNav } from "@/components/bottom-nav";
 import { DailyQuestion } from "@/components/daily-question";
 
-async function fetchUsers(user_id: string) {
+async function fetchUsers(user_id: string, cursor?: string | null) {
     try {
-        const res = await fetch(`${BackEnd_URL}/api/v1/users/best_result/${user_id}`, {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+        const res = await fetch(`${BackEnd_URL}/api/v1/users/best_result/${user_id}${query}`, {
             cache: "no-store",
             headers: { "User-Agent": "Custom" },
         });
-        if (!res.ok) return [];
+        if (!res.ok) return { items: [], next_cursor: null };
         const data = await res.json();
-        return data.items || [];
-    } catch { return []; }
+        return { items: data.items || [], next_cursor: data.next_cursor || null };
+    } catch { return { items: [], next_cursor: null }; }
 }
 
 async function getDailyQuestion() {
@@ -36,6 +37,9 @@ export default function UsersPage() {
     const hasValidUserId = Boolean(userId && /^\d+$/.test(userId));
     const [users, setUsers] = useState<any[]>([]);
     const [currentIndex, setCurrentIndex] = useState(0);
+    // Курсор следующей страницы ленты (null — анкеты закончились)
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [dailyQuestion, setDailyQuestion] = useState<any>(null);
     const [showQuestion, setShowQuestion] = useState(false);
     const [loading, setLoading] = useState(true);
@@ -45,19 +49,21 @@ export default function UsersPage() {
     const loadUsers = useCallback(async () => {
         if (!userId) {
             setUsers([]);
+            setNextCursor(null);
             setCurrentIndex(0);
             setDailyQuestion(null);
             setLoading(false);
             return;
         }
         setLoading(true);
-        const [items, question] = await Promise.all([
+        const [page, question] = await Promise.all([
             fetchUsers(userId),
             getDailyQuestion(),
         ]);
         // Фильтруем только тех кого лайкнули/дизлайкнули В ЭТОЙ сессии
-        const fresh = items.filter((u: any) => !seenIds.has(u.telegram_id));
+        const fresh = page.items.filter((u: any) => !seenIds.has(u.telegram_id));
         setUsers(fresh);
+        setNextCursor(page.next_cursor);
         setCurrentIndex(0);
         setDailyQuestion(question);
         setLoading(false);
@@ -67,6 +73,19 @@ export default function UsersPage() {
         loadUsers();
     }, [loadUsers]);
 
+    // Догружаем следующую страницу, когда до конца текущей осталось несколько анкет
+    useEffect(() => {
+        if (!userId || !nextCursor || loadingMore) return;
+        if (users.length - currentIndex > 3) return;
+        setLoadingMore(true);
+        fetchUsers(userId, nextCursor).then((page) => {
+            const fresh = page.items.filter((u: any) => !seenIds.has(u.telegram_id));
+            setUsers((prev) => [...prev, ...fresh]);
+            setNextCursor(page.next_cursor);
+            setLoadingMore(false);
+        });
+    }, [userId, users.length, currentIndex, nextCursor, loadingMore, seenIds]);
+
     // Пинг: обновляем last_seen при открытии и каждые 60 секунд
     useEffect(() => {
         if (!userId) return;
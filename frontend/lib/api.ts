@@ -74,8 +74,11 @@ export async function meDislike(toUserId: number): Promise<void> {
   if (!res.ok) throw new Error("Ошибка дизлайка");
 }
 
-export async function meMatches(): Promise<{ items: any[]; bot_username?: string }> {
-  const res = await fetch(apiUrl("/me/matches"), { credentials: "include" });
+export async function meMatches(
+  cursor?: string | null,
+): Promise<{ items: any[]; bot_username?: string; next_cursor?: string | null }> {
+  const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+  const res = await fetch(apiUrl(`/me/matches${query}`), { credentials: "include" });
   if (!res.ok) return { items: [] };
   return res.json();
 }